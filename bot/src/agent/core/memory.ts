@@ -94,7 +94,8 @@ export class Memory {
   }
 
   // Event memory management
-  async createEvent(eventType: EventType, data: Data<typeof eventType>, severity: number = 0): Promise<string | null> {
+  // Severity is scored by the storage service when omitted
+  async createEvent(eventType: EventType, data: Data<typeof eventType>, severity?: number): Promise<string | null> {
     try {
       const botId =
         this.agentMemory.data.username ||
@@ -112,7 +113,7 @@ export class Memory {
           event_type: eventType,
           data: data,
           botId: botId,
-          severity: severity,
+          ...(severity !== undefined && { severity: severity }),
         }),
       });
 
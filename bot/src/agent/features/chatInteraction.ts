@@ -7,6 +7,7 @@ import {
   getInventoryItems,
   getNearbyBots,
   getCurrentActivity,
+  diffState,
 } from "../utils";
 import type { Memory } from "../core/memory";
 
@@ -17,6 +18,16 @@ export interface InteractionState {
   lookTimeout: NodeJS.Timeout | null;
 }
 
+export interface ChatEngagement {
+  isNearby: boolean;
+  isLooking: boolean;
+}
+
+interface ChatReply {
+  response: string | null;
+  status?: string;
+}
+
 export class InteractionManager {
   private bot: MineflayerBot;
   private subPort: number;
@@ -24,6 +35,9 @@ export class InteractionManager {
   private state: InteractionState;
   private lookDuration = 10000; // 10 seconds
   private interactionCooldown = 5000; // 5 seconds between responses
+  // Bot state last sent to the logic server, which keeps it so chats only carry changes
+  private stateVersion = 0;
+  private sentState: Record<string, any> | null = null;
 
   constructor(bot: MineflayerBot, memory: Memory, subPort: number) {
     this.bot = bot;
@@ -72,7 +86,7 @@ export class InteractionManager {
     } else {
       // For regular chat, check if player is nearby and looking at the bot
       if (isNearby && isLooking) {
-        await this.respondToPlayer(username, message);
+        await this.respondToPlayer(username, message, { isNearby, isLooking });
         this.startLookingAtPlayer(username);
       }
     }
@@ -138,7 +152,7 @@ export class InteractionManager {
   }
 
   // Conversation
-  private async respondToPlayer(username: string, message: string): Promise<void> {
+  private async respondToPlayer(username: string, message: string, engagement?: ChatEngagement): Promise<void> {
     const now = Date.now();
 
     // Check cooldown
@@ -148,7 +162,7 @@ export class InteractionManager {
     }
 
     // Generate response
-    const response = await this.generateResponse(username, message);
+    const response = await this.generateResponse(username, message, engagement);
 
     if (response) {
       this.bot.chat(response);
@@ -167,13 +181,15 @@ export class InteractionManager {
     }
   }
 
-  private async getAIResponse(username: string, message: string): Promise<string | null> {
+  private async getAIResponse(username: string, message: string, engagement?: ChatEngagement): Promise<string | null> {
     try {
-      const port = 4000 + Number(this.subPort || 1);
-      const botLogicUrl = `${process.env.BOT_LOGIC_HOST}:${port || process.env.BOT_LOGIC_PORT}` || "http://localhost:4001";
+      // A shared logic server hosts every bot on BOT_LOGIC_PORT, otherwise each bot has its own on 4000 + subPort
+      const shared = process.env.BOT_LOGIC_SHARED === "true";
+      const port = shared ? Number(process.env.BOT_LOGIC_PORT || 4001) : 4000 + Number(this.subPort || 1);
+      const botLogicUrl = `${process.env.BOT_LOGIC_HOST || "http://localhost"}:${port}`;
 
-      // Get bot context for the AI
-      const context = {
+      // Get bot state for the AI
+      const state = {
         health: this.bot.health,
         food: this.bot.food,
         position: {
@@ -184,39 +200,81 @@ export class InteractionManager {
         inventory: getInventoryItems(this.bot),
         nearbyPlayers: getNearbyPlayers(this.bot),
         currentActivity: getCurrentActivity(this.bot, this.state),
-        // memory: this.memory.getRecentChat(5),
       };
 
-      const response = await fetch(`${botLogicUrl}/chat`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          message: message,
-          context: context,
-          player_username: username,
-          bot_username: this.bot.username,
-        }),
-      });
-
-      if (response.ok) {
-        const data = (await response.json()) as { response: string };
-        return data.response;
-      } else {
-        logger.warn(`Bot logic service returned ${response.status}`);
+      let data = await this.postChat(botLogicUrl, username, message, this.stateUpdate(state), engagement);
+      if (data?.status === "state_conflict") {
+        // The logic server lost or never got our last update (e.g. it restarted), resend in full
+        this.sentState = null;
+        data = await this.postChat(botLogicUrl, username, message, this.stateUpdate(state), engagement);
+      }
+      if (!data) {
         return null;
       }
+      if (data.status && data.status !== "ok") {
+        // Superseded by a newer message or dropped as stale by the logic scheduler
+        logger.debug(`Chat for ${username} not answered: ${data.status}`);
+        return "";
+      }
+      return data.response ?? null;
     } catch (error) {
       logger.warn("Failed to get AI response:", error);
       return null;
     }
   }
 
-  private async generateResponse(username: string, message: string): Promise<string | null> {
-    // Try to get AI response first
-    const aiResponse = await this.getAIResponse(username, message);
-    if (aiResponse) {
+  /**
+   * Versioned state update: a full snapshot the first time (or after a conflict),
+   * then only the fields that changed since the last one sent.
+   */
+  private stateUpdate(state: Record<string, any>): Record<string, any> {
+    if (this.sentState === null) {
+      this.sentState = state;
+      this.stateVersion += 1;
+      return { version: this.stateVersion, snapshot: state };
+    }
+    const patch = diffState(this.sentState, state);
+    this.sentState = state;
+    if (Object.keys(patch).length === 0) {
+      return { version: this.stateVersion };
+    }
+    this.stateVersion += 1;
+    return { version: this.stateVersion, base_version: this.stateVersion - 1, patch };
+  }
+
+  private async postChat(
+    botLogicUrl: string,
+    username: string,
+    message: string,
+    state: Record<string, any>,
+    engagement?: ChatEngagement,
+  ): Promise<ChatReply | null> {
+    const response = await fetch(`${botLogicUrl}/bots/${encodeURIComponent(this.bot.username)}/chat`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({
+        message: message,
+        state: state,
+        player_username: username,
+        bot_username: this.bot.username,
+        isNearby: engagement?.isNearby ?? false,
+        isLooking: engagement?.isLooking ?? false,
+      }),
+    });
+
+    if (!response.ok) {
+      logger.warn(`Bot logic service returned ${response.status}`);
+      return null;
+    }
+    return (await response.json()) as ChatReply;
+  }
+
+  private async generateResponse(username: string, message: string, engagement?: ChatEngagement): Promise<string | null> {
+    // Try to get AI response first (empty means the logic service chose not to answer)
+    const aiResponse = await this.getAIResponse(username, message, engagement);
+    if (aiResponse !== null) {
       return aiResponse;
     }
 
@@ -248,3 +248,24 @@ export function getCurrentActivity(bot: any, state: any): string {
   return "idle";
 }
 
+/**
+ * JSON merge patch (RFC 7396) that turns `previous` into `next`: changed
+ * keys only, nested objects diffed key by key, removed keys set to null.
+ */
+export function diffState(previous: Record<string, any>, next: Record<string, any>): Record<string, any> {
+  const patch: Record<string, any> = {};
+  for (const [key, value] of Object.entries(next)) {
+    const old = previous[key];
+    const isObject = (v: any) => v !== null && typeof v === "object" && !Array.isArray(v);
+    if (isObject(value) && isObject(old)) {
+      const nested = diffState(old, value);
+      if (Object.keys(nested).length > 0) patch[key] = nested;
+    } else if (!(key in previous) || JSON.stringify(old) !== JSON.stringify(value)) {
+      patch[key] = value;
+    }
+  }
+  for (const key of Object.keys(previous)) {
+    if (!(key in next)) patch[key] = null;
+  }
+  return patch;
+}
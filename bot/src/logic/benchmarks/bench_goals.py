@@ -0,0 +1,178 @@
+"""
+Goal Benchmark - Goal scheduling with thousands of concurrent goals across many bots
+
+Gives every bot a GoalManager with goals whose milestones form
+random dependency graphs, then replays a stream of operations (read the
+next goal and its ready milestones, complete a ready milestone,
+reprioritize, add a goal). The baseline keeps plain goal lists and finds
+the next goal and ready milestones by scanning, which is what the empty
+goal manager left to callers. Both must pick the same goal every time.
+
+Goal storage is benchmarked by storage-service/benchmarks/bench_goals.py.
+
+Run from bot/src/logic:
+    python -m benchmarks.bench_goals
+    python -m benchmarks.bench_goals --bots 500 --goals 40 --ops 200000
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from subordinates.goal_manager import GoalManager, PRIORITY_RANK
+
+PRIORITIES = list(PRIORITY_RANK)
+
+def make_goal(rng: random.Random, bot: int, index: int, milestones: int) -> Dict[str, Any]:
+    goal_id = f"goal_{bot}_{index}"
+    steps = []
+    for m in range(milestones):
+        # Each milestone depends on up to two earlier ones, so the graph stays acyclic
+        depends = rng.sample(range(m), min(m, rng.choice([0, 1, 1, 2])))
+        steps.append({"id": f"{goal_id}_m{m}", "name": f"step {m}",
+                      "dependsOn": [f"{goal_id}_m{d}" for d in depends]})
+    return {"id": goal_id, "name": f"goal {index}", "priority": rng.choice(PRIORITIES),
+            "status": "pending", "createdAt": 1700000000000 + index, "milestones": steps}
+
+class ScanBaseline:
+    """Plain goal lists, scanned on every read"""
+
+    def __init__(self):
+        self.goals: Dict[str, Dict[str, Any]] = {}
+        self.order: Dict[str, int] = {}
+
+    def add(self, goal: Dict[str, Any]) -> None:
+        goal = json.loads(json.dumps(goal))
+        self.goals[goal["id"]] = goal
+        self.order[goal["id"]] = len(self.order)
+
+    def next_goal(self):
+        open_goals = [g for g in self.goals.values() if g["status"] in ("active", "pending")]
+        if not open_goals:
+            return None
+        return min(open_goals, key=lambda g: (PRIORITY_RANK[g["priority"]], g["createdAt"], self.order[g["id"]]))
+
+    def ready(self, goal: Dict[str, Any]) -> List[Dict[str, Any]]:
+        done = {m["id"] for m in goal["milestones"] if m.get("status") == "completed"}
+        return [m for m in goal["milestones"]
+                if m.get("status") != "completed" and all(d in done for d in m["dependsOn"])]
+
+    def complete(self, goal_id: str, milestone_id: str) -> None:
+        goal = self.goals[goal_id]
+        for milestone in goal["milestones"]:
+            if milestone["id"] == milestone_id:
+                milestone["status"] = "completed"
+        goal["status"] = "active"
+        if all(m.get("status") == "completed" for m in goal["milestones"]):
+            goal["status"] = "completed"
+
+def run_engine(bots: int, goals: int, milestones: int, ops: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    managers = [GoalManager(f"bot_{b}") for b in range(bots)]
+    baselines = [ScanBaseline() for _ in range(bots)]
+    next_index = [goals] * bots
+    for b in range(bots):
+        for g in range(goals):
+            goal = make_goal(rng, b, g, milestones)
+            baselines[b].add(goal)
+            managers[b].add_goal(goal)
+
+    # One operation stream, replayed against both
+    stream = []
+    for _ in range(ops):
+        roll = rng.random()
+        kind = "next" if roll < 0.4 else "complete" if roll < 0.7 else "priority" if roll < 0.9 else "add"
+        stream.append((kind, rng.randrange(bots), rng.random(), rng.choice(PRIORITIES)))
+
+    timings = {side: {kind: 0.0 for kind in ("next", "complete", "priority", "add")} for side in ("engine", "scan")}
+    counts = {kind: 0 for kind in ("next", "complete", "priority", "add")}
+    mismatches = 0
+    for kind, b, pick, priority in stream:
+        manager, baseline = managers[b], baselines[b]
+        counts[kind] += 1
+        if kind == "add":
+            goal = make_goal(rng, b, next_index[b], milestones)
+            next_index[b] += 1
+            started = time.perf_counter()
+            manager.add_goal(goal)
+            timings["engine"]["add"] += time.perf_counter() - started
+            started = time.perf_counter()
+            baseline.add(goal)
+            timings["scan"]["add"] += time.perf_counter() - started
+            continue
+
+        started = time.perf_counter()
+        goal = manager.next_goal()
+        ready = manager.ready_milestones(goal["id"]) if goal else []
+        timings["engine"]["next"] += time.perf_counter() - started
+        started = time.perf_counter()
+        expected = baseline.next_goal()
+        expected_ready = baseline.ready(expected) if expected else []
+        timings["scan"]["next"] += time.perf_counter() - started
+        if (goal and goal["id"]) != (expected and expected["id"]) or \
+                sorted(m["id"] for m in ready) != sorted(m["id"] for m in expected_ready):
+            mismatches += 1
+        if goal is None:
+            continue
+
+        if kind == "complete" and ready:
+            milestone_id = ready[int(pick * len(ready))]["id"]
+            started = time.perf_counter()
+            manager.complete_milestone(goal["id"], milestone_id)
+            timings["engine"]["complete"] += time.perf_counter() - started
+            started = time.perf_counter()
+            baseline.complete(goal["id"], milestone_id)
+            timings["scan"]["complete"] += time.perf_counter() - started
+        elif kind == "priority":
+            # Reprioritize a random open goal of the bot, not only the top one
+            open_ids = [g["id"] for g in baseline.goals.values() if g["status"] in ("active", "pending")]
+            target = open_ids[int(pick * len(open_ids))]
+            started = time.perf_counter()
+            manager.set_priority(target, priority)
+            timings["engine"]["priority"] += time.perf_counter() - started
+            started = time.perf_counter()
+            baseline.goals[target]["priority"] = priority
+            timings["scan"]["priority"] += time.perf_counter() - started
+
+    open_goals = sum(len(manager.open_goals()) for manager in managers)
+    return {
+        "bots": bots,
+        "goals": bots * goals,
+        "open_goals_after": open_goals,
+        "ops": ops,
+        # Reads and completions also count the next-goal lookup they start with
+        "engine_us": {kind: round(timings["engine"][kind] * 1e6 / max(counts[kind], 1), 2) for kind in counts},
+        "scan_us": {kind: round(timings["scan"][kind] * 1e6 / max(counts[kind], 1), 2) for kind in counts},
+        "mismatches": mismatches
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=200)
+    parser.add_argument("--goals", type=int, default=25, help="Goals per bot")
+    parser.add_argument("--milestones", type=int, default=8, help="Milestones per goal")
+    parser.add_argument("--ops", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    engine = run_engine(args.bots, args.goals, args.milestones, args.ops, args.seed)
+    if args.json:
+        print(json.dumps(engine, indent=2))
+    else:
+        print(f"{engine['goals']} goals across {engine['bots']} bots, {engine['ops']} operations "
+              f"({engine['open_goals_after']} still open)")
+        for name in ("engine", "scan"):
+            row = engine[f"{name}_us"]
+            print(f"{name:8} " + "  ".join(f"{kind}={row[kind]:8.2f}us" for kind in row))
+        print(f"mismatches: {engine['mismatches']}")
+    if engine["mismatches"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+HTTP Client Benchmark - Per-call latency of a fresh client per call vs the shared pool
+
+Run from bot/src/logic:
+    python -m benchmarks.bench_http_client [calls]
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from clients import ServiceClient
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Minimal keep-alive endpoint that mimics GET /api/v1/events/"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = json.dumps({"events": [], "count": 0}).encode()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+def _summary(label: str, samples: List[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return (f"{label:<28} mean={statistics.mean(samples):7.3f}ms "
+            f"p50={statistics.median(samples):7.3f}ms p95={p95:7.3f}ms")
+
+async def _measure(call: Callable[[], Awaitable[None]], calls: int) -> List[float]:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def run(calls: int) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    async def per_call_client():
+        # Previous behaviour: a new session (and TCP connection) for every call
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            (await client.get("/events/")).json()
+
+    pooled = ServiceClient("bench", base_url)
+    await pooled.start()
+
+    async def pooled_client():
+        (await pooled.get("/events/")).json()
+
+    try:
+        await per_call_client()
+        await pooled_client()
+        before = await _measure(per_call_client, calls)
+        after = await _measure(pooled_client, calls)
+    finally:
+        await pooled.close()
+        server.shutdown()
+
+    print(f"{calls} sequential GET calls against {base_url}")
+    print(_summary("before (client per call)", before))
+    print(_summary("after (shared pool)", after))
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,121 @@
+"""
+Multi-tenant Benchmark - Per-bot RAM and cold start, one process per bot vs one shared server
+
+Linux only (reads /proc). Run from bot/src/logic:
+    python -m benchmarks.bench_multitenant [bots]
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+def _tree_rss_mb(pid: int) -> float:
+    """Resident memory of a process and all of its descendants"""
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+        stack.extend(_children(current))
+    return total_kb / 1024
+
+def _start(port: int, reload: bool) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "--factory", "main:create_app", "--host", "127.0.0.1",
+           "--port", str(port), "--log-level", "warning"]
+    if reload:
+        cmd.append("--reload")
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def _wait_ready(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"Server on port {port} did not become ready")
+
+def _stop(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def per_bot_processes(bots: int):
+    """Previous model: one `uvicorn --reload` process per bot"""
+    ports = [_free_port() for _ in range(bots)]
+    start = time.perf_counter()
+    processes = [_start(port, reload=True) for port in ports]
+    try:
+        for port in ports:
+            _wait_ready(port)
+        cold_start = time.perf_counter() - start
+        rss = sum(_tree_rss_mb(process.pid) for process in processes)
+    finally:
+        _stop(processes)
+    return cold_start, rss
+
+def shared_server(bots: int):
+    """New model: one production server hosting every bot"""
+    port = _free_port()
+    start = time.perf_counter()
+    process = _start(port, reload=False)
+    try:
+        _wait_ready(port)
+        for i in range(bots):
+            httpx.post(f"http://127.0.0.1:{port}/bots/bench_bot_{i}").raise_for_status()
+        cold_start = time.perf_counter() - start
+        rss = _tree_rss_mb(process.pid)
+    finally:
+        _stop([process])
+    return cold_start, rss
+
+def main() -> None:
+    bots = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    old_start, old_rss = per_bot_processes(bots)
+    new_start, new_rss = shared_server(bots)
+
+    print(f"{bots} bots")
+    print(f"{'model':<24} {'cold start':>12} {'total RSS':>12} {'RSS per bot':>12}")
+    print(f"{'process per bot':<24} {old_start:>11.2f}s {old_rss:>10.1f}MB {old_rss / bots:>10.1f}MB")
+    print(f"{'shared server':<24} {new_start:>11.2f}s {new_rss:>10.1f}MB {new_rss / bots:>10.1f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Startup Benchmark - Import time and time to first request for the three services
+
+Each run starts from a fresh interpreter. Import time is how long importing
+the service's entry module takes; the server columns come from launching
+`uvicorn --factory <module>:create_app` on a free port and timing /health
+becoming ready, then one representative request. The governor runs on the
+fake LLM backend with no added latency, so its first chat measures service
+overhead only. Storage needs Redis for its first request to succeed; without
+one the request still runs and the status code shows it failed.
+
+Run from bot/src/logic:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --service governor --json
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+
+# name: (working directory, entry module, first request (method, path, json body))
+SERVICES = {
+    "storage-service": (os.path.join(ROOT, "storage-service"), "src.main",
+                        ("GET", "/api/v1/events/?count=1", None)),
+    "governor": (os.path.join(ROOT, "governor"), "app.main",
+                 ("POST", "/chat", {"message": "Hello there", "context": {}})),
+    "bot-logic": (os.path.join(ROOT, "bot", "src", "logic"), "main",
+                  ("GET", "/status", None)),
+}
+
+ENV = {"LLM_BACKEND": "fake", "FAKE_LLM_LATENCY_MS": "0", "FAKE_LLM_TOKENS_PER_SECOND": "1000000",
+       "PREFETCH_ENABLED": "false"}
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _env() -> Dict[str, str]:
+    return {**os.environ, **ENV}
+
+def import_time(service: str) -> float:
+    """Seconds to import the service's entry module in a fresh interpreter"""
+    cwd, module, _ = SERVICES[service]
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=_env(), check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def server_start(service: str, timeout: float = 60.0) -> Dict[str, Any]:
+    """Seconds from launching uvicorn to /health answering, then the first request"""
+    cwd, module, (method, path, body) = SERVICES[service]
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", f"{module}:create_app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=base, timeout=30.0) as client:
+            deadline = started + timeout
+            while True:
+                try:
+                    if client.get("/health", timeout=0.5).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.perf_counter() > deadline or process.poll() is not None:
+                    raise RuntimeError(f"{service} did not become ready")
+                time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            request_started = time.perf_counter()
+            response = client.request(method, path, json=body)
+            first = time.perf_counter() - request_started
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {"ready": ready, "first_request": first, "status": response.status_code}
+
+def measure(service: str, runs: int) -> Dict[str, Any]:
+    imports = [import_time(service) for _ in range(runs)]
+    starts = [server_start(service) for _ in range(runs)]
+    _, _, (method, path, _) = SERVICES[service]
+    return {
+        "service": service,
+        "runs": runs,
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "ready_ms": round(statistics.median(s["ready"] for s in starts) * 1000, 1),
+        "first_request": f"{method} {path}",
+        "first_request_ms": round(statistics.median(s["first_request"] for s in starts) * 1000, 1),
+        "first_request_status": starts[-1]["status"]
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement (median reported)")
+    parser.add_argument("--service", choices=sorted(SERVICES), action="append",
+                        help="Service to measure (repeatable, default all)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [measure(service, args.runs) for service in args.service or SERVICES]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"median of {args.runs} runs")
+    print(f"{'service':<16} {'import':>9} {'ready':>9} {'first req':>10}  request")
+    for row in results:
+        print(f"{row['service']:<16} {row['import_ms']:>7.0f}ms {row['ready_ms']:>7.0f}ms "
+              f"{row['first_request_ms']:>8.1f}ms  {row['first_request']} -> {row['first_request_status']}")
+
+if __name__ == "__main__":
+    main()
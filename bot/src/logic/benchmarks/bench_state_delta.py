@@ -0,0 +1,158 @@
+"""
+State Delta Benchmark - Chat request bytes and serialization time, full context vs versioned patches
+
+Simulates a bot chatting while its state drifts between messages (it moves,
+eats, mines a few items, players come and go) and builds each chat request
+both ways: with the full state in "context", as agents used to send it,
+and with a versioned patch of the changed fields applied to the logic
+server's BotState. Times cover the agent side (diff + encode) and the
+server side (decode + apply). The held state must equal the agent's after
+every request.
+
+Run from bot/src/logic:
+    python -m benchmarks.bench_state_delta
+    python -m benchmarks.bench_state_delta --chats 20000 --items 60
+"""
+
+import argparse
+import copy
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from context.bot_state import BotState, diff_state
+
+ITEMS = ["oak_log", "oak_planks", "stick", "cobblestone", "dirt", "torch", "coal", "iron_ore", "iron_ingot",
+         "bread", "cooked_beef", "wheat_seeds", "crafting_table", "furnace", "stone_pickaxe", "iron_pickaxe",
+         "stone_axe", "iron_sword", "shield", "bucket", "water_bucket", "gravel", "sand", "glass", "flint",
+         "string", "bone", "arrow", "bow", "leather", "feather", "gold_ingot", "redstone", "lapis_lazuli",
+         "diamond", "emerald", "obsidian", "andesite", "diorite", "granite"]
+
+def initial_state(rng: random.Random, items: int, players: int) -> Dict[str, Any]:
+    names = [ITEMS[i % len(ITEMS)] + ("" if i < len(ITEMS) else f"_{i}") for i in range(items)]
+    return {
+        "health": 20,
+        "food": 20,
+        "position": {"x": rng.uniform(-500, 500), "y": 64.0, "z": rng.uniform(-500, 500)},
+        "inventory": {name: rng.randint(1, 64) for name in names},
+        "nearbyPlayers": [f"player_{i}" for i in range(players)],
+        "currentActivity": "idle"
+    }
+
+def drift(rng: random.Random, state: Dict[str, Any]) -> Dict[str, Any]:
+    state = copy.deepcopy(state)
+    if rng.random() < 0.6:
+        state["position"]["x"] += rng.uniform(-4, 4)
+        state["position"]["z"] += rng.uniform(-4, 4)
+    if rng.random() < 0.1:
+        state["position"]["y"] += rng.choice([-1.0, 1.0])
+    if rng.random() < 0.15:
+        state["health"] = max(1, min(20, state["health"] + rng.choice([-2, -1, 1, 2])))
+    if rng.random() < 0.1:
+        state["food"] = max(0, min(20, state["food"] + rng.choice([-1, 1])))
+    inventory = state["inventory"]
+    for _ in range(rng.choice([0, 0, 1, 1, 2])):
+        name = rng.choice(list(inventory)) if inventory else rng.choice(ITEMS)
+        count = inventory.get(name, 0) + rng.choice([-3, -1, 1, 2, 4])
+        if count > 0:
+            inventory[name] = count
+        else:
+            inventory.pop(name, None)
+    if rng.random() < 0.05:
+        players = state["nearbyPlayers"]
+        if players and rng.random() < 0.5:
+            players.remove(rng.choice(players))
+        else:
+            players.append(f"player_{rng.randrange(1000)}")
+    state["currentActivity"] = rng.choice(["idle", "idle", "moving", "looking_at_player"])
+    return state
+
+def run(chats: int, items: int, players: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    states: List[Dict[str, Any]] = [initial_state(rng, items, players)]
+    for _ in range(chats - 1):
+        states.append(drift(rng, states[-1]))
+
+    def request(**fields: Any) -> Dict[str, Any]:
+        return {"message": "what are you up to?", "player_username": "Steve", "bot_username": "Bot",
+                "isNearby": True, "isLooking": False, **fields}
+
+    # Full context on every request
+    full_bytes, full_encode_us, full_decode_us = [], [], []
+    for state in states:
+        started = time.perf_counter()
+        body = json.dumps(request(context=state))
+        encoded = time.perf_counter()
+        json.loads(body)["context"]
+        full_encode_us.append((encoded - started) * 1e6)
+        full_decode_us.append((time.perf_counter() - encoded) * 1e6)
+        full_bytes.append(len(body.encode()))
+
+    # Versioned patches against the server's held state
+    server = BotState()
+    sent, version = None, 0
+    delta_bytes, delta_encode_us, delta_decode_us, mismatches = [], [], [], 0
+    for state in states:
+        started = time.perf_counter()
+        if sent is None:
+            version += 1
+            update = {"version": version, "snapshot": state}
+        else:
+            patch = diff_state(sent, state)
+            if patch:
+                version += 1
+                update = {"version": version, "base_version": version - 1, "patch": patch}
+            else:
+                update = {"version": version}
+        sent = state
+        body = json.dumps(request(state=update))
+        encoded = time.perf_counter()
+        server.update(json.loads(body)["state"])
+        delta_encode_us.append((encoded - started) * 1e6)
+        delta_decode_us.append((time.perf_counter() - encoded) * 1e6)
+        delta_bytes.append(len(body.encode()))
+        if server.snapshot() != state:
+            mismatches += 1
+
+    def summary(values: List[float]) -> Dict[str, float]:
+        return {"mean": round(statistics.mean(values), 2), "p50": round(statistics.median(values), 2)}
+
+    return {
+        "chats": chats,
+        "inventory_items": items,
+        "full": {"bytes": summary(full_bytes), "encode_us": summary(full_encode_us),
+                 "decode_us": summary(full_decode_us)},
+        "delta": {"bytes": summary(delta_bytes), "encode_us": summary(delta_encode_us),
+                  "decode_us": summary(delta_decode_us)},
+        "bytes_saved_pct": round(100 * (1 - sum(delta_bytes) / sum(full_bytes)), 1),
+        "mismatches": mismatches
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=30, help="Distinct inventory items")
+    parser.add_argument("--players", type=int, default=5, help="Nearby players")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.chats, args.items, args.players, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['chats']} chats, {report['inventory_items']} inventory items")
+        for name in ("full", "delta"):
+            row = report[name]
+            print(f"{name:6} bytes mean={row['bytes']['mean']:8.1f}  "
+                  f"encode mean={row['encode_us']['mean']:7.2f}us  decode mean={row['decode_us']['mean']:7.2f}us")
+        print(f"bytes saved: {report['bytes_saved_pct']}%")
+        print(f"mismatches: {report['mismatches']}")
+    if report["mismatches"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""
+Swarm Simulator - Storage, bot logic and governor in one process under simulated bot traffic
+
+The three services run in-process and talk over ASGI transports, with the
+governor on the fake LLM backend and Redis replaced by fakeredis (or a real
+local Redis via --redis-url; point it at a scratch database). Each simulated
+bot behaves like a Mineflayer agent: bursts of bot_action events, periodic
+get_events polls and chats to bot logic, which are then recorded as
+chat_message events. Scenarios add chat storms where a share of the swarm
+is spoken to at once. Traffic is open-loop, so queueing shows up as latency.
+
+The report gives throughput and tail latency per endpoint. With --check the
+run fails (exit code 1) when an endpoint regresses against the stored
+baseline for the scenario; --update-baseline records the current run.
+The scenario runs --runs times and every figure reported (and stored as a
+baseline) is the median across runs: near saturation one run's p95 can be
+twice the next one's. Only endpoints with at least --min-samples requests
+in both the run and the baseline have their latency and throughput
+compared, and on p50/p95 rather than p99, which is just the slowest few
+requests. The storm scenarios see only a few dozen one-to-one chats, so
+the chat scenario is the one that gates chat latency.
+Everything shares one event loop, so the loop lag line tells whether the
+simulator itself was saturated.
+
+Run from bot/src/logic:
+    python -m benchmarks.swarm --scenario smoke
+    python -m benchmarks.swarm --scenario swarm --check
+    python -m benchmarks.swarm --scenario chat --check
+    python -m benchmarks.swarm --scenario chat_storm --update-baseline
+    python -m benchmarks.swarm --bots 400 --duration 60 --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "swarm.json")
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    # Quick check of every path
+    "smoke": {"bots": 20, "duration": 10.0, "action_rate": 0.5, "burst": (1, 6), "poll_interval": 2.0,
+              "chat_rate": 0.05, "storm_interval": 0.0, "storm_fraction": 0.0},
+    # A busy server: steady actions and polls with an occasional chat storm. It runs at the
+    # simulator's saturation point, where latency swings several-fold between identical runs
+    # (poll p50 60-500ms), so --check gates it on throughput and errors only
+    "swarm": {"bots": 200, "duration": 30.0, "action_rate": 0.3, "burst": (1, 6), "poll_interval": 3.0,
+              "chat_rate": 0.01, "storm_interval": 10.0, "storm_fraction": 0.25, "compare_latency": False},
+    # Steady one-to-one chat below the fake LLM's capacity, long enough (about 180 chats a run)
+    # for the chat endpoint to reach --min-samples. Only its latency is gated: the storage
+    # endpoints answer in a few ms here and their p95 is event loop jitter
+    "chat": {"bots": 100, "duration": 60.0, "action_rate": 0.1, "burst": (1, 3), "poll_interval": 3.0,
+             "chat_rate": 0.03, "storm_interval": 0.0, "storm_fraction": 0.0,
+             "latency_endpoints": ["POST /bots/{bot}/chat"]},
+    # Players talking to most of the swarm at once, every few seconds
+    "chat_storm": {"bots": 200, "duration": 30.0, "action_rate": 0.1, "burst": (1, 3), "poll_interval": 3.0,
+                   "chat_rate": 0.01, "storm_interval": 10.0, "storm_fraction": 0.5},
+}
+
+ACTIONS = ["dig", "place_block", "move_to", "attack", "craft", "eat", "equip", "follow"]
+BLOCKS = ["stone", "oak_log", "iron_ore", "dirt", "cobblestone", "diamond_ore"]
+PLAYERS = ["Steve", "Alex", "Notch", "Jeb", "Dinnerbone"]
+CHATS = [
+    "hey what's up",
+    "where can I find diamonds?",
+    "come here",
+    "how do i make a nether portal?",
+    "nice castle!",
+    "what are you doing?",
+]
+STORM_CHATS = ["hey everyone!", "who wants to go mining?", "everyone come to spawn"]
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))]
+
+class Recorder:
+    """Latency samples and error counts per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.failed: Dict[str, int] = {}  # Transport errors (no response at all)
+        self.errors: Dict[str, int] = {}  # Transport errors and 4xx/5xx responses
+        self.chat_statuses: Dict[str, int] = {}
+
+    async def call(self, endpoint: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.failed[endpoint] = self.failed.get(endpoint, 0) + 1
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            return None
+        self.latencies.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return response
+
+    def report(self, duration: float) -> Dict[str, Dict[str, float]]:
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.failed)):
+            values = sorted(self.latencies.get(endpoint, []))
+            count = len(values) + self.failed.get(endpoint, 0)
+            errors = self.errors.get(endpoint, 0)
+            endpoints[endpoint] = {
+                "count": count,
+                "errors": errors,
+                "error_rate": round(errors / count, 4),
+                "throughput": round((count - errors) / duration, 2),
+                "p50_ms": round(_percentile(values, 50), 2),
+                "p95_ms": round(_percentile(values, 95), 2),
+                "p99_ms": round(_percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2) if values else 0.0
+            }
+        return endpoints
+
+class Swarm:
+    """Simulated bots driving the in-process services"""
+
+    def __init__(self, scenario: Dict[str, Any], storage: httpx.AsyncClient, logic: httpx.AsyncClient,
+                 seed: int = 0):
+        self.scenario = scenario
+        self.storage = storage
+        self.logic = logic
+        self.rng = random.Random(seed)
+        self.recorder = Recorder()
+        self.bots = [f"SimBot{i:03d}" for i in range(scenario["bots"])]
+        self.pending: set = set()
+        self.stop_at = 0.0
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _sleep_until(self, at: float) -> bool:
+        """Sleep until a loop time; False once the run is over"""
+        if at >= self.stop_at:
+            return False
+        await asyncio.sleep(max(0.0, at - time.perf_counter()))
+        return True
+
+    async def create_event(self, bot: str, event_type: str, data: Dict[str, Any], severity: int = 0) -> None:
+        await self.recorder.call(f"POST /events ({event_type})", self.storage.post(
+            "/events/", json={"event_type": event_type, "data": data, "botId": bot, "severity": severity}
+        ))
+
+    async def action_burst(self, bot: str) -> None:
+        for _ in range(self.rng.randint(*self.scenario["burst"])):
+            await self.create_event(bot, "bot_action", {
+                "data": {"action": self.rng.choice(ACTIONS), "block": self.rng.choice(BLOCKS),
+                         "position": {"x": self.rng.randint(-500, 500), "y": 64, "z": self.rng.randint(-500, 500)}},
+                "metadata": {"tick": self.rng.randint(0, 1 << 20)}
+            })
+
+    async def chat(self, bot: str, player: str, message: str, endpoint: str) -> None:
+        response = await self.recorder.call(endpoint, self.logic.post(f"/bots/{bot}/chat", json={
+            "message": message,
+            "context": {"health": 20, "food": 18, "position": {"x": 10, "y": 64, "z": -20},
+                        "inventory": {"stone": 12, "torch": 5}, "nearbyPlayers": [player],
+                        "currentActivity": "building"},
+            "player_username": player,
+            "bot_username": bot,
+            "isNearby": True,
+            "isLooking": self.rng.random() < 0.5
+        }))
+        if response is None or response.status_code != 200:
+            return
+        result = response.json()
+        status = result.get("status", "ok")
+        self.recorder.chat_statuses[status] = self.recorder.chat_statuses.get(status, 0) + 1
+        if status == "ok":
+            await self.create_event(bot, "chat_message", {
+                "username": player, "message": message, "response": result.get("response"),
+                "distance": 3, "isNearby": True, "isLooking": True
+            }, severity=1)
+
+    async def poll_loop(self, bot: str) -> None:
+        interval = self.scenario["poll_interval"]
+        at = time.perf_counter() + self.rng.uniform(0, interval)
+        while await self._sleep_until(at):
+            self._spawn(self.recorder.call("GET /events (poll)", self.storage.get(
+                "/events/", params={"count": 10, "botId": bot}
+            )))
+            at += interval
+
+    async def action_loop(self, bot: str) -> None:
+        rate = self.scenario["action_rate"]
+        if rate <= 0:
+            return
+        at = time.perf_counter() + self.rng.expovariate(rate)
+        while await self._sleep_until(at):
+            self._spawn(self.action_burst(bot))
+            at += self.rng.expovariate(rate)
+
+    async def chat_loop(self, bot: str) -> None:
+        rate = self.scenario["chat_rate"]
+        if rate <= 0:
+            return
+        at = time.perf_counter() + self.rng.expovariate(rate)
+        while await self._sleep_until(at):
+            self._spawn(self.chat(bot, self.rng.choice(PLAYERS), self.rng.choice(CHATS), "POST /bots/{bot}/chat"))
+            at += self.rng.expovariate(rate)
+
+    async def storm_loop(self) -> None:
+        interval = self.scenario["storm_interval"]
+        if interval <= 0:
+            return
+        at = time.perf_counter() + interval
+        while await self._sleep_until(at):
+            player = self.rng.choice(PLAYERS)
+            message = self.rng.choice(STORM_CHATS)
+            targets = self.rng.sample(self.bots, max(1, int(len(self.bots) * self.scenario["storm_fraction"])))
+            for bot in targets:
+                # Everyone hears the message within a second
+                self._spawn(self._delayed(self.rng.uniform(0, 1.0),
+                                          self.chat(bot, player, message, "POST /bots/{bot}/chat (storm)")))
+            at += interval
+
+    async def _delayed(self, delay: float, coro) -> None:
+        await asyncio.sleep(delay)
+        await coro
+
+    async def run(self, drain_timeout: float = 60.0) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self.stop_at = started + self.scenario["duration"]
+        lag: List[float] = []
+        monitor = asyncio.create_task(_monitor_loop_lag(lag))
+
+        loops = [self.storm_loop()]
+        for bot in self.bots:
+            loops += [self.poll_loop(bot), self.action_loop(bot), self.chat_loop(bot)]
+        await asyncio.gather(*loops)
+        # Let requests still in flight finish (they count towards the run)
+        if self.pending:
+            await asyncio.wait(list(self.pending), timeout=drain_timeout)
+        elapsed = time.perf_counter() - started
+        monitor.cancel()
+
+        lag.sort()
+        return {
+            "bots": len(self.bots),
+            "duration": self.scenario["duration"],
+            "elapsed": round(elapsed, 2),
+            "endpoints": self.recorder.report(self.scenario["duration"]),
+            "chat_statuses": dict(self.recorder.chat_statuses),
+            "loop_lag_ms": {"p50": round(_percentile(lag, 50), 2), "p99": round(_percentile(lag, 99), 2),
+                            "max": round(lag[-1], 2) if lag else 0.0}
+        }
+
+async def _monitor_loop_lag(samples: List[float], interval: float = 0.05) -> None:
+    """How late the event loop wakes a sleeper (all services and bots share it)"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.perf_counter() - started - interval) * 1000))
+
+async def run_swarm(scenario: Dict[str, Any], redis_url: Optional[str], seed: int) -> Dict[str, Any]:
+    """Start the three services in-process, run the scenario and return the report"""
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    for service in ("storage-service", "governor"):
+        path = os.path.join(ROOT, service)
+        if path not in sys.path:
+            sys.path.append(path)
+
+    from src import db_connections, instrument_redis, redis_pool_options
+    from src.main import create_app as create_storage_app
+    from src.services.events import EventService
+    from src.services.events.triggers import TriggerService
+    from app.main import create_app as create_governor_app
+    from app.services.scheduler import get_llm_scheduler
+    from main import create_app as create_logic_app
+    from clients import http_clients
+
+    storage_app, governor_app, logic_app = create_storage_app(), create_governor_app(), create_logic_app()
+
+    # Request logging would dominate the profile
+    logging.disable(logging.INFO)
+
+    async with AsyncExitStack() as stack:
+        if redis_url:
+            os.environ["REDIS_URL"] = redis_url
+            await stack.enter_async_context(storage_app.router.lifespan_context(storage_app))
+            if db_connections.redis is None:
+                raise SystemExit(f"Could not connect to Redis at {redis_url}")
+        else:
+            try:
+                from fakeredis import aioredis as fake_aioredis
+            except ImportError:
+                raise SystemExit("Install fakeredis (pip install fakeredis) or pass --redis-url")
+            import redis.asyncio as aioredis
+            db_connections.redis = instrument_redis(fake_aioredis.FakeRedis(
+                decode_responses=True, connection_pool_class=aioredis.BlockingConnectionPool,
+                **redis_pool_options()
+            ))
+            storage_app.state.trigger_service = TriggerService(db_connections)
+            storage_app.state.event_service = EventService(db_connections, triggers=storage_app.state.trigger_service)
+
+        # Bot logic reaches the other two services over ASGI instead of the network
+        http_clients.storage.transport = httpx.ASGITransport(app=storage_app)
+        http_clients.governor.transport = httpx.ASGITransport(app=governor_app)
+        await stack.enter_async_context(governor_app.router.lifespan_context(governor_app))
+        await stack.enter_async_context(logic_app.router.lifespan_context(logic_app))
+
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        storage = await stack.enter_async_context(httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=storage_app), base_url="http://storage/api/v1",
+            timeout=60.0, limits=limits
+        ))
+        logic = await stack.enter_async_context(httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=logic_app), base_url="http://logic",
+            timeout=60.0, limits=limits
+        ))
+
+        # The scheduler outlives a run, so count only this run's jobs
+        before = get_llm_scheduler().stats()
+        report = await Swarm(scenario, storage, logic, seed).run()
+        scheduler = get_llm_scheduler().stats()
+        report["llm"] = {k: scheduler[k] - before[k] for k in ("completed", "expired", "errors")}
+        return report
+
+def median_report(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold several runs of one scenario into a report of per-figure medians"""
+    if len(reports) == 1:
+        return reports[0]
+
+    def median(values: List[float]) -> float:
+        values = sorted(values)
+        middle = len(values) // 2
+        return values[middle] if len(values) % 2 else round((values[middle - 1] + values[middle]) / 2, 4)
+
+    endpoints = {}
+    for endpoint in sorted({endpoint for report in reports for endpoint in report["endpoints"]}):
+        rows = [report["endpoints"][endpoint] for report in reports if endpoint in report["endpoints"]]
+        endpoints[endpoint] = {field: median([row[field] for row in rows]) for field in rows[0]}
+    statuses = {status for report in reports for status in report["chat_statuses"]}
+    return {
+        "bots": reports[0]["bots"],
+        "duration": reports[0]["duration"],
+        "runs": len(reports),
+        "elapsed": max(report["elapsed"] for report in reports),
+        "endpoints": endpoints,
+        "chat_statuses": {status: median([report["chat_statuses"].get(status, 0) for report in reports])
+                          for status in sorted(statuses)},
+        "llm": {field: median([report["llm"][field] for report in reports]) for field in reports[0]["llm"]},
+        "loop_lag_ms": {field: median([report["loop_lag_ms"][field] for report in reports])
+                        for field in reports[0]["loop_lag_ms"]}
+    }
+
+def check_baseline(name: str, report: Dict[str, Any], baselines: Dict[str, Any], tolerance: float,
+                   min_delta_ms: float, min_samples: int, compare_latency: bool = True,
+                   latency_endpoints: Optional[List[str]] = None) -> Tuple[List[str], List[str]]:
+    """
+    Regressions of a run against the stored baseline for its scenario
+
+    An endpoint regresses when its p50 or p95 grows by more than tolerance
+    (and by at least min_delta_ms, so sub-millisecond noise is ignored),
+    its throughput drops by more than tolerance, its error rate rises by
+    more than one point, or it disappears. Latency and throughput are only
+    compared when both runs have min_samples requests for the endpoint, and
+    latency not at all without compare_latency (nor, given latency_endpoints,
+    for endpoints outside it).
+
+    Returns:
+        (regressions, endpoints skipped for too few samples)
+    """
+    baseline = baselines.get(name)
+    if baseline is None:
+        return [f"No baseline for scenario '{name}' (run with --update-baseline)"], []
+
+    problems, skipped = [], []
+    for endpoint, expected in baseline["endpoints"].items():
+        current = report["endpoints"].get(endpoint)
+        if current is None:
+            problems.append(f"{endpoint}: missing from this run")
+            continue
+        if current["error_rate"] > expected["error_rate"] + 0.01:
+            problems.append(f"{endpoint}: error rate {current['error_rate']} (baseline {expected['error_rate']})")
+        samples = min(current["count"], expected["count"])
+        if samples < min_samples:
+            skipped.append(f"{endpoint}: {samples} samples")
+            continue
+        gated = compare_latency and (latency_endpoints is None or endpoint in latency_endpoints)
+        for pct in ("p50_ms", "p95_ms") if gated else ():
+            limit = max(expected[pct] * (1 + tolerance), expected[pct] + min_delta_ms)
+            if current[pct] > limit:
+                problems.append(f"{endpoint}: {pct[:3]} {current[pct]}ms > {limit:.1f}ms "
+                                f"(baseline {expected[pct]}ms)")
+        if current["throughput"] < expected["throughput"] * (1 - tolerance):
+            problems.append(f"{endpoint}: throughput {current['throughput']}/s < "
+                            f"{expected['throughput'] * (1 - tolerance):.2f}/s (baseline {expected['throughput']}/s)")
+    return problems, skipped
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="swarm")
+    parser.add_argument("--bots", type=int, help="Override the scenario's bot count")
+    parser.add_argument("--duration", type=float, help="Override the scenario's duration in seconds")
+    parser.add_argument("--redis-url", help="Use a real Redis instead of fakeredis")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3, help="Runs to take the median of")
+    parser.add_argument("--check", action="store_true", help="Fail on regressions against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--baseline-file", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative p50/p95/throughput change")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0, help="Ignore latency increases smaller than this")
+    parser.add_argument("--min-samples", type=int, default=100,
+                        help="Requests an endpoint needs in both runs for its latency and throughput to be compared")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    scenario = dict(SCENARIOS[args.scenario])
+    if args.bots is not None:
+        scenario["bots"] = args.bots
+    if args.duration is not None:
+        scenario["duration"] = args.duration
+    # Baselines only make sense for the scenario as defined
+    name = args.scenario if (args.bots, args.duration) == (None, None) else f"{args.scenario}-custom"
+
+    report = median_report([asyncio.run(run_swarm(scenario, args.redis_url, args.seed))
+                            for _ in range(max(1, args.runs))])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        runs = f", median of {report['runs']} runs" if report.get("runs") else ""
+        print(f"scenario {name}: {report['bots']} bots for {report['duration']}s "
+              f"(drained after {report['elapsed']}s{runs})")
+        print(f"{'endpoint':<34} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for endpoint, row in report["endpoints"].items():
+            print(f"{endpoint:<34} {row['count']:>7} {row['errors']:>5} {row['throughput']:>8.1f} "
+                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+        print(f"chat statuses {report['chat_statuses']}  llm {report['llm']}")
+        print(f"event loop lag p50 {report['loop_lag_ms']['p50']}ms  p99 {report['loop_lag_ms']['p99']}ms")
+
+    baselines: Dict[str, Any] = {}
+    if os.path.exists(args.baseline_file):
+        with open(args.baseline_file) as f:
+            baselines = json.load(f)
+
+    if args.update_baseline:
+        baselines[name] = {"bots": report["bots"], "duration": report["duration"], "runs": report.get("runs", 1),
+                           "endpoints": report["endpoints"]}
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline_file)), exist_ok=True)
+        with open(args.baseline_file, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline for '{name}' written to {args.baseline_file}")
+
+    if args.check:
+        problems, skipped = check_baseline(name, report, baselines, args.tolerance, args.min_delta_ms,
+                                           args.min_samples, scenario.get("compare_latency", True),
+                                           scenario.get("latency_endpoints"))
+        if not scenario.get("compare_latency", True):
+            print(f"Latency not compared: '{args.scenario}' runs at the simulator's saturation point")
+        elif scenario.get("latency_endpoints"):
+            print(f"Latency compared only for: {', '.join(scenario['latency_endpoints'])}")
+        for endpoint in skipped:
+            print(f"Latency not compared (below --min-samples): {endpoint}")
+        if problems:
+            print("REGRESSIONS:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"No regressions against the '{name}' baseline")
+
+if __name__ == "__main__":
+    main()
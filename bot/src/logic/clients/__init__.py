@@ -0,0 +1,15 @@
+"""
+Clients module for outbound HTTP calls to storage-service and governor
+"""
+
+from dotenv import load_dotenv
+
+from .http_client import HttpClients, ServiceClient, CircuitBreaker, CircuitOpenError
+
+# Load environment variables before reading service URLs
+load_dotenv()
+
+# Global client holder, started and closed by the FastAPI lifespan
+http_clients = HttpClients()
+
+__all__ = ['http_clients', 'HttpClients', 'ServiceClient', 'CircuitBreaker', 'CircuitOpenError']
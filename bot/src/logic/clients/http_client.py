@@ -0,0 +1,241 @@
+"""
+HTTP Client - Shared pooled HTTP clients for outbound service calls
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from metrics import registry
+from tracing import Span, tracer, inject_headers
+
+logger = logging.getLogger(__name__)
+
+upstream_request_duration = registry.histogram(
+    "upstream_request_duration_seconds", "Outbound service call latency per attempt",
+    ("service", "method", "outcome")
+)
+
+# Methods that are safe to resend after a timeout or a 5xx response
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS = {502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream circuit is open"""
+
+class CircuitBreaker:
+    """Simple consecutive-failure circuit breaker (closed -> open -> half-open)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Closed and half-open circuits let calls through, open ones reject them"""
+        return self.state != self.OPEN
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+
+class ServiceClient:
+    """
+    Pooled keep-alive client for a single upstream service
+
+    Connections are reused across calls. Connect errors are retried for every
+    method; timeouts and 502/503/504 responses are only retried for idempotent
+    methods so a slow POST is never sent twice.
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float = 10.0,
+                 connect_timeout: float = 2.0, max_connections: int = 20,
+                 max_keepalive: int = 10, keepalive_expiry: float = 30.0,
+                 retries: int = 2, backoff: float = 0.2, max_backoff: float = 2.0,
+                 failure_threshold: int = 5, reset_timeout: float = 15.0,
+                 http2: bool = False, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.http2 = http2 and _http2_available()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        # Custom transport, e.g. httpx.ASGITransport to call a service in-process
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Underlying httpx client, created on first use if the lifespan has not started it"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport
+            )
+        return self._client
+
+    async def start(self) -> None:
+        _ = self.client
+        logger.info(f"HTTP client '{self.name}' ready: {self.base_url} (http2={self.http2})")
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info(f"HTTP client '{self.name}' closed")
+        self._client = None
+
+    async def request(self, method: str, path: str, retry: Optional[bool] = None,
+                      **kwargs: Any) -> httpx.Response:
+        """
+        Send a request through the pool with retries and circuit breaking
+
+        Args:
+            method: HTTP method
+            path: Path relative to the service base URL
+            retry: Force retries on/off for timeouts and 5xx (defaults to method idempotency)
+            **kwargs: Passed through to httpx (json, params, headers, ...)
+
+        Returns:
+            The httpx response (non-retryable error statuses are returned as-is)
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        with tracer.span(f"{self.name} {method} {path}") as span:
+            if span is not None:
+                kwargs["headers"] = inject_headers(kwargs.get("headers"), span)
+            return await self._send(method, path, retry, span, **kwargs)
+
+    async def _send(self, method: str, path: str, retry: bool, span: Optional[Span],
+                    **kwargs: Any) -> httpx.Response:
+        """Retry loop behind request()"""
+        attempt = 0
+        while True:
+            if span is not None:
+                span.set("attempts", attempt + 1)
+            started = time.perf_counter()
+            outcome = "transport_error"
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                outcome = str(response.status_code)
+            except httpx.ConnectError:
+                outcome = "connect_error"
+                self.breaker.record_failure()
+                if attempt >= self.retries or not self.breaker.allow_request():
+                    raise
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if not retry or attempt >= self.retries or not self.breaker.allow_request():
+                    raise
+            else:
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if (not retry or response.status_code not in RETRYABLE_STATUS
+                        or attempt >= self.retries or not self.breaker.allow_request()):
+                    return response
+            finally:
+                upstream_request_duration.observe(time.perf_counter() - started, self.name, method, outcome)
+
+            attempt += 1
+            delay = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+            delay *= random.uniform(0.5, 1.0)
+            logger.debug(f"Retrying {method} {self.name}{path} in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures
+        }
+
+class HttpClients:
+    """Lifecycle holder for the clients used by the bot logic service"""
+
+    def __init__(self):
+        http2 = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+        self.storage = ServiceClient(
+            "storage-service",
+            os.getenv("STORAGE_SERVICE_URL", "http://localhost:8000/api/v1"),
+            timeout=float(os.getenv("STORAGE_TIMEOUT", "5")),
+            max_connections=int(os.getenv("STORAGE_MAX_CONNECTIONS", "20")),
+            http2=http2
+        )
+        self.governor = ServiceClient(
+            "governor",
+            os.getenv("FASTAPI_BRIDGE_URL", "http://localhost:5000"),
+            timeout=float(os.getenv("GOVERNOR_TIMEOUT", "30")),
+            max_connections=int(os.getenv("GOVERNOR_MAX_CONNECTIONS", "10")),
+            http2=http2
+        )
+
+    async def startup(self) -> None:
+        await self.storage.start()
+        await self.governor.start()
+
+    async def shutdown(self) -> None:
+        await self.storage.close()
+        await self.governor.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "storage": self.storage.status(),
+            "governor": self.governor.status()
+        }
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+        return False
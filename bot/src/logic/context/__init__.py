@@ -2,9 +2,19 @@
 Context module for shared state across logic components
 """
 
+import os
 from .event_context import EventContext
+from .bot_registry import BotRegistry, BotRuntime
+from .bot_state import BotState, StateConflict
 
 # Global event context instance
-eventContext = EventContext()
+eventContext = EventContext(maxEvents=int(os.getenv("EVENT_CACHE_SIZE", "1000")))
 
-__all__ = ['eventContext', 'EventContext']
\ No newline at end of file
+# Per-bot runtimes when one server hosts many bots
+botRegistry = BotRegistry(
+    maxEvents=int(os.getenv("EVENT_CACHE_SIZE", "1000")),
+    maxBots=int(os.getenv("MAX_HOSTED_BOTS", "500"))
+)
+
+__all__ = ['eventContext', 'botRegistry', 'EventContext', 'BotRegistry', 'BotRuntime', 'BotState',
+           'StateConflict']
\ No newline at end of file
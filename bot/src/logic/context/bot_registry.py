@@ -0,0 +1,106 @@
+"""
+Bot Registry - Per-bot runtime state for a multi-tenant logic server
+"""
+
+import time
+import logging
+from typing import Callable, Dict, Any, List, Optional
+
+from .event_context import EventContext
+from .bot_state import BotState
+from subordinates.chat_scheduler import create_scheduler
+from subordinates.goal_manager import GoalManager
+
+logger = logging.getLogger(__name__)
+
+class BotRuntime:
+    """Isolated state for a single bot hosted by this server"""
+
+    def __init__(self, name: str, maxEvents: int = 1000):
+        self.name = name
+        self.eventContext = EventContext(maxEvents=maxEvents)
+        self.chatScheduler = create_scheduler()
+        self.state = BotState()
+        self.goals = GoalManager(name)
+        self.createdAt = time.time()
+        self.lastSeen = self.createdAt
+        self.requestCount = 0
+
+    def touch(self) -> None:
+        self.lastSeen = time.time()
+        self.requestCount += 1
+
+    def getStats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "events_cached": self.eventContext.getMemorySize(),
+            "requests": self.requestCount,
+            "chat_queue": self.chatScheduler.get_stats(),
+            "state_version": self.state.version,
+            "goals": self.goals.getStats(),
+            "created_at": self.createdAt,
+            "last_seen": self.lastSeen
+        }
+
+class BotRegistry:
+    """Creates bot runtimes on first use and keeps them isolated by bot name"""
+
+    def __init__(self, maxEvents: int = 1000, maxBots: int = 500):
+        self.maxEvents = maxEvents
+        self.maxBots = maxBots
+        self._bots: Dict[str, BotRuntime] = {}
+        # Called with each runtime as it is dropped, so services can release their per-bot state
+        self._removeListeners: List[Callable[[BotRuntime], None]] = []
+
+    def getBot(self, name: str) -> BotRuntime:
+        """Get the runtime for a bot, creating it if needed"""
+        runtime = self._bots.get(name)
+        if runtime is None:
+            if len(self._bots) >= self.maxBots:
+                self._evictIdlest()
+            runtime = BotRuntime(name, maxEvents=self.maxEvents)
+            self._bots[name] = runtime
+            logger.info(f"Registered bot runtime: {name} ({len(self._bots)} hosted)")
+        return runtime
+
+    def findBot(self, name: str) -> Optional[BotRuntime]:
+        return self._bots.get(name)
+
+    def onRemove(self, listener: Callable[[BotRuntime], None]) -> None:
+        """Register a callback for runtimes being removed or evicted"""
+        self._removeListeners.append(listener)
+
+    def removeBot(self, name: str) -> bool:
+        runtime = self._bots.pop(name, None)
+        if runtime is None:
+            return False
+        self._release(runtime)
+        logger.info(f"Removed bot runtime: {name}")
+        return True
+
+    def listBots(self) -> List[Dict[str, Any]]:
+        return [runtime.getStats() for runtime in self._bots.values()]
+
+    def runtimes(self) -> List[BotRuntime]:
+        return list(self._bots.values())
+
+    def clear(self) -> None:
+        for runtime in self._bots.values():
+            self._release(runtime)
+        self._bots.clear()
+
+    def __len__(self) -> int:
+        return len(self._bots)
+
+    def _release(self, runtime: BotRuntime) -> None:
+        runtime.chatScheduler.close()
+        for listener in self._removeListeners:
+            try:
+                listener(runtime)
+            except Exception as e:
+                logger.error(f"Failed to release runtime {runtime.name}: {e}")
+
+    def _evictIdlest(self) -> None:
+        idlest = min(self._bots.values(), key=lambda r: r.lastSeen)
+        logger.warning(f"Bot limit reached ({self.maxBots}), evicting idle runtime: {idlest.name}")
+        self.removeBot(idlest.name)
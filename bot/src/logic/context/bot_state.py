@@ -0,0 +1,126 @@
+"""
+Bot State - Versioned snapshot of a bot's in-game state, updated by compact patches
+"""
+
+import copy
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+state_updates = registry.counter(
+    "bot_state_updates_total", "Bot state updates by kind", ("kind",)
+)
+
+class StateConflict(Exception):
+    """A patch was based on a version other than the one held"""
+
+    def __init__(self, version: int):
+        super().__init__(f"State is at version {version}")
+        self.version = version
+
+def merge_patch(target: Dict[str, Any], patch: Dict[str, Any]) -> None:
+    """
+    Apply a JSON merge patch (RFC 7396) in place
+
+    Nested objects are merged key by key, None removes a key and any other
+    value (lists included) replaces it.
+    """
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict):
+            current = target.get(key)
+            if not isinstance(current, dict):
+                current = target[key] = {}
+            merge_patch(current, value)
+        else:
+            target[key] = value
+
+def diff_state(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge patch that turns old into new (the inverse of merge_patch)"""
+    patch: Dict[str, Any] = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = diff_state(previous, value)
+            if nested:
+                patch[key] = nested
+        elif key not in old or previous != value:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+class BotState:
+    """
+    The latest state a bot agent reported (health, food, position,
+    inventory, nearby players, activity)
+
+    The agent numbers its updates. A full snapshot is always accepted; a
+    patch carries the version it was computed against and is rejected with
+    StateConflict when that is not the version held, so the agent resends
+    a full snapshot. Chat requests then refer to the state by version and
+    the prompt is built from the copy held here.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.fields: Dict[str, Any] = {}
+        self.updatedAt: Optional[float] = None
+
+    def replace(self, fields: Dict[str, Any], version: Optional[int] = None) -> int:
+        """Store a full snapshot"""
+        self.fields = copy.deepcopy(fields)
+        self.version = version if version is not None else self.version + 1
+        self.updatedAt = time.time()
+        state_updates.inc(1, "full")
+        return self.version
+
+    def applyPatch(self, patch: Dict[str, Any], baseVersion: int, version: Optional[int] = None) -> int:
+        """
+        Apply changed fields on top of baseVersion
+
+        Raises:
+            StateConflict: baseVersion is not the version held
+        """
+        if baseVersion != self.version or self.updatedAt is None:
+            state_updates.inc(1, "conflict")
+            raise StateConflict(self.version)
+        merge_patch(self.fields, patch)
+        self.version = version if version is not None else self.version + 1
+        self.updatedAt = time.time()
+        state_updates.inc(1, "patch")
+        return self.version
+
+    def update(self, update: Dict[str, Any]) -> int:
+        """
+        Apply an update as sent by the agent
+
+        {"version": n, "snapshot": {...}} replaces the state,
+        {"version": n, "base_version": m, "patch": {...}} patches it and
+        {"version": n} alone only checks that n is the version held.
+
+        Raises:
+            StateConflict: The update cannot be applied to the state held
+        """
+        version = update.get("version")
+        if isinstance(update.get("snapshot"), dict):
+            return self.replace(update["snapshot"], version)
+        if isinstance(update.get("patch"), dict):
+            return self.applyPatch(update["patch"], int(update.get("base_version", -1)), version)
+        if version is not None and (version != self.version or self.updatedAt is None):
+            state_updates.inc(1, "conflict")
+            raise StateConflict(self.version)
+        return self.version
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The current fields (shared, treat as read-only)"""
+        return self.fields
+
+    def getStats(self) -> Dict[str, Any]:
+        return {"version": self.version, "fields": self.fields, "updated_at": self.updatedAt}
@@ -3,35 +3,178 @@ Event Context - Shared event state for logic components
 """
 
 import logging
-from typing import List, Dict, Any
+import time
+from collections import OrderedDict
+from itertools import count as counter
+from typing import List, Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+FilterKey = Tuple[Tuple[str, Any], ...]
+
 class EventContext:
-    """Centralized event state management"""
-    
-    def __init__(self):
-        self.eventMemory: List[Dict[str, Any]] = []
-        
+    """
+    Centralized event state management
+
+    Events live in a bounded LRU buffer keyed by event id, so re-fetched
+    events replace their previous copy instead of piling up and move to the
+    recent end. When the buffer is full the least recently refreshed entry
+    is evicted, and fetch records whose filters matched it are dropped so
+    the next read of those filters goes back to storage instead of serving
+    a short result. Secondary indexes by type and botId keep filtered local
+    reads proportional to the matching subset.
+    """
+
+    def __init__(self, maxEvents: int = 1000):
+        self.maxEvents = maxEvents
+        self._events: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._byType: Dict[str, Dict[str, None]] = {}
+        self._byBot: Dict[str, Dict[str, None]] = {}
+        self._fetches: Dict[FilterKey, Tuple[float, int]] = {}
+        self._localIds = counter()
+        self.evictedCount = 0
+
+    @property
+    def eventMemory(self) -> List[Dict[str, Any]]:
+        """All cached events, oldest first"""
+        return list(self._events.values())
+
     def updateEventMemory(self, events: List[Dict[str, Any]]) -> None:
-        """Update the event memory with new events"""
-        self.eventMemory = events
-        logger.debug(f"Event memory updated with {len(events)} events")
-        
+        """Merge freshly fetched events into memory (oldest first, deduplicated by id)"""
+        for event in sorted(events, key=lambda e: e.get('timestamp', 0)):
+            self._insert(event)
+        logger.debug(f"Event memory merged {len(events)} events ({len(self._events)} cached)")
+
     def getLocalEvents(self, count: int = 10) -> List[Dict[str, Any]]:
         """Get events from local memory (no API call)"""
-        return self.eventMemory[-count:] if self.eventMemory else []
-        
+        if count <= 0 or not self._events:
+            return []
+        return list(self._events.values())[-count:]
+
+    def queryEvents(self, count: int = 10, event_id: Optional[str] = None,
+                    botId: Optional[str] = None, event_type: Optional[str] = None,
+                    min_severity: Optional[int] = None, since: Optional[int] = None,
+                    order_by: str = "timestamp", order_desc: bool = True) -> List[Dict[str, Any]]:
+        """
+        Filter local memory with the same semantics as the storage-service GET /events
+
+        Args:
+            count: Number of events to return
+            event_id: Filter by specific event ID
+            botId: Filter by bot ID
+            event_type: Filter by event type
+            min_severity: Filter by minimum severity level
+            since: Only events with timestamp >= since (milliseconds)
+            order_by: Field to order by ('timestamp', 'severity')
+            order_desc: Order descending (newest first)
+
+        Returns:
+            List of matching events
+        """
+        if event_id:
+            event = self._events.get(event_id)
+            return [event] if event and self._matches(event, botId, event_type, min_severity, since) else []
+
+        candidates = self._candidateIds(botId, event_type)
+        events = [self._events[eid] for eid in candidates]
+        events = [e for e in events if self._matches(e, botId, event_type, min_severity, since)]
+        events.sort(key=lambda e: e.get(order_by, 0) or 0, reverse=order_desc)
+        return events[:count]
+
     def addEventToMemory(self, event: Dict[str, Any]) -> None:
         """Add a single event to local memory"""
-        self.eventMemory.append(event)
+        self._insert(event)
         logger.debug(f"Added event to memory: {event.get('type', 'unknown')}")
-        
+
     def clearEventMemory(self) -> None:
         """Clear all events from memory"""
-        self.eventMemory.clear()
+        self._events.clear()
+        self._byType.clear()
+        self._byBot.clear()
+        self._fetches.clear()
         logger.debug("Event memory cleared")
-        
+
     def getMemorySize(self) -> int:
         """Get current memory size"""
-        return len(self.eventMemory)
\ No newline at end of file
+        return len(self._events)
+
+    # Freshness tracking for read-through reads
+
+    @staticmethod
+    def filterKey(**filters: Any) -> FilterKey:
+        return tuple(sorted((k, v) for k, v in filters.items() if v is not None))
+
+    def markFetched(self, key: FilterKey, count: int, returned: int) -> None:
+        """Record a completed remote fetch for a filter set"""
+        # A short page means storage has nothing more, so that page covers any larger count
+        covered = returned if returned >= count else float('inf')
+        self._fetches[key] = (time.monotonic(), covered)
+
+    def fetchAge(self, key: FilterKey, count: int) -> Optional[float]:
+        """Seconds since a fetch that covers `count` events for this filter set, None if never"""
+        fetched = self._fetches.get(key)
+        if fetched is None or fetched[1] < count:
+            return None
+        return time.monotonic() - fetched[0]
+
+    # Internal helpers
+
+    def _insert(self, event: Dict[str, Any]) -> None:
+        eventId = event.get('id') or f"local-{next(self._localIds)}"
+        previous = self._events.get(eventId)
+        if previous is not None:
+            self._unindex(eventId, previous)
+        elif len(self._events) >= self.maxEvents:
+            self._evictOldest()
+
+        self._events[eventId] = event
+        self._events.move_to_end(eventId)
+        self._byType.setdefault(event.get('type') or '', {})[eventId] = None
+        self._byBot.setdefault(event.get('botId') or '', {})[eventId] = None
+
+    def _evictOldest(self) -> None:
+        oldestId, oldest = self._events.popitem(last=False)
+        self._unindex(oldestId, oldest)
+        self.evictedCount += 1
+        # Filter sets that could have returned this event no longer cover their count locally
+        for key in [key for key in self._fetches if self._coveredBy(oldest, key)]:
+            del self._fetches[key]
+
+    def _coveredBy(self, event: Dict[str, Any], key: FilterKey) -> bool:
+        filters = dict(key)
+        if filters.get('event_id') and filters['event_id'] != event.get('id'):
+            return False
+        return self._matches(event, filters.get('botId'), filters.get('event_type'),
+                             filters.get('min_severity'), filters.get('since'))
+
+    def _unindex(self, eventId: str, event: Dict[str, Any]) -> None:
+        for index, key in ((self._byType, event.get('type') or ''),
+                           (self._byBot, event.get('botId') or '')):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(eventId, None)
+                if not bucket:
+                    del index[key]
+
+    def _candidateIds(self, botId: Optional[str], event_type: Optional[str]):
+        buckets = []
+        if event_type:
+            buckets.append(self._byType.get(event_type, {}))
+        if botId:
+            buckets.append(self._byBot.get(botId, {}))
+        if not buckets:
+            return self._events.keys()
+        return min(buckets, key=len).keys()
+
+    @staticmethod
+    def _matches(event: Dict[str, Any], botId: Optional[str], event_type: Optional[str],
+                 min_severity: Optional[int], since: Optional[int] = None) -> bool:
+        if botId and event.get('botId') != botId:
+            return False
+        if event_type and event.get('type') != event_type:
+            return False
+        if min_severity is not None and event.get('severity', 0) < min_severity:
+            return False
+        if since is not None and event.get('timestamp', 0) < since:
+            return False
+        return True
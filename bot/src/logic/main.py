@@ -3,65 +3,318 @@ Bot Logic Service - Main Entry Point
 Handles AI decision making and multi-agent coordination
 """
 
+import os
 import asyncio
 import logging
-from fastapi import FastAPI, Request
+from typing import Optional
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
-from subordinates.chat_manager import chat_manager
-
-# Load environment variables from .env file
-load_dotenv()
+from clients import http_clients
+from context import botRegistry, BotRuntime, StateConflict
+from subordinates.chat_manager import ChatManager, get_chat_manager
+from subordinates.chat_scheduler import chat_priority
+from subordinates.goal_manager import create_goal_sync
+from memory.prefetcher import EventPrefetcher, create_prefetcher
+from memory.redis_connector import close_redis
+from metrics import MetricsMiddleware, render_metrics, route_template, CONTENT_TYPE
+from tracing import TracingMiddleware, init_tracing, tracer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Bot Logic Service", version="1.0.0")
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PROMPT_RECENT_EVENTS = int(os.getenv("PROMPT_RECENT_EVENTS", "8"))
+CHAT_ERROR_REPLY = "Sorry, I'm having trouble thinking right now."
+
+router = APIRouter()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: open the pooled clients, then wire the services the routes depend on
+    await http_clients.startup()
+    app.state.chat_manager = get_chat_manager()
+    # Keeps hosted bots' recent events warm for prompt building
+    app.state.prefetcher = create_prefetcher(botRegistry)
+    if PREFETCH_ENABLED:
+        await app.state.prefetcher.start()
+    # Persists goal changes to the storage service in batches
+    app.state.goal_sync = create_goal_sync(botRegistry)
+    await app.state.goal_sync.start()
+    yield
+    # Shutdown
+    await app.state.prefetcher.stop()
+    await app.state.goal_sync.stop()
+    # Write conversation windows Redis missed so a restarted server picks them up
+    await app.state.chat_manager.conversations.flush()
+    await close_redis()
+    await http_clients.shutdown()
+    botRegistry.clear()
+    tracer.close()
+
+# Route dependencies: services wired by the lifespan (async so FastAPI skips the threadpool)
+async def get_prefetcher(request: Request) -> EventPrefetcher:
+    return request.app.state.prefetcher
+
+async def get_chat(request: Request) -> ChatManager:
+    return request.app.state.chat_manager
+
+def create_app() -> FastAPI:
+    """
+    Build the bot logic application
+
+    Used as the uvicorn entry point (uvicorn --factory main:create_app).
+    Clients, the chat manager and the prefetcher are created by the lifespan,
+    so building the app does no I/O.
+    """
+    app = FastAPI(title="Bot Logic Service", version="1.0.0", lifespan=lifespan)
+    init_tracing("bot-logic")
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Per-route latency histograms and in-flight requests
+    app.add_middleware(MetricsMiddleware)
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Request spans; the trace ID is forwarded to the governor and storage with every call
+    app.add_middleware(TracingMiddleware, route_name=route_template)
 
-@app.get("/health")
+    app.include_router(router)
+    return app
+
+@router.get("/health")
 async def health_check():
     return {"status": "ok", "service": "bot-logic"}
 
-@app.get("/")
+@router.get("/status")
+async def status(prefetcher: EventPrefetcher = Depends(get_prefetcher)):
+    return {
+        "status": "running",
+        "hosted_bots": len(botRegistry),
+        "upstreams": http_clients.status(),
+        "prefetch_max_lag_seconds": prefetcher.getStats()["max_lag_seconds"]
+    }
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+@router.get("/prefetch")
+async def prefetch_status(prefetcher: EventPrefetcher = Depends(get_prefetcher)):
+    """Prefetch lag per hosted bot"""
+    return prefetcher.getStats()
+
+@router.get("/conversations")
+async def conversation_status(chat_manager: ChatManager = Depends(get_chat)):
+    """Conversation windows held for (bot, player) pairs"""
+    return chat_manager.conversations.getStats()
+
+@router.get("/")
 async def root():
     return {"message": "Bot Logic Service is running"}
 
-@app.post("/chat")
-async def handle_chat(request: Request):
+@router.get("/bots")
+async def list_bots():
+    """List the bots hosted by this server"""
+    bots = botRegistry.listBots()
+    return {"bots": bots, "count": len(bots)}
+
+@router.post("/bots/{bot_name}")
+async def register_bot(bot_name: str):
+    """Register a bot ahead of its first chat (idempotent)"""
+    return botRegistry.getBot(bot_name).getStats()
+
+@router.delete("/bots/{bot_name}")
+async def remove_bot(bot_name: str):
+    """Drop a bot's runtime state from this server"""
+    if not botRegistry.removeBot(bot_name):
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return {"status": "removed", "bot": bot_name}
+
+@router.get("/bots/{bot_name}/state")
+async def get_bot_state(bot_name: str):
+    """Versioned state snapshot the bot's prompts are built from"""
+    runtime = botRegistry.findBot(bot_name)
+    if runtime is None:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return runtime.state.getStats()
+
+@router.put("/bots/{bot_name}/state")
+@router.patch("/bots/{bot_name}/state")
+async def update_bot_state(bot_name: str, request: Request):
+    """
+    Update a bot's state: {"version", "snapshot"} replaces it,
+    {"version", "base_version", "patch"} applies changed fields only
+    """
+    update = await request.json()
+    try:
+        version = botRegistry.getBot(bot_name).state.update(update)
+    except StateConflict as e:
+        raise HTTPException(status_code=409, detail={"status": "state_conflict", "version": e.version})
+    return {"status": "ok", "version": version}
+
+def find_goals(bot_name: str):
+    runtime = botRegistry.findBot(bot_name)
+    if runtime is None:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return runtime.goals
+
+@router.get("/bots/{bot_name}/goals")
+async def list_goals(bot_name: str, status: Optional[str] = None):
+    """A bot's goals, open ones in the order they would be worked on"""
+    goals = find_goals(bot_name).get_goals(status)
+    return {"goals": goals, "count": len(goals)}
+
+@router.post("/bots/{bot_name}/goals")
+async def create_goal(bot_name: str, request: Request):
+    """Add a goal (milestones may list the milestone ids they depend on in dependsOn)"""
+    try:
+        return botRegistry.getBot(bot_name).goals.add_goal(await request.json())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/bots/{bot_name}/goals/next")
+async def next_goal(bot_name: str):
+    """The goal to work on now and its ready milestones"""
+    goals = find_goals(bot_name)
+    goal = goals.next_goal()
+    if goal is None:
+        return {"goal": None, "ready_milestones": []}
+    return {"goal": goal, "ready_milestones": goals.ready_milestones(goal["id"])}
+
+@router.patch("/bots/{bot_name}/goals/{goal_id}")
+async def update_goal(bot_name: str, goal_id: str, request: Request):
+    """Change a goal's priority and/or status"""
+    goals = find_goals(bot_name)
+    if goal_id not in goals.goals:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    updates = await request.json()
+    try:
+        if "priority" in updates:
+            goals.set_priority(goal_id, updates["priority"])
+        if "status" in updates:
+            goals.set_status(goal_id, updates["status"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return goals.goals[goal_id]
+
+@router.post("/bots/{bot_name}/goals/{goal_id}/milestones/{milestone_id}/complete")
+async def complete_milestone(bot_name: str, goal_id: str, milestone_id: str):
+    """Complete a ready milestone; returns the goal and the milestones it unlocked"""
+    try:
+        return find_goals(bot_name).complete_milestone(goal_id, milestone_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Goal or milestone not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.delete("/bots/{bot_name}/goals/{goal_id}")
+async def delete_goal(bot_name: str, goal_id: str):
+    """Remove a goal"""
+    if not find_goals(bot_name).remove_goal(goal_id):
+        raise HTTPException(status_code=404, detail="Goal not found")
+    return {"status": "removed", "goal_id": goal_id}
+
+@router.get("/bots/{bot_name}/chat/queue")
+async def get_chat_queue(bot_name: str):
+    """Chat queue depth, wait times and drop counters for a bot"""
+    runtime = botRegistry.findBot(bot_name)
+    if runtime is None:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return runtime.chatScheduler.get_stats()
+
+@router.post("/bots/{bot_name}/chat")
+async def handle_bot_chat(bot_name: str, request: Request,
+                          chat_manager: ChatManager = Depends(get_chat),
+                          prefetcher: EventPrefetcher = Depends(get_prefetcher)):
+    """
+    Handle chat requests for a specific hosted bot
+    """
+    data = await read_chat_body(request)
+    if data is None:
+        return {"response": CHAT_ERROR_REPLY}
+    return await process_chat(botRegistry.getBot(bot_name), data, chat_manager, prefetcher)
+
+@router.post("/chat")
+async def handle_chat(request: Request,
+                      chat_manager: ChatManager = Depends(get_chat),
+                      prefetcher: EventPrefetcher = Depends(get_prefetcher)):
     """
     Handle chat requests from bot-agent and forward to fastapi-bridge
+    (legacy route, the bot is resolved from bot_username)
     """
+    data = await read_chat_body(request)
+    if data is None:
+        return {"response": CHAT_ERROR_REPLY}
+    return await process_chat(botRegistry.getBot(data.get("bot_username", "Bot")), data, chat_manager, prefetcher)
+
+async def read_chat_body(request: Request) -> Optional[dict]:
+    """The chat request's JSON object, or None when the body is not one"""
     try:
         data = await request.json()
+    except ValueError as e:
+        logger.error(f"Error handling chat: malformed body ({e})")
+        return None
+    if not isinstance(data, dict):
+        logger.error("Error handling chat: body is not a JSON object")
+        return None
+    return data
+
+async def process_chat(runtime: BotRuntime, data: dict, chat_manager: ChatManager,
+                       prefetcher: EventPrefetcher) -> dict:
+    try:
+        runtime.touch()
         message = data.get("message", "")
-        context = data.get("context", {})
+        # Bot state arrives as a versioned patch (or a full snapshot) and is read locally;
+        # a full "context" from older agents is still used as sent
+        if isinstance(data.get("state"), dict):
+            try:
+                runtime.state.update(data["state"])
+            except StateConflict as e:
+                return {"status": "state_conflict", "version": e.version, "response": None}
+        context = data.get("context")
+        if context is None:
+            context = runtime.state.snapshot()
         # NEW: Extract username information
         player_username = data.get("player_username", "Player")
-        bot_username = data.get("bot_username", "Bot")
+        bot_username = data.get("bot_username", runtime.name)
         
         logger.info(f"Received chat request from {player_username} to {bot_username}: {message}")
         
-        # Forward to specialized chat manager
-        response = await chat_manager.handle_chat_message(
-            message, context, player_username, bot_username
+        # Rank by how directly the player is engaging the bot
+        priority = chat_priority(
+            message, bot_username,
+            is_nearby=bool(data.get("isNearby", False)),
+            is_looking=bool(data.get("isLooking", False))
+        )
+        
+        # Queue behind the bot's other replies, then forward to specialized chat manager
+        result = await runtime.chatScheduler.submit(
+            player_username, message, priority,
+            lambda text: chat_manager.handle_chat_message(
+                text, context, player_username, bot_username,
+                recent_events=prefetcher.recentEvents(runtime, PROMPT_RECENT_EVENTS),
+                priority=priority
+            )
         )
         
-        return {"response": response}
+        if result["status"] == "error":
+            result["response"] = CHAT_ERROR_REPLY
+        return result
         
     except Exception as e:
         logger.error(f"Error handling chat: {e}")
-        return {"response": "Sorry, I'm having trouble thinking right now."}
+        return {"response": CHAT_ERROR_REPLY}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
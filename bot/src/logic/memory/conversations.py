@@ -0,0 +1,207 @@
+"""
+Conversation Windows - Recent exchanges per (bot, player), held by the logic server
+"""
+
+import os
+import json
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from metrics import registry
+from memory.redis_connector import get_redis
+
+logger = logging.getLogger(__name__)
+
+WINDOW_KEY = "conversation:{}:{}"  # bot, player
+
+window_lookups = registry.counter(
+    "conversation_window_lookups_total", "Conversation window reads by where they were found", ("source",)
+)
+
+class ConversationWindow:
+    """The last few messages of one conversation, plus how many the governor has seen"""
+
+    __slots__ = ("entries", "forwarded", "updatedAt")
+
+    def __init__(self, size: int, entries: Optional[List[Dict[str, Any]]] = None, forwarded: int = 0):
+        self.entries: Deque[Dict[str, Any]] = deque(entries or [], maxlen=size)
+        # Entries at the tail not yet forwarded to the governor
+        self.forwarded = min(forwarded, len(self.entries))
+        self.updatedAt = time.time()
+
+    def unforwarded(self) -> List[Dict[str, Any]]:
+        return list(self.entries)[self.forwarded:]
+
+    def toJson(self) -> str:
+        return json.dumps({"entries": list(self.entries), "forwarded": self.forwarded,
+                           "updated_at": self.updatedAt})
+
+class ConversationStore:
+    """
+    Capped, TTL-bounded conversation windows
+
+    Windows live in an LRU of at most maxConversations entries and keep the
+    last windowSize messages ({username, message, timestamp}, the format
+    the governor's memory bridge ingests). Messages older than ttl are
+    dropped on read. When Redis is configured (BOT_LOGIC_REDIS_URL), every
+    change is written through to Redis with the same TTL and windows are
+    read from there, so all workers share them and a crash loses nothing;
+    the LRU serves a window only while Redis is unreachable.
+    """
+
+    def __init__(self, windowSize: int = 12, ttl: float = 1800.0, maxConversations: int = 2000,
+                 redis=None):
+        self.windowSize = windowSize
+        self.ttl = ttl
+        self.maxConversations = maxConversations
+        self.redis = redis
+        self._windows: "OrderedDict[Tuple[str, str], ConversationWindow]" = OrderedDict()
+        # Windows whose write-through failed; retried on eviction and at shutdown
+        self._unsaved: set = set()
+
+    async def getWindow(self, bot: str, player: str) -> ConversationWindow:
+        """Window for a conversation, from Redis when configured (another worker may have changed it)"""
+        key = (bot, player)
+        window = await self._load(bot, player)
+        if window is not None:
+            window_lookups.inc(1, "redis")
+            await self._insert(key, window)
+        else:
+            window = self._windows.get(key)
+            if window is not None:
+                self._windows.move_to_end(key)
+                window_lookups.inc(1, "memory")
+            else:
+                window_lookups.inc(1, "miss")
+                window = ConversationWindow(self.windowSize)
+                await self._insert(key, window)
+        self._expire(window)
+        return window
+
+    async def recent(self, bot: str, player: str) -> List[Dict[str, Any]]:
+        """Messages in the window, oldest first"""
+        return list((await self.getWindow(bot, player)).entries)
+
+    async def append(self, bot: str, player: str, entries: List[Dict[str, Any]]) -> None:
+        """Add messages to the end of the window"""
+        window = await self.getWindow(bot, player)
+        for entry in entries:
+            if len(window.entries) == window.entries.maxlen and window.forwarded:
+                window.forwarded -= 1
+            window.entries.append(entry)
+        window.updatedAt = time.time()
+        await self._save(bot, player, window)
+
+    async def merge(self, bot: str, player: str, entries: List[Dict[str, Any]]) -> int:
+        """
+        Add caller-supplied history (legacy context["memory"]) that the window lacks
+
+        Returns:
+            Number of entries added
+        """
+        window = await self.getWindow(bot, player)
+        seen = {(e.get("username"), e.get("message"), e.get("timestamp")) for e in window.entries}
+        new = [
+            entry for entry in entries
+            if isinstance(entry, dict) and entry.get("message")
+            and (entry.get("username"), entry.get("message"), entry.get("timestamp")) not in seen
+        ]
+        new.sort(key=lambda entry: entry.get("timestamp") or 0)
+        if new:
+            await self.append(bot, player, new)
+        return len(new)
+
+    async def takeUnforwarded(self, bot: str, player: str) -> List[Dict[str, Any]]:
+        """Messages the governor has not been sent yet, marking them as sent"""
+        window = await self.getWindow(bot, player)
+        pending = window.unforwarded()
+        if pending:
+            window.forwarded = len(window.entries)
+            await self._save(bot, player, window)
+        return pending
+
+    async def flush(self) -> int:
+        """Write windows whose write-through failed to Redis (shutdown)"""
+        unsaved = [key for key in self._unsaved if key in self._windows]
+        if self.redis is None or not unsaved:
+            return 0
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for bot, player in unsaved:
+                    pipe.set(WINDOW_KEY.format(bot, player), self._windows[(bot, player)].toJson(),
+                             ex=max(1, int(self.ttl)))
+                await pipe.execute()
+            self._unsaved.clear()
+            return len(unsaved)
+        except Exception as e:
+            logger.warning(f"Failed to spill conversation windows: {e}")
+            return 0
+
+    def getStats(self) -> Dict[str, Any]:
+        return {
+            "conversations": len(self._windows),
+            "messages": sum(len(window.entries) for window in self._windows.values()),
+            "window_size": self.windowSize,
+            "ttl_seconds": self.ttl,
+            "spill": self.redis is not None,
+            "unsaved": len(self._unsaved)
+        }
+
+    def _expire(self, window: ConversationWindow) -> None:
+        cutoff = (time.time() - self.ttl) * 1000
+        while window.entries and (window.entries[0].get("timestamp") or 0) < cutoff:
+            window.entries.popleft()
+            window.forwarded = max(0, window.forwarded - 1)
+
+    async def _save(self, bot: str, player: str, window: ConversationWindow) -> None:
+        """Write a changed window through to Redis"""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(WINDOW_KEY.format(bot, player), window.toJson(), ex=max(1, int(self.ttl)))
+            self._unsaved.discard((bot, player))
+        except Exception as e:
+            self._unsaved.add((bot, player))
+            logger.debug(f"Failed to save conversation {bot}/{player}: {e}")
+
+    async def _insert(self, key: Tuple[str, str], window: ConversationWindow) -> None:
+        self._windows[key] = window
+        self._windows.move_to_end(key)
+        if len(self._windows) <= self.maxConversations:
+            return
+        evicted_key, evicted = self._windows.popitem(last=False)
+        # Only a window Redis missed needs spilling; any other copy there is as new or newer
+        if evicted_key in self._unsaved and evicted.entries:
+            await self._save(*evicted_key, evicted)
+        self._unsaved.discard(evicted_key)
+
+    async def _load(self, bot: str, player: str) -> Optional[ConversationWindow]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(WINDOW_KEY.format(bot, player))
+        except Exception as e:
+            logger.debug(f"Failed to load conversation {bot}/{player}: {e}")
+            return None
+        if not raw:
+            return None
+        state = json.loads(raw)
+        window = ConversationWindow(self.windowSize, state.get("entries"), state.get("forwarded", 0))
+        window.updatedAt = state.get("updated_at", window.updatedAt)
+        return window
+
+_store: Optional[ConversationStore] = None
+
+def get_conversation_store() -> ConversationStore:
+    """Process-wide store, created on first use from CONVERSATION_* settings"""
+    global _store
+    if _store is None:
+        _store = ConversationStore(
+            windowSize=int(os.getenv("CONVERSATION_WINDOW", "12")),
+            ttl=float(os.getenv("CONVERSATION_TTL", "1800")),
+            maxConversations=int(os.getenv("CONVERSATION_MAX", "2000")),
+            redis=get_redis()
+        )
+    return _store
@@ -3,21 +3,27 @@ Memory Management - Handles API calls and business logic
 """
 
 import os
+import time
+import asyncio
 import logging
-import aiohttp
 from typing import List, Dict, Any, Optional
-from logic.context import eventContext
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+from context import eventContext, EventContext
+from clients import http_clients
 
 logger = logging.getLogger(__name__)
 
-STORAGE_SERVICE_URL = os.getenv("STORAGE_SERVICE_URL", "http://localhost:8000/api/v1/events") #
+EVENTS_PATH = "/events/"
+
+# Read-through cache policy: serve locally within TTL, serve stale + refresh in
+# the background up to MAX_STALE, otherwise block on the storage service
+EVENT_CACHE_TTL = float(os.getenv("EVENT_CACHE_TTL", "5"))
+EVENT_CACHE_MAX_STALE = float(os.getenv("EVENT_CACHE_MAX_STALE", "60"))
+
+_refresh_tasks: Dict[tuple, asyncio.Task] = {}
 
 async def create_event(event_type: str, data: Dict[str, Any], 
-                      botId: Optional[str] = None, severity: int = 0) -> Optional[str]:
+                      botId: Optional[str] = None, severity: int = 0,
+                      event_context: Optional[EventContext] = None) -> Optional[str]:
     """
     Create an event via storage service
     
@@ -26,10 +32,12 @@ async def create_event(event_type: str, data: Dict[str, Any],
         data: Event data
         botId: Bot identifier
         severity: Event severity (0-10)
+        event_context: Bot context to update (defaults to the global context)
         
     Returns:
         Event ID if successful, None if failed
     """
+    event_context = event_context or eventContext
     try:
         payload = {
             "event_type": event_type,
@@ -38,50 +46,101 @@ async def create_event(event_type: str, data: Dict[str, Any],
             "severity": severity
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(STORAGE_SERVICE_URL, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    logger.info(f"Event created: {event_type} ({result['event_id']})")
-                    return result['event_id']
-                else:
-                    logger.error(f"Failed to create event: HTTP {response.status}")
-                    return None
-                    
+        response = await http_clients.storage.post(EVENTS_PATH, json=payload)
+        if response.status_code == 200:
+            result = response.json()
+            logger.info(f"Event created: {event_type} ({result['event_id']})")
+            
+            # Make the new event visible to local reads before the next fetch
+            event_context.addEventToMemory({
+                "id": result['event_id'],
+                "botId": botId,
+                "type": event_type,
+                "data": data,
+                "severity": severity,
+                "timestamp": int(time.time() * 1000)
+            })
+            return result['event_id']
+        else:
+            logger.error(f"Failed to create event: HTTP {response.status_code}")
+            return None
+
     except Exception as e:
         logger.error(f"Failed to create event: {e}")
         return None
 
-async def get_events(count: int = 10, **filters) -> List[Dict[str, Any]]:
+async def get_events(count: int = 10, max_age: Optional[float] = None,
+                     event_context: Optional[EventContext] = None,
+                     **filters) -> List[Dict[str, Any]]:
+    """
+    Get events, served from local context while fresh enough
+    
+    Args:
+        count: Number of events to retrieve
+        max_age: Freshness TTL in seconds (defaults to EVENT_CACHE_TTL, 0 forces a fetch)
+        event_context: Bot context to read and update (defaults to the global context)
+        **filters: Additional filters (event_id, botId, event_type, min_severity)
+        
+    Returns:
+        List of events
+    """
+    event_context = event_context or eventContext
+    key = event_context.filterKey(**filters)
+    ttl = EVENT_CACHE_TTL if max_age is None else max_age
+    age = event_context.fetchAge(key, count)
+    
+    if age is not None and ttl > 0:
+        if age <= ttl:
+            return event_context.queryEvents(count, **filters)
+        if age <= EVENT_CACHE_MAX_STALE:
+            _schedule_refresh(event_context, key, count, filters)
+            return event_context.queryEvents(count, **filters)
+    
+    return await fetch_events(count, event_context=event_context, **filters)
+
+async def fetch_events(count: int = 10, event_context: Optional[EventContext] = None,
+                       **filters) -> List[Dict[str, Any]]:
     """
-    Get events from storage service and update context
+    Get events from storage service and merge them into context
     
     Args:
         count: Number of events to retrieve
+        event_context: Bot context to update (defaults to the global context)
         **filters: Additional filters (event_id, botId, event_type, min_severity)
         
     Returns:
         List of events
     """
+    event_context = event_context or eventContext
     try:
         params = {"count": count}
-        params.update(filters)
+        params.update({k: v for k, v in filters.items() if v is not None})
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(STORAGE_SERVICE_URL, params=params) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    events = result['events']
-                    
-                    # Update context memory
-                    eventContext.update_event_memory(events)
-                    
-                    logger.info(f"Retrieved {len(events)} events")
-                    return events
-                else:
-                    logger.error(f"Failed to get events: HTTP {response.status}")
-                    return eventContext.get_local_events(count)
-                    
+        response = await http_clients.storage.get(EVENTS_PATH, params=params)
+        if response.status_code == 200:
+            result = response.json()
+            events = result['events']
+            
+            # Merge into context memory
+            event_context.updateEventMemory(events)
+            event_context.markFetched(event_context.filterKey(**filters), count, len(events))
+            
+            logger.info(f"Retrieved {len(events)} events")
+            return events
+        else:
+            logger.error(f"Failed to get events: HTTP {response.status_code}")
+            return event_context.queryEvents(count, **filters)
+
     except Exception as e:
         logger.error(f"Failed to get events: {e}")
-        return eventContext.get_local_events(count)
\ No newline at end of file
+        return event_context.queryEvents(count, **filters)
+
+def _schedule_refresh(event_context: EventContext, key: tuple, count: int,
+                      filters: Dict[str, Any]) -> None:
+    """Refresh a stale filter set in the background, at most once at a time"""
+    task_key = (id(event_context), key)
+    if task_key in _refresh_tasks:
+        return
+    task = asyncio.create_task(fetch_events(count, event_context=event_context, **filters))
+    _refresh_tasks[task_key] = task
+    task.add_done_callback(lambda _: _refresh_tasks.pop(task_key, None))
@@ -0,0 +1,190 @@
+"""
+Event Prefetcher - Keeps each hosted bot's recent relevant events warm in memory
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from clients import http_clients
+from context import BotRegistry, BotRuntime
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+poll_lag = registry.gauge(
+    "prefetch_lag_seconds", "Seconds since the last successful prefetch poll of a bot", ("bot",)
+)
+delivery_lag = registry.gauge(
+    "prefetch_delivery_lag_seconds", "Age of the newest event when the prefetcher received it", ("bot",)
+)
+
+EVENTS_PATH = "/events/"
+DEFAULT_EVENT_TYPES = "chat_message,discovery_made,goal_progress"
+
+def storage_now_ms() -> float:
+    """
+    Now, on the clock storage stamps events with
+
+    Storage uses datetime.utcnow().timestamp(), which reads naive UTC as
+    local time, so its timestamps are shifted by the host's UTC offset;
+    comparing them with time.time() would add that offset to every lag.
+    """
+    return datetime.utcnow().timestamp() * 1000
+
+class EventPrefetcher:
+    """
+    Background poller that merges new events for every hosted bot into its EventContext
+
+    Each bot has a cursor: a timestamp watermark and how many matching events
+    at that timestamp were already read. Polls ask storage only for the
+    relevant event types from the cursor on (oldest first, skipping those
+    already read) and page forward while pages come back full, so a page
+    whose events all share one timestamp - a batch write - still advances.
+    Prompt building then reads the bot's EventContext with no network call.
+    """
+
+    def __init__(self, registry: BotRegistry, interval: float = 2.0,
+                 event_types: Optional[List[str]] = None, page_size: int = 100,
+                 max_pages: int = 5):
+        self.registry = registry
+        self.interval = interval
+        self.event_types = set(event_types or DEFAULT_EVENT_TYPES.split(","))
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._watermarks: Dict[str, int] = {}
+        self._skips: Dict[str, int] = {}
+        self._lastPoll: Dict[str, float] = {}
+        self._deliveryLagMs: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.failures = 0
+        registry.onRemove(self.forgetBot)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Event prefetcher started (interval={self.interval}s, types={sorted(self.event_types)})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Event prefetcher stopped")
+
+    async def prefetchBot(self, runtime: BotRuntime) -> int:
+        """Pull relevant events after the bot's cursor into its context"""
+        watermark = self._watermarks.get(runtime.name)
+        skip = self._skips.get(runtime.name, 0)
+        merged = 0
+
+        for _ in range(self.max_pages):
+            params = {"count": self.page_size, "botId": runtime.name, "order_desc": "false",
+                      "event_types": ",".join(sorted(self.event_types))}
+            if watermark is not None:
+                params["since"] = watermark
+                params["skip"] = skip
+            else:
+                # First poll: only the most recent page matters
+                params["order_desc"] = "true"
+
+            response = await http_clients.storage.get(EVENTS_PATH, params=params)
+            response.raise_for_status()
+            events = response.json()['events']
+
+            runtime.eventContext.updateEventMemory(events)
+            merged += len(events)
+
+            if events:
+                newest = max(e.get('timestamp', 0) for e in events)
+                if watermark is None or newest > watermark:
+                    lag = max(0.0, storage_now_ms() - newest)
+                    self._deliveryLagMs[runtime.name] = lag
+                    delivery_lag.set(lag / 1000, runtime.name)
+                if params["order_desc"] == "true":
+                    # The first poll read the newest page only; older events at its
+                    # timestamp are passed over like everything before it
+                    watermark, skip = newest + 1, 0
+                    break
+                # Events at the newest timestamp are the ones to skip next time
+                same = sum(1 for e in events if e.get('timestamp', 0) == newest)
+                skip = skip + same if newest == watermark else same
+                watermark = newest
+            if len(events) < self.page_size or params["order_desc"] == "true":
+                break
+
+        if self.registry.findBot(runtime.name) is not runtime:
+            # Removed while polling: leave no cursor or series behind
+            self.forgetBot(runtime)
+            return merged
+        if watermark is not None:
+            self._watermarks[runtime.name] = watermark
+            self._skips[runtime.name] = skip
+        self._lastPoll[runtime.name] = time.monotonic()
+        poll_lag.set(0, runtime.name)
+        return merged
+
+    def forgetBot(self, runtime: BotRuntime) -> None:
+        """Drop a removed bot's cursor and lag series"""
+        for state in (self._watermarks, self._skips, self._lastPoll, self._deliveryLagMs):
+            state.pop(runtime.name, None)
+        poll_lag.remove(runtime.name)
+        delivery_lag.remove(runtime.name)
+
+    def recentEvents(self, runtime: BotRuntime, count: int = 8) -> List[Dict[str, Any]]:
+        """Most recent relevant events for a bot, newest first, from local memory only"""
+        events = []
+        for event_type in self.event_types:
+            events.extend(runtime.eventContext.queryEvents(count, botId=runtime.name, event_type=event_type))
+        events.sort(key=lambda e: e.get('timestamp', 0), reverse=True)
+        return events[:count]
+
+    def getStats(self) -> Dict[str, Any]:
+        """Prefetch lag per bot: seconds since the last successful poll and newest-event delivery lag"""
+        now = time.monotonic()
+        bots = {}
+        for runtime in self.registry.runtimes():
+            name = runtime.name
+            lastPoll = self._lastPoll.get(name)
+            bots[name] = {
+                "lag_seconds": round(now - lastPoll, 3) if lastPoll is not None else None,
+                "delivery_lag_ms": self._deliveryLagMs.get(name),
+                "watermark": self._watermarks.get(name)
+            }
+        lags = [b["lag_seconds"] for b in bots.values() if b["lag_seconds"] is not None]
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "failures": self.failures,
+            "max_lag_seconds": max(lags) if lags else None,
+            "bots": bots
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            now = time.monotonic()
+            for name, lastPoll in self._lastPoll.items():
+                poll_lag.set(round(now - lastPoll, 3), name)
+            results = await asyncio.gather(
+                *(self.prefetchBot(runtime) for runtime in self.registry.runtimes()),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    self.failures += 1
+                    logger.debug(f"Prefetch failed: {result}")
+            await asyncio.sleep(self.interval)
+
+def create_prefetcher(registry: BotRegistry) -> EventPrefetcher:
+    """Prefetcher configured from the environment"""
+    return EventPrefetcher(
+        registry,
+        interval=float(os.getenv("PREFETCH_INTERVAL", "2")),
+        event_types=[t.strip() for t in os.getenv("PREFETCH_EVENT_TYPES", DEFAULT_EVENT_TYPES).split(",") if t.strip()],
+        page_size=int(os.getenv("PREFETCH_PAGE_SIZE", "100"))
+    )
@@ -1,2 +1,36 @@
-# Placeholder for Redis connector
-pass
+"""
+Redis Connector - Optional Redis client for bot logic state that should outlive the process
+"""
+
+import os
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[aioredis.Redis] = None
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """
+    Shared client for BOT_LOGIC_REDIS_URL, created on first use
+
+    Returns None when no URL is configured, so callers keep their state
+    in-process only.
+    """
+    global _client
+    url = os.getenv("BOT_LOGIC_REDIS_URL", "")
+    if _client is None and url:
+        _client = aioredis.Redis.from_url(
+            url, password=os.getenv("REDIS_PASSWORD") or None, decode_responses=True,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "100"))
+        )
+        logger.info(f"Bot logic Redis client: {url}")
+    return _client
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -3,7 +3,7 @@ import sys
 import subprocess
 
 def parse_args():
-    """Parse command line arguments like botName=Bob subPort=1"""
+    """Parse command line arguments like botName=Bob subPort=1 mode=prod workers=2"""
     params = {}
     for arg in sys.argv[1:]:
         if '=' in arg:
@@ -11,25 +11,61 @@ def parse_args():
             params[key] = value
     return params
 
+def build_command(params):
+    """
+    Build the uvicorn command line
+
+    One server hosts any number of bots (routed by /bots/{botName}/...), so a
+    single instance on BOT_LOGIC_PORT is enough. subPort is still accepted to
+    run a dedicated instance on 4000+subPort.
+
+    Raises:
+        SystemExit: For workers > 1, which bot state held per process cannot support
+    """
+    if 'port' in params:
+        port = int(params['port'])
+    elif 'subPort' in params or 'SUBPORT' in os.environ:
+        port = 4000 + int(params.get('subPort', os.environ.get('SUBPORT', '1')))
+    else:
+        port = int(os.environ.get('BOT_LOGIC_PORT', '4001'))
+
+    mode = params.get('mode', os.environ.get('BOT_LOGIC_MODE', 'dev'))
+    workers = int(params.get('workers', os.environ.get('BOT_LOGIC_WORKERS', '1')))
+    host = params.get('host', '0.0.0.0')
+
+    if mode == 'prod' and workers > 1:
+        # Each bot's versioned state (and its chat queue) lives in one process, and
+        # uvicorn spreads a bot's requests over all workers: a patch reaching a worker
+        # that did not see the previous update is answered with state_conflict
+        raise SystemExit(
+            f"workers={workers} is not supported: bot state is held per process. "
+            "Run workers=1, or one instance per group of bots with subPort=N"
+        )
+
+    cmd = [
+        sys.executable, '-m', 'uvicorn',
+        '--factory', 'main:create_app',
+        '--host', host,
+        '--port', str(port)
+    ]
+
+    if mode == 'prod':
+        cmd += ['--workers', str(workers), '--no-access-log']
+    else:
+        # --reload and --workers are mutually exclusive in uvicorn
+        cmd += ['--reload']
+
+    return cmd, port, mode, workers
+
 def main():
     params = parse_args()
-    
-    # Get subPort from args, env, or default
-    subport = int(params.get('subPort', os.environ.get('SUBPORT', '1')))
-    port = 4000 + subport
-    
-    print(f"Starting Bot Logic Service on port {port}")
+    cmd, port, mode, workers = build_command(params)
+
+    print(f"Starting Bot Logic Service on port {port} (mode={mode}, workers={workers if mode == 'prod' else 1})")
     if 'botName' in params:
         print(f"Associated with bot: {params['botName']}")
-    
-    cmd = [
-        sys.executable, '-m', 'uvicorn', 
-        'main:app', '--reload', 
-        '--host', '0.0.0.0', 
-        '--port', str(port)
-    ]
-    
+
     subprocess.run(cmd)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
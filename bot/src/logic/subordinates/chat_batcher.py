@@ -0,0 +1,102 @@
+"""
+Chat Batcher - Groups concurrent governor chat calls into /chat/batch requests
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+from clients import ServiceClient
+
+logger = logging.getLogger(__name__)
+
+class ChatBatcher:
+    """
+    Micro-batcher for chat payloads bound for the governor
+
+    The first payload opens a window of window_ms; everything submitted
+    before it closes (or until max_batch is reached) goes out as one
+    POST /chat/batch. Context values shared by every payload in the batch
+    are sent once as shared_context.
+    """
+
+    def __init__(self, client: ServiceClient, window_ms: float = 20.0, max_batch: int = 32):
+        self.client = client
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Batches in flight; the loop only holds weak references to tasks
+        self._sending: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a chat payload and wait for its result
+
+        Returns:
+            The governor's result for this payload: {response, confidence} or {error}
+
+        Raises:
+            Whatever the batch request raised (connection errors, timeouts, HTTP errors)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.create_task(self._send(pending))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, pending: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        payloads = [payload for payload, _ in pending]
+        shared, requests = split_shared_context(payloads)
+        try:
+            response = await self.client.post("/chat/batch", json={"requests": requests, "shared_context": shared})
+            response.raise_for_status()
+            results = response.json()["results"]
+            self.batches += 1
+            self.batched_requests += len(pending)
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            logger.error(f"Chat batch of {len(pending)} failed: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+def split_shared_context(payloads: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Hoist context entries that are identical in every payload into one shared context"""
+    contexts = [payload.get("context") or {} for payload in payloads]
+    if len(payloads) < 2:
+        return {}, payloads
+    shared = {
+        key: value for key, value in contexts[0].items()
+        if all(key in context and context[key] == value for context in contexts[1:])
+    }
+    if not shared:
+        return {}, payloads
+    requests = [
+        {**payload, "context": {k: v for k, v in context.items() if k not in shared}}
+        for payload, context in zip(payloads, contexts)
+    ]
+    return shared, requests
+
+def create_batcher(client: ServiceClient) -> Optional[ChatBatcher]:
+    """Batcher configured from the environment (None when CHAT_BATCH_WINDOW_MS is 0)"""
+    window_ms = float(os.getenv("CHAT_BATCH_WINDOW_MS", "0"))
+    if window_ms <= 0:
+        return None
+    return ChatBatcher(client, window_ms, int(os.getenv("CHAT_BATCH_MAX_SIZE", "32")))
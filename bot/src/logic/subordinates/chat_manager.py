@@ -5,28 +5,41 @@ Chat Manager - Handles chat interactions with LLM bridge
 import httpx
 import logging
 import os
+import json
+import time
 import textwrap
-from typing import Optional
-from dotenv import load_dotenv
-
-# from logic.context import getLocalEvents
-# recent = getLocalEvents(10)
-# from logic.memory import get_events
-# events = await get_events(20, event_type="player_joined")
-
-# Load environment variables
-load_dotenv()
+from typing import Optional, List
+from clients import http_clients, ServiceClient, CircuitOpenError
+from memory.conversations import ConversationStore, get_conversation_store
+from subordinates.chat_batcher import create_batcher
+from metrics import registry
+from tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+prompt_build_duration = registry.histogram(
+    "chat_prompt_build_seconds", "Time to build the bot prompt for a chat message"
+)
+
 class ChatManager:
-    def __init__(self, bridge_url: str = None):
+    def __init__(self, bridge_url: str = None, client: Optional[ServiceClient] = None,
+                 conversations: Optional[ConversationStore] = None):
         self.bridge_url = bridge_url or os.getenv("FASTAPI_BRIDGE_URL", "http://localhost:5000")
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Shared pooled client (lifecycle owned by the FastAPI lifespan)
+        self.client = client or (
+            http_clients.governor if bridge_url is None
+            else ServiceClient("governor", self.bridge_url)
+        )
+        # Optional micro-batching of concurrent chats into /chat/batch
+        self.batcher = create_batcher(self.client)
+        # Per-(bot, player) conversation windows, so callers only send the new message
+        self.conversations = conversations or get_conversation_store()
         logger.info(f"ChatManager initialized with bridge URL: {self.bridge_url}")
     
     async def handle_chat_message(self, message: str, context: Optional[dict] = None, 
-                                 player_username: str = "Player", bot_username: str = "Bot") -> str:
+                                 player_username: str = "Player", bot_username: str = "Bot",
+                                 recent_events: Optional[List[dict]] = None,
+                                 priority: Optional[int] = None) -> str:
         """
         Send a chat message to the FastAPI bridge for LLM processing
         
@@ -35,6 +48,8 @@ class ChatManager:
             context: Optional context about the bot's current state
             player_username: Username of the player asking the question
             bot_username: Username of the bot responding
+            recent_events: Prefetched recent events for the bot (read locally, newest first)
+            priority: Chat priority class, lets the governor pick a larger model for direct requests
             
         Returns:
             LLM-generated response string
@@ -49,24 +64,48 @@ class ChatManager:
             # 3. A request for a conversation (e.g. "How's your day going?") - chitchat
             # 4. An unclear request (e.g. "Hello") - store and gather more context
 
+            # History sent by older callers is merged into the local conversation window
+            context = dict(context or {})
+            legacy_memory = context.pop("memory", None)
+            if isinstance(legacy_memory, list):
+                await self.conversations.merge(bot_username, player_username, legacy_memory)
+            
             # Build specialized Minecraft bot prompt
-            specialized_prompt = self.build_minecraft_bot_prompt(
-                message, context, player_username, bot_username
-            )
+            with prompt_build_duration.time(), tracer.span("chat.prompt_build"):
+                specialized_prompt = self.build_minecraft_bot_prompt(
+                    message, context, player_username, bot_username, recent_events
+                )
             
-            # Prepare the request payload
+            # Forward every window entry the governor has not seen yet (it renders the
+            # conversation from its memory), then record the new message
+            forward = await self.conversations.takeUnforwarded(bot_username, player_username)
+            await self.conversations.append(bot_username, player_username, [
+                {"username": player_username, "message": message, "timestamp": int(time.time() * 1000)}
+            ])
+            if forward:
+                context["memory"] = forward
             payload = {
                 "message": specialized_prompt,
-                "context": context or {},
+                "context": context,
                 "player_username": player_username,
-                "bot_username": bot_username
+                "bot_username": bot_username,
+                "query": message,
+                "bot_id": bot_username,
+                "player": player_username,
+                "priority": priority
             }
             
-            # Send request to FastAPI bridge
-            response = await self.client.post(
-                f"{self.bridge_url}/chat",
-                json=payload
-            )
+            # Send request to FastAPI bridge (batched with other bots' chats when enabled)
+            if self.batcher is not None:
+                result = await self.batcher.submit(payload)
+                if "error" in result:
+                    logger.error(f"Batched bridge request failed: {result['error']}")
+                    return "Sorry, I'm having trouble thinking right now."
+                cleaned_response = self.clean_bot_response(result.get("response", "I'm not sure how to respond to that."), bot_username)
+                await self.record_reply(bot_username, player_username, cleaned_response)
+                return cleaned_response
+
+            response = await self.client.post("/chat", json=payload)
             
             logger.info(f"Bridge response status: {response.status_code}")
             
@@ -76,6 +115,7 @@ class ChatManager:
                 
                 # Clean up the response to be more bot-like
                 cleaned_response = self.clean_bot_response(llm_response, bot_username)
+                await self.record_reply(bot_username, player_username, cleaned_response)
                 
                 logger.info(f"LLM response: {cleaned_response}")
                 return cleaned_response
@@ -83,6 +123,9 @@ class ChatManager:
                 logger.error(f"Bridge request failed: {response.status_code} - {response.text}")
                 return "Sorry, I'm having trouble thinking right now."
                 
+        except CircuitOpenError:
+            logger.error(f"Bridge circuit open, skipping call to {self.bridge_url}")
+            return "Sorry, my brain isn't connected right now."
         except httpx.ConnectError:
             logger.error(f"Could not connect to bridge at {self.bridge_url}")
             return "Sorry, my brain isn't connected right now."
@@ -93,12 +136,18 @@ class ChatManager:
             logger.error(f"Error handling chat message: {e}")
             return "Something went wrong with my thinking process."
     
+    async def record_reply(self, bot_username: str, player_username: str, reply: str) -> None:
+        """Append the bot's reply to the conversation window"""
+        await self.conversations.append(bot_username, player_username, [
+            {"username": bot_username, "message": reply, "timestamp": int(time.time() * 1000)}
+        ])
+    
     def build_minecraft_bot_prompt(self, message: str, context: dict, 
-                                  player_username: str, bot_username: str) -> str:
+                                  player_username: str, bot_username: str,
+                                  recent_events: Optional[List[dict]] = None) -> str:
         """
         Build a specialized prompt for the Minecraft bot subordinate
         """
-        print(context)
         prompt = textwrap.dedent(f"""\
             You are {bot_username}, an AI-powered Minecraft bot. You are currently in a Minecraft world and a player named {player_username} is talking to you.
 
@@ -142,29 +191,45 @@ class ChatManager:
                 if players:
                     prompt += f"\n- Nearby players: {', '.join(players)}"
 
-        # Add conversation context
-        memory_str = ""
-        if context and "memory" in context and isinstance(context["memory"], list):
-            memory_str = "MEMORY (Previous messages):\n"
-            for entry in context["memory"]:
-                if isinstance(entry, dict) and "username" in entry and "message" in entry:
-                    timestamp = entry.get("timestamp", "")
-                    timestamp_str = f" at {timestamp}" if timestamp else ""
-                    memory_str += f"- {entry['username']}{timestamp_str}: {entry['message']}\n"
+        # Conversation memory (this chat's window included) is consolidated and added by the governor
+        prompt += "\n\n"
 
-        prompt += f"\n{memory_str}\n"
+        # Add recent events (oldest first so they read as a timeline)
+        if recent_events:
+            prompt += "RECENT EVENTS:\n"
+            for event in reversed(recent_events):
+                prompt += f"- {self.format_event(event)}\n"
 
-        # Add world knowledge
-        prompt += f"\nKNOWLEDGE:\n{context.get('knowledge', '')}"
+        # Add world knowledge supplied by the caller (the governor adds retrieved knowledge itself)
+        if context and context.get("knowledge"):
+            prompt += f"\nKNOWLEDGE:\n{context['knowledge']}\n"
 
-        # Add current conversation
+        # Add the current message; earlier turns come from the governor's conversation memory
+        prompt += "CONVERSATION (Current conversation):\n"
         prompt += textwrap.dedent(f"""\
-            CONVERSATION (Current conversation):
             {player_username}: {message}
             {bot_username}:""")
 
         return prompt
     
+    def format_event(self, event: dict) -> str:
+        """
+        Summarize an event in one short prompt line
+        """
+        data = event.get("data") or {}
+        event_type = event.get("type", "event")
+        if event_type == "chat_message" and "message" in data:
+            line = f"{data.get('username', 'someone')} said: {data['message']}"
+            if data.get("response"):
+                line += f" (you replied: {data['response']})"
+            return line
+        if event_type == "discovery_made":
+            return f"Discovered {data.get('discovery', 'something')}"
+        if event_type == "goal_progress":
+            milestone = f" - {data['milestone']}" if data.get("milestone") else ""
+            return f"Goal {data.get('goal', '?')}{milestone}"
+        return f"{event_type}: {json.dumps(data, default=str)[:80]}"
+
     def clean_bot_response(self, response: str, bot_username: str) -> str:
         """
         Clean up the LLM response to be more appropriate for a Minecraft bot
@@ -187,17 +252,24 @@ class ChatManager:
     
     async def close(self):
         """Close the HTTP client"""
-        await self.client.aclose()
+        await self.client.close()
+
+# Global instance, created on first use (the service wires it in its lifespan)
+_chat_manager: Optional[ChatManager] = None
 
-# Global instance for easy access
-chat_manager = ChatManager()
+def get_chat_manager() -> ChatManager:
+    """Process-wide chat manager using the shared governor client"""
+    global _chat_manager
+    if _chat_manager is None:
+        _chat_manager = ChatManager()
+    return _chat_manager
 
 async def handle_chat_message(message: str, context: Optional[dict] = None, 
                              player_username: str = "Player", bot_username: str = "Bot") -> str:
     """
     Convenience function for handling chat messages
     """
-    return await chat_manager.handle_chat_message(message, context, player_username, bot_username)
+    return await get_chat_manager().handle_chat_message(message, context, player_username, bot_username)
 
 
 
@@ -0,0 +1,222 @@
+"""
+Chat Scheduler - Per-bot admission control and prioritization for chat replies
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower runs first)
+PRIORITY_DIRECT = 0     # Message addresses the bot by name
+PRIORITY_ENGAGED = 1    # Player is nearby and looking at the bot
+PRIORITY_NEARBY = 2     # Player is nearby
+PRIORITY_LOOKING = 3    # Player is looking at the bot from afar
+PRIORITY_AMBIENT = 4    # Everything else
+
+ChatHandler = Callable[[str], Awaitable[str]]
+
+def chat_priority(message: str, bot_username: str, is_nearby: bool = False,
+                  is_looking: bool = False) -> int:
+    """Rank a chat message using the agent's proximity and eye-contact data"""
+    name = bot_username.lower()
+    lowered = message.lower()
+    if name and (f"@{name}" in lowered or lowered.startswith(name)):
+        return PRIORITY_DIRECT
+    if is_nearby and is_looking:
+        return PRIORITY_ENGAGED
+    if is_nearby:
+        return PRIORITY_NEARBY
+    if is_looking:
+        return PRIORITY_LOOKING
+    return PRIORITY_AMBIENT
+
+class ChatJob:
+    """A queued chat message waiting for an LLM slot"""
+
+    def __init__(self, seq: int, player: str, message: str, priority: int, handler: ChatHandler):
+        self.seq = seq
+        self.player = player
+        self.message = message
+        self.priority = priority
+        self.handler = handler
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        # The reply runs in the submitter's context so its spans join the request's trace
+        self.context = contextvars.copy_context()
+        self.queue_span = tracer.start_span("chat.queue", player=player, priority=priority)
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.active = True
+
+    def resolve(self, status: str, response: Optional[str] = None) -> None:
+        self.active = False
+        if self.queue_span is not None:
+            # Dropped before it ran (superseded, stale, overflow)
+            self.queue_span.set("outcome", status)
+            tracer.end_span(self.queue_span)
+            self.queue_span = None
+        if not self.future.done():
+            self.future.set_result({
+                "status": status,
+                "response": response,
+                "wait_ms": round(((self.started_at or time.monotonic()) - self.enqueued_at) * 1000, 1)
+            })
+
+class ChatScheduler:
+    """
+    Bounded per-bot chat queue
+
+    At most max_concurrent replies run at once; the rest wait in a priority
+    heap. Each player has at most one queued message: a newer message from the
+    same player supersedes (and by default is merged with) the queued one.
+    Messages that waited longer than max_wait are dropped instead of answered.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 32,
+                 max_wait: float = 30.0, merge_superseded: bool = True):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.merge_superseded = merge_superseded
+
+        self._heap: List[tuple] = []
+        self._pending: Dict[str, ChatJob] = {}
+        self._running = 0
+        # Running jobs; the loop only holds weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self._seq = itertools.count()
+        self._waits: Deque[float] = deque(maxlen=500)
+        self.counters = {
+            "submitted": 0,
+            "completed": 0,
+            "superseded": 0,
+            "stale": 0,
+            "overflow": 0,
+            "errors": 0
+        }
+
+    async def submit(self, player: str, message: str, priority: int,
+                     handler: ChatHandler) -> Dict[str, Any]:
+        """
+        Queue a chat message and wait for its outcome
+
+        Args:
+            player: Player that sent the message
+            message: Chat message text
+            priority: Priority class (see PRIORITY_*)
+            handler: Coroutine that produces the reply for a message
+
+        Returns:
+            Dict with status ('ok', 'superseded', 'stale', 'overflow', 'error'),
+            the response text (None unless answered) and the queue wait in ms
+        """
+        self.counters["submitted"] += 1
+
+        previous = self._pending.pop(player, None)
+        if previous is not None:
+            if self.merge_superseded:
+                message = f"{previous.message}\n{message}"
+                priority = min(priority, previous.priority)
+            previous.resolve("superseded")
+            self.counters["superseded"] += 1
+
+        job = ChatJob(next(self._seq), player, message, priority, handler)
+        if len(self._pending) >= self.max_queue and not self._make_room(job):
+            job.resolve("overflow")
+            self.counters["overflow"] += 1
+            return job.future.result()
+
+        self._pending[player] = job
+        heapq.heappush(self._heap, (job.priority, job.seq, job))
+        self._dispatch()
+        return await job.future
+
+    def close(self) -> None:
+        """Drop everything still queued and cancel the replies being generated"""
+        for job in list(self._pending.values()):
+            job.resolve("dropped")
+        self._pending.clear()
+        self._heap.clear()
+        for task in list(self._tasks):
+            task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        now = time.monotonic()
+        oldest = max((now - job.enqueued_at for job in self._pending.values()), default=0.0)
+        return {
+            "queue_depth": len(self._pending),
+            "running": self._running,
+            "max_concurrent": self.max_concurrent,
+            "oldest_wait_ms": round(oldest * 1000, 1),
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[max(0, int(len(waits) * 0.95) - 1)] * 1000, 1) if waits else 0.0,
+            **self.counters
+        }
+
+    def _make_room(self, job: ChatJob) -> bool:
+        """Evict the worst queued job if the new one outranks it"""
+        worst = max(self._pending.values(), key=lambda j: (j.priority, j.seq))
+        if job.priority >= worst.priority:
+            return False
+        del self._pending[worst.player]
+        worst.resolve("overflow")
+        self.counters["overflow"] += 1
+        return True
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrent and self._heap:
+            _, _, job = heapq.heappop(self._heap)
+            if not job.active:
+                continue
+            self._pending.pop(job.player, None)
+
+            job.started_at = time.monotonic()
+            waited = job.started_at - job.enqueued_at
+            self._waits.append(waited)
+            if waited > self.max_wait:
+                logger.info(f"Dropping stale chat from {job.player} ({waited:.1f}s old)")
+                job.resolve("stale")
+                self.counters["stale"] += 1
+                continue
+
+            self._running += 1
+            tracer.end_span(job.queue_span)
+            job.queue_span = None
+            task = asyncio.create_task(self._run(job), context=job.context)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: ChatJob) -> None:
+        try:
+            response = await job.handler(job.message)
+            job.resolve("ok", response)
+            self.counters["completed"] += 1
+        except asyncio.CancelledError:
+            job.resolve("dropped")
+            raise
+        except Exception as e:
+            logger.error(f"Chat job for {job.player} failed: {e}")
+            job.resolve("error")
+            self.counters["errors"] += 1
+        finally:
+            self._running -= 1
+            self._dispatch()
+
+def create_scheduler() -> ChatScheduler:
+    """Scheduler configured from the environment"""
+    return ChatScheduler(
+        max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", "2")),
+        max_queue=int(os.getenv("CHAT_MAX_QUEUE", "32")),
+        max_wait=float(os.getenv("CHAT_MAX_WAIT", "30")),
+        merge_superseded=os.getenv("CHAT_MERGE_SUPERSEDED", "true").lower() == "true"
+    )
@@ -0,0 +1,491 @@
+"""
+Goal Manager - Per-bot goal scheduling with milestone dependencies, persisted to the storage service
+"""
+
+import os
+import time
+import asyncio
+import logging
+from uuid import uuid4
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from clients import http_clients
+
+logger = logging.getLogger(__name__)
+
+GOALS_PATH = "/goals/"
+
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+OPEN_STATUSES = ("active", "pending")
+STATUSES = ("active", "pending", "completed", "archived")
+
+class GoalHeap:
+    """
+    Binary min-heap of goal ids with a position index
+
+    Keys are (priority rank, createdAt, tiebreak), so the most urgent,
+    then oldest, goal is on top. The index lets a goal's priority change
+    or the goal leave the heap in O(log n) without a rebuild.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[Tuple[int, int, int], str]] = []
+        self._position: Dict[str, int] = {}
+        self._tiebreak = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, goal_id: str) -> bool:
+        return goal_id in self._position
+
+    def push(self, goal_id: str, rank: int, createdAt: int) -> None:
+        """Add a goal, or move it when already present"""
+        if goal_id in self._position:
+            self.update(goal_id, rank, createdAt)
+            return
+        self._tiebreak += 1
+        self._heap.append(((rank, createdAt, self._tiebreak), goal_id))
+        self._position[goal_id] = len(self._heap) - 1
+        self._siftUp(len(self._heap) - 1)
+
+    def update(self, goal_id: str, rank: int, createdAt: int) -> None:
+        index = self._position[goal_id]
+        key = (rank, createdAt, self._heap[index][0][2])
+        self._heap[index] = (key, goal_id)
+        self._siftUp(index)
+        self._siftDown(self._position[goal_id])
+
+    def remove(self, goal_id: str) -> bool:
+        index = self._position.pop(goal_id, None)
+        if index is None:
+            return False
+        last = self._heap.pop()
+        if index < len(self._heap):
+            self._heap[index] = last
+            self._position[last[1]] = index
+            self._siftUp(index)
+            self._siftDown(self._position[last[1]])
+        return True
+
+    def peek(self) -> Optional[str]:
+        return self._heap[0][1] if self._heap else None
+
+    def ordered(self, count: Optional[int] = None) -> List[str]:
+        """Goal ids in priority order (sorts a copy, the heap is untouched)"""
+        entries = sorted(self._heap)
+        return [goal_id for _, goal_id in entries[:count]]
+
+    def _siftUp(self, index: int) -> None:
+        heap = self._heap
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent][0] <= entry[0]:
+                break
+            heap[index] = heap[parent]
+            self._position[heap[index][1]] = index
+            index = parent
+        heap[index] = entry
+        self._position[entry[1]] = index
+
+    def _siftDown(self, index: int) -> None:
+        heap = self._heap
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if entry[0] <= heap[child][0]:
+                break
+            heap[index] = heap[child]
+            self._position[heap[index][1]] = index
+            index = child
+        heap[index] = entry
+        self._position[entry[1]] = index
+
+class MilestonePlan:
+    """
+    Dependency graph of one goal's milestones
+
+    Each milestone may list ids of milestones it depends on (dependsOn).
+    Open milestones keep a count of unmet dependencies; completing one
+    decrements its dependents, so readiness is maintained in time
+    proportional to the edges touched rather than rescanned.
+    """
+
+    def __init__(self, milestones: List[Dict[str, Any]]):
+        self.milestones = {milestone['id']: milestone for milestone in milestones}
+        self._dependents: Dict[str, List[str]] = {milestone_id: [] for milestone_id in self.milestones}
+        self._unmet: Dict[str, int] = {}
+        self._ready: Dict[str, None] = {}  # insertion-ordered set
+        for milestone_id, milestone in self.milestones.items():
+            dependencies = milestone.get('dependsOn') or []
+            for dependency in dependencies:
+                if dependency not in self.milestones:
+                    raise ValueError(f"Milestone '{milestone_id}' depends on unknown milestone '{dependency}'")
+                self._dependents[dependency].append(milestone_id)
+            if milestone.get('status') != "completed":
+                self._unmet[milestone_id] = sum(
+                    1 for dependency in dependencies if self.milestones[dependency].get('status') != "completed"
+                )
+        self._checkAcyclic()
+        for milestone_id, unmet in self._unmet.items():
+            if unmet == 0:
+                self._ready[milestone_id] = None
+
+    def ready(self) -> List[Dict[str, Any]]:
+        """Open milestones whose dependencies are all completed, in the order they became ready"""
+        return [self.milestones[milestone_id] for milestone_id in self._ready]
+
+    def complete(self, milestone_id: str, timestamp: int) -> List[str]:
+        """
+        Mark a milestone completed
+
+        Returns:
+            Ids of milestones that became ready
+
+        Raises:
+            KeyError: Unknown milestone
+            ValueError: The milestone still has unmet dependencies
+        """
+        milestone = self.milestones[milestone_id]
+        if milestone.get('status') == "completed":
+            return []
+        if milestone_id not in self._ready:
+            raise ValueError(f"Milestone '{milestone_id}' has unmet dependencies")
+        milestone['status'] = "completed"
+        milestone['completedAt'] = timestamp
+        del self._ready[milestone_id]
+        del self._unmet[milestone_id]
+        unlocked = []
+        for dependent in self._dependents[milestone_id]:
+            if dependent in self._unmet:
+                self._unmet[dependent] -= 1
+                if self._unmet[dependent] == 0:
+                    self._ready[dependent] = None
+                    unlocked.append(dependent)
+        return unlocked
+
+    def progress(self) -> int:
+        if not self.milestones:
+            return 0
+        return round((len(self.milestones) - len(self._unmet)) * 100 / len(self.milestones))
+
+    def done(self) -> bool:
+        return bool(self.milestones) and not self._unmet
+
+    def _checkAcyclic(self) -> None:
+        indegree = {milestone_id: len(self.milestones[milestone_id].get('dependsOn') or [])
+                    for milestone_id in self.milestones}
+        queue = [milestone_id for milestone_id, count in indegree.items() if count == 0]
+        visited = 0
+        while queue:
+            milestone_id = queue.pop()
+            visited += 1
+            for dependent in self._dependents[milestone_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+        if visited != len(self.milestones):
+            raise ValueError("Milestone dependencies form a cycle")
+
+class GoalManager:
+    """
+    Goals of one bot
+
+    Open goals (active or pending) sit in a GoalHeap, so the next goal to
+    work on is read in O(1) and reprioritized in O(log n); each goal has a
+    MilestonePlan for its ready milestones. A goal completes when its last
+    milestone does. Changes are recorded for GoalSync, which persists new
+    goals as full records and later changes as batched progress updates.
+    """
+
+    def __init__(self, botId: str):
+        self.botId = botId
+        self.goals: Dict[str, Dict[str, Any]] = {}
+        self.loaded = False
+        self._heap = GoalHeap()
+        self._plans: Dict[str, MilestonePlan] = {}
+        self._new: Set[str] = set()
+        self._updates: Dict[str, Dict[str, Any]] = {}
+        self._deleted: Set[str] = set()
+
+    def add_goal(self, goal: Dict[str, Any], persist: bool = True) -> Dict[str, Any]:
+        """
+        Add a goal (TypeScript Goal shape; milestones may carry dependsOn)
+
+        Raises:
+            ValueError: Invalid priority or status, or bad milestone dependencies
+        """
+        now = int(time.time() * 1000)
+        record = {
+            'id': goal.get('id') or str(uuid4()),
+            'botId': self.botId,
+            'name': goal.get('name', ''),
+            'type': goal.get('type', "goal"),
+            'priority': goal.get('priority', "medium"),
+            'status': goal.get('status', "pending"),
+            'progress': goal.get('progress', 0),
+            'createdAt': goal.get('createdAt') or now,
+            **{key: goal[key] for key in ('completedAt', 'updatedAt', 'execute') if goal.get(key) is not None}
+        }
+        if record['priority'] not in PRIORITY_RANK:
+            raise ValueError(f"Unknown priority '{record['priority']}'")
+        if record['status'] not in STATUSES:
+            raise ValueError(f"Unknown status '{record['status']}'")
+        record['milestones'] = [
+            {
+                'type': "goal",
+                'priority': record['priority'],
+                'status': "pending",
+                'createdAt': now,
+                'dependsOn': [],
+                **milestone,
+                'id': milestone.get('id') or str(uuid4()),
+                'parentGoalId': record['id']
+            }
+            for milestone in goal.get('milestones') or []
+        ]
+        plan = MilestonePlan(record['milestones'])
+
+        if record['id'] in self.goals:
+            self.remove_goal(record['id'], persist=False)
+        self.goals[record['id']] = record
+        self._plans[record['id']] = plan
+        if plan.milestones:
+            record['progress'] = plan.progress()
+        if record['status'] in OPEN_STATUSES:
+            self._heap.push(record['id'], PRIORITY_RANK[record['priority']], record['createdAt'])
+        if persist:
+            self._new.add(record['id'])
+            self._updates.pop(record['id'], None)
+        return record
+
+    def next_goal(self) -> Optional[Dict[str, Any]]:
+        """The most urgent open goal (oldest first within a priority)"""
+        goal_id = self._heap.peek()
+        return self.goals[goal_id] if goal_id else None
+
+    def open_goals(self, count: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Open goals in the order they would be worked on"""
+        return [self.goals[goal_id] for goal_id in self._heap.ordered(count)]
+
+    def get_goals(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status in OPEN_STATUSES:
+            return [goal for goal in self.open_goals() if goal['status'] == status]
+        if status is None:
+            return self.open_goals() + [goal for goal in self.goals.values() if goal['status'] not in OPEN_STATUSES]
+        return [goal for goal in self.goals.values() if goal['status'] == status]
+
+    def ready_milestones(self, goal_id: str) -> List[Dict[str, Any]]:
+        """Milestones of a goal that can be worked on now"""
+        return self._plans[goal_id].ready()
+
+    def set_priority(self, goal_id: str, priority: str) -> Dict[str, Any]:
+        if priority not in PRIORITY_RANK:
+            raise ValueError(f"Unknown priority '{priority}'")
+        goal = self.goals[goal_id]
+        goal['priority'] = priority
+        if goal_id in self._heap:
+            self._heap.update(goal_id, PRIORITY_RANK[priority], goal['createdAt'])
+        self._recordUpdate(goal_id, {'priority': priority})
+        return goal
+
+    def set_status(self, goal_id: str, status: str) -> Dict[str, Any]:
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status '{status}'")
+        goal = self.goals[goal_id]
+        goal['status'] = status
+        if status in OPEN_STATUSES:
+            self._heap.push(goal_id, PRIORITY_RANK[goal['priority']], goal['createdAt'])
+        else:
+            self._heap.remove(goal_id)
+            if status == "completed":
+                goal['completedAt'] = int(time.time() * 1000)
+                goal['progress'] = 100
+        self._recordUpdate(goal_id, {'status': status})
+        return goal
+
+    def complete_milestone(self, goal_id: str, milestone_id: str) -> Dict[str, Any]:
+        """
+        Complete a ready milestone, completing the goal with its last one
+
+        Returns:
+            {'goal', 'unlocked': milestones that became ready}
+
+        Raises:
+            KeyError: Unknown goal or milestone
+            ValueError: The milestone still has unmet dependencies
+        """
+        goal = self.goals[goal_id]
+        plan = self._plans[goal_id]
+        unlocked = plan.complete(milestone_id, int(time.time() * 1000))
+        goal['progress'] = plan.progress()
+        if goal['status'] == "pending":
+            goal['status'] = "active"
+        self._recordUpdate(goal_id, {'milestones': {milestone_id: "completed"}, 'progress': goal['progress'],
+                                     'status': goal['status']})
+        if plan.done() and goal['status'] != "completed":
+            self.set_status(goal_id, "completed")
+        return {'goal': goal, 'unlocked': [plan.milestones[m] for m in unlocked]}
+
+    def remove_goal(self, goal_id: str, persist: bool = True) -> bool:
+        goal = self.goals.pop(goal_id, None)
+        if goal is None:
+            return False
+        self._heap.remove(goal_id)
+        self._plans.pop(goal_id, None)
+        self._new.discard(goal_id)
+        self._updates.pop(goal_id, None)
+        if persist:
+            self._deleted.add(goal_id)
+        return True
+
+    def take_changes(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+        """(new goal records, progress updates, deleted goal ids) since the last call"""
+        created = [self.goals[goal_id] for goal_id in self._new if goal_id in self.goals]
+        updates = list(self._updates.values())
+        deleted = list(self._deleted)
+        self._new.clear()
+        self._updates.clear()
+        self._deleted.clear()
+        return created, updates, deleted
+
+    def restore_changes(self, created: List[Dict[str, Any]], updates: List[Dict[str, Any]],
+                        deleted: List[str]) -> None:
+        """Put back changes that could not be persisted"""
+        self._deleted.update(goal_id for goal_id in deleted if goal_id not in self.goals)
+        for goal in created:
+            if goal['id'] in self.goals:
+                self._new.add(goal['id'])
+        for update in updates:
+            if update['id'] in self.goals and update['id'] not in self._new:
+                self._recordUpdate(update['id'], {key: value for key, value in update.items() if key != 'id'})
+
+    def getStats(self) -> Dict[str, Any]:
+        counts = {status: 0 for status in STATUSES}
+        for goal in self.goals.values():
+            counts[goal['status']] = counts.get(goal['status'], 0) + 1
+        goal = self.next_goal()
+        return {"goals": counts, "next_goal": goal['id'] if goal else None,
+                "unsynced": len(self._new) + len(self._updates) + len(self._deleted)}
+
+    def _recordUpdate(self, goal_id: str, fields: Dict[str, Any]) -> None:
+        if goal_id in self._new:
+            return  # the full record is sent anyway
+        update = self._updates.setdefault(goal_id, {'id': goal_id})
+        milestones = fields.get('milestones')
+        if milestones:
+            update.setdefault('milestones', {}).update(milestones)
+        update.update({key: value for key, value in fields.items() if key != 'milestones'})
+
+class GoalSync:
+    """
+    Background writer that persists hosted bots' goal changes to the storage service
+
+    Each tick loads the open goals of bots seen for the first time, then
+    sends all new goals in one POST /goals/batch and all other changes in
+    one PATCH /goals/progress (removed goals are deleted one by one).
+    Changes that fail to send are kept for the next tick, and so are the
+    unsent changes of runtimes the registry drops (removed or evicted).
+    """
+
+    def __init__(self, registry, interval: float = 2.0):
+        self.registry = registry
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.failures = 0
+        # (new goals, updates, deleted ids) taken from runtimes dropped before they were sent
+        self._released: List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]] = []
+        registry.onRemove(self.release)
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Goal sync started (interval={self.interval}s)")
+
+    async def stop(self) -> None:
+        """Stop the loop and send what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.flush()
+
+    def release(self, runtime) -> None:
+        """Keep a dropped runtime's unsent changes for the next flush (nothing is sent when not running)"""
+        if self._task is None:
+            return
+        created, updates, deleted = runtime.goals.take_changes()
+        if created or updates or deleted:
+            self._released.append((created, updates, deleted))
+
+    async def load(self, manager: GoalManager) -> int:
+        """Load a bot's open goals from storage (local goals with the same id win)"""
+        loaded = 0
+        for status in OPEN_STATUSES:
+            response = await http_clients.storage.get(GOALS_PATH, params={"botId": manager.botId, "status": status,
+                                                                          "count": 1000})
+            response.raise_for_status()
+            for goal in response.json()['goals']:
+                if goal['id'] not in manager.goals:
+                    manager.add_goal(goal, persist=False)
+                    loaded += 1
+        manager.loaded = True
+        return loaded
+
+    async def flush(self) -> Dict[str, int]:
+        """Persist pending changes of every hosted bot and of dropped ones"""
+        pending = [(runtime.goals, *runtime.goals.take_changes()) for runtime in self.registry.runtimes()]
+        pending += [(None, *changes) for changes in self._released]
+        self._released = []
+        created = [goal for _, goals, _, _ in pending for goal in goals]
+        updates = [update for _, _, bot_updates, _ in pending for update in bot_updates]
+        deleted = [goal_id for _, _, _, bot_deleted in pending for goal_id in bot_deleted]
+        try:
+            for goal_id in deleted:
+                response = await http_clients.storage.request("DELETE", f"{GOALS_PATH}{goal_id}")
+                if response.status_code != 404:
+                    response.raise_for_status()
+            if created:
+                response = await http_clients.storage.post(f"{GOALS_PATH}batch", json={"goals": created})
+                response.raise_for_status()
+            if updates:
+                response = await http_clients.storage.request("PATCH", f"{GOALS_PATH}progress",
+                                                              json={"updates": updates})
+                response.raise_for_status()
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Goal sync failed, keeping {len(created)} new goals and {len(updates)} updates: {e}")
+            for manager, goals, bot_updates, bot_deleted in pending:
+                if manager is None:
+                    self._released.append((goals, bot_updates, bot_deleted))
+                else:
+                    manager.restore_changes(goals, bot_updates, bot_deleted)
+            return {"created": 0, "updated": 0, "deleted": 0}
+        return {"created": len(created), "updated": len(updates), "deleted": len(deleted)}
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._released:
+                # A dropped bot that is back loads its goals only once its last changes are stored
+                await self.flush()
+            for runtime in self.registry.runtimes():
+                if not runtime.goals.loaded:
+                    try:
+                        await self.load(runtime.goals)
+                    except Exception as e:
+                        logger.debug(f"Failed to load goals for {runtime.name}: {e}")
+            await self.flush()
+
+def create_goal_sync(registry) -> GoalSync:
+    """GoalSync from GOAL_SYNC_INTERVAL (0 keeps goals in memory only)"""
+    return GoalSync(registry, interval=float(os.getenv("GOAL_SYNC_INTERVAL", "2")))
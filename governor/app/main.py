@@ -3,37 +3,100 @@ FastAPI Bridge - Main Application
 Handles LLM integration and RAG capabilities
 """
 
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import decision, memory, status
+from fastapi.responses import PlainTextResponse
+from app.routes import decision, memory, status, rag, severity
+from app.services.llm_client import get_backend
+from app.services.rag_engine import get_rag_engine
+from app.services.memory_bridge import get_memory_bridge
+from app.utils.metrics import MetricsMiddleware, render_metrics, route_template, CONTENT_TYPE
+from app.utils.tracing import TracingMiddleware, init_tracing, tracer
 
-app = FastAPI(title="FastAPI Bridge", version="1.0.0")
+logger = logging.getLogger(__name__)
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def warm_up() -> None:
+    """
+    Build the slow-to-create services ahead of the first request (blocking)
 
-# Include routers
-app.include_router(decision.router, prefix="/api/v1")
-app.include_router(memory.router, prefix="/api/v1")
-app.include_router(status.router, prefix="/api/v1")
+    Loads the persisted vector store and lets the LLM backend import its
+    client library, which for openai is a third of a second.
+    """
+    started = time.perf_counter()
+    try:
+        get_rag_engine()
+        get_backend().warm_up()
+        logger.info(f"Services warmed up in {(time.perf_counter() - started) * 1000:.0f}ms")
+    except Exception as e:
+        logger.warning(f"Warm-up failed, services will initialize on first use: {e}")
 
-@app.get("/")
-async def root():
-    return {"message": "FastAPI Bridge is running"}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: consolidate conversation memory in the background and warm
+    # the heavy services off the event loop, so /health answers right away
+    await get_memory_bridge().start()
+    warming = asyncio.create_task(asyncio.to_thread(warm_up))
+    yield
+    # Shutdown: stop consolidation and persist the vector store
+    await warming
+    await get_memory_bridge().stop()
+    get_rag_engine().close()
+    tracer.close()
 
-@app.get("/health")
-async def health_check():
-    return {"status": "ok", "service": "fastapi-bridge"}
+def create_app() -> FastAPI:
+    """
+    Build the governor application
 
-# Simplified chat endpoint at root level for easy access
-app.include_router(decision.router)
+    Used as the uvicorn entry point (uvicorn --factory app.main:create_app).
+    Services stay lazy singletons; the lifespan starts and warms them.
+    """
+    app = FastAPI(title="FastAPI Bridge", version="1.0.0", lifespan=lifespan)
+    init_tracing("governor")
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Per-route latency histograms and in-flight requests
+    app.add_middleware(MetricsMiddleware)
+
+    # Request spans, continuing the caller's trace when a traceparent header is sent
+    app.add_middleware(TracingMiddleware, route_name=route_template)
+
+    # Include routers
+    app.include_router(decision.router, prefix="/api/v1")
+    app.include_router(memory.router, prefix="/api/v1")
+    app.include_router(status.router, prefix="/api/v1")
+    app.include_router(rag.router, prefix="/api/v1")
+    app.include_router(severity.router, prefix="/api/v1")
+
+    @app.get("/")
+    async def root():
+        return {"message": "FastAPI Bridge is running"}
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "ok", "service": "fastapi-bridge"}
+
+    @app.get("/metrics")
+    async def metrics():
+        """Prometheus metrics"""
+        return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+    # Simplified chat endpoint at root level for easy access
+    app.include_router(decision.router)
+
+    return app
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    uvicorn.run(create_app(), host="0.0.0.0", port=8001)
@@ -3,24 +3,48 @@ Decision Routes - Handles LLM decision making requests
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+import os
+import json
+import asyncio
 import logging
 
-from app.services.llm_client import ask_llm
+from app.services.scheduler import DeadlineExceeded
+from app.services.llm_client import LLMConfigurationError, LLMRateLimitError, MISSING_KEY_REPLY, RATE_LIMITED_REPLY
+from app.services.model_router import get_model_router
+from app.services.rag_engine import get_rag_engine
+from app.services.memory_bridge import get_memory_bridge
+from app.utils.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0.2"))
+CHAT_DEADLINE = float(os.getenv("LLM_CHAT_DEADLINE", "15"))
+BATCH_MAX_SIZE = int(os.getenv("CHAT_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", "8"))
+
 class ChatRequest(BaseModel):
     message: str
     context: Optional[Dict[str, Any]] = None
+    query: Optional[str] = None  # Raw player message used for retrieval
+    bot_id: Optional[str] = None
+    player: Optional[str] = None
+    priority: Optional[int] = None  # Bot-side chat priority class (0 = addressed directly)
 
 class ChatResponse(BaseModel):
     response: str
     confidence: Optional[float] = None
 
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest]
+    shared_context: Optional[Dict[str, Any]] = None  # Context common to every request, sent once
+    stream: bool = False  # Stream results as NDJSON lines in completion order
+
 @router.post("/chat", response_model=ChatResponse)
 async def handle_chat(request: ChatRequest):
     """
@@ -29,24 +53,167 @@ async def handle_chat(request: ChatRequest):
     try:
         logger.info(f"Received chat request: {request.message}")
         
-        # Build the prompt with context
-        prompt = build_chat_prompt(request.message, request.context)
+        # Retrieve relevant knowledge and consolidated memory, then build the prompt with context
+        with tracer.span("rag.retrieve"):
+            knowledge = await retrieve_knowledge(request.query or request.message)
+        with tracer.span("memory.recall"):
+            memory = recall_memory(request)
+        prompt = build_chat_prompt(request.message, request.context, knowledge, memory)
         
-        # Get LLM response
-        llm_response = await ask_llm(prompt)
+        # Get LLM response from the cheapest adequate model (useless once the player has moved on)
+        try:
+            routed = await get_model_router().respond(
+                prompt, request.query or request.message, bot_id=request.bot_id or "default",
+                bot_priority=request.priority, deadline=CHAT_DEADLINE
+            )
+        except DeadlineExceeded:
+            logger.warning(f"Chat reply missed its {CHAT_DEADLINE}s deadline")
+            raise HTTPException(status_code=504, detail="LLM response deadline exceeded")
+        except LLMConfigurationError as e:
+            logger.error(str(e))
+            return ChatResponse(response=MISSING_KEY_REPLY, confidence=0.0)
+        except LLMRateLimitError:
+            logger.error("LLM rate limit exceeded")
+            return ChatResponse(response=RATE_LIMITED_REPLY, confidence=0.0)
         
-        logger.info(f"Generated response: {llm_response}")
+        logger.info(f"Generated response ({routed['tier']}, confidence {routed['confidence']}): {routed['response']}")
         
         return ChatResponse(
-            response=llm_response,
-            confidence=0.8  # Placeholder confidence score
+            response=routed["response"],
+            confidence=routed["confidence"]
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing chat request: {e}")
         raise HTTPException(status_code=500, detail="Failed to process chat message")
 
-def build_chat_prompt(message: str, context: Optional[Dict[str, Any]] = None) -> str:
+@router.post("/chat/batch")
+async def handle_chat_batch(batch: ChatBatchRequest):
+    """
+    Process many bots' chat requests in one call
+
+    Prompts are built in bulk (one retrieval pass over the distinct queries,
+    one memory lookup per conversation), identical prompts are answered once
+    and LLM calls fan out with bounded concurrency. Results come back in
+    request order, or as NDJSON lines tagged with their index when streaming.
+    """
+    if not batch.requests:
+        return {"results": [], "unique_prompts": 0}
+    if len(batch.requests) > BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_MAX_SIZE} requests")
+
+    with tracer.span("chat.batch.prompts", size=len(batch.requests)):
+        prompts = await build_batch_prompts(batch)
+    groups: Dict[str, List[int]] = {}
+    for index, prompt in enumerate(prompts):
+        groups.setdefault(prompt, []).append(index)
+    logger.info(f"Received chat batch: {len(prompts)} requests, {len(groups)} distinct prompts")
+
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def answer(prompt: str, indices: List[int]) -> Tuple[List[int], Dict[str, Any]]:
+        request = batch.requests[indices[0]]
+        async with semaphore:
+            try:
+                routed = await get_model_router().respond(
+                    prompt, request.query or request.message, bot_id=request.bot_id or "default",
+                    bot_priority=request.priority, deadline=CHAT_DEADLINE
+                )
+                return indices, {"response": routed["response"], "confidence": routed["confidence"]}
+            except DeadlineExceeded:
+                return indices, {"error": "deadline_exceeded"}
+            except LLMConfigurationError:
+                return indices, {"response": MISSING_KEY_REPLY, "confidence": 0.0}
+            except LLMRateLimitError:
+                return indices, {"response": RATE_LIMITED_REPLY, "confidence": 0.0}
+            except Exception as e:
+                logger.error(f"Error processing batched chat request: {e}")
+                return indices, {"error": "failed"}
+
+    tasks = [asyncio.create_task(answer(prompt, indices)) for prompt, indices in groups.items()]
+
+    if batch.stream:
+        async def stream():
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    indices, result = await finished
+                    for index in indices:
+                        yield json.dumps({"index": index, **result}) + "\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+    for indices, result in await asyncio.gather(*tasks):
+        for index in indices:
+            results[index] = result
+    return {"results": results, "unique_prompts": len(groups)}
+
+async def build_batch_prompts(batch: ChatBatchRequest) -> List[str]:
+    """
+    Prompts for every request in a batch with shared work done once
+    """
+    requests = batch.requests
+    shared = batch.shared_context or {}
+    contexts = [{**shared, **(request.context or {})} for request in requests]
+
+    # One embedding and search pass over the distinct queries
+    queries = [request.query or request.message for request in requests]
+    distinct = list(dict.fromkeys(queries))
+    engine = get_rag_engine()
+    knowledge: Dict[str, List[str]] = {query: [] for query in distinct}
+    if engine.count:
+        hits = await asyncio.to_thread(engine.search_batch, distinct, RAG_TOP_K, RAG_MIN_SCORE)
+        knowledge = {query: [hit["text"] for hit in found] for query, found in zip(distinct, hits)}
+
+    # Ingest all forwarded history first, then render each conversation once
+    bridge = get_memory_bridge()
+    for request, context in zip(requests, contexts):
+        history = context.get("memory")
+        if request.bot_id and request.player and isinstance(history, list) and history:
+            bridge.ingest(request.bot_id, history, request.player)
+    memories: Dict[Tuple[str, str], str] = {}
+    for request in requests:
+        key = (request.bot_id, request.player)
+        if request.bot_id and request.player and key not in memories:
+            memories[key] = bridge.render(bridge.get_payload(request.bot_id, request.player))
+
+    return [
+        build_chat_prompt(request.message, context, knowledge[query],
+                          memories.get((request.bot_id, request.player), ""))
+        for request, context, query in zip(requests, contexts, queries)
+    ]
+
+async def retrieve_knowledge(query: str) -> List[str]:
+    """
+    Top-k indexed snippets relevant to the query (empty when nothing is indexed)
+
+    The search runs on a worker thread: it waits for the engine's lock,
+    which an index write on another thread may be holding.
+    """
+    engine = get_rag_engine()
+    if engine.count == 0:
+        return []
+    hits = await asyncio.to_thread(engine.search, query, RAG_TOP_K, RAG_MIN_SCORE)
+    return [hit["text"] for hit in hits]
+
+def recall_memory(request: ChatRequest) -> str:
+    """
+    Bounded memory text for the conversation, ingesting any raw history sent along
+    """
+    if not (request.bot_id and request.player):
+        return ""
+    bridge = get_memory_bridge()
+    history = (request.context or {}).get("memory")
+    if isinstance(history, list) and history:
+        bridge.ingest(request.bot_id, history, request.player)
+    return bridge.render(bridge.get_payload(request.bot_id, request.player))
+
+def build_chat_prompt(message: str, context: Optional[Dict[str, Any]] = None,
+                      knowledge: Optional[List[str]] = None, memory: str = "") -> str:
     """
     Build a prompt for the LLM based on the message and context
     """
@@ -65,6 +232,14 @@ Keep responses concise and helpful. Focus on Minecraft-related advice and conver
         if context.get("inventory"):
             base_prompt += f"Inventory items: {', '.join(context['inventory'].keys())}\n"
     
+    # Add consolidated conversation memory if available
+    if memory:
+        base_prompt += f"Conversation memory:\n{memory}\n"
+    
+    # Add retrieved knowledge if available
+    if knowledge:
+        base_prompt += "Relevant knowledge:\n" + "".join(f"- {snippet}\n" for snippet in knowledge)
+    
     base_prompt += f"\nPlayer message: {message}\n\nBot response:"
     
     return base_prompt
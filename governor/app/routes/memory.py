@@ -1,12 +1,39 @@
 """
-Memory Routes - Placeholder for memory-related endpoints
+Memory Routes - Ingest conversation history and serve consolidated memory
 """
 
 from fastapi import APIRouter
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, List
+
+from app.services.memory_bridge import get_memory_bridge
 
 router = APIRouter()
 
+class IngestRequest(BaseModel):
+    bot_id: str
+    entries: List[Dict[str, Any]]
+    player: Optional[str] = None
+
+@router.post("/memory/ingest")
+async def ingest_memory(request: IngestRequest):
+    """Queue raw memory entries or storage chat events for consolidation"""
+    added = get_memory_bridge().ingest(request.bot_id, request.entries, request.player)
+    return {"status": "queued", "added": added}
+
+@router.post("/memory/consolidate")
+async def consolidate_memory():
+    """Run a consolidation batch now instead of waiting for the schedule"""
+    return {"status": "consolidated", "conversations": get_memory_bridge().consolidate()}
+
 @router.get("/memory/status")
 async def memory_status():
-    """Placeholder for memory status endpoint"""
-    return {"status": "memory system not implemented yet"}
+    """Tier sizes, consolidation counters and served payload sizes"""
+    return get_memory_bridge().stats()
+
+@router.get("/memory/{bot_id}/{player}")
+async def get_memory(bot_id: str, player: str):
+    """Bounded memory payload for a bot's conversation with a player"""
+    bridge = get_memory_bridge()
+    payload = bridge.get_payload(bot_id, player)
+    return {**payload, "text": bridge.render(payload)}
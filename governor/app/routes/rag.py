@@ -0,0 +1,80 @@
+"""
+RAG Routes - Index and search knowledge snippets and events
+"""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+import asyncio
+import logging
+
+from app.services.rag_engine import get_rag_engine, event_to_text
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+class Document(BaseModel):
+    text: str
+    id: Optional[str] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+class AddDocumentsRequest(BaseModel):
+    documents: List[Document]
+
+class AddEventsRequest(BaseModel):
+    events: List[Dict[str, Any]]
+
+class SearchRequest(BaseModel):
+    queries: List[str]
+    k: int = Field(5, ge=1, le=100)
+    min_score: float = 0.0
+
+@router.post("/rag/documents")
+async def add_documents(request: AddDocumentsRequest):
+    """Embed and index knowledge snippets (documents with an existing id are replaced)"""
+    try:
+        engine = get_rag_engine()
+        docs = request.documents
+        ids = None
+        if all(doc.id for doc in docs):
+            ids = [doc.id for doc in docs]
+        elif any(doc.id for doc in docs):
+            raise HTTPException(status_code=400, detail="Either all or none of the documents must have an id")
+        # Embedding and an occasional index retrain are CPU-bound; keep them off the event loop
+        added = await asyncio.to_thread(engine.add, [doc.text for doc in docs], [doc.metadata for doc in docs], ids)
+        return {"status": "indexed", "ids": added, "documents": engine.count}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error indexing documents: {e}")
+        raise HTTPException(status_code=500, detail="Failed to index documents")
+
+@router.post("/rag/events")
+async def add_events(request: AddEventsRequest):
+    """Index storage-service events by their id"""
+    try:
+        engine = get_rag_engine()
+        events = [event for event in request.events if event.get("id")]
+        added = await asyncio.to_thread(
+            engine.add,
+            [event_to_text(event) for event in events],
+            [{"type": event.get("type"), "botId": event.get("botId"),
+              "timestamp": event.get("timestamp"), "source": "event"} for event in events],
+            [event["id"] for event in events]
+        )
+        return {"status": "indexed", "count": len(added), "documents": engine.count}
+    except Exception as e:
+        logger.error(f"Error indexing events: {e}")
+        raise HTTPException(status_code=500, detail="Failed to index events")
+
+@router.post("/rag/search")
+async def search(request: SearchRequest):
+    """Top-k cosine search for a batch of queries"""
+    # Off the event loop: the search waits for the engine's lock while an index write holds it
+    results = await asyncio.to_thread(get_rag_engine().search_batch, request.queries, request.k, request.min_score)
+    return {"results": results}
+
+@router.get("/rag/status")
+async def rag_status():
+    return get_rag_engine().stats()
@@ -0,0 +1,68 @@
+"""
+Severity Routes - LLM second opinion on event severity for the storage service
+"""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+import os
+import re
+import logging
+
+from app.services.rag_engine import event_to_text
+from app.services.scheduler import DeadlineExceeded, PRIORITY_SUMMARIZATION, get_llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+SEVERITY_DEADLINE = float(os.getenv("LLM_SEVERITY_DEADLINE", "60"))
+
+class SeverityRequest(BaseModel):
+    events: List[Dict[str, Any]] = Field(..., max_length=64)
+
+def build_severity_prompt(events: List[Dict[str, Any]]) -> str:
+    lines = [
+        "Rate how important each Minecraft bot event is to remember, from 0 (routine noise) "
+        "to 10 (critical, e.g. the bot died or a goal failed).",
+        "Reply with one line per event in the form '<number>: <severity>' and nothing else.",
+        ""
+    ]
+    for index, event in enumerate(events, 1):
+        lines.append(f"{index}. {event_to_text(event)[:300]}")
+    return "\n".join(lines)
+
+def parse_severities(text: str, count: int) -> List[Optional[int]]:
+    """Severities by event position; events the reply skipped are None"""
+    severities: List[Optional[int]] = [None] * count
+    for number, severity in re.findall(r"(\d+)\s*[:.)-]\s*(\d+)", text):
+        index = int(number) - 1
+        if 0 <= index < count:
+            severities[index] = min(10, int(severity))
+    return severities
+
+@router.post("/severity")
+async def score_severity(request: SeverityRequest):
+    """
+    Score a batch of events with the LLM
+
+    Runs as background work behind chat and planning, in one prompt per batch.
+    """
+    if not request.events:
+        return {"severities": []}
+    try:
+        text = await get_llm_scheduler().submit(
+            build_severity_prompt(request.events), PRIORITY_SUMMARIZATION,
+            bot_id="storage-service", deadline=SEVERITY_DEADLINE, max_tokens=8 * len(request.events)
+        )
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="LLM severity deadline exceeded")
+    except Exception as e:
+        logger.error(f"Error scoring severity: {e}")
+        raise HTTPException(status_code=500, detail="Failed to score severity")
+
+    severities = parse_severities(text, len(request.events))
+    if all(severity is None for severity in severities):
+        logger.warning(f"Unusable severity reply: {text[:200]}")
+        raise HTTPException(status_code=502, detail="LLM reply had no severities")
+    return {"severities": severities}
@@ -3,6 +3,11 @@ Status Routes - System status and health endpoints
 """
 
 from fastapi import APIRouter
+from app.services.rag_engine import get_rag_engine
+from app.services.memory_bridge import get_memory_bridge
+from app.services.scheduler import get_llm_scheduler
+from app.services.model_router import get_model_router
+from app.services.llm_client import get_backend
 
 router = APIRouter()
 
@@ -12,8 +17,10 @@ async def get_status():
     return {
         "status": "running",
         "services": {
-            "llm_client": "active",
-            "memory": "placeholder",
-            "rag": "placeholder"
+            "llm_client": get_backend().stats(),
+            "memory": get_memory_bridge().stats(),
+            "rag": get_rag_engine().stats(),
+            "scheduler": get_llm_scheduler().stats(),
+            "router": get_model_router().stats()
         }
     }
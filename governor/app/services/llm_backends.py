@@ -0,0 +1,294 @@
+"""
+LLM Backends - Provider implementations behind the LLM client
+"""
+
+import os
+import time
+import zlib
+import random
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LLMResult:
+    """A completion plus the signals used to judge it"""
+
+    def __init__(self, text: str, model: str, finish_reason: Optional[str] = None,
+                 avg_logprob: Optional[float] = None, completion_tokens: int = 0,
+                 latency_ms: float = 0.0, prompt_tokens: int = 0):
+        self.text = text
+        self.model = model
+        self.finish_reason = finish_reason
+        self.avg_logprob = avg_logprob
+        self.completion_tokens = completion_tokens
+        self.latency_ms = latency_ms
+        self.prompt_tokens = prompt_tokens
+
+class LLMRateLimitError(Exception):
+    """The provider rejected the call with HTTP 429"""
+
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMAuthenticationError(Exception):
+    """The provider rejected the credentials"""
+
+class LLMAPIError(Exception):
+    """Any other provider-side failure"""
+
+class LLMConfigurationError(Exception):
+    """The backend cannot be called as configured (e.g. no API key)"""
+
+class LLMBackend:
+    """Backend interface: one completion call and a token stream"""
+
+    name = "backend"
+
+    async def complete(self, prompt: str, model: str, max_tokens: int,
+                       temperature: float = 0.7, logprobs: bool = False) -> LLMResult:
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, model: str, max_tokens: int,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+        """Default stream: the whole completion as one chunk"""
+        result = await self.complete(prompt, model, max_tokens, temperature)
+        yield result.text
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def warm_up(self) -> None:
+        """Pay one-off setup costs (imports, clients) before the first call; blocking"""
+
+class OpenAIBackend(LLMBackend):
+    """
+    OpenAI chat completions
+
+    The openai package takes about a third of a second to import, so it is
+    imported with the client on first use (or by warm_up at startup) rather
+    than when the service module loads.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.AsyncOpenAI(api_key=self.api_key or os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def warm_up(self) -> None:
+        import openai  # noqa: F401
+
+    async def complete(self, prompt: str, model: str, max_tokens: int,
+                       temperature: float = 0.7, logprobs: bool = False) -> LLMResult:
+        started = time.perf_counter()
+        try:
+            # Awaited directly so cancelling the caller closes the HTTP request too
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                extra_body={"logprobs": True} if logprobs else None
+            )
+        except Exception as e:
+            _raise_neutral(e)
+
+        choice = response.choices[0]
+        usage = getattr(response, "usage", None)
+        return LLMResult(
+            text=(choice.message.content or "").strip(),
+            model=model,
+            finish_reason=choice.finish_reason,
+            avg_logprob=_mean_logprob(getattr(choice, "logprobs", None)),
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0
+        )
+
+    async def stream(self, prompt: str, model: str, max_tokens: int,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+        chunks = None
+        try:
+            chunks = await self.client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            async for chunk in chunks:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except Exception as e:
+            _raise_neutral(e)
+        finally:
+            # A consumer that stops early (or is cancelled) releases the connection
+            if chunks is not None:
+                await chunks.response.aclose()
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline backend for benchmarks and load tests
+
+    Replies are picked from canned lines by a hash of the prompt, so the same
+    prompt always gets the same text. Time to first token follows the chosen
+    latency distribution (median latency_ms), then tokens arrive at
+    tokens_per_second. Calls fail with LLMRateLimitError at
+    rate_limit_probability, or when more than max_rps calls arrive per second.
+    All randomness comes from a seeded generator.
+    """
+
+    name = "fake"
+
+    REPLIES = [
+        "Sure thing! I'll grab my pickaxe and head over.",
+        "Diamonds are usually found deep down, around y -58. Bring a bucket for the lava!",
+        "I'm building the east tower of my castle right now, come take a look.",
+        "Watch out, I saw a creeper sneaking around the farm earlier.",
+        "Hey! Good to see you. Need any help with your base?",
+        "You can make a nether portal with at least 10 obsidian and a flint and steel.",
+        "I've got some spare iron if you need it, just ask.",
+        "It's getting dark, we should head inside before the mobs spawn.",
+    ]
+
+    def __init__(self, latency_ms: float = 300.0, latency_dist: str = "lognormal",
+                 jitter: float = 0.5, tokens_per_second: float = 60.0,
+                 rate_limit_probability: float = 0.0, max_rps: Optional[float] = None,
+                 retry_after: float = 1.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit_probability = rate_limit_probability
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._tokens = max_rps or 0.0
+        self._refilled = time.monotonic()
+        self.calls = 0
+        self.rate_limited = 0
+
+    async def complete(self, prompt: str, model: str, max_tokens: int,
+                       temperature: float = 0.7, logprobs: bool = False) -> LLMResult:
+        started = time.perf_counter()
+        self._admit()
+        text, finish_reason, tokens, h = self._reply(prompt, max_tokens)
+        await asyncio.sleep(self._first_token_delay() + tokens / self.tokens_per_second)
+        return LLMResult(
+            text=text,
+            model=model,
+            finish_reason=finish_reason,
+            avg_logprob=-(0.05 + (h % 50) / 100) if logprobs else None,
+            completion_tokens=tokens,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            prompt_tokens=len(prompt) // 4
+        )
+
+    async def stream(self, prompt: str, model: str, max_tokens: int,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+        self._admit()
+        text, _, tokens, _ = self._reply(prompt, max_tokens)
+        await asyncio.sleep(self._first_token_delay())
+        words = text.split(" ")
+        per_word = tokens / len(words) / self.tokens_per_second
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(per_word)
+            yield word if index == 0 else f" {word}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "latency_ms": self.latency_ms,
+            "latency_dist": self.latency_dist,
+            "tokens_per_second": self.tokens_per_second
+        }
+
+    def _admit(self) -> None:
+        self.calls += 1
+        if self.max_rps:
+            now = time.monotonic()
+            self._tokens = min(self.max_rps, self._tokens + (now - self._refilled) * self.max_rps)
+            self._refilled = now
+            if self._tokens < 1:
+                self.rate_limited += 1
+                raise LLMRateLimitError("Fake backend: requests per second exceeded", self.retry_after)
+            self._tokens -= 1
+        if self.rate_limit_probability and self._rng.random() < self.rate_limit_probability:
+            self.rate_limited += 1
+            raise LLMRateLimitError("Fake backend: injected 429", self.retry_after)
+
+    def _reply(self, prompt: str, max_tokens: int):
+        h = zlib.crc32(prompt.encode("utf-8"))
+        text = self.REPLIES[h % len(self.REPLIES)]
+        finish_reason = "stop"
+        if len(text) > max_tokens * 4:
+            text = text[:max_tokens * 4]
+            finish_reason = "length"
+        return text, finish_reason, max(1, len(text) // 4), h
+
+    def _first_token_delay(self) -> float:
+        latency = self.latency_ms / 1000
+        if self.latency_dist == "fixed":
+            return latency
+        if self.latency_dist == "uniform":
+            return max(0.0, self._rng.uniform(latency * (1 - self.jitter), latency * (1 + self.jitter)))
+        if self.latency_dist == "exponential":
+            return self._rng.expovariate(1 / latency) if latency > 0 else 0.0
+        # lognormal with median latency_ms: a long right tail like real providers
+        return latency * self._rng.lognormvariate(0.0, self.jitter)
+
+def _raise_neutral(error: Exception) -> None:
+    """Re-raise an openai error as the backend-neutral equivalent (others unchanged)"""
+    import openai
+    if isinstance(error, openai.RateLimitError):
+        raise LLMRateLimitError(str(error)) from error
+    if isinstance(error, openai.AuthenticationError):
+        raise LLMAuthenticationError(str(error)) from error
+    if isinstance(error, openai.APIError):
+        raise LLMAPIError(str(error)) from error
+    raise error
+
+def _mean_logprob(logprobs: Any) -> Optional[float]:
+    """Mean token log-probability from a choice's logprobs (object or raw dict)"""
+    if logprobs is None:
+        return None
+    content = logprobs.get("content") if isinstance(logprobs, dict) else getattr(logprobs, "content", None)
+    if not content:
+        return None
+    values = [t.get("logprob") if isinstance(t, dict) else getattr(t, "logprob", None) for t in content]
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def create_backend() -> LLMBackend:
+    """Backend selected by LLM_BACKEND ('openai' or 'fake'), fake tuned by FAKE_LLM_* settings"""
+    kind = os.getenv("LLM_BACKEND", "openai").lower()
+    if kind == "fake":
+        max_rps = float(os.getenv("FAKE_LLM_MAX_RPS", "0"))
+        return FakeBackend(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "300")),
+            latency_dist=os.getenv("FAKE_LLM_LATENCY_DIST", "lognormal"),
+            jitter=float(os.getenv("FAKE_LLM_JITTER", "0.5")),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "60")),
+            rate_limit_probability=float(os.getenv("FAKE_LLM_429_RATE", "0")),
+            max_rps=max_rps or None,
+            seed=int(os.getenv("FAKE_LLM_SEED", "0"))
+        )
+    if kind != "openai":
+        logger.warning(f"Unknown LLM_BACKEND '{kind}', using openai")
+    return OpenAIBackend()
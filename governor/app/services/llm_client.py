@@ -2,19 +2,101 @@
 LLM Client - Handles communication with language models
 """
 
-import openai
 import os
+import time
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
 
+from app.services.llm_backends import (
+    LLMBackend, LLMResult, LLMRateLimitError, LLMAuthenticationError, LLMAPIError, LLMConfigurationError,
+    OpenAIBackend, create_backend
+)
+from app.utils.metrics import registry
+from app.utils.tracing import tracer
+
 # Load environment variables from .env file
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Configure OpenAI client
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds", "LLM call latency", ("backend", "model", "outcome")
+)
+llm_tokens = registry.counter("llm_tokens_total", "LLM tokens used", ("model", "kind"))
+
+# Replies a player sees when the LLM cannot answer
+MISSING_KEY_REPLY = "I need an API key to think properly. Please configure OPENAI_API_KEY."
+RATE_LIMITED_REPLY = "I'm thinking too much right now. Please try again in a moment."
+
+# Active backend (LLM_BACKEND=openai|fake), created on first use
+_backend: Optional[LLMBackend] = None
+
+def get_backend() -> LLMBackend:
+    """The backend every LLM call goes through"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+        logger.info(f"LLM backend: {_backend.name}")
+    return _backend
+
+def set_backend(backend: LLMBackend) -> None:
+    """Swap the backend (benchmarks and load tests use a FakeBackend)"""
+    global _backend
+    _backend = backend
+
+async def complete(prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 150,
+                   temperature: float = 0.7, logprobs: bool = False) -> LLMResult:
+    """
+    Send a prompt to the LLM and return the completion with its metadata
+
+    Unlike ask_llm, provider errors are raised to the caller.
+
+    Args:
+        prompt: The prompt to send to the LLM
+        model: The model to use
+        max_tokens: Maximum tokens in the response
+        temperature: Sampling temperature
+        logprobs: Request token log-probabilities (used for confidence scoring)
+
+    Returns:
+        LLMResult with the text, finish reason and mean token log-probability
+
+    Raises:
+        LLMConfigurationError: If the OpenAI backend has no API key
+    """
+    backend = get_backend()
+    if backend.name == "openai" and not os.getenv("OPENAI_API_KEY"):
+        raise LLMConfigurationError("OpenAI API key not configured")
+
+    logger.info(f"Sending prompt to {model}: {prompt[:100]}...")
+    started = time.perf_counter()
+    outcome = "error"
+    span = tracer.start_span("llm.complete", backend=backend.name, model=model)
+    try:
+        result = await backend.complete(prompt, model, max_tokens, temperature, logprobs)
+        outcome = "ok"
+        if span is not None:
+            span.set("prompt_tokens", result.prompt_tokens)
+            span.set("completion_tokens", result.completion_tokens)
+    except LLMRateLimitError:
+        outcome = "rate_limited"
+        raise
+    finally:
+        llm_request_duration.observe(time.perf_counter() - started, backend.name, model, outcome)
+        if span is not None:
+            span.set("outcome", outcome)
+        tracer.end_span(span, error=outcome == "error")
+
+    llm_tokens.inc(result.prompt_tokens, model, "prompt")
+    llm_tokens.inc(result.completion_tokens, model, "completion")
+    return result
+
+async def stream_llm(prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 150,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+    """Stream response text chunks as the backend produces them"""
+    async for chunk in get_backend().stream(prompt, model, max_tokens, temperature):
+        yield chunk
 
 async def ask_llm(prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 150) -> str:
     """
@@ -29,34 +111,23 @@ async def ask_llm(prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 1
         The LLM's response as a string
     """
     try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if get_backend().name == "openai" and not os.getenv("OPENAI_API_KEY"):
             logger.error("OpenAI API key not configured")
-            return "I need an API key to think properly. Please configure OPENAI_API_KEY."
-        
-        logger.info(f"Sending prompt to {model}: {prompt[:100]}...")
-        
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=max_tokens,
-            temperature=0.7
-        )
+            return MISSING_KEY_REPLY
         
-        llm_response = response.choices[0].message.content.strip()
+        result = await complete(prompt, model, max_tokens)
+        llm_response = result.text
         logger.info(f"LLM response received: {llm_response}")
         
         return llm_response
         
-    except openai.AuthenticationError:
+    except LLMRateLimitError:
+        logger.error("LLM rate limit exceeded")
+        return RATE_LIMITED_REPLY
+    except LLMAuthenticationError:
         logger.error("OpenAI authentication failed")
         return "I'm having trouble with my API credentials."
-    except openai.RateLimitError:
-        logger.error("OpenAI rate limit exceeded")
-        return "I'm thinking too much right now. Please try again in a moment."
-    except openai.APIError as e:
+    except LLMAPIError as e:
         logger.error(f"OpenAI API error: {e}")
         return "I'm having trouble connecting to my brain right now."
     except Exception as e:
@@ -65,6 +136,5 @@ async def ask_llm(prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 1
 
 def set_api_key(api_key: str):
     """Set the OpenAI API key"""
-    global client
-    client = openai.OpenAI(api_key=api_key)
     os.environ["OPENAI_API_KEY"] = api_key
+    set_backend(OpenAIBackend(api_key))
@@ -1,2 +1,455 @@
-# Placeholder for memory bridge service
-pass
+"""
+Memory Bridge - Tiered conversation memory consolidated in the background
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from collections import Counter, OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+ConversationKey = Tuple[str, str]
+Summarizer = Callable[[List[Dict[str, Any]]], str]
+
+ENTRY_CHARS = 160
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from get got have hey hi how i i'm im in is it it's its
+just like me my no not of oh ok okay on or so that the then there this to u up us was we what
+when where who why will with yeah yes you your you're
+""".split())
+
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9_']+")
+
+# Long-term facts a player states about themselves: (fact key, pattern)
+FACT_PATTERNS = [
+    ("name", re.compile(r"\b(?:my name is|call me)\s+([A-Za-z0-9_]{2,24})", re.I)),
+    ("home", re.compile(r"\b(?:my (?:base|house|home) is|i live)\s+([^.!?]{3,60})", re.I)),
+    ("likes", re.compile(r"\bi (?:really )?(?:like|love|enjoy)\s+([^.!?,]{2,40})", re.I)),
+    ("dislikes", re.compile(r"\bi (?:hate|don't like|dislike)\s+([^.!?,]{2,40})", re.I)),
+    ("goal", re.compile(r"\bi(?:'m| am) (?:building|making|looking for|trying to)\s+([^.!?]{3,60})", re.I)),
+    ("location", re.compile(r"(-?\d{1,7})[ ,]+(-?\d{1,3})[ ,]+(-?\d{1,7})")),
+]
+
+def normalize_entry(entry: Dict[str, Any], bot_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn a raw memory entry or storage chat event into {speaker, text, timestamp}
+
+    Accepts the bot's context["memory"] entries ({username, message, timestamp})
+    and storage-service chat_message events (data.event == 'bot_response' marks
+    the bot's own reply).
+    """
+    data = entry.get("data") if isinstance(entry.get("data"), dict) else entry
+    timestamp = entry.get("timestamp") or time.time() * 1000
+    if isinstance(timestamp, str):
+        try:
+            timestamp = float(timestamp)
+        except ValueError:
+            timestamp = time.time() * 1000
+    if data.get("event") == "bot_response" and data.get("response"):
+        return {"speaker": bot_id, "text": str(data["response"])[:ENTRY_CHARS], "timestamp": timestamp}
+    if data.get("username") and data.get("message"):
+        return {"speaker": str(data["username"]), "text": str(data["message"])[:ENTRY_CHARS],
+                "timestamp": timestamp}
+    return None
+
+def extractive_summary(entries: List[Dict[str, Any]], max_chars: int = 200) -> str:
+    """
+    Summarize a closed session without an LLM call: size, span, topics and the last exchange
+    """
+    words = Counter()
+    for entry in entries:
+        words.update(w for w in WORD_PATTERN.findall(entry["text"].lower())
+                     if w not in STOPWORDS and len(w) > 2)
+    topics = ", ".join(word for word, _ in words.most_common(5))
+    minutes = max(1, round((entries[-1]["timestamp"] - entries[0]["timestamp"]) / 60000))
+    last = entries[-1]
+    summary = f"{len(entries)} messages over ~{minutes}min"
+    if topics:
+        summary += f" about {topics}"
+    summary += f"; ended with {last['speaker']}: \"{last['text'][:60]}\""
+    return summary[:max_chars]
+
+def extract_facts(entries: List[Dict[str, Any]], player: str) -> List[Tuple[str, str]]:
+    """Self-stated player facts as (key, fact) pairs, later statements win"""
+    facts = []
+    for entry in entries:
+        if entry["speaker"] != player:
+            continue
+        for key, pattern in FACT_PATTERNS:
+            match = pattern.search(entry["text"])
+            if not match:
+                continue
+            if key == "location":
+                value = " ".join(match.groups())
+                facts.append((f"location:{value}", f"mentioned coordinates {value}"))
+            elif key in ("likes", "dislikes"):
+                value = match.group(1).strip().lower()
+                facts.append((f"{key}:{value}", f"{key} {value}"))
+            else:
+                facts.append((key, f"{key}: {match.group(1).strip()}"))
+    return facts
+
+class Conversation:
+    """
+    Memory for one (bot, player) pair
+
+    New entries land in `pending` and are visible immediately. Consolidation
+    moves them into the verbatim `recent` tier; entries pushed out of it build
+    up an open session, which closes into a one-line summary after a quiet gap
+    or once it is long enough. Summaries pushed out of the session tier are
+    dropped; the facts extracted when each session closed stay in `facts`.
+    """
+
+    def __init__(self, bot_id: str, player: str, recent_limit: int, session_limit: int,
+                 fact_limit: int):
+        self.bot_id = bot_id
+        self.player = player
+        self.pending: List[Dict[str, Any]] = []
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent_limit)
+        self.open_session: List[Dict[str, Any]] = []
+        self.sessions: Deque[Dict[str, Any]] = deque(maxlen=session_limit)
+        self.facts: "OrderedDict[str, str]" = OrderedDict()
+        self.fact_limit = fact_limit
+        self.watermark = 0.0
+        self.total_entries = 0
+        self.last_activity = time.monotonic()
+
+    def add(self, entries: List[Dict[str, Any]]) -> int:
+        """Append entries newer than the watermark, returning how many were new"""
+        seen = {(e["speaker"], e["timestamp"], e["text"]) for e in self.recent_view()}
+        added = 0
+        for entry in sorted(entries, key=lambda e: e["timestamp"]):
+            key = (entry["speaker"], entry["timestamp"], entry["text"])
+            if entry["timestamp"] < self.watermark or key in seen:
+                continue
+            self.pending.append(entry)
+            seen.add(key)
+            added += 1
+        if added:
+            self.total_entries += added
+            self.last_activity = time.monotonic()
+        return added
+
+    def recent_view(self) -> List[Dict[str, Any]]:
+        """Verbatim tier including entries not consolidated yet"""
+        tail = list(self.recent) + self.pending
+        return tail[-(self.recent.maxlen or len(tail)):]
+
+class MemoryBridge:
+    """
+    Per-(bot, player) tiered memory: recent verbatim -> session summaries -> long-term facts
+
+    Ingestion only appends; summarizing and fact extraction run in batches on
+    a background schedule. `get_payload` serves a bounded view whose size
+    depends on the tier limits and the character budget, not on history length.
+    """
+
+    def __init__(self, recent_limit: int = 6, session_limit: int = 4, fact_limit: int = 12,
+                 session_gap: float = 600.0, session_max_entries: int = 24,
+                 max_chars: int = 1200, max_conversations: int = 5000,
+                 interval: float = 5.0, summarizer: Optional[Summarizer] = None,
+                 storage_url: Optional[str] = None):
+        self.recent_limit = recent_limit
+        self.session_limit = session_limit
+        self.fact_limit = fact_limit
+        self.session_gap_ms = session_gap * 1000
+        self.session_max_entries = session_max_entries
+        self.max_chars = max_chars
+        self.max_conversations = max_conversations
+        self.interval = interval
+        self.summarizer = summarizer or extractive_summary
+        self.storage_url = storage_url.rstrip("/") if storage_url else None
+
+        self._conversations: "OrderedDict[ConversationKey, Conversation]" = OrderedDict()
+        self._dirty: Dict[ConversationKey, None] = {}
+        self._open: Dict[ConversationKey, None] = {}
+        # Pull cursor: newest timestamp read, and how many chat events at it were read
+        self._storage_watermark: Optional[float] = None
+        self._storage_skip = 0
+        self._task: Optional[asyncio.Task] = None
+        self._payload_chars: Deque[int] = deque(maxlen=500)
+        self.counters = {
+            "ingested": 0,
+            "consolidation_runs": 0,
+            "sessions_closed": 0,
+            "facts_extracted": 0,
+            "evicted_conversations": 0,
+            "pull_failures": 0
+        }
+        self.last_run_ms = 0.0
+
+    # Ingestion
+
+    def ingest(self, bot_id: str, entries: List[Dict[str, Any]],
+               player: Optional[str] = None) -> int:
+        """
+        Queue raw entries for consolidation
+
+        Args:
+            bot_id: Bot the conversation belongs to
+            entries: Raw memory entries or storage chat events
+            player: Player the entries belong to; when omitted each entry is
+                filed under its own speaker (bot replies need an explicit player)
+
+        Returns:
+            Number of new entries accepted
+        """
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for raw in entries:
+            entry = normalize_entry(raw, bot_id)
+            if entry is None:
+                continue
+            owner = player or (raw.get("data") or raw).get("username") or entry["speaker"]
+            grouped.setdefault(owner, []).append(entry)
+
+        added = 0
+        for owner, owned in grouped.items():
+            conversation = self._conversation(bot_id, owner)
+            new = conversation.add(owned)
+            if new:
+                self._dirty[(bot_id, owner)] = None
+                added += new
+        self.counters["ingested"] += added
+        return added
+
+    # Serving
+
+    def get_payload(self, bot_id: str, player: str) -> Dict[str, Any]:
+        """Bounded memory for one conversation: facts, session summaries and recent messages"""
+        conversation = self._conversations.get((bot_id, player))
+        if conversation is None:
+            return {"facts": [], "sessions": [], "recent": []}
+
+        facts = list(conversation.facts.values())
+        sessions = [s["summary"] for s in conversation.sessions]
+        recent = [{"speaker": e["speaker"], "text": e["text"]} for e in conversation.recent_view()]
+
+        # Trim to the character budget: oldest sessions, then oldest messages, then oldest facts
+        while self._payload_size(facts, sessions, recent) > self.max_chars:
+            if sessions:
+                sessions.pop(0)
+            elif len(recent) > 1:
+                recent.pop(0)
+            elif facts:
+                facts.pop(0)
+            else:
+                break
+
+        payload = {"facts": facts, "sessions": sessions, "recent": recent}
+        self._payload_chars.append(self._payload_size(facts, sessions, recent))
+        return payload
+
+    @staticmethod
+    def render(payload: Dict[str, Any]) -> str:
+        """Prompt text for a memory payload (empty when there is nothing to remember)"""
+        lines = []
+        if payload.get("facts"):
+            lines.append("Known about this player: " + "; ".join(payload["facts"]))
+        for summary in payload.get("sessions", []):
+            lines.append(f"Earlier conversation: {summary}")
+        for entry in payload.get("recent", []):
+            lines.append(f"{entry['speaker']}: {entry['text']}")
+        return "\n".join(lines)
+
+    # Consolidation
+
+    def consolidate(self) -> int:
+        """Run one consolidation batch over every conversation with new entries"""
+        start = time.perf_counter()
+        dirty = list(self._dirty)
+        self._dirty.clear()
+        for key in dirty:
+            conversation = self._conversations.get(key)
+            if conversation is not None:
+                self._consolidate(conversation)
+
+        # Close sessions that have gone quiet so their summaries become visible
+        quiet_before = time.time() * 1000 - self.session_gap_ms
+        for key in list(self._open):
+            conversation = self._conversations.get(key)
+            if conversation is None or not conversation.open_session:
+                self._open.pop(key, None)
+            elif conversation.open_session[-1]["timestamp"] < quiet_before:
+                self._close_session(conversation)
+                self._open.pop(key, None)
+        self.counters["consolidation_runs"] += 1
+        self.last_run_ms = round((time.perf_counter() - start) * 1000, 3)
+        return len(dirty)
+
+    def _consolidate(self, conversation: Conversation) -> None:
+        for entry in conversation.pending:
+            if len(conversation.recent) == conversation.recent.maxlen:
+                self._push_session_entry(conversation, conversation.recent[0])
+            conversation.recent.append(entry)
+            conversation.watermark = max(conversation.watermark, entry["timestamp"])
+        conversation.pending = []
+        if conversation.open_session:
+            self._open[(conversation.bot_id, conversation.player)] = None
+
+    def _push_session_entry(self, conversation: Conversation, entry: Dict[str, Any]) -> None:
+        session = conversation.open_session
+        if session and (entry["timestamp"] - session[-1]["timestamp"] > self.session_gap_ms
+                        or len(session) >= self.session_max_entries):
+            self._close_session(conversation)
+        conversation.open_session.append(entry)
+
+    def _close_session(self, conversation: Conversation) -> None:
+        entries = conversation.open_session
+        conversation.open_session = []
+        if not entries:
+            return
+        conversation.sessions.append({
+            "summary": self.summarizer(entries),
+            "start": entries[0]["timestamp"],
+            "end": entries[-1]["timestamp"],
+            "messages": len(entries)
+        })
+        self.counters["sessions_closed"] += 1
+
+        for key, fact in extract_facts(entries, conversation.player):
+            conversation.facts.pop(key, None)
+            conversation.facts[key] = fact
+            self.counters["facts_extracted"] += 1
+        while len(conversation.facts) > conversation.fact_limit:
+            conversation.facts.popitem(last=False)
+
+    # Background schedule
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Memory bridge started (interval={self.interval}s, storage={self.storage_url or 'off'})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Memory bridge stopped")
+
+    async def pull_from_storage(self, client: httpx.AsyncClient, page_size: int = 200,
+                                max_pages: int = 5) -> int:
+        """
+        Ingest chat events stored since the last pull
+
+        Pages forward from the (timestamp, skip) cursor while pages come back
+        full, skipping the events at the watermark already read, so a batch
+        of page_size or more chats stamped with one millisecond still advances.
+        """
+        added = 0
+        for _ in range(max_pages):
+            params: Dict[str, Any] = {"count": page_size, "event_type": "chat_message"}
+            if self._storage_watermark is None:
+                # First pull: only the most recent page matters
+                params["order_desc"] = "true"
+            else:
+                params["since"] = int(self._storage_watermark)
+                params["skip"] = self._storage_skip
+                params["order_desc"] = "false"
+
+            response = await client.get(f"{self.storage_url}/events/", params=params)
+            response.raise_for_status()
+            events = response.json().get("events", [])
+
+            by_bot: Dict[str, List[Dict[str, Any]]] = {}
+            for event in events:
+                by_bot.setdefault(event.get("botId") or "unknown", []).append(event)
+            for bot_id, bot_events in by_bot.items():
+                added += self.ingest(bot_id, bot_events)
+            if not events:
+                break
+
+            newest = max(event.get("timestamp", 0) for event in events)
+            if self._storage_watermark is None:
+                # Older events at the newest timestamp are passed over like everything before it
+                self._storage_watermark, self._storage_skip = newest + 1, 0
+                break
+            same = sum(1 for event in events if event.get("timestamp", 0) == newest)
+            self._storage_skip = self._storage_skip + same if newest == self._storage_watermark else same
+            self._storage_watermark = newest
+            if len(events) < page_size:
+                break
+        return added
+
+    async def _loop(self) -> None:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                if self.storage_url:
+                    try:
+                        await self.pull_from_storage(client)
+                    except Exception as e:
+                        self.counters["pull_failures"] += 1
+                        logger.debug(f"Memory pull failed: {e}")
+                if self._dirty:
+                    self.consolidate()
+                await asyncio.sleep(self.interval)
+
+    # Stats and internals
+
+    def stats(self) -> Dict[str, Any]:
+        conversations = list(self._conversations.values())
+        sizes = list(self._payload_chars)
+        return {
+            "status": "running" if self._task is not None else "idle",
+            "conversations": len(conversations),
+            "pending_entries": sum(len(c.pending) for c in conversations),
+            "recent_entries": sum(len(c.recent) for c in conversations),
+            "sessions": sum(len(c.sessions) for c in conversations),
+            "facts": sum(len(c.facts) for c in conversations),
+            "dirty_conversations": len(self._dirty),
+            "last_run_ms": self.last_run_ms,
+            "payload_chars_avg": round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+            "payload_chars_max": max(sizes) if sizes else 0,
+            "max_chars": self.max_chars,
+            "storage_watermark": self._storage_watermark,
+            **self.counters
+        }
+
+    def _conversation(self, bot_id: str, player: str) -> Conversation:
+        key = (bot_id, player)
+        conversation = self._conversations.get(key)
+        if conversation is None:
+            if len(self._conversations) >= self.max_conversations:
+                evicted, _ = self._conversations.popitem(last=False)
+                self._dirty.pop(evicted, None)
+                self._open.pop(evicted, None)
+                self.counters["evicted_conversations"] += 1
+            conversation = Conversation(bot_id, player, self.recent_limit,
+                                        self.session_limit, self.fact_limit)
+            self._conversations[key] = conversation
+        else:
+            self._conversations.move_to_end(key)
+        return conversation
+
+    @staticmethod
+    def _payload_size(facts: List[str], sessions: List[str], recent: List[Dict[str, str]]) -> int:
+        return (sum(len(f) + 2 for f in facts) + sum(len(s) + 24 for s in sessions)
+                + sum(len(e["speaker"]) + len(e["text"]) + 3 for e in recent))
+
+_bridge: Optional[MemoryBridge] = None
+
+def get_memory_bridge() -> MemoryBridge:
+    """Process-wide memory bridge, created on first use from MEMORY_* environment settings"""
+    global _bridge
+    if _bridge is None:
+        pull = os.getenv("MEMORY_PULL_ENABLED", "false").lower() == "true"
+        _bridge = MemoryBridge(
+            recent_limit=int(os.getenv("MEMORY_RECENT_LIMIT", "6")),
+            session_limit=int(os.getenv("MEMORY_SESSION_LIMIT", "4")),
+            fact_limit=int(os.getenv("MEMORY_FACT_LIMIT", "12")),
+            session_gap=float(os.getenv("MEMORY_SESSION_GAP", "600")),
+            max_chars=int(os.getenv("MEMORY_MAX_CHARS", "1200")),
+            interval=float(os.getenv("MEMORY_CONSOLIDATE_INTERVAL", "5")),
+            storage_url=os.getenv("STORAGE_SERVICE_URL") if pull else None
+        )
+    return _bridge
@@ -0,0 +1,281 @@
+"""
+Model Router - Cheapest-first model cascade with computed confidence
+"""
+
+import os
+import re
+import math
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.services.llm_client import LLMResult, LLMRateLimitError, LLMConfigurationError, complete
+from app.services.scheduler import LLMScheduler, DeadlineExceeded, PRIORITY_INTERACTIVE, get_llm_scheduler
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+CompletionRunner = Callable[..., Awaitable[LLMResult]]
+
+# Minecraft chat messages are cut at 256 characters
+CHAT_CHAR_LIMIT = 256
+
+HEDGES = re.compile(
+    r"\b(as an ai|language model|i'm not sure|i am not sure|i don't know|i cannot|i can't help|"
+    r"i'm unable|i am unable|not able to answer)\b", re.I
+)
+# Fallback strings ask_llm returns instead of raising
+FALLBACK_PREFIXES = ("I need an API key", "I'm having trouble", "I'm thinking too much",
+                     "Something unexpected happened")
+
+PLANNING_WORDS = re.compile(r"\b(how (do|can|should) i|explain|why|plan|steps?|strategy|build me|craft)\b", re.I)
+COMMAND_WORDS = re.compile(r"^\s*(!|come|follow|go|bring|give|stop|mine|attack|help me)\b", re.I)
+WORD_PATTERN = re.compile(r"[a-z0-9]{3,}")
+
+def classify_intent(message: str) -> str:
+    """
+    Rough intent of a player message: 'command', 'planning', 'question' or 'chitchat'
+    """
+    if COMMAND_WORDS.search(message):
+        return "command"
+    if PLANNING_WORDS.search(message):
+        return "planning"
+    if message.rstrip().endswith("?"):
+        return "question"
+    return "chitchat"
+
+def chat_max_tokens(char_limit: int = CHAT_CHAR_LIMIT) -> int:
+    """Token budget for a reply that must fit in char_limit (~4 chars per token, small margin)"""
+    return math.ceil(char_limit / 4) + 8
+
+def score_confidence(result: LLMResult, query: str, intent: str,
+                     char_limit: int = CHAT_CHAR_LIMIT) -> float:
+    """
+    Confidence in a reply from 0 to 1
+
+    Starts from the mean token probability when the backend returned logprobs
+    (0.75 otherwise) and is reduced by validator checks: empty or fallback
+    text, truncation, replies over the chat limit, hedging or refusals, and
+    answers to questions that share no words with the question.
+    """
+    text = result.text.strip()
+    if not text or text.startswith(FALLBACK_PREFIXES):
+        return 0.0
+
+    confidence = math.exp(result.avg_logprob) if result.avg_logprob is not None else 0.75
+    if result.finish_reason == "length":
+        confidence -= 0.3
+    if len(text) > char_limit:
+        confidence -= 0.2
+    if HEDGES.search(text):
+        confidence -= 0.4
+    if intent in ("question", "planning"):
+        asked = set(WORD_PATTERN.findall(query.lower()))
+        if asked and not asked & set(WORD_PATTERN.findall(text.lower())):
+            confidence -= 0.1
+    return round(max(0.0, min(1.0, confidence)), 3)
+
+class ModelTier:
+    """One rung of the cascade"""
+
+    def __init__(self, name: str, model: str, max_prompt_chars: int):
+        self.name = name
+        self.model = model
+        self.max_prompt_chars = max_prompt_chars
+        self.latencies: Deque[float] = deque(maxlen=500)
+        self.confidences: Deque[float] = deque(maxlen=500)
+        self.calls = 0
+        self.escalations = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        confidences = list(self.confidences)
+        return {
+            "model": self.model,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "escalations": self.escalations,
+            "escalation_rate": round(self.escalations / self.calls, 3) if self.calls else 0.0,
+            "latency_ms_avg": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "latency_ms_p95": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 1) if latencies else 0.0,
+            "confidence_avg": round(sum(confidences) / len(confidences), 3) if confidences else None
+        }
+
+class ModelRouter:
+    """
+    Routes each chat through the cheapest tier likely to handle it
+
+    The starting tier depends on prompt size (a tier is skipped when the prompt
+    exceeds its max_prompt_chars), intent and how directly the player is
+    engaging the bot. A reply whose computed confidence is below the threshold
+    is retried one tier up while time remains; the most confident reply wins.
+    A 429 is not a sign the tier is too weak, so it is retried on the same
+    tier after a backoff (the provider's Retry-After when given) rather than
+    escalated to a more expensive one.
+    """
+
+    def __init__(self, tiers: List[ModelTier], threshold: float = 0.6,
+                 scheduler: Optional[LLMScheduler] = None,
+                 runner: Optional[CompletionRunner] = None,
+                 char_limit: int = CHAT_CHAR_LIMIT, use_logprobs: bool = True,
+                 rate_limit_retries: int = 2, rate_limit_backoff: float = 0.5):
+        self.tiers = tiers
+        self.rate_limit_retries = rate_limit_retries
+        self.rate_limit_backoff = rate_limit_backoff
+        self.threshold = threshold
+        self._scheduler = scheduler
+        self.runner = runner or complete
+        self.char_limit = char_limit
+        self.use_logprobs = use_logprobs
+
+    @property
+    def scheduler(self) -> LLMScheduler:
+        return self._scheduler or get_llm_scheduler()
+
+    def start_tier(self, prompt: str, intent: str, bot_priority: Optional[int]) -> int:
+        """Index of the first tier to try"""
+        index = 0
+        # Complex requests from a player addressing the bot directly skip the small tier
+        if intent == "planning" and bot_priority is not None and bot_priority <= 1:
+            index = min(1, len(self.tiers) - 1)
+        while index < len(self.tiers) - 1 and len(prompt) > self.tiers[index].max_prompt_chars:
+            index += 1
+        return index
+
+    async def respond(self, prompt: str, query: str, bot_id: str = "default",
+                      bot_priority: Optional[int] = None, deadline: Optional[float] = None,
+                      priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Answer a prompt, escalating through tiers on low confidence
+
+        Args:
+            prompt: Full prompt text
+            query: The player's raw message (used for intent and validation)
+            bot_id: Bot the reply is for (scheduler fair-share unit)
+            bot_priority: Bot-side chat priority class (0 = addressed directly)
+            deadline: Seconds the whole cascade may take
+            priority: Scheduler priority class
+
+        Returns:
+            Dict with response, confidence, tier, model, intent and attempts
+
+        Raises:
+            DeadlineExceeded: If no tier produced a reply in time
+            LLMConfigurationError: If the backend is not configured (no tier can answer)
+            LLMRateLimitError: If the provider kept rate limiting and no reply was produced
+            RuntimeError: If every tier that was tried failed
+        """
+        intent = classify_intent(query)
+        max_tokens = chat_max_tokens(self.char_limit)
+        expires = time.monotonic() + deadline if deadline is not None else None
+        best: Optional[Dict[str, Any]] = None
+        attempts = 0
+        timed_out = False
+        last_rate_limit: Optional[LLMRateLimitError] = None
+        retries = 0
+
+        index = self.start_tier(prompt, intent, bot_priority)
+        while index < len(self.tiers):
+            tier = self.tiers[index]
+            remaining = expires - time.monotonic() if expires is not None else None
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                break
+
+            attempts += 1
+            tier.calls += 1
+            started = time.perf_counter()
+            rate_limited = None
+            with tracer.span("llm.tier", tier=tier.name, model=tier.model, intent=intent) as span:
+                try:
+                    result = await self.scheduler.submit(
+                        prompt, priority, bot_id=bot_id, deadline=remaining, runner=self.runner,
+                        model=tier.model, max_tokens=max_tokens, logprobs=self.use_logprobs
+                    )
+                except DeadlineExceeded:
+                    timed_out = True
+                    break
+                except LLMConfigurationError:
+                    raise
+                except LLMRateLimitError as e:
+                    tier.rate_limited += 1
+                    rate_limited = e
+                    result = None
+                except Exception as e:
+                    tier.errors += 1
+                    logger.warning(f"Tier {tier.name} ({tier.model}) failed: {e}")
+                    result = None
+                tier.latencies.append((time.perf_counter() - started) * 1000)
+
+                if rate_limited is None:
+                    confidence = score_confidence(result, query, intent, self.char_limit) if result else 0.0
+                    tier.confidences.append(confidence)
+                    if span is not None:
+                        span.set("confidence", confidence)
+                elif span is not None:
+                    span.set("outcome", "rate_limited")
+
+            if rate_limited is not None:
+                # Back off and retry the same tier; give up (without escalating) when out of retries or time
+                last_rate_limit = rate_limited
+                wait = rate_limited.retry_after or self.rate_limit_backoff * 2 ** retries * (0.5 + random.random())
+                remaining = expires - time.monotonic() if expires is not None else None
+                if retries >= self.rate_limit_retries or (remaining is not None and wait >= remaining):
+                    break
+                retries += 1
+                logger.info(f"Tier {tier.name} rate limited, retrying in {wait:.2f}s")
+                await asyncio.sleep(wait)
+                continue
+
+            if result is not None and (best is None or confidence > best["confidence"]):
+                best = {"response": result.text, "confidence": confidence,
+                        "tier": tier.name, "model": tier.model}
+
+            if confidence >= self.threshold or index == len(self.tiers) - 1:
+                break
+            tier.escalations += 1
+            logger.info(f"Escalating from {tier.name}: confidence {confidence} < {self.threshold}")
+            index += 1
+
+        if best is None:
+            if timed_out:
+                raise DeadlineExceeded("No model tier produced a reply in time")
+            if last_rate_limit is not None:
+                raise last_rate_limit
+            raise RuntimeError("Every model tier failed")
+        return {**best, "intent": intent, "attempts": attempts}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "max_tokens": chat_max_tokens(self.char_limit),
+            "tiers": {tier.name: tier.stats() for tier in self.tiers}
+        }
+
+def tiers_from_env() -> List[ModelTier]:
+    """Tiers from LLM_TIERS ('name:model:max_prompt_chars,...'), smallest first"""
+    spec = os.getenv("LLM_TIERS", "small:gpt-3.5-turbo:12000,large:gpt-4o:100000")
+    tiers = []
+    for item in spec.split(","):
+        name, model, max_chars = item.strip().split(":")
+        tiers.append(ModelTier(name, model, int(max_chars)))
+    return tiers
+
+_router: Optional[ModelRouter] = None
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router, created on first use from LLM_* environment settings"""
+    global _router
+    if _router is None:
+        _router = ModelRouter(
+            tiers_from_env(),
+            threshold=float(os.getenv("LLM_CONFIDENCE_THRESHOLD", "0.6")),
+            use_logprobs=os.getenv("LLM_LOGPROBS", "true").lower() == "true"
+        )
+    return _router
@@ -1,2 +1,512 @@
-# Placeholder for RAG engine
-pass
+"""
+RAG Engine - In-process vector retrieval over events and knowledge snippets
+"""
+
+import os
+import re
+import json
+import zlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+class Embedder:
+    """Embedder interface: maps texts to L2-normalized float32 vectors"""
+
+    name = "embedder"
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+class HashingEmbedder(Embedder):
+    """
+    Offline embedder using the hashing trick over word unigrams and bigrams
+
+    Token counts are log-scaled (sublinear TF) and hashed into a fixed number of
+    signed buckets, so no vocabulary or network access is needed and vectors
+    are stable across processes.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[str, int] = {}
+            words = TOKEN_PATTERN.findall(text.lower())
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                index, sign = self._bucket(token)
+                matrix[row, index] += sign * (1.0 + np.log(count))
+        return _normalize(matrix)
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            h = zlib.crc32(token.encode("utf-8"))
+            bucket = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+            if len(self._buckets) < 200_000:
+                self._buckets[token] = bucket
+        return bucket
+
+class IVFIndex:
+    """
+    Inverted-file approximate index: vectors are bucketed under their nearest
+    k-means centroid and queries only score the nprobe closest buckets
+    """
+
+    def __init__(self, nlist: int, nprobe: int = 8):
+        self.nlist = nlist
+        self.nprobe = min(nprobe, nlist)
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self._lists: List[List[int]] = []
+        self._arrays: Dict[int, np.ndarray] = {}
+        self._packed: Dict[int, np.ndarray] = {}
+        self._row_list: Dict[int, int] = {}
+
+    def train(self, vectors: np.ndarray, iterations: int = 10, seed: int = 0) -> None:
+        """Spherical k-means on a sample of the corpus"""
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), max(self.nlist * 40, 10_000), 100_000)
+        sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, self.nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=self.nlist) == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = len(vectors)
+        self._lists = [[] for _ in range(self.nlist)]
+        self._arrays.clear()
+        self._packed.clear()
+        self._row_list.clear()
+
+    def assign(self, vectors: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[i:i + chunk] @ self.centroids.T, axis=1)
+            for i in range(0, len(vectors), chunk)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def add(self, rows: Iterable[int], vectors: np.ndarray) -> None:
+        for row, list_id in zip(rows, self.assign(vectors)):
+            previous = self._row_list.get(row)
+            if previous is not None:
+                self._lists[previous].remove(row)
+                self._invalidate(previous)
+            self._lists[list_id].append(row)
+            self._row_list[row] = int(list_id)
+            self._invalidate(int(list_id))
+
+    def probe(self, queries: np.ndarray) -> np.ndarray:
+        """Ids of the nprobe nearest lists for each query"""
+        scores = queries @ self.centroids.T
+        return np.argpartition(-scores, self.nprobe - 1, axis=1)[:, :self.nprobe]
+
+    def candidates(self, list_ids: Iterable[int], source: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and contiguous vector blocks of the given lists"""
+        rows, blocks = [], []
+        for list_id in list_ids:
+            list_rows, packed = self._list_block(int(list_id), source)
+            rows.append(list_rows)
+            blocks.append(packed)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, source.shape[1]), dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(blocks)
+
+    def _list_block(self, list_id: int, source: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Lists are packed into their own contiguous copy on first probe, which
+        # avoids a random gather over the full matrix on every query
+        array = self._arrays.get(list_id)
+        if array is None:
+            array = np.asarray(self._lists[list_id], dtype=np.int64)
+            self._arrays[list_id] = array
+            self._packed[list_id] = np.ascontiguousarray(source[array])
+        return array, self._packed[list_id]
+
+    def pack(self, source: np.ndarray) -> None:
+        """Pack every list up front (done after training)"""
+        for list_id in range(self.nlist):
+            self._list_block(list_id, source)
+
+    def _invalidate(self, list_id: int) -> None:
+        self._arrays.pop(list_id, None)
+        self._packed.pop(list_id, None)
+
+class RetrievalEngine:
+    """
+    Vector store with exact and approximate top-k cosine search
+
+    Vectors live in a float32 matrix that grows by doubling. With a data_dir
+    the matrix is a memory-mapped file (vectors.f32) and documents are appended
+    to docs.jsonl, with the index.json header rewritten after every add, so
+    restarts reopen the corpus without re-embedding and a crash loses no
+    acknowledged add. That flush happens after the lock is released (writers
+    take turns on a lock of their own), so searches wait only for the
+    in-memory part of an add. Below brute_force_limit vectors every query is an
+    exact matrix product; past it an IVF index is trained once and new
+    vectors are assigned to existing centroids, with a retrain only after
+    the corpus grows retrain_factor times. Training runs on a snapshot
+    outside the lock, so searches keep using the previous index meanwhile.
+    """
+
+    def __init__(self, embedder: Optional[Embedder] = None, data_dir: Optional[str] = None,
+                 brute_force_limit: int = 50_000, nprobe: Optional[int] = None,
+                 retrain_factor: float = 4.0):
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self.data_dir = data_dir
+        self.brute_force_limit = brute_force_limit
+        self.nprobe = nprobe
+        self.retrain_factor = retrain_factor
+
+        self.count = 0
+        self._capacity = 0
+        self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self._docs: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._ivf: Optional[IVFIndex] = None
+        self._docs_file = None
+        self._lock = threading.RLock()
+        self._persist_lock = threading.Lock()  # orders flushes and header writes, not searches
+        self._building = False
+        self._changed_rows: set = set()  # rows written while an index is being trained
+
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+            self._load()
+
+    # Writes
+
+    def add(self, texts: Sequence[str], metadata: Optional[Sequence[Dict[str, Any]]] = None,
+            ids: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Embed and index texts (an existing id is overwritten in place)
+
+        Args:
+            texts: Texts to embed
+            metadata: Optional metadata per text
+            ids: Optional document ids (generated when missing)
+
+        Returns:
+            Document ids in input order
+        """
+        if not texts:
+            return []
+        vectors = self.embedder.embed(texts)
+        metadata = metadata or [{} for _ in texts]
+        with self._lock:
+            ids = list(ids) if ids else [f"doc-{self.count + i}" for i in range(len(texts))]
+            docs = [{"id": doc_id, "text": text, "metadata": meta}
+                    for doc_id, text, meta in zip(ids, texts, metadata)]
+            rebuild = self._index(vectors, docs)
+        self._persist()
+        if rebuild:
+            self._build_ivf()
+        return ids
+
+    def add_vectors(self, vectors: np.ndarray, docs: Sequence[Dict[str, Any]]) -> None:
+        """Index pre-computed (normalized) vectors with their documents"""
+        with self._lock:
+            rebuild = self._index(vectors, docs)
+        self._persist()
+        if rebuild:
+            self._build_ivf()
+
+    def _index(self, vectors: np.ndarray, docs: Sequence[Dict[str, Any]]) -> bool:
+        """Store vectors and documents (lock held); True when the IVF index should be retrained"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = []
+        for doc in docs:
+            row = self._rows.get(doc["id"])
+            if row is None:
+                row = self.count
+                self.count += 1
+                self._docs.append(doc)
+                self._rows[doc["id"]] = row
+            else:
+                self._docs[row] = doc
+            rows.append(row)
+            self._append_doc(row, doc)
+
+        self._ensure_capacity(self.count)
+        self._vectors[rows] = vectors
+        if self._building:
+            self._changed_rows.update(rows)
+
+        if self._ivf is not None and self.count > self._ivf.trained_size * self.retrain_factor:
+            return not self._building
+        if self._ivf is not None:
+            self._ivf.add(rows, vectors)
+            return False
+        return self.count >= self.brute_force_limit and not self._building
+
+    # Reads
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        return self.search_batch([query], k, min_score)[0]
+
+    def search_batch(self, queries: Sequence[str], k: int = 5,
+                     min_score: float = 0.0) -> List[List[Dict[str, Any]]]:
+        """Top-k documents for each query, embedded and scored as one batch"""
+        if not queries:
+            return []
+        scores, rows = self.search_vectors(self.embedder.embed(queries), k)
+        results = []
+        for query_scores, query_rows in zip(scores, rows):
+            results.append([
+                {**self._docs[row], "score": float(score)}
+                for score, row in zip(query_scores, query_rows)
+                if row >= 0 and score > min_score
+            ])
+        return results
+
+    def search_vectors(self, queries: np.ndarray, k: int = 5,
+                       exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k cosine search for a batch of normalized query vectors
+
+        Returns:
+            (scores, rows) arrays of shape (len(queries), k); missing hits have row -1
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            if self.count == 0:
+                return (np.full((len(queries), k), -np.inf, dtype=np.float32),
+                        np.full((len(queries), k), -1, dtype=np.int64))
+            if self._ivf is None or exact:
+                return self._search_exact(queries, k)
+            return self._search_ivf(queries, k)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self.count,
+            "dim": self.dim,
+            "embedder": self.embedder.name,
+            "index": "ivf" if self._ivf is not None else "brute_force",
+            "ivf_lists": self._ivf.nlist if self._ivf is not None else 0,
+            "persistent": self.data_dir is not None
+        }
+
+    # Persistence
+
+    def flush(self) -> None:
+        self._persist()
+
+    def close(self) -> None:
+        self.flush()
+        if self._docs_file:
+            self._docs_file.close()
+            self._docs_file = None
+
+    # Internal helpers
+
+    def _search_exact(self, queries: np.ndarray, k: int,
+                      block: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force search in corpus blocks so the score matrix stays bounded"""
+        best_scores, best_rows = None, None
+        for start in range(0, self.count, block):
+            stop = min(self.count, start + block)
+            scores, rows = _top_k(queries @ self._vectors[start:stop].T, k)
+            rows = np.where(rows >= 0, rows + start, -1)
+            if best_scores is None:
+                best_scores, best_rows = scores, rows
+                continue
+            merged_scores = np.concatenate([best_scores, scores], axis=1)
+            merged_rows = np.concatenate([best_rows, rows], axis=1)
+            best_scores, positions = _top_k(merged_scores, k)
+            best_rows = np.take_along_axis(merged_rows, positions, axis=1)
+        return best_scores, best_rows
+
+    def _search_ivf(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        for i, (query, list_ids) in enumerate(zip(queries, self._ivf.probe(queries))):
+            candidates, block = self._ivf.candidates(list_ids, self._vectors)
+            if len(candidates) == 0:
+                continue
+            scores, positions = _top_k((block @ query)[None, :], k)
+            found = positions[0] >= 0
+            all_scores[i, :found.sum()] = scores[0][found]
+            all_rows[i, :found.sum()] = candidates[positions[0][found]]
+        return all_scores, all_rows
+
+    def _build_ivf(self) -> None:
+        """
+        Train a new IVF index and swap it in
+
+        k-means runs on a copy of the vectors without holding the lock, so
+        searches and adds carry on against the previous index; rows added
+        or overwritten meanwhile are assigned to the new index at the swap.
+        """
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+            self._changed_rows.clear()
+            count = self.count
+            vectors = np.array(self._vectors[:count])
+        try:
+            nlist = max(16, int(np.sqrt(count)))
+            logger.info(f"Training IVF index: {count} vectors, {nlist} lists")
+            # Probe ~3% of the lists unless configured, which keeps recall steady as nlist grows
+            ivf = IVFIndex(nlist, self.nprobe or max(8, nlist // 32))
+            ivf.train(vectors)
+            ivf.add(range(count), vectors)
+            ivf.pack(vectors)
+            with self._lock:
+                changed = sorted(self._changed_rows | set(range(count, self.count)))
+                if changed:
+                    ivf.add(changed, self._vectors[changed])
+                self._ivf = ivf
+        finally:
+            with self._lock:
+                self._building = False
+                self._changed_rows.clear()
+
+    def _persist(self) -> None:
+        """Make appended vectors and documents durable, then record the count (lock not held)"""
+        if not self.data_dir:
+            return
+        with self._persist_lock:
+            # Every row below the count was written under the lock before it was read
+            with self._lock:
+                count = self.count
+                vectors = self._vectors
+                docs_file = self._docs_file
+            if isinstance(vectors, np.memmap):
+                vectors.flush()
+            if docs_file:
+                docs_file.flush()
+            path = os.path.join(self.data_dir, "index.json")
+            with open(f"{path}.tmp", "w") as f:
+                json.dump({"count": count, "dim": self.dim, "embedder": self.embedder.name}, f)
+            os.replace(f"{path}.tmp", path)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self._capacity:
+            return
+        capacity = max(1024, self._capacity * 2, needed)
+        if self.data_dir:
+            path = os.path.join(self.data_dir, "vectors.f32")
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            self._vectors = None
+            with open(path, "ab") as f:
+                f.truncate(capacity * self.dim * 4)
+            self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        else:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self._capacity] = self._vectors[:self._capacity]
+            self._vectors = grown
+        self._capacity = capacity
+
+    def _append_doc(self, row: int, doc: Dict[str, Any]) -> None:
+        if self._docs_file:
+            self._docs_file.write(json.dumps({"row": row, **doc}) + "\n")
+
+    def _load(self) -> None:
+        header_path = os.path.join(self.data_dir, "index.json")
+        docs_path = os.path.join(self.data_dir, "docs.jsonl")
+        vectors_path = os.path.join(self.data_dir, "vectors.f32")
+
+        if os.path.exists(header_path) and os.path.exists(vectors_path):
+            with open(header_path) as f:
+                header = json.load(f)
+            if header.get("dim") != self.dim or header.get("embedder") != self.embedder.name:
+                raise ValueError(f"RAG data in {self.data_dir} was built with a different embedder")
+
+            count = header["count"]
+            docs: List[Optional[Dict[str, Any]]] = [None] * count
+            if os.path.exists(docs_path):
+                with open(docs_path) as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        row = entry.pop("row")
+                        if row < count:
+                            docs[row] = entry
+
+            capacity = os.path.getsize(vectors_path) // (self.dim * 4)
+            self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            self._capacity = capacity
+            self.count = count
+            self._docs = [doc or {"id": f"doc-{row}", "text": "", "metadata": {}} for row, doc in enumerate(docs)]
+            self._rows = {doc["id"]: row for row, doc in enumerate(self._docs)}
+            logger.info(f"Loaded {count} vectors from {self.data_dir}")
+            if self.count >= self.brute_force_limit:
+                self._build_ivf()
+
+        self._docs_file = open(docs_path, "a")
+
+def event_to_text(event: Dict[str, Any]) -> str:
+    """Flatten a storage-service event into a searchable sentence"""
+    data = event.get("data") or {}
+    parts = [event.get("type", "event").replace("_", " ")]
+    if event.get("botId"):
+        parts.append(f"by {event['botId']}")
+    for key, value in data.items():
+        if isinstance(value, (str, int, float)):
+            parts.append(f"{key} {value}")
+        elif isinstance(value, dict):
+            parts.append(f"{key} " + " ".join(f"{k} {v}" for k, v in value.items() if isinstance(v, (str, int, float))))
+    return " ".join(parts)
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of a score matrix, sorted descending, padded with -1 rows"""
+    n = scores.shape[1]
+    kk = min(k, n)
+    part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    rows = np.take_along_axis(part, order, axis=1)
+    top = np.take_along_axis(part_scores, order, axis=1)
+    if kk < k:
+        pad = k - kk
+        rows = np.pad(rows, ((0, 0), (0, pad)), constant_values=-1)
+        top = np.pad(top, ((0, 0), (0, pad)), constant_values=-np.inf)
+    return top.astype(np.float32), rows.astype(np.int64)
+
+_engine: Optional[RetrievalEngine] = None
+_engine_lock = threading.Lock()
+
+def get_rag_engine() -> RetrievalEngine:
+    """
+    Process-wide engine, created on first use from RAG_* environment settings
+
+    Loading a persisted store can take a while, so startup does it from a
+    worker thread; the lock keeps a request arriving meanwhile from loading
+    a second copy.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RetrievalEngine(
+                    HashingEmbedder(dim=int(os.getenv("RAG_DIM", "384"))),
+                    data_dir=os.getenv("RAG_DATA_DIR") or None,
+                    brute_force_limit=int(os.getenv("RAG_BRUTE_FORCE_LIMIT", "50000")),
+                    nprobe=int(os.getenv("RAG_NPROBE", "0")) or None
+                )
+    return _engine
@@ -1,2 +1,273 @@
-# Placeholder for scheduler service
-pass
+"""
+LLM Scheduler - Priority, deadline and fair-share scheduling of LLM calls
+"""
+
+import os
+import time
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.services.llm_client import ask_llm
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower runs first)
+PRIORITY_INTERACTIVE = 0   # Chat replies a player is waiting for
+PRIORITY_PLANNING = 1      # Goal and task planning
+PRIORITY_SUMMARIZATION = 2 # Memory summaries and other background work
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_PLANNING: "planning",
+    PRIORITY_SUMMARIZATION: "summarization"
+}
+
+LLMRunner = Callable[..., Awaitable[str]]
+
+class DeadlineExceeded(Exception):
+    """Raised when a job's deadline passes before it produced a result"""
+
+class LLMJob:
+    """A prompt waiting for (or holding) an LLM slot"""
+
+    def __init__(self, prompt: str, priority: int, bot_id: str, deadline: Optional[float],
+                 coalesce_key: Optional[Tuple], llm_kwargs: Dict[str, Any],
+                 runner: LLMRunner):
+        self.prompt = prompt
+        self.priority = priority
+        self.bot_id = bot_id
+        self.deadline = deadline
+        self.coalesce_key = coalesce_key
+        self.llm_kwargs = llm_kwargs
+        self.runner = runner
+        self.enqueued_at = time.monotonic()
+        # The call runs in the submitter's context so its spans join the submitter's trace
+        self.context = contextvars.copy_context()
+        self.queue_span = tracer.start_span("llm.queue", priority=PRIORITY_NAMES.get(priority), bot_id=bot_id)
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.task: Optional[asyncio.Task] = None
+        self.active = True
+        self.waiters = 1
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        self.active = False
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.queue_span is not None:
+            # Never dispatched: the queue span ends with the job
+            tracer.end_span(self.queue_span, error=error is not None)
+            self.queue_span = None
+        if not self.future.done():
+            if isinstance(error, asyncio.CancelledError):
+                self.future.cancel()
+            elif error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+
+class LLMScheduler:
+    """
+    Shared admission point for every LLM call in the governor
+
+    At most max_concurrent calls run at once. Waiting jobs are served strictly
+    by priority class; within a class each bot has its own FIFO and bots are
+    picked by weighted fair share (the bot with the least weighted service so
+    far goes next), so one chatty bot cannot starve the others. A job whose
+    deadline passes is cancelled, whether queued or running. Batch-tolerant
+    jobs with the same prompt and settings share a single call (and the
+    first job's priority and deadline).
+    """
+
+    def __init__(self, max_concurrent: int = 4, runner: Optional[LLMRunner] = None,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_concurrent = max_concurrent
+        self.runner = runner or ask_llm
+        self.weights: Dict[str, float] = dict(weights or {})
+
+        self._queues: Dict[int, Dict[str, Deque[LLMJob]]] = {p: {} for p in PRIORITY_NAMES}
+        self._vtime: Dict[str, float] = {}
+        self._coalescing: Dict[Tuple, LLMJob] = {}
+        self._running = 0
+        self._waits: Dict[int, Deque[float]] = {p: deque(maxlen=500) for p in PRIORITY_NAMES}
+        self.counters = {
+            "submitted": 0,
+            "completed": 0,
+            "expired": 0,
+            "coalesced": 0,
+            "errors": 0
+        }
+        self.dispatched_by_bot: Dict[str, int] = {}
+
+    async def submit(self, prompt: str, priority: int = PRIORITY_INTERACTIVE,
+                     bot_id: str = "default", deadline: Optional[float] = None,
+                     coalesce: bool = False, runner: Optional[LLMRunner] = None,
+                     **llm_kwargs: Any) -> Any:
+        """
+        Queue a prompt and wait for the LLM response
+
+        Args:
+            prompt: Prompt text
+            priority: Priority class (see PRIORITY_*)
+            bot_id: Bot the work is done for (the fair-share unit)
+            deadline: Seconds from now after which the result is useless
+            coalesce: Share the call with identical queued or running prompts
+            runner: Call to make instead of the scheduler's default runner
+            **llm_kwargs: Passed through to the runner (model, max_tokens)
+
+        Returns:
+            The runner's result (the response text for ask_llm)
+
+        Raises:
+            DeadlineExceeded: If the deadline passed before a response arrived
+        """
+        self.counters["submitted"] += 1
+
+        runner = runner or self.runner
+        key = None
+        if coalesce:
+            key = (prompt, runner, tuple(sorted(llm_kwargs.items())))
+            shared = self._coalescing.get(key)
+            if shared is not None and shared.active:
+                shared.waiters += 1
+                self.counters["coalesced"] += 1
+                return await self._wait(shared, shielded=True)
+
+        job = LLMJob(prompt, priority, bot_id, deadline, key, llm_kwargs, runner)
+        if key is not None:
+            self._coalescing[key] = job
+        if deadline is not None:
+            job.timer = asyncio.get_running_loop().call_later(deadline, self._expire, job)
+
+        queue = self._queues[priority].setdefault(bot_id, deque())
+        if not queue:
+            # A bot returning from idle starts level with the others instead of cashing in saved credit
+            active = [self._vtime[b] for q in self._queues.values() for b in q if b != bot_id and q[b]]
+            self._vtime[bot_id] = max(self._vtime.get(bot_id, 0.0), min(active, default=0.0))
+        queue.append(job)
+        self._dispatch()
+        return await self._wait(job, shielded=coalesce)
+
+    async def _wait(self, job: LLMJob, shielded: bool) -> Any:
+        """Wait for a job's result as one of its callers"""
+        try:
+            return await asyncio.shield(job.future) if shielded else await job.future
+        except asyncio.CancelledError:
+            # Caller went away: drop the job once no other caller shares it
+            job.waiters -= 1
+            if job.waiters <= 0 and job.active:
+                self._cancel(job, asyncio.CancelledError())
+            raise
+
+    def set_weight(self, bot_id: str, weight: float) -> None:
+        """Give a bot a larger (or smaller) share of LLM capacity"""
+        self.weights[bot_id] = max(weight, 0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        now = time.monotonic()
+        for priority, name in PRIORITY_NAMES.items():
+            queued = [job for q in self._queues[priority].values() for job in q if job.active]
+            waits = sorted(self._waits[priority])
+            classes[name] = {
+                "queue_depth": len(queued),
+                "oldest_wait_ms": round(max((now - j.enqueued_at for j in queued), default=0.0) * 1000, 1),
+                "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "wait_ms_p95": round(waits[max(0, int(len(waits) * 0.95) - 1)] * 1000, 1) if waits else 0.0
+            }
+        return {
+            "running": self._running,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": sum(c["queue_depth"] for c in classes.values()),
+            "classes": classes,
+            "dispatched_by_bot": dict(self.dispatched_by_bot),
+            **self.counters
+        }
+
+    def _next_job(self) -> Optional[LLMJob]:
+        for priority in sorted(self._queues):
+            bots = self._queues[priority]
+            while True:
+                waiting = [bot for bot, queue in bots.items() if queue]
+                if not waiting:
+                    break
+                bot = min(waiting, key=lambda b: self._vtime.get(b, 0.0))
+                job = bots[bot].popleft()
+                if not bots[bot]:
+                    del bots[bot]
+                if job.active:
+                    self._vtime[bot] = self._vtime.get(bot, 0.0) + 1.0 / self.weights.get(bot, 1.0)
+                    return job
+        return None
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrent:
+            job = self._next_job()
+            if job is None:
+                return
+            self._waits[job.priority].append(time.monotonic() - job.enqueued_at)
+            self.dispatched_by_bot[job.bot_id] = self.dispatched_by_bot.get(job.bot_id, 0) + 1
+            self._running += 1
+            tracer.end_span(job.queue_span)
+            job.queue_span = None
+            job.task = asyncio.create_task(self._run(job), context=job.context)
+
+    async def _run(self, job: LLMJob) -> None:
+        try:
+            response = await job.runner(job.prompt, **job.llm_kwargs)
+            job.finish(response)
+            self.counters["completed"] += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"LLM job for {job.bot_id} failed: {e}")
+            job.finish(error=e)
+            self.counters["errors"] += 1
+        finally:
+            self._forget(job)
+            self._running -= 1
+            self._dispatch()
+
+    def _expire(self, job: LLMJob) -> None:
+        if not job.active:
+            return
+        logger.info(f"LLM job for {job.bot_id} missed its {job.deadline}s deadline "
+                    f"({PRIORITY_NAMES[job.priority]})")
+        self._cancel(job, DeadlineExceeded(f"No response within {job.deadline}s"))
+        self.counters["expired"] += 1
+
+    def _cancel(self, job: LLMJob, error: BaseException) -> None:
+        """Resolve a job with an error and stop its call if it is already running"""
+        job.finish(error=error)
+        self._forget(job)
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+
+    def _forget(self, job: LLMJob) -> None:
+        if job.coalesce_key is not None and self._coalescing.get(job.coalesce_key) is job:
+            del self._coalescing[job.coalesce_key]
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse 'BotA=2,BotB=0.5' into a weight map"""
+    weights = {}
+    for item in spec.split(","):
+        if "=" in item:
+            bot, weight = item.split("=", 1)
+            weights[bot.strip()] = float(weight)
+    return weights
+
+_scheduler: Optional[LLMScheduler] = None
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Process-wide scheduler, created on first use from LLM_* environment settings"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT", "4")),
+            weights=parse_weights(os.getenv("LLM_BOT_WEIGHTS", ""))
+        )
+    return _scheduler
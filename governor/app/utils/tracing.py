@@ -0,0 +1,271 @@
+"""
+Tracing - Correlation IDs and span timing exported as JSON lines
+
+Vendored: this file is kept byte-identical in bot/src/logic, governor/app/utils
+and storage-service/src. Each service is built and run from its own directory
+(the Docker build context), so a package shared between them would not be
+importable in the images; change all three copies together.
+"""
+
+import os
+import json
+import time
+import atexit
+import random
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context header carried on every call between the services
+TRACEPARENT_HEADER = "traceparent"
+# Returned on every traced response so callers can log the correlation ID
+TRACE_ID_HEADER = "x-trace-id"
+
+# (trace_id, parent span_id, sampled) taken from an incoming traceparent
+SpanContext = Tuple[str, str, bool]
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "start", "_started", "attrs")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.attrs = attrs or {}
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class JsonLinesExporter:
+    """
+    Appends finished spans to a JSON-lines file
+
+    Lines are buffered and written once batch_size spans are waiting or
+    flush_interval after the first buffered span, so the event loop does one
+    small write per batch instead of one per span.
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._buffer: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.exported = 0
+        atexit.register(self.close)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, separators=(",", ":"), default=str))
+        self.exported += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            try:
+                self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+            except RuntimeError:
+                self.flush()  # No event loop to flush later from
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer and not self._file.closed:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if not self._file.closed:
+            self._file.close()
+
+class _SpanScope:
+    """Context manager that makes a child span current for its block"""
+
+    __slots__ = ("tracer", "name", "attrs", "span", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> Optional[Span]:
+        self.span = self.tracer.start_span(self.name, **self.attrs)
+        if self.span is not None:
+            self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.span is not None:
+            _current.reset(self.token)
+            self.tracer.end_span(self.span, error=exc_type is not None)
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to the exporter
+
+    Traces start at the HTTP edge (TracingMiddleware); code below it opens
+    child spans with tracer.span(name). Outside a request, or when no
+    exporter is configured, spans are no-ops and cost one context lookup.
+    Sampling is decided once per trace and travels in the traceparent flags.
+    """
+
+    def __init__(self, service: str = "unknown", exporter: Optional[JsonLinesExporter] = None,
+                 sample_rate: float = 1.0):
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, service: str, exporter: Optional[JsonLinesExporter],
+                  sample_rate: float = 1.0) -> None:
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_trace(self, name: str, parent: Optional[SpanContext] = None, **attrs: Any) -> Span:
+        """Root span for this service: continues the caller's trace or starts a new one"""
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        return Span(name, trace_id, parent_id, sampled, attrs)
+
+    def start_span(self, name: str, **attrs: Any) -> Optional[Span]:
+        """Child of the current span, not made current (None outside a trace)"""
+        parent = _current.get()
+        if parent is None or not self.enabled:
+            return None
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, attrs)
+
+    def end_span(self, span: Optional[Span], error: bool = False) -> None:
+        if span is None or not span.sampled or self.exporter is None:
+            return
+        self.exporter.export({
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "service": self.service,
+            "name": span.name,
+            "start": round(span.start, 6),
+            "duration_ms": round((time.perf_counter() - span._started) * 1000, 3),
+            "status": "error" if error else "ok",
+            "attrs": span.attrs
+        })
+
+    def span(self, name: str, **attrs: Any) -> _SpanScope:
+        """Time a block as a child of the current span"""
+        return _SpanScope(self, name, attrs)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+tracer = Tracer()
+
+def init_tracing(service: str) -> Tracer:
+    """
+    Configure the process tracer from TRACE_* settings
+
+    TRACE_FILE enables export (a '{service}' placeholder is replaced with the
+    service name); TRACE_SAMPLE_RATE is the fraction of new traces kept.
+    """
+    path = os.getenv("TRACE_FILE", "")
+    exporter = JsonLinesExporter(path.replace("{service}", service)) if path else None
+    tracer.configure(service, exporter, float(os.getenv("TRACE_SAMPLE_RATE", "1.0")))
+    if exporter is not None:
+        logger.info(f"Tracing enabled for {service}: spans written to {exporter.path}")
+    return tracer
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+def inject_headers(headers: Optional[Dict[str, str]] = None, span: Optional[Span] = None) -> Dict[str, str]:
+    """Outgoing headers carrying the trace context of span (default: the current span)"""
+    headers = dict(headers or {})
+    span = span or _current.get()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent
+    return headers
+
+def parse_traceparent(value: str) -> Optional[SpanContext]:
+    """(trace_id, span_id, sampled) from a traceparent header, None if malformed"""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware opening the root span of each request
+
+    An incoming traceparent header continues the caller's trace. The span is
+    named after the route template (route_name) and the trace ID is returned
+    in the x-trace-id response header.
+    """
+
+    def __init__(self, app, route_name: Optional[Callable[[dict], str]] = None,
+                 skip_paths: Iterable[str] = ("/metrics", "/health")):
+        self.app = app
+        self.route_name = route_name or (lambda scope: scope.get("path", ""))
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        span = tracer.start_trace(scope["method"], parent)
+        token = _current.set(span)
+        status = 500
+
+        async def send_with_trace_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_ID_HEADER.encode(), span.trace_id.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current.reset(token)
+            span.name = f"{scope['method']} {self.route_name(scope)}"
+            span.set("status_code", status)
+            tracer.end_span(span, error=status >= 500)
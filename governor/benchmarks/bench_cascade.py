@@ -0,0 +1,89 @@
+"""
+Cascade Benchmark - Model cascade vs always using the large model, on stubbed backends
+
+The stub backends have fixed latency profiles and a known share of weak
+answers (hedges, truncation), so escalation rate and latency per tier can be
+checked without network access.
+
+Run from governor/:
+    python -m benchmarks.bench_cascade [requests]      (default: 400)
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from app.services.llm_client import LLMResult
+from app.services.model_router import ModelRouter, ModelTier
+from app.services.scheduler import LLMScheduler
+
+QUERIES = [
+    "hey how's it going",
+    "where did you put the diamonds?",
+    "come here",
+    "how do i build a nether portal?",
+    "nice castle",
+    "why is my farm not working?",
+    "follow me",
+    "what are you doing?",
+]
+
+# model: (latency seconds, share of weak answers, cost per call)
+PROFILES = {
+    "stub-small": (0.02, 0.25, 1),
+    "stub-large": (0.12, 0.02, 15),
+}
+
+class StubBackend:
+    """Deterministic completions with per-model latency and weak-answer rate"""
+
+    def __init__(self, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.cost = 0
+
+    async def __call__(self, prompt: str, model: str, max_tokens: int, **kwargs) -> LLMResult:
+        latency, weak_rate, cost = PROFILES[model]
+        self.cost += cost
+        await asyncio.sleep(latency)
+        if self.rng.random() < weak_rate:
+            text = "I'm not sure, I don't know much about that"
+            return LLMResult(text, model, "stop", avg_logprob=-1.2, completion_tokens=12)
+        query = prompt.rsplit("Player message: ", 1)[-1]
+        text = f"Sure! About {query[:60]} - let's do it, follow me."
+        return LLMResult(text, model, "stop", avg_logprob=-0.15, completion_tokens=16)
+
+async def run(requests: int, cascade: bool) -> None:
+    backend = StubBackend()
+    tiers = [ModelTier("small", "stub-small", 12000), ModelTier("large", "stub-large", 100000)]
+    if not cascade:
+        tiers = tiers[1:]
+    router = ModelRouter(tiers, scheduler=LLMScheduler(max_concurrent=8), runner=backend)
+
+    latencies = []
+    async def one(i: int) -> None:
+        query = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        await router.respond(f"Player message: {query}", query, bot_id=f"bot{i % 4}")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    label = "cascade" if cascade else "large only"
+    print(f"{label:<12} p50 {latencies[len(latencies) // 2]:7.1f}ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f}ms  "
+          f"cost {backend.cost:6d}  throughput {requests / elapsed:6.1f}/s")
+    for name, stats in router.stats()["tiers"].items():
+        print(f"  {name:<6} calls {stats['calls']:4d}  escalation rate {stats['escalation_rate']:.3f}  "
+              f"latency avg {stats['latency_ms_avg']:6.1f}ms  confidence avg {stats['confidence_avg']}")
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    asyncio.run(run(requests, cascade=False))
+    asyncio.run(run(requests, cascade=True))
+
+if __name__ == "__main__":
+    main()
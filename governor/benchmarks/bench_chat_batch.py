@@ -0,0 +1,89 @@
+"""
+Chat Batch Benchmark - A reaction storm as N separate /chat calls vs /chat/batch
+
+Starts the governor in-process on a free port with a stubbed LLM backend
+(fixed latency), so only HTTP, prompt building and scheduling overhead differ.
+
+Run from governor/:
+    OPENAI_API_KEY=unused python -m benchmarks.bench_chat_batch [bots] [llm_ms]
+"""
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from app.main import create_app
+from app.routes.decision import BATCH_MAX_SIZE
+from app.services.llm_client import LLMResult
+from app.services.model_router import get_model_router
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _payload(i: int) -> dict:
+    return {
+        "message": f"You are Bot{i}. A creeper exploded near the castle. Player message: what was that?",
+        "query": "what was that?",
+        "bot_id": f"Bot{i}",
+        "player": "Steve",
+        "context": {"health": 20, "position": {"x": 10, "y": 64, "z": -30},
+                    "nearbyPlayers": ["Steve", "Alex"], "currentActivity": "building"}
+    }
+
+async def individual(base: str, bots: int) -> float:
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/api/v1/chat", json=_payload(i)) for i in range(bots)))
+        elapsed = time.perf_counter() - started
+    assert all(r.status_code == 200 for r in responses)
+    return elapsed
+
+async def batched(base: str, bots: int) -> float:
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/api/v1/chat/batch", json={"requests": [_payload(i) for i in range(start, min(bots, start + BATCH_MAX_SIZE))]})
+            for start in range(0, bots, BATCH_MAX_SIZE)
+        ))
+        elapsed = time.perf_counter() - started
+    assert all(r.status_code == 200 and all("response" in x for x in r.json()["results"]) for r in responses)
+    return elapsed
+
+def main() -> None:
+    bots = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    llm_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+
+    async def stub(prompt: str, model: str, max_tokens: int, **kwargs) -> LLMResult:
+        await asyncio.sleep(llm_ms / 1000)
+        return LLMResult("Something blew up over by the castle!", model, "stop")
+    get_model_router().runner = stub
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(batched(base, 2))  # warm up
+        single = min(asyncio.run(individual(base, bots)) for _ in range(3))
+        batch = min(asyncio.run(batched(base, bots)) for _ in range(3))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    print(f"{bots} bots, stub LLM {llm_ms:.0f}ms")
+    print(f"{'individual /chat':<20} {single * 1000:8.1f}ms")
+    print(f"{'/chat/batch':<20} {batch * 1000:8.1f}ms")
+
+if __name__ == "__main__":
+    main()
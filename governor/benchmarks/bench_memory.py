@@ -0,0 +1,75 @@
+"""
+Memory Benchmark - Per-chat memory payload size as conversation history grows
+
+Compares rendering the full raw history into every prompt (the bot's previous
+behaviour) with the memory bridge's bounded payload.
+
+Run from governor/:
+    python -m benchmarks.bench_memory [lengths...]      (default: 10 100 1000 10000)
+"""
+
+import random
+import sys
+import time
+
+from app.services.memory_bridge import MemoryBridge
+
+LINES = [
+    "hey can you help me find diamonds",
+    "my base is at the big oak forest",
+    "i love building redstone farms",
+    "meet me at 120 64 -340",
+    "what are you doing right now",
+    "can you bring me some iron",
+    "my name is Steve_42",
+    "the creepers blew up my wall again",
+]
+
+def history(length: int, rng: random.Random):
+    """Alternating player/bot messages, one every 20s with occasional long breaks"""
+    now = time.time() * 1000 - length * 60_000
+    entries = []
+    for i in range(length):
+        now += 20_000 if rng.random() > 0.05 else 3_600_000
+        if i % 2 == 0:
+            entries.append({"username": "Steve", "message": rng.choice(LINES), "timestamp": now})
+        else:
+            entries.append({"data": {"event": "bot_response", "username": "Steve", "message": "",
+                                     "response": "Sure thing, on my way!"}, "timestamp": now})
+    return entries
+
+def raw_prompt_chars(entries) -> int:
+    """Size of the old MEMORY section: every entry rendered verbatim"""
+    return sum(len(f"- {e.get('username', 'Bot')} at {e['timestamp']}: "
+                   f"{e.get('message') or e.get('data', {}).get('response', '')}\n") for e in entries)
+
+def run(length: int) -> None:
+    rng = random.Random(length)
+    entries = history(length, rng)
+    bridge = MemoryBridge()
+
+    start = time.perf_counter()
+    for i in range(0, length, 50):
+        bridge.ingest("Bot", entries[i:i + 50], "Steve")
+        bridge.consolidate()
+    consolidate_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(100):
+        payload = bridge.get_payload("Bot", "Steve")
+        text = bridge.render(payload)
+    serve_us = (time.perf_counter() - start) / 100 * 1e6
+
+    print(f"{length:>8} {raw_prompt_chars(entries):>12} {len(text):>12} "
+          f"{len(payload['sessions']):>9} {len(payload['facts']):>6} "
+          f"{consolidate_ms:>14.1f} {serve_us:>10.1f}")
+
+def main() -> None:
+    lengths = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    print(f"{'history':>8} {'raw chars':>12} {'tiered chars':>12} {'sessions':>9} {'facts':>6} "
+          f"{'consolidate ms':>14} {'serve us':>10}")
+    for length in lengths:
+        run(length)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+RAG Benchmark - Recall and latency of exact vs IVF search at growing corpus sizes
+
+Run from governor/:
+    python -m benchmarks.bench_rag [sizes...]      (default: 10000 100000 1000000)
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app.services.rag_engine import Embedder, RetrievalEngine
+
+DIM = 128
+QUERIES = 500
+K = 10
+
+class PrecomputedEmbedder(Embedder):
+    """Vectors are generated directly, so only index cost is measured"""
+    name = "precomputed"
+    dim = DIM
+
+def clustered_corpus(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Gaussian clusters on the unit sphere, closer to real embeddings than uniform noise"""
+    centers = rng.normal(size=(max(64, size // 500), DIM)).astype(np.float32)
+    vectors = np.empty((size, DIM), dtype=np.float32)
+    for start in range(0, size, 100_000):
+        stop = min(size, start + 100_000)
+        chunk = centers[rng.integers(0, len(centers), stop - start)]
+        chunk += 0.6 * rng.normal(size=chunk.shape).astype(np.float32)
+        vectors[start:stop] = chunk / np.linalg.norm(chunk, axis=1, keepdims=True)
+    return vectors
+
+def run(size: int) -> None:
+    rng = np.random.default_rng(size)
+    corpus = clustered_corpus(size, rng)
+    queries = corpus[rng.integers(0, size, QUERIES)] + 0.2 * rng.normal(size=(QUERIES, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    engine = RetrievalEngine(PrecomputedEmbedder(), brute_force_limit=min(size, 50_000))
+    docs = [{"id": str(i), "text": "", "metadata": {}} for i in range(size)]
+    start = time.perf_counter()
+    engine.add_vectors(corpus, docs)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, exact_rows = engine.search_vectors(queries, K, exact=True)
+    exact_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    start = time.perf_counter()
+    _, ivf_rows = engine.search_vectors(queries, K)
+    ivf_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(exact_rows, ivf_rows)])
+
+    start = time.perf_counter()
+    extra = clustered_corpus(1000, rng)
+    engine.add_vectors(extra, [{"id": f"new-{i}", "text": "", "metadata": {}} for i in range(1000)])
+    incremental_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{size:>9} {build:>8.2f}s {exact_ms:>10.3f}ms {ivf_ms:>10.3f}ms {recall:>10.3f} {incremental_ms:>12.1f}ms")
+
+def main() -> None:
+    sizes = [int(s) for s in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"dim={DIM} queries={QUERIES} k={K} (latency is per query, batched)")
+    print(f"{'vectors':>9} {'build':>9} {'exact':>12} {'ivf':>12} {'recall@k':>10} {'add 1k':>14}")
+    for size in sizes:
+        run(size)
+
+if __name__ == "__main__":
+    main()
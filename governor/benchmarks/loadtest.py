@@ -0,0 +1,165 @@
+"""
+Governor Load Test - Drive /chat at a controlled request rate and report latency percentiles
+
+Open-loop: requests are started on schedule (constant or Poisson arrivals)
+whether or not earlier ones have finished, so queueing shows up as latency.
+Without --target the governor runs in-process on the fake LLM backend, fully
+offline; tune the fake with FAKE_LLM_* settings.
+
+Run from governor/:
+    python -m benchmarks.loadtest --rate 50 --duration 20
+    FAKE_LLM_429_RATE=0.05 python -m benchmarks.loadtest --rate 100 --arrival poisson
+    python -m benchmarks.loadtest --target http://localhost:5000 --rate 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+QUERIES = [
+    "hey what's up",
+    "where can I find diamonds?",
+    "come here",
+    "how do i make a nether portal?",
+    "nice castle!",
+    "what are you doing?",
+]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _payload(i: int, bots: int) -> dict:
+    query = QUERIES[i % len(QUERIES)]
+    bot = f"LoadBot{i % bots}"
+    return {
+        "message": f"You are {bot}. Player message: {query}",
+        "query": query,
+        "bot_id": bot,
+        "player": f"Player{i % 7}",
+        "context": {"health": 20, "position": {"x": i % 100, "y": 64, "z": -i % 100}}
+    }
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))]
+
+def start_local_governor():
+    """Run the governor in this process on the fake backend, returning (base_url, server, thread)"""
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    import uvicorn
+    from app.main import create_app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server, thread
+
+async def run_load(base: str, rate: float, duration: float, arrival: str, bots: int,
+                   timeout: float, seed: int) -> Dict:
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    tasks = []
+
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base, timeout=timeout, limits=limits) as client:
+        async def one(i: int) -> None:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/v1/chat", json=_payload(i, bots))
+                key = str(response.status_code)
+            except httpx.TimeoutException:
+                key = "timeout"
+            except httpx.HTTPError as e:
+                key = type(e).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            statuses[key] = statuses.get(key, 0) + 1
+            if key == "200":
+                latencies.append(elapsed)
+
+        loop_start = time.perf_counter()
+        next_at = 0.0
+        i = 0
+        while next_at < duration:
+            delay = loop_start + next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i)))
+            i += 1
+            next_at += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+        sent_for = time.perf_counter() - loop_start
+        await asyncio.gather(*tasks)
+        total = time.perf_counter() - loop_start
+
+        status = (await client.get("/api/v1/status")).json()
+
+    latencies.sort()
+    sent = len(tasks)
+    errors = sent - statuses.get("200", 0)
+    return {
+        "target_rate": rate,
+        "offered_rate": round(sent / sent_for, 2),
+        "sent": sent,
+        "ok": statuses.get("200", 0),
+        "error_rate": round(errors / sent, 4) if sent else 0.0,
+        "throughput": round(statuses.get("200", 0) / total, 2),
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 1),
+            "p95": round(_percentile(latencies, 95), 1),
+            "p99": round(_percentile(latencies, 99), 1),
+            "max": round(latencies[-1], 1) if latencies else 0.0
+        },
+        "statuses": statuses,
+        "scheduler": {k: status["services"]["scheduler"][k] for k in ("completed", "expired", "errors")},
+        "backend": status["services"].get("llm_client")
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", help="Governor base URL (default: in-process governor on the fake backend)")
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="constant")
+    parser.add_argument("--bots", type=int, default=8, help="Distinct bot ids to spread load over")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    server = thread = None
+    base = args.target
+    if base is None:
+        base, server, thread = start_local_governor()
+    try:
+        report = asyncio.run(run_load(base.rstrip("/"), args.rate, args.duration, args.arrival,
+                                      args.bots, args.timeout, args.seed))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    lat = report["latency_ms"]
+    print(f"rate {report['target_rate']}/s (offered {report['offered_rate']}/s), {report['sent']} requests")
+    print(f"throughput {report['throughput']}/s  error rate {report['error_rate'] * 100:.2f}%")
+    print(f"latency p50 {lat['p50']}ms  p95 {lat['p95']}ms  p99 {lat['p99']}ms  max {lat['max']}ms")
+    print(f"statuses {report['statuses']}  scheduler {report['scheduler']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Trace Report - Per-request waterfalls and per-hop latency percentiles from span files
+
+Reads the JSON-lines span files written by the bot logic service, the
+governor and the storage service (TRACE_FILE, e.g. traces/{service}.jsonl)
+and joins them by trace ID. Without options it prints latency percentiles for
+every hop (service + span name), with self time excluding child spans so the
+slow hop stands out. Span start times are wall-clock, so services should run
+on hosts with synced clocks for the waterfalls to line up.
+
+Run from governor/:
+    python -m benchmarks.trace_report traces/
+    python -m benchmarks.trace_report traces/*.jsonl --slowest 3
+    python -m benchmarks.trace_report traces/ --trace 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))]
+
+def load_spans(paths: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Spans grouped by trace ID (directories are searched for *.jsonl files)"""
+    files: List[str] = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path])
+
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for file in files:
+        with open(file, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    span = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+                traces.setdefault(span["trace_id"], []).append(span)
+    return traces
+
+def _roots(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Spans whose parent is not in the trace (the request's entry points)"""
+    ids = {span["span_id"] for span in spans}
+    return [span for span in spans if span.get("parent_id") not in ids]
+
+def trace_duration(spans: List[Dict[str, Any]]) -> float:
+    """Wall time covered by a trace in ms"""
+    start = min(span["start"] for span in spans)
+    end = max(span["start"] + span["duration_ms"] / 1000 for span in spans)
+    return (end - start) * 1000
+
+def hop_stats(traces: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Latency percentiles per hop, slowest p99 first
+
+    Self time is a span's duration minus the time covered by its direct
+    children (never below zero when children run concurrently).
+    """
+    durations: Dict[tuple, List[float]] = {}
+    self_times: Dict[tuple, List[float]] = {}
+    errors: Dict[tuple, int] = {}
+    for spans in traces.values():
+        children: Dict[str, float] = {}
+        for span in spans:
+            if span.get("parent_id"):
+                children[span["parent_id"]] = children.get(span["parent_id"], 0.0) + span["duration_ms"]
+        for span in spans:
+            key = (span["service"], span["name"])
+            durations.setdefault(key, []).append(span["duration_ms"])
+            self_times.setdefault(key, []).append(max(0.0, span["duration_ms"] - children.get(span["span_id"], 0.0)))
+            if span.get("status") == "error":
+                errors[key] = errors.get(key, 0) + 1
+
+    rows = []
+    for key, values in durations.items():
+        values.sort()
+        own = sorted(self_times[key])
+        rows.append({
+            "service": key[0],
+            "name": key[1],
+            "count": len(values),
+            "errors": errors.get(key, 0),
+            "p50_ms": round(_percentile(values, 50), 2),
+            "p90_ms": round(_percentile(values, 90), 2),
+            "p99_ms": round(_percentile(values, 99), 2),
+            "max_ms": round(values[-1], 2),
+            "self_p50_ms": round(_percentile(own, 50), 2),
+            "self_p99_ms": round(_percentile(own, 99), 2)
+        })
+    rows.sort(key=lambda row: row["p99_ms"], reverse=True)
+    return rows
+
+def waterfall(spans: List[Dict[str, Any]], width: int = 50) -> List[str]:
+    """Text waterfall of one trace: a bar per span on a shared time axis, children indented"""
+    start = min(span["start"] for span in spans)
+    total = max(trace_duration(spans), 0.001)
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        children.setdefault(span.get("parent_id"), []).append(span)
+
+    lines = []
+
+    def render(span: Dict[str, Any], depth: int) -> None:
+        offset = (span["start"] - start) * 1000
+        begin = min(width - 1, int(offset / total * width))
+        length = max(1, min(width - begin, round(span["duration_ms"] / total * width)))
+        bar = " " * begin + "#" * length + " " * (width - begin - length)
+        flag = " !" if span.get("status") == "error" else ""
+        lines.append(f"|{bar}| {offset:9.1f} {span['duration_ms']:9.1f}  "
+                     f"{'  ' * depth}{span['service']}: {span['name']}{flag}")
+        for child in sorted(children.get(span["span_id"], []), key=lambda s: s["start"]):
+            render(child, depth + 1)
+
+    for root in sorted(_roots(spans), key=lambda s: s["start"]):
+        render(root, 0)
+    return lines
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Span files or directories of *.jsonl files")
+    parser.add_argument("--trace", help="Print the waterfall of one trace ID")
+    parser.add_argument("--slowest", type=int, default=0, help="Print waterfalls of the N slowest traces")
+    parser.add_argument("--width", type=int, default=50, help="Waterfall bar width")
+    parser.add_argument("--json", action="store_true", help="Print hop statistics as JSON")
+    args = parser.parse_args(argv)
+
+    traces = load_spans(args.paths)
+    if not traces:
+        sys.exit("No spans found")
+
+    if args.trace:
+        spans = traces.get(args.trace)
+        if spans is None:
+            sys.exit(f"Trace {args.trace} not found")
+        print(f"trace {args.trace}  {trace_duration(spans):.1f}ms  {len(spans)} spans  (offset, duration in ms)")
+        print("\n".join(waterfall(spans, args.width)))
+        return
+
+    rows = hop_stats(traces)
+    if args.json:
+        print(json.dumps({"traces": len(traces), "hops": rows}, indent=2))
+    else:
+        print(f"{len(traces)} traces, {sum(len(s) for s in traces.values())} spans")
+        print(f"{'service':<16} {'span':<36} {'count':>6} {'err':>4} {'p50':>8} {'p90':>8} "
+              f"{'p99':>8} {'max':>8} {'self50':>8} {'self99':>8}")
+        for row in rows:
+            print(f"{row['service'][:16]:<16} {row['name'][:36]:<36} {row['count']:>6} {row['errors']:>4} "
+                  f"{row['p50_ms']:>8.1f} {row['p90_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} "
+                  f"{row['self_p50_ms']:>8.1f} {row['self_p99_ms']:>8.1f}")
+
+    slowest = sorted(traces.items(), key=lambda item: trace_duration(item[1]), reverse=True)[:args.slowest]
+    for trace_id, spans in slowest:
+        print(f"\ntrace {trace_id}  {trace_duration(spans):.1f}ms  {len(spans)} spans  (offset, duration in ms)")
+        print("\n".join(waterfall(spans, args.width)))
+
+if __name__ == "__main__":
+    main()
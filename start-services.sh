@@ -11,7 +11,7 @@ export BOT_LOGIC_URL="http://localhost:8000"
 # Start FastAPI Bridge
 echo "📡 Starting FastAPI Bridge on port 8001..."
 cd fastapi-bridge
-python -m uvicorn app.main:app --host 0.0.0.0 --port 8001 &
+python -m uvicorn --factory app.main:create_app --host 0.0.0.0 --port 8001 &
 BRIDGE_PID=$!
 
 # Wait a moment for bridge to start
@@ -20,7 +20,7 @@ sleep 3
 # Start Bot Logic
 echo "🧠 Starting Bot Logic on port 8000..."
 cd ../bot-logic
-FASTAPI_BRIDGE_URL=$FASTAPI_BRIDGE_URL python -m uvicorn main:app --host 0.0.0.0 --port 8000 &
+FASTAPI_BRIDGE_URL=$FASTAPI_BRIDGE_URL python -m uvicorn --factory main:create_app --host 0.0.0.0 --port 8000 &
 LOGIC_PID=$!
 
 # Wait a moment for logic to start
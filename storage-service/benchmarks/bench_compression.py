@@ -0,0 +1,184 @@
+"""
+Compression Benchmark - Event data compression ratio and CPU cost per event type
+
+Generates synthetic events shaped like the large ones bots write (block
+scans in world_update, area metadata in discovery_made) plus small chat
+messages, and runs them through the storage service's PayloadCodec:
+without a dictionary, then with a dictionary trained on the first
+--train events of each type (zstd as well when zstandard is installed).
+Every payload must decode back to the original data.
+
+It then writes the same events into an EventService on fakeredis with and
+without compression and reports hot tier bytes and read time with and
+without data.
+
+Run from storage-service/:
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --events 5000 --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from src.services.events import EventService, compression
+from src.services.events.compression import PayloadCodec
+from src.services.events.retention import RetentionPolicy
+
+BLOCKS = ["minecraft:stone", "minecraft:dirt", "minecraft:grass_block", "minecraft:deepslate", "minecraft:andesite",
+          "minecraft:coal_ore", "minecraft:iron_ore", "minecraft:gravel", "minecraft:water", "minecraft:oak_log",
+          "minecraft:oak_leaves", "minecraft:sand", "minecraft:diorite", "minecraft:granite", "minecraft:air"]
+BIOMES = ["plains", "forest", "desert", "taiga", "swamp", "river", "savanna", "dripstone_caves"]
+STRUCTURES = ["village", "mineshaft", "ruined_portal", "shipwreck", "desert_pyramid", "stronghold"]
+
+def make_data(rng: random.Random, event_type: str) -> Dict[str, Any]:
+    if event_type == "world_update":
+        ox, oz = rng.randrange(-2000, 2000), rng.randrange(-2000, 2000)
+        return {
+            "action": "block_scan",
+            "origin": {"x": ox, "y": 64, "z": oz},
+            "radius": 8,
+            "blocks": [
+                {"name": rng.choice(BLOCKS[:6]) if rng.random() < 0.8 else rng.choice(BLOCKS),
+                 "position": {"x": ox + rng.randint(-8, 8), "y": 64 + rng.randint(-8, 8), "z": oz + rng.randint(-8, 8)}}
+                for _ in range(rng.randint(60, 160))
+            ]
+        }
+    if event_type == "discovery_made":
+        return {
+            "discovery": rng.choice(STRUCTURES),
+            "biome": rng.choice(BIOMES),
+            "bounds": {"min": {"x": rng.randint(-2000, 2000), "y": 40, "z": rng.randint(-2000, 2000)},
+                       "max": {"x": rng.randint(-2000, 2000), "y": 90, "z": rng.randint(-2000, 2000)}},
+            "chunks": [{"x": rng.randint(-125, 125), "z": rng.randint(-125, 125), "biome": rng.choice(BIOMES),
+                        "loaded": rng.random() < 0.9, "entities": rng.randint(0, 12)}
+                       for _ in range(rng.randint(20, 60))],
+            "notes": "Found while exploring, marked for the next expedition"
+        }
+    return {"username": f"player_{rng.randrange(50)}", "message": rng.choice(
+        ["anyone got iron?", "heading to the village", "need help at base", "found diamonds!"])}
+
+def make_events(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    types = ["world_update", "discovery_made", "chat_message"]
+    return [
+        {"id": f"event_{i}", "type": event_type, "botId": f"bot_{i % 20}", "severity": rng.randint(0, 10),
+         "timestamp": 1700000000000 + i, "data": make_data(rng, event_type)}
+        for i, event_type in ((i, types[i % len(types)]) for i in range(count))
+    ]
+
+def measure_codec(codec, events: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    report: Dict[str, Dict[str, float]] = {}
+    stored = []
+    for event in events:
+        raw = len(json.dumps(event["data"]))
+        started = time.perf_counter()
+        encoded = codec.encode(event)
+        elapsed = time.perf_counter() - started
+        stored.append(encoded)
+        row = report.setdefault(event["type"], {"events": 0, "raw_bytes": 0, "stored_bytes": 0,
+                                                "compress_s": 0.0, "decompress_s": 0.0, "errors": 0})
+        row["events"] += 1
+        row["raw_bytes"] += raw
+        row["stored_bytes"] += len(encoded.get("data_z", "")) or raw
+        row["compress_s"] += elapsed
+    for event, encoded in zip(events, stored):
+        copy = dict(encoded)
+        started = time.perf_counter()
+        inflate(codec, copy)
+        report[event["type"]]["decompress_s"] += time.perf_counter() - started
+        if copy.get("data") != event["data"]:
+            report[event["type"]]["errors"] += 1
+    return {
+        event_type: {
+            "ratio": round(row["raw_bytes"] / row["stored_bytes"], 2),
+            "raw_bytes_per_event": round(row["raw_bytes"] / row["events"]),
+            "compress_us": round(row["compress_s"] * 1e6 / row["events"], 1),
+            "decompress_us": round(row["decompress_s"] * 1e6 / row["events"], 1),
+            "errors": row["errors"]
+        }
+        for event_type, row in report.items()
+    }
+
+def inflate(codec, event: Dict[str, Any]) -> None:
+    # decode() is async only to load dictionaries from Redis, so time the inflate itself
+    if "data_z" in event:
+        event["data"] = codec._inflate(event.pop("data_z"))
+
+async def measure_service(events: List[Dict[str, Any]], min_bytes: int) -> Dict[str, Any]:
+    from fakeredis import aioredis as fake_aioredis
+
+    db = SimpleNamespace(redis=fake_aioredis.FakeRedis(decode_responses=True))
+    codec = PayloadCodec(db, min_bytes=min_bytes, algorithm="zlib", train_samples=64)
+    service = EventService(db, policy=RetentionPolicy(max_bytes=1 << 40), codec=codec)
+    for start in range(0, len(events), 500):
+        await service._store([dict(event) for event in events[start:start + 500]])
+        await codec.train()
+    stats = await service.getRetentionStats()
+
+    timings = {}
+    for include_data in (True, False):
+        started = time.perf_counter()
+        for _ in range(20):
+            await service.getEvents(count=200, include_data=include_data)
+        timings[include_data] = (time.perf_counter() - started) / 20 * 1000
+    await db.redis.aclose()
+    return {"hot_tier_bytes": stats["bytes"], "read_200_ms": round(timings[True], 2),
+            "read_200_without_data_ms": round(timings[False], 2)}
+
+def run(events_count: int, train: int, seed: int) -> Dict[str, Any]:
+    logging.disable(logging.INFO)
+    rng = random.Random(seed)
+    events = make_events(rng, events_count)
+    training = make_events(random.Random(seed + 1), train * 3)
+    db = SimpleNamespace(redis=None)
+
+    algorithms = ["zlib"] + (["zstd"] if compression.zstandard is not None else [])
+    report: Dict[str, Any] = {"events": events_count, "codecs": {}}
+    for algorithm in algorithms:
+        plain = PayloadCodec(db, min_bytes=1, algorithm=algorithm, train_samples=train)
+        report["codecs"][algorithm] = measure_codec(plain, events)
+        trained = PayloadCodec(db, min_bytes=1, algorithm=algorithm, train_samples=train)
+        for event in training:
+            trained.encode(event)
+        asyncio.run(trained.train())
+        report["codecs"][f"{algorithm}+dict"] = measure_codec(trained, events)
+
+    report["service"] = {
+        "uncompressed": asyncio.run(measure_service(events, 0)),
+        "compressed": asyncio.run(measure_service(events, 1024))
+    }
+    report["errors"] = sum(row["errors"] for codec in report["codecs"].values() for row in codec.values())
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=3000)
+    parser.add_argument("--train", type=int, default=64, help="Samples per event type for dictionary training")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.events, args.train, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['events']} events")
+        for name, types in report["codecs"].items():
+            for event_type, row in types.items():
+                print(f"{name:10} {event_type:15} {row['raw_bytes_per_event']:7} B  ratio={row['ratio']:6.2f}  "
+                      f"compress={row['compress_us']:7.1f}us  decompress={row['decompress_us']:7.1f}us")
+        for name, row in report["service"].items():
+            print(f"{name:13} hot tier {row['hot_tier_bytes'] / 1024:9.1f} KiB  read 200: {row['read_200_ms']:6.2f}ms "
+                  f"with data, {row['read_200_without_data_ms']:6.2f}ms without")
+        print(f"decode errors: {report['errors']}")
+    if report["errors"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Export Benchmark - Bulk export of the event history to Parquet against paging the events API as JSON
+
+Fills an EventService on fakeredis with synthetic events from many bots
+(large world updates stored compressed, small chat and action events),
+then reads the whole history twice:
+
+- scrape: what offline analysis did before, GET /api/v1/events/ 1000
+  events at a time walking `since` forward, keeping every page as JSON
+- export: an ExportService job writing day/bot partitioned Parquet
+
+Reports events per second, output bytes and peak memory (a second pass:
+Python objects through tracemalloc plus Arrow buffers, which tracemalloc
+does not see, sampled from pyarrow's allocator) for both, and checks
+that the Parquet dataset holds every event exactly once. Once the
+export's buffers reach --buffer-mb its peak memory stays flat as
+--events grows, while the scrape's grows with the history.
+
+The export is the slower of the two in events per second: it does the
+same page reads and decoding as the scrape, then converts to Arrow and
+encodes Parquet. At 40k events (median of 3 runs) it managed about 15k
+events/s against 28k for the scrape when each partition's page was
+coerced value by value; converting whole columns per event type brought
+it to about 22k against 30k. The remaining gap is the conversion and
+Parquet encoding themselves, about 0.8s of the export's 1.8s.
+
+Run from storage-service/:
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --events 200000 --bots 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from src.services.events import EventService
+from src.services.events.export import ExportService
+from src.services.events.retention import RetentionPolicy
+
+BLOCKS = ["minecraft:stone", "minecraft:dirt", "minecraft:deepslate", "minecraft:iron_ore", "minecraft:oak_log"]
+ACTIONS = ["mine", "craft", "move", "attack", "place"]
+
+def make_event(rng: random.Random, bots: int) -> Dict[str, Any]:
+    botId = f"bot_{rng.randrange(bots)}"
+    roll = rng.random()
+    if roll < 0.1:
+        data = {"position": {"x": rng.randint(-500, 500), "y": 64, "z": rng.randint(-500, 500)},
+                "blocks": [rng.choice(BLOCKS) for _ in range(rng.randint(100, 300))]}
+        return {"type": "world_update", "botId": botId, "data": data, "severity": 2}
+    if roll < 0.5:
+        data = {"player": f"player_{rng.randrange(20)}", "message": "hello " * rng.randint(1, 8)}
+        return {"type": "chat_message", "botId": botId, "data": data, "severity": 1}
+    data = {"action": rng.choice(ACTIONS), "success": rng.random() < 0.9, "duration": round(rng.random() * 5, 3),
+            "target": {"x": rng.randint(-500, 500), "y": rng.randint(0, 120), "z": rng.randint(-500, 500)}}
+    return {"type": "bot_action", "botId": botId, "data": data, "severity": 3}
+
+async def fill(events: int, bots: int, seed: int):
+    try:
+        from fakeredis import aioredis as fake_aioredis
+    except ImportError:
+        raise SystemExit("Install fakeredis (pip install fakeredis)")
+
+    rng = random.Random(seed)
+    db = SimpleNamespace(redis=fake_aioredis.FakeRedis(decode_responses=True))
+    # A budget large enough that nothing is evicted while filling
+    service = EventService(db, policy=RetentionPolicy(max_bytes=1 << 40))
+    for start in range(0, events, 200):
+        await service.createEvents([make_event(rng, bots) for _ in range(min(200, events - start))])
+    await service.codec.train()
+    return db, service
+
+async def scrape(service) -> Dict[str, Any]:
+    """Page the events API forward by `since`, as a JSON client would"""
+    pages: List[str] = []
+    seen = set()
+    since = None
+    while True:
+        events = await service.getEvents(count=1000, since=since, order_desc=False)
+        fresh = [event for event in events if event['id'] not in seen]
+        if not fresh:
+            break
+        seen.update(event['id'] for event in fresh)
+        pages.append(json.dumps({"events": fresh, "count": len(fresh)}))
+        since = fresh[-1]['timestamp']
+    return {"events": len(seen), "bytes": sum(len(page) for page in pages)}
+
+async def export(db, service, directory: str, buffer_mb: float) -> Dict[str, Any]:
+    exporter = ExportService(db, service, directory, max_buffered_bytes=int(buffer_mb * 1024 * 1024))
+    job = exporter.createJob()
+    await job.task
+    progress = job.progress()
+    return {"events": progress["exported"], "files": progress["files"], "bytes": progress["bytes"],
+            "state": progress["state"], "path": job.directory}
+
+async def measure(events: int, bots: int, buffer_mb: float, seed: int) -> Dict[str, Any]:
+    import pyarrow
+    import pyarrow.dataset
+
+    db, service = await fill(events, bots, seed)
+    directory = tempfile.mkdtemp(prefix="bench-export-")
+    try:
+        report: Dict[str, Any] = {"events": events, "bots": bots, "buffer_mb": buffer_mb}
+        started = time.perf_counter()
+        report["scrape"] = await scrape(service)
+        report["scrape"]["events_per_s"] = round(report["scrape"]["events"] / (time.perf_counter() - started))
+        started = time.perf_counter()
+        report["export"] = await export(db, service, directory, buffer_mb)
+        report["export"]["events_per_s"] = round(report["export"]["events"] / (time.perf_counter() - started))
+
+        dataset = pyarrow.dataset.dataset(report["export"].pop("path"), format="parquet", partitioning="hive",
+                                          exclude_invalid_files=True)
+        ids = dataset.to_table(columns=["id"]).column("id").to_pylist()
+        report["export"]["unique_events"] = len(set(ids))
+
+        # Memory pass, separately because tracemalloc slows everything down
+        runs = (("scrape", lambda: scrape(service)), ("export", lambda: export(db, service, directory, buffer_mb)))
+        for name, run in runs:
+            arrow_peak = 0
+            async def sample_arrow():
+                nonlocal arrow_peak
+                while True:
+                    arrow_peak = max(arrow_peak, pyarrow.total_allocated_bytes())
+                    await asyncio.sleep(0.001)
+            sampler = asyncio.create_task(sample_arrow())
+            tracemalloc.start()
+            await run()
+            python_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            sampler.cancel()
+            report[name]["peak_mb"] = round((python_peak + arrow_peak) / 1e6, 1)
+        await db.redis.aclose()
+        return report
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=30000)
+    parser.add_argument("--bots", type=int, default=20)
+    parser.add_argument("--buffer-mb", type=float, default=8, help="Arrow data the export may hold in memory")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = asyncio.run(measure(args.events, args.bots, args.buffer_mb, args.seed))
+    scraped, exported = report["scrape"], report["export"]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['events']} events from {report['bots']} bots")
+        print(f"scrape  {scraped['events_per_s']:>8} events/s  {scraped['bytes'] / 1e6:8.1f}MB JSON     "
+              f"peak {scraped['peak_mb']}MB")
+        print(f"export  {exported['events_per_s']:>8} events/s  {exported['bytes'] / 1e6:8.1f}MB Parquet  "
+              f"peak {exported['peak_mb']}MB  ({exported['files']} files)")
+        print(f"events: scraped {scraped['events']}, exported {exported['events']} "
+              f"({exported['unique_events']} unique in the dataset)")
+    if exported["state"] != "completed" or exported["unique_events"] != report["events"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Goal Storage Benchmark - GoalService writes and indexed queries with thousands of goals
+
+Writes goals for many bots to GoalService in batches, applies batched
+progress updates, and times a bot's open goals by status through the
+index against a scan of all goal records. Then several writers update
+the same goals at once, each completing a different milestone, and
+every completion must survive (a lost read-modify-write shows up as a
+mismatch), while writers of different goals must not hold each other up
+with write conflicts. Redis is fakeredis unless --redis-url points at a real one
+(use a scratch database: it is flushed). fakeredis never interleaves two
+transactions, so there every writer's read is held until all writers
+have read, the worst overlap a real Redis can produce.
+
+The goal engine itself is benchmarked by bot/src/logic/benchmarks/bench_goals.py.
+
+Run from storage-service/:
+    python -m benchmarks.bench_goals
+    python -m benchmarks.bench_goals --bots 500 --goals 40 --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+from src.services.events.goal_service import GoalService, GOALS_KEY, PRIORITY_RANK, STATUSES, goal_write_conflicts
+
+PRIORITIES = list(PRIORITY_RANK)
+
+async def _redis(redis_url: Optional[str]):
+    import redis.asyncio as aioredis
+    if redis_url:
+        return aioredis.Redis.from_url(redis_url, decode_responses=True)
+    try:
+        from fakeredis import aioredis as fake_aioredis
+    except ImportError:
+        raise SystemExit("Install fakeredis (pip install fakeredis) or pass --redis-url")
+    return fake_aioredis.FakeRedis(decode_responses=True)
+
+def overlap_reads(redis) -> Callable[[int], None]:
+    """
+    Hold goal reads until the given number of writers have all read
+
+    Returns a function that arms the hold for the next phase's writers.
+    """
+    hold = {"writers": 0, "arrived": 0, "ready": asyncio.Event()}
+    make_pipeline = redis.pipeline
+
+    def pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        hmget = pipe.hmget
+
+        async def held_hmget(*args, **kwargs):
+            result = await hmget(*args, **kwargs)
+            if hold["writers"] and not hold["ready"].is_set():
+                hold["arrived"] += 1
+                if hold["arrived"] >= hold["writers"]:
+                    hold["ready"].set()
+                await hold["ready"].wait()
+            return result
+
+        pipe.hmget = held_hmget
+        return pipe
+
+    def arm(writers: int) -> None:
+        hold.update(writers=writers, arrived=0, ready=asyncio.Event())
+
+    redis.pipeline = pipeline
+    return arm
+
+def conflicts() -> float:
+    """Write conflicts counted so far (goal_write_conflicts_total)"""
+    return sum(float(line.rsplit(" ", 1)[1]) for line in goal_write_conflicts.render() if not line.startswith("#"))
+
+def make_goal(rng: random.Random, bot: int, index: int, milestones: int) -> Dict[str, Any]:
+    goal_id = f"goal_{bot}_{index}"
+    return {"id": goal_id, "botId": f"bot_{bot}", "name": f"goal {index}", "priority": rng.choice(PRIORITIES),
+            "status": rng.choice(STATUSES), "createdAt": 1700000000000 + index,
+            "milestones": [{"id": f"{goal_id}_m{m}", "name": f"step {m}"} for m in range(milestones)]}
+
+async def run(bots: int, goals: int, milestones: int, batch: int, writers: int,
+              redis_url: Optional[str], seed: int) -> Dict[str, Any]:
+    logging.disable(logging.INFO)
+    rng = random.Random(seed)
+    db = SimpleNamespace(redis=await _redis(redis_url))
+    await db.redis.flushdb()
+    service = GoalService(db)
+    records = [make_goal(rng, b, g, milestones) for b in range(bots) for g in range(goals)]
+
+    started = time.perf_counter()
+    for start in range(0, len(records), batch):
+        await service.saveGoals(records[start:start + batch])
+    save_s = time.perf_counter() - started
+
+    updates = []
+    for goal in rng.sample(records, min(len(records), 5000)):
+        update: Dict[str, Any] = {"id": goal["id"], "priority": rng.choice(PRIORITIES)}
+        if goal["milestones"]:
+            update["milestones"] = {goal["milestones"][0]["id"]: "completed"}
+        updates.append(update)
+    started = time.perf_counter()
+    for start in range(0, len(updates), batch):
+        await service.updateProgress(updates[start:start + batch])
+    update_s = time.perf_counter() - started
+
+    indexed_ms, scan_ms, mismatches = [], [], 0
+    for b in rng.sample(range(bots), min(bots, 50)):
+        botId = f"bot_{b}"
+        started = time.perf_counter()
+        indexed = await service.getGoals(botId=botId, status="active", count=1000)
+        indexed_ms.append((time.perf_counter() - started) * 1000)
+        if len(scan_ms) >= 5:
+            continue  # the full scan is slow, a few samples are enough
+        started = time.perf_counter()
+        scanned = [json.loads(raw) for raw in (await db.redis.hgetall(GOALS_KEY)).values()]
+        scanned = [goal for goal in scanned if goal["botId"] == botId and goal["status"] == "active"]
+        scan_ms.append((time.perf_counter() - started) * 1000)
+        if sorted(goal["id"] for goal in indexed) != sorted(goal["id"] for goal in scanned):
+            mismatches += 1
+
+    arm = overlap_reads(db.redis) if not redis_url else lambda writers: None
+
+    # Concurrent writers on the same goals: writer w completes milestone w of each
+    contended = [goal["id"] for goal in rng.sample(records, min(len(records), 200))]
+    arm(min(writers, milestones))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        service.updateProgress([{"id": goal_id, "milestones": {f"{goal_id}_m{w}": "completed"}}
+                                for goal_id in contended])
+        for w in range(min(writers, milestones))
+    ))
+    concurrent_ms = (time.perf_counter() - started) * 1000
+    lost = 0
+    for goal in await service._read(contended):
+        done = {m["id"] for m in goal["milestones"] if m.get("status") == "completed"}
+        lost += sum(1 for w in range(min(writers, milestones)) if f"{goal['id']}_m{w}" not in done)
+
+    # Concurrent writers on different goals, writer w updating its own share: none should retry
+    disjoint = [goal["id"] for goal in rng.sample(records, min(len(records), 200 * writers))]
+    arm(writers)
+    before = conflicts()
+    await asyncio.gather(*(
+        service.updateProgress([{"id": goal_id, "progress": 50} for goal_id in disjoint[w::writers]])
+        for w in range(writers)
+    ))
+    disjoint_conflicts = int(conflicts() - before)
+    await db.redis.aclose()
+    return {
+        "records": len(records),
+        "save_per_s": round(len(records) / save_s),
+        "progress_updates_per_s": round(len(updates) / update_s),
+        "query_by_status_ms": round(statistics.mean(indexed_ms), 2),
+        "scan_all_ms": round(statistics.mean(scan_ms), 2),
+        "concurrent_writers": min(writers, milestones),
+        "concurrent_ms": round(concurrent_ms, 2),
+        "lost_updates": lost,
+        "disjoint_writes": len(disjoint),
+        "disjoint_conflicts": disjoint_conflicts,
+        "mismatches": mismatches
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=200)
+    parser.add_argument("--goals", type=int, default=25, help="Goals per bot")
+    parser.add_argument("--milestones", type=int, default=8, help="Milestones per goal")
+    parser.add_argument("--batch", type=int, default=500, help="Goals or updates per write")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writers on the same goals")
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.bots, args.goals, args.milestones, args.batch, args.writers,
+                             args.redis_url, args.seed))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['records']} goals: save {report['save_per_s']} goals/s, "
+              f"progress {report['progress_updates_per_s']} updates/s")
+        print(f"query    by status {report['query_by_status_ms']:.2f}ms vs scan {report['scan_all_ms']:.2f}ms")
+        print(f"contended {report['concurrent_writers']} writers in {report['concurrent_ms']:.2f}ms, "
+              f"{report['lost_updates']} lost updates")
+        print(f"disjoint  {report['disjoint_writes']} goals over {report['concurrent_writers']} writers, "
+              f"{report['disjoint_conflicts']} conflicts")
+        print(f"mismatches: {report['mismatches']}")
+    if report["mismatches"] or report["lost_updates"] or report["disjoint_conflicts"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
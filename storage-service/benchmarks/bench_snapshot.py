@@ -0,0 +1,128 @@
+"""
+Snapshot Benchmark - Hot tier snapshot size, save time and restore throughput
+
+Fills the storage service's hot tier with synthetic events and agents,
+saves a snapshot, wipes Redis and restores it, then checks that the
+indexes agree with the restored events. Restore is compared against
+refilling the same events one at a time, the way POST /feed did.
+Redis is fakeredis unless --redis-url points at a real one (use a
+scratch database: it is flushed).
+
+Run from storage-service/:
+    python -m benchmarks.bench_snapshot
+    python -m benchmarks.bench_snapshot --events 50000 --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from src.services.events import EventService
+from src.services.events.retention import RetentionPolicy
+from src.services.events.snapshot import HotTierSnapshotter, AGENTS_KEY
+
+EVENT_TYPES = ["bot_action", "chat_message", "command_executed", "discovery_made", "goal_progress"]
+
+async def _redis(redis_url: Optional[str]):
+    import redis.asyncio as aioredis
+    if redis_url:
+        return aioredis.Redis.from_url(redis_url, decode_responses=True)
+    try:
+        from fakeredis import aioredis as fake_aioredis
+    except ImportError:
+        raise SystemExit("Install fakeredis (pip install fakeredis) or pass --redis-url")
+    return fake_aioredis.FakeRedis(decode_responses=True)
+
+async def run(events: int, agents: int, redis_url: Optional[str], seed: int) -> Dict[str, Any]:
+    logging.disable(logging.INFO)
+    rng = random.Random(seed)
+    db = SimpleNamespace(redis=await _redis(redis_url))
+    await db.redis.flushdb()
+    # A budget large enough that nothing is evicted, so counts compare exactly
+    service = EventService(db, policy=RetentionPolicy(max_bytes=1 << 40))
+
+    batch = []
+    for i in range(events):
+        batch.append({
+            "type": rng.choice(EVENT_TYPES), "botId": f"bot_{i % 50}", "severity": rng.randint(0, 10),
+            "data": {"message": f"event {i}", "position": {"x": rng.randint(-500, 500), "y": 64, "z": 0}}
+        })
+        if len(batch) == 1000:
+            await service.createEvents(batch)
+            batch = []
+    if batch:
+        await service.createEvents(batch)
+    for i in range(agents):
+        await db.redis.lpush(AGENTS_KEY, json.dumps({"id": f"agent_{i}", "type": "agent",
+                                                     "data": {"username": f"bot_{i}"}}))
+    before = await service.verifyIndexes()
+    agents_before = await db.redis.lrange(AGENTS_KEY, 0, -1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshotter = HotTierSnapshotter(db, service, os.path.join(directory, "hot-tier.snapshot"), interval=0)
+        saved = await snapshotter.save()
+
+        await db.redis.flushdb()
+        started = time.perf_counter()
+        restored = await snapshotter.restore()
+        restore_s = time.perf_counter() - started
+
+    after = await service.verifyIndexes()
+    agents_after = await db.redis.lrange(AGENTS_KEY, 0, -1)
+
+    # Baseline: the same events written back one at a time
+    payloads, _ = await service.exportHotTier()
+    sample = [json.loads(payload) for payload in payloads[:min(len(payloads), 2000)]]
+    await db.redis.flushdb()
+    started = time.perf_counter()
+    for event in sample:
+        await service._store([event])
+    single_rate = len(sample) / (time.perf_counter() - started) if sample else 0.0
+    await db.redis.flushdb()
+    await db.redis.aclose()
+
+    return {
+        "events": events,
+        "agents": agents,
+        "snapshot_bytes": saved["bytes"],
+        "bytes_per_event": round(saved["bytes"] / max(events, 1), 1),
+        "save_ms": saved["ms"],
+        "restore_ms": round(restore_s * 1000, 1),
+        "restore_events_per_s": round(restored["events"] / restore_s) if restore_s else 0,
+        "single_write_events_per_s": round(single_rate),
+        "consistent": after["consistent"] and after["events"] == before["events"]
+                      and after["bytes"] == before["bytes"] and agents_after == agents_before
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.events, args.agents, args.redis_url, args.seed))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['events']} events, {report['agents']} agents")
+    print(f"snapshot   {report['snapshot_bytes'] / 1024:9.1f} KiB  ({report['bytes_per_event']} bytes/event)")
+    print(f"save       {report['save_ms']:9.1f} ms")
+    print(f"restore    {report['restore_ms']:9.1f} ms  ({report['restore_events_per_s']} events/s)")
+    print(f"one-by-one {report['single_write_events_per_s']:>9} events/s")
+    print(f"indexes    {'consistent' if report['consistent'] else 'INCONSISTENT'}")
+    if not report["consistent"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Trigger Benchmark - Rule evaluation time per event with many registered rules
+
+Registers synthetic trigger rules (by default 10k, spread over event types,
+bots, severity floors, data conditions and areas) in the storage service's
+TriggerIndex and times matching a stream of events against them. The
+baseline evaluates every rule for every event, which is what clients
+filtering the full event list amount to. Both must agree on every match.
+
+Run from storage-service/:
+    python -m benchmarks.bench_triggers
+    python -m benchmarks.bench_triggers --rules 50000 --events 20000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from src.services.events.triggers import TriggerIndex, CompiledRule
+
+EVENT_TYPES = ["bot_action", "chat_message", "command_executed", "discovery_made", "goal_progress",
+               "player_interaction", "system_event", "world_update"]
+STATUSES = ["in_progress", "completed", "failed", "interrupted"]
+
+def make_rule(rng: random.Random, bots: int, players: int) -> Dict[str, Any]:
+    rule: Dict[str, Any] = {"id": f"rule_{rng.random()}", "queue": "bench"}
+    if rng.random() < 0.97:
+        rule["event_type"] = rng.choice(EVENT_TYPES)
+    if rng.random() < 0.9:
+        rule["botId"] = f"bot_{rng.randrange(bots)}"
+    if rng.random() < 0.5:
+        rule["min_severity"] = rng.randint(3, 9)
+    conditions = []
+    roll = rng.random()
+    if roll < 0.4:
+        conditions.append({"field": "username", "op": "eq", "value": f"player_{rng.randrange(players)}"})
+    elif roll < 0.6:
+        conditions.append({"field": "status", "op": "eq", "value": rng.choice(STATUSES)})
+    elif roll < 0.7:
+        conditions.append({"field": "message", "op": "contains", "value": rng.choice(["help", "diamond", "base"])})
+    if conditions:
+        rule["conditions"] = conditions
+    if rng.random() < 0.2:
+        rule["near"] = {"x": rng.uniform(-500, 500), "z": rng.uniform(-500, 500), "radius": rng.uniform(8, 64)}
+    return rule
+
+def make_event(rng: random.Random, bots: int, players: int) -> Dict[str, Any]:
+    return {
+        "type": rng.choice(EVENT_TYPES),
+        "botId": f"bot_{rng.randrange(bots)}",
+        "severity": rng.randint(0, 10),
+        "data": {
+            "username": f"player_{rng.randrange(players)}",
+            "status": rng.choice(STATUSES),
+            "message": rng.choice(["need help here", "found a diamond", "heading back to base", "idle"]),
+            "position": {"x": rng.uniform(-500, 500), "y": 64, "z": rng.uniform(-500, 500)}
+        }
+    }
+
+def run(rule_count: int, event_count: int, bots: int, players: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    rules = [make_rule(rng, bots, players) for _ in range(rule_count)]
+    events = [make_event(rng, bots, players) for _ in range(event_count)]
+
+    started = time.perf_counter()
+    index = TriggerIndex(rules)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    def linear(event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        severity = event["severity"]
+        return [
+            compiled.rule for compiled in all_rules
+            if compiled.rule.get("event_type") in (None, event["type"])
+            and compiled.rule.get("botId") in (None, event["botId"])
+            and compiled.min_severity <= severity and compiled.matches(severity, event["data"])
+        ]
+    all_rules = [CompiledRule(rule) for rule in rules]
+
+    indexed_us, matches = [], 0
+    for event in events:
+        started = time.perf_counter()
+        matched = index.match(event)
+        indexed_us.append((time.perf_counter() - started) * 1e6)
+        matches += len(matched)
+
+    # The linear scan is slow, so it runs on a sample and is checked against the index
+    sample = events[:min(len(events), 500)]
+    linear_us, mismatches = [], 0
+    for event in sample:
+        started = time.perf_counter()
+        expected = linear(event)
+        linear_us.append((time.perf_counter() - started) * 1e6)
+        if sorted(r["id"] for r in expected) != sorted(r["id"] for r in index.match(event)):
+            mismatches += 1
+
+    indexed_us.sort()
+    return {
+        "rules": rule_count,
+        "events": event_count,
+        "compile_ms": round(compile_ms, 1),
+        "matches_per_event": round(matches / max(event_count, 1), 2),
+        "indexed_us": {"mean": round(statistics.mean(indexed_us), 2),
+                       "p99": round(indexed_us[int(len(indexed_us) * 0.99) - 1], 2)},
+        "linear_us": {"mean": round(statistics.mean(linear_us), 2)},
+        "mismatches": mismatches
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--bots", type=int, default=200)
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.rules, args.events, args.bots, args.players, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['rules']} rules compiled in {report['compile_ms']}ms, "
+              f"{report['matches_per_event']} matches per event")
+        print(f"indexed  mean={report['indexed_us']['mean']:9.2f}us  p99={report['indexed_us']['p99']:9.2f}us")
+        print(f"linear   mean={report['linear_us']['mean']:9.2f}us")
+        print(f"mismatches: {report['mismatches']}")
+    if report["mismatches"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
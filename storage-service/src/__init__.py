@@ -3,6 +3,7 @@ Storage Service - Central storage management for the bot ecosystem
 """
 
 import os
+import time
 import logging
 import asyncio
 from typing import Optional
@@ -10,6 +11,9 @@ from dotenv import load_dotenv
 
 import redis.asyncio as aioredis
 
+from src.metrics import registry
+from src.tracing import tracer
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,6 +21,57 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+redis_command_duration = registry.histogram(
+    "redis_command_duration_seconds", "Redis command latency", ("command", "outcome")
+)
+
+def redis_pool_options() -> dict:
+    """
+    Connection pool settings from REDIS_MAX_CONNECTIONS / REDIS_POOL_TIMEOUT
+
+    The pool blocks (up to the timeout) when every connection is busy, so a
+    burst of requests queues for a connection instead of failing with
+    'Too many connections'.
+    """
+    return {
+        "max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", "100")),
+        "timeout": float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+    }
+
+def _timed(call, command_of):
+    """Wrap a coroutine function so each call is timed (and traced) as one Redis command"""
+    async def timed(*args, **options):
+        command = command_of(args)
+        span = tracer.start_span(f"redis {command}")
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await call(*args, **options)
+            outcome = "ok"
+            return result
+        finally:
+            redis_command_duration.observe(time.perf_counter() - started, command, outcome)
+            tracer.end_span(span, error=outcome == "error")
+    return timed
+
+def instrument_redis(client: aioredis.Redis) -> aioredis.Redis:
+    """
+    Time every command the client sends (EventService and AgentService both go through it)
+
+    Pipelines are timed as a whole when executed, as MULTI for transactions.
+    Commands issued while handling a traced request are also recorded as spans.
+    """
+    client.execute_command = _timed(client.execute_command, lambda args: str(args[0]).upper())
+    pipeline = client.pipeline
+
+    def timed_pipeline(transaction: bool = True, shard_hint=None):
+        pipe = pipeline(transaction, shard_hint)
+        pipe.execute = _timed(pipe.execute, lambda args: "MULTI" if transaction else "PIPELINE")
+        return pipe
+
+    client.pipeline = timed_pipeline
+    return client
+
 class DatabaseConnections:
     """Centralized database connection management"""
     
@@ -39,11 +94,13 @@ class DatabaseConnections:
             
             logger.info(f"🔄 Attempting Redis connection to: {redis_url}")
             
-            self.redis = aioredis.from_url(
+            pool = aioredis.BlockingConnectionPool.from_url(
                 redis_url,
                 password=redis_password,
-                decode_responses=True
+                decode_responses=True,
+                **redis_pool_options()
             )
+            self.redis = instrument_redis(aioredis.Redis(connection_pool=pool))
             
             # Test connection
             await self.redis.ping()
@@ -2,25 +2,46 @@
 Events API - REST endpoints for event management
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-from src import db_connections
 from src.services.events import EventService
+from src.services.events.admission import AdmissionController, WritesPaused, retry_after_header
 from src.schemas.events import (
-    CreateEventRequest, EventResponse, FeedTableRequest, FeedTableResponse,
+    CreateEventRequest, CreateEventsRequest, CreateEventsResponse, EventResponse, FeedTableRequest, FeedTableResponse,
     GetEventsResponse, UpdateEventRequest, UpdateEventResponse, 
-    DeleteEventResponse, ErrorResponse
+    DeleteEventResponse, ErrorResponse, RetentionStatsResponse, CompressionStatsResponse
 )
 
 router = APIRouter()
 
-# Initialize service
-event_service = EventService(db_connections)
+async def get_event_service(request: Request) -> EventService:
+    """EventService wired by the application lifespan (async so FastAPI skips the threadpool)"""
+    return request.app.state.event_service
 
-@router.post("/", response_model=EventResponse, responses={500: {"model": ErrorResponse}})
-async def create_event(request: CreateEventRequest):
+async def get_admission(request: Request) -> Optional[AdmissionController]:
+    """Write admission control (None when disabled)"""
+    return getattr(request.app.state, "admission", None)
+
+async def admit_or_throttle(admission: Optional[AdmissionController], events_by_bot: Dict[Optional[str], List[str]]):
+    """Raise 429 with Retry-After when any bot in the write is over its rate, 503 while a restore runs"""
+    if admission is None:
+        return
+    try:
+        wait = await admission.admit(events_by_bot)
+    except WritesPaused as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after_header(e.retry_after))
+    if wait:
+        raise HTTPException(status_code=429, detail=f"Event rate exceeded, retry in {wait:.1f}s",
+                            headers=retry_after_header(wait))
+
+@router.post("/", response_model=EventResponse,
+             responses={429: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def create_event(request: CreateEventRequest,
+                       event_service: EventService = Depends(get_event_service),
+                       admission: Optional[AdmissionController] = Depends(get_admission)):
     """Create a new event"""
+    await admit_or_throttle(admission, {request.botId: [request.event_type]})
     try:
         event_id = await event_service.createEvent(
             request.event_type, 
@@ -32,15 +53,39 @@ async def create_event(request: CreateEventRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch", response_model=CreateEventsResponse,
+             responses={429: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def create_events(request: CreateEventsRequest,
+                        event_service: EventService = Depends(get_event_service),
+                        admission: Optional[AdmissionController] = Depends(get_admission)):
+    """Create several events in one write (missing severities are scored together)"""
+    events_by_bot: Dict[Optional[str], List[str]] = {}
+    for event in request.events:
+        events_by_bot.setdefault(event.botId, []).append(event.event_type)
+    await admit_or_throttle(admission, events_by_bot)
+    try:
+        event_ids = await event_service.createEvents([
+            {'type': event.event_type, 'data': event.data, 'botId': event.botId, 'severity': event.severity}
+            for event in request.events
+        ])
+        return CreateEventsResponse(event_ids=event_ids, status="created")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/", response_model=GetEventsResponse, responses={500: {"model": ErrorResponse}})
 async def get_events(
     count: int = Query(10, ge=1, le=1000),
     event_id: Optional[str] = None,
     botId: Optional[str] = None,
     event_type: Optional[str] = None,
+    event_types: Optional[str] = Query(None, description="Comma-separated event types, any of which match"),
     min_severity: Optional[int] = None,
+    since: Optional[int] = None,
+    skip: int = Query(0, ge=0, le=100000, description="Matching events to skip (cursor within `since`)"),
     order_by: str = Query("timestamp", regex="^(timestamp|severity)$"),
-    order_desc: bool = True
+    order_desc: bool = True,
+    include_data: bool = True,
+    event_service: EventService = Depends(get_event_service)
 ):
     """Get events with filtering and ordering"""
     try:
@@ -50,15 +95,20 @@ async def get_events(
             botId=botId,
             event_type=event_type,
             min_severity=min_severity,
+            since=since,
             order_by=order_by,
-            order_desc=order_desc
+            order_desc=order_desc,
+            include_data=include_data,
+            event_types=[t for t in event_types.split(",") if t] if event_types else None,
+            skip=skip
         )
         return {"events": events, "count": len(events)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/feed", response_model=FeedTableResponse, responses={500: {"model": ErrorResponse}})
-async def feed_table(request: FeedTableRequest):
+async def feed_table(request: FeedTableRequest,
+                     event_service: EventService = Depends(get_event_service)):
     """Feed events from archive into Redis table"""
     try:
         added_count = await event_service.feedTable(request.events)
@@ -66,8 +116,24 @@ async def feed_table(request: FeedTableRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/retention", response_model=RetentionStatsResponse, responses={500: {"model": ErrorResponse}})
+async def retention_stats(event_service: EventService = Depends(get_event_service)):
+    """Hot tier byte usage and eviction counters per severity band"""
+    try:
+        return await event_service.getRetentionStats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/compression", response_model=CompressionStatsResponse, responses={500: {"model": ErrorResponse}})
+async def compression_stats(event_service: EventService = Depends(get_event_service)):
+    """Payload compression ratio and time per event type"""
+    try:
+        return event_service.codec.getStats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{event_id}")
-async def delete_event(event_id: str):
+async def delete_event(event_id: str, event_service: EventService = Depends(get_event_service)):
     """Delete an event by ID"""
     try:
         success = await event_service.deleteEvent(event_id)
@@ -80,7 +146,8 @@ async def delete_event(event_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{event_id}")
-async def update_event(event_id: str, updates: Dict[str, Any]):
+async def update_event(event_id: str, updates: Dict[str, Any],
+                       event_service: EventService = Depends(get_event_service)):
     """Update an event by ID"""
     try:
         success = await event_service.updateEvent(event_id, updates)
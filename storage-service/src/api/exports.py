@@ -0,0 +1,50 @@
+"""
+Exports API - Start and follow bulk exports of the event history to columnar files
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from src.services.events.export import ExportService
+from src.schemas.events import ErrorResponse
+from src.schemas.exports import ExportRequest, ExportJobModel, ExportJobsResponse
+
+router = APIRouter()
+
+async def get_export_service(request: Request) -> ExportService:
+    """ExportService wired by the application lifespan"""
+    return request.app.state.export_service
+
+@router.post("/", response_model=ExportJobModel, status_code=202,
+             responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def start_export(request: ExportRequest, export_service: ExportService = Depends(get_export_service)):
+    """Queue an export job; it runs in the background, follow it with GET /{job_id}"""
+    try:
+        job = export_service.createJob(fmt=request.format, since=request.since, until=request.until,
+                                       botId=request.botId, event_types=request.event_types)
+        return job.progress()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=ExportJobsResponse)
+async def get_exports(export_service: ExportService = Depends(get_export_service)):
+    """Export jobs, newest first"""
+    jobs = [job.progress() for job in export_service.getJobs()]
+    return {"jobs": jobs, "count": len(jobs)}
+
+@router.get("/{job_id}", response_model=ExportJobModel, responses={404: {"model": ErrorResponse}})
+async def get_export(job_id: str, export_service: ExportService = Depends(get_export_service)):
+    """Progress of an export job"""
+    job = export_service.getJob(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.progress()
+
+@router.delete("/{job_id}")
+async def cancel_export(job_id: str, export_service: ExportService = Depends(get_export_service)):
+    """Cancel a queued or running export job"""
+    if export_service.getJob(job_id) is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if not export_service.cancelJob(job_id):
+        raise HTTPException(status_code=409, detail="Export job already finished")
+    return {"status": "cancelling", "job_id": job_id}
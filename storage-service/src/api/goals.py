@@ -0,0 +1,69 @@
+"""
+Goals API - Persist bot goals and query them by status
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Optional
+from src.services.events.goal_service import GoalService
+from src.schemas.events import ErrorResponse
+from src.schemas.goals import (
+    GoalModel, SaveGoalsRequest, SaveGoalsResponse, GoalProgressRequest, GoalProgressResponse, GetGoalsResponse
+)
+
+router = APIRouter()
+
+async def get_goal_service(request: Request) -> GoalService:
+    """GoalService wired by the application lifespan"""
+    return request.app.state.goal_service
+
+@router.post("/batch", response_model=SaveGoalsResponse, responses={500: {"model": ErrorResponse}})
+async def save_goals(request: SaveGoalsRequest, goal_service: GoalService = Depends(get_goal_service)):
+    """Create or replace goals in one write"""
+    try:
+        goal_ids = await goal_service.saveGoals([goal.model_dump(exclude_none=True) for goal in request.goals])
+        return SaveGoalsResponse(goal_ids=goal_ids, status="saved")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/progress", response_model=GoalProgressResponse, responses={500: {"model": ErrorResponse}})
+async def update_progress(request: GoalProgressRequest, goal_service: GoalService = Depends(get_goal_service)):
+    """Apply batched progress, status, priority and milestone updates"""
+    try:
+        updated = await goal_service.updateProgress([update.model_dump(exclude_none=True) for update in request.updates])
+        return {"updated": updated}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/", response_model=GetGoalsResponse, responses={500: {"model": ErrorResponse}})
+async def get_goals(
+    botId: Optional[str] = None,
+    status: Optional[str] = Query(None, regex="^(active|pending|completed|archived)$"),
+    count: int = Query(100, ge=1, le=1000),
+    goal_service: GoalService = Depends(get_goal_service)
+):
+    """Goals by bot and/or status, highest priority then oldest first"""
+    try:
+        goals = await goal_service.getGoals(botId=botId, status=status, count=count)
+        return {"goals": goals, "count": len(goals), "totals": await goal_service.countGoals(botId)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{goal_id}", response_model=GoalModel, responses={404: {"model": ErrorResponse}})
+async def get_goal(goal_id: str, goal_service: GoalService = Depends(get_goal_service)):
+    """Get a goal by ID"""
+    goal = await goal_service.getGoal(goal_id)
+    if goal is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    return goal
+
+@router.delete("/{goal_id}")
+async def delete_goal(goal_id: str, goal_service: GoalService = Depends(get_goal_service)):
+    """Delete a goal by ID"""
+    try:
+        if not await goal_service.deleteGoal(goal_id):
+            raise HTTPException(status_code=404, detail="Goal not found")
+        return {"status": "deleted", "goal_id": goal_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,56 @@
+"""
+Triggers API - Register rules matched against new events and read queued matches
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from src.services.events.triggers import TriggerService
+from src.schemas.events import ErrorResponse
+from src.schemas.triggers import CreateTriggerRequest, TriggerModel, GetTriggersResponse, PopQueueResponse
+
+router = APIRouter()
+
+async def get_trigger_service(request: Request) -> TriggerService:
+    """TriggerService wired by the application lifespan"""
+    return request.app.state.trigger_service
+
+@router.post("/", response_model=TriggerModel, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
+async def create_trigger(request: CreateTriggerRequest,
+                         trigger_service: TriggerService = Depends(get_trigger_service)):
+    """Register a trigger rule"""
+    try:
+        return await trigger_service.createRule(request.model_dump(exclude_none=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/", response_model=GetTriggersResponse, responses={500: {"model": ErrorResponse}})
+async def get_triggers(trigger_service: TriggerService = Depends(get_trigger_service)):
+    """List registered trigger rules"""
+    try:
+        triggers = await trigger_service.getRules()
+        return {"triggers": triggers, "count": len(triggers)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/queues/{name}", response_model=PopQueueResponse, responses={500: {"model": ErrorResponse}})
+async def pop_queue(name: str, count: int = Query(50, ge=1, le=1000),
+                    trigger_service: TriggerService = Depends(get_trigger_service)):
+    """Take matches off a named queue, oldest first"""
+    try:
+        matches = await trigger_service.popQueue(name, count)
+        return {"matches": matches, "count": len(matches)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{trigger_id}")
+async def delete_trigger(trigger_id: str, trigger_service: TriggerService = Depends(get_trigger_service)):
+    """Remove a trigger rule"""
+    try:
+        if not await trigger_service.deleteRule(trigger_id):
+            raise HTTPException(status_code=404, detail="Trigger not found")
+        return {"status": "deleted", "trigger_id": trigger_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
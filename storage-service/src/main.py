@@ -3,33 +3,101 @@ Memory Service - Main FastAPI application
 """
 
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
+import os
+import logging
 from contextlib import asynccontextmanager
 from src import db_connections
 from src.api.events import router as events_router
+from src.api.triggers import router as triggers_router
+from src.api.goals import router as goals_router
+from src.api.exports import router as exports_router
+from src.services.events import EventService, GoalService
+from src.services.events.snapshot import snapshotter_from_env
+from src.services.events.triggers import trigger_service_from_env
+from src.services.events.admission import admission_from_env
+from src.services.events.export import export_service_from_env
+from src.metrics import MetricsMiddleware, render_metrics, route_template, CONTENT_TYPE
+from src.tracing import TracingMiddleware, init_tracing, tracer
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: connect, then wire the services the routers depend on
     await db_connections.initialize_connections()
+    app.state.trigger_service = trigger_service_from_env(db_connections)
+    app.state.event_service = EventService(db_connections, triggers=app.state.trigger_service)
+    app.state.admission = admission_from_env(db_connections)
+    app.state.goal_service = GoalService(db_connections)
+    app.state.export_service = export_service_from_env(db_connections, app.state.event_service)
+    await app.state.event_service.migrateLegacyEvents()
+    await app.state.event_service.migrateBotTimelines()
+    if db_connections.redis:
+        await app.state.trigger_service.start()
+    await app.state.event_service.start()
+
+    # Refill an empty hot tier from the last snapshot, then keep snapshotting
+    snapshotter = snapshotter_from_env(db_connections, app.state.event_service) if db_connections.redis else None
+    if snapshotter:
+        try:
+            await snapshotter.restore()
+        except Exception as e:
+            logger.error(f"Hot tier restore failed, starting empty: {e}")
+        await snapshotter.start()
     yield
-    # Shutdown
+    # Shutdown: stop exports and take a final snapshot while Redis is still connected
+    await app.state.export_service.stop()
+    if snapshotter:
+        await snapshotter.stop()
+    await app.state.event_service.stop()
+    await app.state.trigger_service.stop()
     await db_connections.close_connections()
+    tracer.close()
+
+def create_app() -> FastAPI:
+    """
+    Build the storage service application
+
+    Used as the uvicorn entry point (uvicorn --factory src.main:create_app).
+    Connections and services are created by the lifespan, so building the
+    app does no I/O.
+    """
+    app = FastAPI(
+        title="Storage Service",
+        description="Centralized storage management for bot ecosystem",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    init_tracing("storage-service")
+
+    # Per-route latency histograms and in-flight requests
+    app.add_middleware(MetricsMiddleware)
+
+    # Request spans, continuing the caller's trace when a traceparent header is sent
+    app.add_middleware(TracingMiddleware, route_name=route_template)
+
+    # Gzip large responses (event lists) for clients that accept it
+    app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "4096")))
 
-app = FastAPI(
-    title="Storage Service",
-    description="Centralized storage management for bot ecosystem",
-    version="1.0.0",
-    lifespan=lifespan
-)
+    # Include API routers
+    app.include_router(events_router, prefix="/api/v1/events", tags=["events"])
+    app.include_router(triggers_router, prefix="/api/v1/triggers", tags=["triggers"])
+    app.include_router(goals_router, prefix="/api/v1/goals", tags=["goals"])
+    app.include_router(exports_router, prefix="/api/v1/exports", tags=["exports"])
 
-# Include API routers
-app.include_router(events_router, prefix="/api/v1/events", tags=["events"])
+    @app.get("/health")
+    async def health_check():
+        return {
+            "status": "ok",
+            "service": "storage-service",
+            "redis_connected": db_connections.redis is not None
+        }
 
-@app.get("/health")
-async def health_check():
-    return {
-        "status": "ok",
-        "service": "storage-service",
-        "redis_connected": db_connections.redis is not None
-    }
+    @app.get("/metrics")
+    async def metrics():
+        """Prometheus metrics"""
+        return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
 
+    return app
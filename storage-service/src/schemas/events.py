@@ -11,19 +11,28 @@ class CreateEventRequest(BaseModel):
     event_type: str = Field(..., description="Type of event (e.g., 'player_joined', 'goal_completed')", example="player_joined")
     data: Dict[str, Any] = Field(..., description="Event data payload", example={"username": "Steve", "position": {"x": 100, "y": 64, "z": 200}})
     botId: Optional[str] = Field(None, description="Bot identifier", example="bot_001")
-    severity: int = Field(0, ge=0, le=10, description="Event severity/importance level (0-10)", example=5)
+    severity: Optional[int] = Field(None, ge=0, le=10, description="Event severity/importance level (0-10), scored by the service when omitted", example=5)
 
 class EventResponse(BaseModel):
     """Response model for event creation"""
     event_id: str = Field(..., description="Unique identifier for the created event", example="550e8400-e29b-41d4-a716-446655440000")
     status: str = Field(..., description="Creation status", example="created")
 
+class CreateEventsRequest(BaseModel):
+    """Request model for creating several events at once"""
+    events: List[CreateEventRequest] = Field(..., max_length=1000, description="Events to create")
+
+class CreateEventsResponse(BaseModel):
+    """Response model for batch event creation"""
+    event_ids: List[str] = Field(..., description="IDs of the created events, in request order")
+    status: str = Field(..., description="Creation status", example="created")
+
 class EventModel(BaseModel):
     """Complete event model"""
     id: str = Field(..., description="Unique event identifier", example="550e8400-e29b-41d4-a716-446655440000")
     botId: Optional[str] = Field(None, description="Bot identifier", example="bot_001")
     type: str = Field(..., description="Event type", example="player_joined")
-    data: Dict[str, Any] = Field(..., description="Event data payload")
+    data: Optional[Dict[str, Any]] = Field(None, description="Event data payload (omitted when include_data=false)")
     severity: int = Field(..., description="Event severity level", example=5)
     timestamp: int = Field(..., description="Event timestamp in milliseconds", example=1703097600000)
     retrieval: Optional[int] = Field(None, description="Retrieval timestamp for archived events", example=1703097600000)
@@ -35,6 +44,7 @@ class EventFilters(BaseModel):
     botId: Optional[str] = Field(None, description="Filter by bot ID")
     event_type: Optional[str] = Field(None, description="Filter by event type")
     min_severity: Optional[int] = Field(None, ge=0, le=10, description="Filter by minimum severity level")
+    since: Optional[int] = Field(None, description="Only events with timestamp >= since (milliseconds)")
     order_by: str = Field("timestamp", pattern="^(timestamp|severity)$", description="Field to order by")
     order_desc: bool = Field(True, description="Order descending (newest first)")
 
@@ -68,6 +78,41 @@ class UpdateEventResponse(BaseModel):
     status: str = Field(..., description="Update status", example="updated")
     event_id: str = Field(..., description="ID of updated event")
 
+class BandRetentionStats(BaseModel):
+    """Hot tier usage and evictions for one severity band"""
+    weight: float = Field(..., description="Retention weight relative to the low band", example=16)
+    count: int = Field(..., description="Events held", example=120)
+    bytes: int = Field(..., description="Payload bytes held", example=48000)
+    evicted: int = Field(..., description="Events evicted to stay within the byte budget", example=3)
+    evicted_bytes: int = Field(..., description="Payload bytes evicted", example=1200)
+    expired: int = Field(..., description="Retrieved events dropped after their TTL", example=0)
+
+class RetentionStatsResponse(BaseModel):
+    """Response model for hot tier retention statistics"""
+    max_bytes: int = Field(..., description="Byte budget for event payloads", example=4194304)
+    bytes: int = Field(..., description="Payload bytes held", example=1048576)
+    count: int = Field(..., description="Events held", example=2600)
+    half_life_seconds: float = Field(..., description="Half-life of an event's retention value", example=3600)
+    bands: Dict[str, BandRetentionStats] = Field(..., description="Statistics per band (low, medium, high, critical, retrieval)")
+
+class TypeCompressionStats(BaseModel):
+    """Payload compression for one event type"""
+    events: int = Field(..., description="Events written", example=420)
+    compressed: int = Field(..., description="Events stored with compressed data", example=380)
+    raw_bytes: int = Field(..., description="Data bytes before compression", example=3400000)
+    stored_bytes: int = Field(..., description="Data bytes stored", example=410000)
+    ratio: float = Field(..., description="raw_bytes / stored_bytes", example=8.3)
+    compress_us: float = Field(..., description="Mean compression time per compressed event (microseconds)", example=95.0)
+    decompress_us: float = Field(..., description="Mean decompression time per inflated event (microseconds)", example=30.0)
+    dictionary: bool = Field(..., description="Whether a trained dictionary is in use", example=True)
+
+class CompressionStatsResponse(BaseModel):
+    """Response model for event payload compression statistics"""
+    algorithm: str = Field(..., description="Compression algorithm (zstd or zlib)", example="zlib")
+    min_bytes: int = Field(..., description="Data size from which payloads are compressed", example=1024)
+    dictionaries: int = Field(..., description="Trained dictionaries loaded", example=2)
+    types: Dict[str, TypeCompressionStats] = Field(..., description="Statistics per event type since startup")
+
 class ErrorResponse(BaseModel):
     """Standard error response model"""
     error: str = Field(..., description="Error message", example="Event not found")
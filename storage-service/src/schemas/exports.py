@@ -0,0 +1,43 @@
+"""
+Export schema definitions using Pydantic for OpenAPI generation
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+class ExportRequest(BaseModel):
+    """Request model for starting an export job"""
+    format: str = Field("parquet", pattern="^(parquet|arrow)$", description="Parquet or Arrow IPC files")
+    since: Optional[int] = Field(None, description="Earliest event timestamp in milliseconds (inclusive)")
+    until: Optional[int] = Field(None, description="Latest event timestamp in milliseconds (inclusive)")
+    botId: Optional[str] = Field(None, description="Only export events of this bot")
+    event_types: Optional[List[str]] = Field(None, description="Only export events of these types")
+
+class ExportJobModel(BaseModel):
+    """Export job state and progress"""
+    id: str = Field(..., description="Job identifier, also the name of its directory", example="20240101T120000-1a2b3c4d")
+    state: str = Field(..., description="queued, running, completed, failed or cancelled", example="running")
+    format: str = Field(..., description="File format", example="parquet")
+    directory: str = Field(..., description="Directory the files are written to")
+    since: Optional[int] = Field(None, description="Earliest event timestamp exported")
+    until: Optional[int] = Field(None, description="Latest event timestamp exported")
+    botId: Optional[str] = Field(None, description="Bot filter")
+    event_types: Optional[List[str]] = Field(None, description="Event type filter")
+    total: int = Field(..., description="Events in the time range when the job started", example=1200000)
+    scanned: int = Field(..., description="Events read so far", example=450000)
+    exported: int = Field(..., description="Events written so far (after filters)", example=448000)
+    percent: float = Field(..., description="scanned / total", example=37.5)
+    files: int = Field(..., description="Files closed so far", example=12)
+    bytes: int = Field(..., description="Bytes in closed files", example=52000000)
+    open_files: int = Field(..., description="Files still being written")
+    buffered_rows: int = Field(..., description="Rows held in memory waiting for their row group")
+    buffered_bytes: int = Field(..., description="Arrow bytes held in memory waiting to be written")
+    created: int = Field(..., description="Job creation timestamp in milliseconds")
+    started: Optional[int] = Field(None, description="Start timestamp in milliseconds")
+    finished: Optional[int] = Field(None, description="End timestamp in milliseconds")
+    error: Optional[str] = Field(None, description="Failure reason")
+
+class ExportJobsResponse(BaseModel):
+    """Response model for listing export jobs"""
+    jobs: List[ExportJobModel] = Field(..., description="Known jobs, newest first")
+    count: int = Field(..., description="Number of jobs returned")
@@ -0,0 +1,65 @@
+"""
+Goal schema definitions using Pydantic for OpenAPI generation
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+
+class MilestoneModel(BaseModel):
+    """Step of a goal"""
+    id: Optional[str] = Field(None, description="Milestone identifier (generated when omitted)")
+    name: str = Field(..., description="Milestone name", example="Mine 3 iron ore")
+    type: str = Field("goal", pattern="^(discovery|goal|command)$", description="Milestone type")
+    priority: str = Field("medium", pattern="^(critical|high|medium|low)$", description="Milestone priority")
+    status: str = Field("pending", pattern="^(active|pending|completed|archived)$", description="Milestone status")
+    dependsOn: List[str] = Field(default_factory=list, description="Milestones of the same goal that must complete first")
+    createdAt: Optional[int] = Field(None, description="Creation timestamp in milliseconds")
+    completedAt: Optional[int] = Field(None, description="Completion timestamp in milliseconds")
+    parentGoalId: Optional[str] = Field(None, description="Goal the milestone belongs to")
+    execute: Optional[Any] = Field(None, description="Command or commands to run for this milestone")
+
+class GoalModel(BaseModel):
+    """Goal record"""
+    id: Optional[str] = Field(None, description="Goal identifier (generated when omitted)")
+    botId: str = Field(..., description="Bot pursuing the goal", example="bot_001")
+    name: str = Field(..., description="Goal name", example="Build an iron pickaxe")
+    type: str = Field("goal", pattern="^(discovery|goal|command)$", description="Goal type")
+    priority: str = Field("medium", pattern="^(critical|high|medium|low)$", description="Goal priority")
+    status: str = Field("pending", pattern="^(active|pending|completed|archived)$", description="Goal status")
+    milestones: List[MilestoneModel] = Field(default_factory=list, description="Milestones of the goal")
+    progress: int = Field(0, ge=0, le=100, description="Completion percentage")
+    createdAt: Optional[int] = Field(None, description="Creation timestamp in milliseconds")
+    completedAt: Optional[int] = Field(None, description="Completion timestamp in milliseconds")
+    updatedAt: Optional[int] = Field(None, description="Last write timestamp in milliseconds")
+    execute: Optional[Any] = Field(None, description="Command or commands to run for this goal")
+
+class SaveGoalsRequest(BaseModel):
+    """Request model for creating or replacing goals"""
+    goals: List[GoalModel] = Field(..., min_length=1, max_length=1000, description="Goals to store")
+
+class SaveGoalsResponse(BaseModel):
+    """Response model for saved goals"""
+    goal_ids: List[str] = Field(..., description="Goal identifiers, in request order")
+    status: str = Field(..., description="Save status", example="saved")
+
+class GoalProgressUpdate(BaseModel):
+    """Partial update of one goal"""
+    id: str = Field(..., description="Goal identifier")
+    progress: Optional[int] = Field(None, ge=0, le=100, description="Completion percentage (derived from milestones when omitted)")
+    status: Optional[str] = Field(None, pattern="^(active|pending|completed|archived)$", description="New goal status")
+    priority: Optional[str] = Field(None, pattern="^(critical|high|medium|low)$", description="New goal priority")
+    milestones: Dict[str, str] = Field(default_factory=dict, description="Milestone id -> new status")
+
+class GoalProgressRequest(BaseModel):
+    """Request model for batched progress updates"""
+    updates: List[GoalProgressUpdate] = Field(..., min_length=1, max_length=5000, description="Updates, applied in order")
+
+class GoalProgressResponse(BaseModel):
+    """Response model for batched progress updates"""
+    updated: int = Field(..., description="Goals updated (unknown ids are skipped)")
+
+class GetGoalsResponse(BaseModel):
+    """Response model for goal queries"""
+    goals: List[GoalModel] = Field(..., description="Goals, highest priority then oldest first")
+    count: int = Field(..., description="Number of goals returned")
+    totals: Dict[str, int] = Field(..., description="Goals per status for the bot (or all bots)")
@@ -0,0 +1,58 @@
+"""
+Trigger schema definitions using Pydantic for OpenAPI generation
+"""
+
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, Dict, Any, List
+
+class TriggerCondition(BaseModel):
+    """Predicate over a field of the event data"""
+    field: str = Field(..., description="Dotted path inside event data", example="metadata.username")
+    op: str = Field("eq", pattern="^(eq|ne|in|contains|gt|gte|lt|lte|exists)$", description="Comparison operator")
+    value: Any = Field(None, description="Value to compare with (a list for 'in', a boolean for 'exists')", example="Steve")
+
+class TriggerArea(BaseModel):
+    """Sphere (or cylinder when y is omitted) the event position must fall in"""
+    x: float = Field(..., example=100)
+    y: Optional[float] = Field(None, example=64)
+    z: float = Field(..., example=200)
+    radius: float = Field(..., gt=0, example=32)
+
+class CreateTriggerRequest(BaseModel):
+    """Request model for registering a trigger rule"""
+    name: Optional[str] = Field(None, description="Label included with each match", example="base_visitors")
+    event_type: Optional[str] = Field(None, description="Event type to match (any when omitted)", example="player_joined")
+    botId: Optional[str] = Field(None, description="Bot to match (any when omitted)", example="bot_002")
+    min_severity: Optional[int] = Field(None, ge=0, le=10, description="Lowest matching severity", example=7)
+    max_severity: Optional[int] = Field(None, ge=0, le=10, description="Highest matching severity")
+    conditions: List[TriggerCondition] = Field(default_factory=list, description="Predicates that must all hold")
+    near: Optional[TriggerArea] = Field(None, description="Area around which the event must happen (data.position)")
+    webhook: Optional[str] = Field(None, description="URL that receives matches as POST {'matches': [...]}")
+    queue: Optional[str] = Field(None, pattern="^[A-Za-z0-9_.-]+$", description="Named queue to push matches to", example="alerts")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if bool(self.webhook) == bool(self.queue):
+            raise ValueError("Exactly one of 'webhook' or 'queue' is required")
+        return self
+
+class TriggerModel(CreateTriggerRequest):
+    """Registered trigger rule"""
+    id: str = Field(..., description="Trigger identifier")
+    created: int = Field(..., description="Registration timestamp in milliseconds")
+
+class GetTriggersResponse(BaseModel):
+    """Response model for listing trigger rules"""
+    triggers: List[TriggerModel] = Field(..., description="Registered rules, oldest first")
+    count: int = Field(..., description="Number of rules")
+
+class TriggerMatch(BaseModel):
+    """An event that matched a trigger"""
+    trigger_id: str = Field(..., description="Matching trigger")
+    name: Optional[str] = Field(None, description="Trigger label")
+    event: Dict[str, Any] = Field(..., description="The matching event")
+
+class PopQueueResponse(BaseModel):
+    """Response model for taking matches off a named queue"""
+    matches: List[TriggerMatch] = Field(..., description="Matches, oldest first")
+    count: int = Field(..., description="Number of matches returned")
@@ -3,5 +3,6 @@ Event Storage Service - Handles event creation and retrieval
 """
 
 from .event_service import EventService
+from .goal_service import GoalService
 
-__all__ = ['EventService']
\ No newline at end of file
+__all__ = ['EventService', 'GoalService']
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Write Admission - Per-bot token buckets on event writes, shared across workers through Redis
+"""
+
+import os
+import math
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.metrics import registry
+from .snapshot import RESTORING_KEY
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = "admission:{}:{}"  # bot, rate class
+
+DEFAULT_CLASS = "default"
+
+# Seconds a writer is told to wait while a snapshot restore holds off writes
+RESTORE_RETRY_AFTER = 1.0
+
+events_admission = registry.counter(
+    "events_admission_total", "Event write admission decisions", ("rate_class", "outcome")
+)
+
+# Refills and checks every bucket a write touches, then takes the tokens
+# only if all of them can pay, so a rejected batch costs nothing. A cost
+# above the burst is admitted once the bucket is full and leaves it in debt,
+# which holds the bot to the sustained rate afterwards. Nothing is admitted
+# while a snapshot restore is replacing the hot tier.
+# KEYS: restoring flag, then buckets. ARGV: now (ms), then rate (tokens/s),
+# burst, cost per bucket.
+# Returns 0 when admitted, -1 while restoring, otherwise milliseconds until
+# it would be admitted.
+TOKEN_BUCKET_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return -1
+end
+local now = tonumber(ARGV[1])
+local wait = 0
+local tokens = {}
+for i = 1, #KEYS - 1 do
+  local rate = tonumber(ARGV[i * 3 - 1])
+  local burst = tonumber(ARGV[i * 3])
+  local cost = tonumber(ARGV[i * 3 + 1])
+  local state = redis.call('HMGET', KEYS[i + 1], 'tokens', 'ts')
+  local available = tonumber(state[1]) or burst
+  local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+  available = math.min(burst, available + elapsed * rate / 1000)
+  local need = math.min(cost, burst)
+  if available < need then
+    wait = math.max(wait, math.ceil((need - available) * 1000 / rate))
+  end
+  tokens[i] = available
+end
+if wait > 0 then
+  return wait
+end
+for i = 1, #KEYS - 1 do
+  local rate = tonumber(ARGV[i * 3 - 1])
+  local burst = tonumber(ARGV[i * 3])
+  local cost = tonumber(ARGV[i * 3 + 1])
+  local remaining = tokens[i] - cost
+  redis.call('HSET', KEYS[i + 1], 'tokens', tostring(remaining), 'ts', tostring(now))
+  redis.call('PEXPIRE', KEYS[i + 1], math.ceil((burst - remaining) * 1000 / rate) + 1000)
+end
+return 0
+"""
+
+def parse_rates(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse 'default=20:60,bot_action=50:100' (event type=rate per second:burst)"""
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            rate, burst = value.split(":", 1)
+            rates[name.strip()] = (max(float(rate), 0.001), max(float(burst), 1.0))
+        except ValueError:
+            logger.warning(f"Ignoring invalid admission rate '{item}'")
+    return rates
+
+class WritesPaused(Exception):
+    """Raised by admission while a snapshot restore holds off event writes"""
+
+    def __init__(self, message: str = "Hot tier restore in progress", retry_after: float = RESTORE_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Token bucket per (botId, event type) on event writes
+
+    Each event type listed in rates gets its own bucket per bot; other
+    types share the bot's 'default' bucket. Buckets live in Redis and are
+    updated by one script call per write, so the limits hold across
+    storage-service workers. The same call refuses every write while a
+    snapshot restore is replacing the hot tier. If Redis cannot run the
+    script, writes are admitted (fail open) and counted as errors.
+    """
+
+    def __init__(self, db_connections, rates: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.db = db_connections
+        self.rates = {DEFAULT_CLASS: (20.0, 60.0), **(rates or {})}
+        self._script = None
+        self._failing = False
+
+    def rate_class(self, event_type: str) -> str:
+        return event_type if event_type in self.rates else DEFAULT_CLASS
+
+    async def admit(self, events_by_bot: Dict[Optional[str], List[str]]) -> float:
+        """
+        Take tokens for a write, all or nothing across every bot in it
+
+        Every (bot, rate class) bucket the write touches goes to one script
+        call, so a write rejected for one bot takes no tokens from the others.
+
+        Args:
+            events_by_bot: Type of each event written, by writing bot (None
+                shares the 'unknown' buckets)
+
+        Returns:
+            0 when admitted, otherwise seconds to wait before retrying
+
+        Raises:
+            WritesPaused: While a snapshot restore is replacing the hot tier
+        """
+        costs: Dict[Tuple[str, str], int] = {}
+        for botId, event_types in events_by_bot.items():
+            for event_type in event_types:
+                bucket = (botId or "unknown", self.rate_class(event_type))
+                costs[bucket] = costs.get(bucket, 0) + 1
+        if not costs or not self.db.redis:
+            return 0.0
+
+        keys = [RESTORING_KEY] + [BUCKET_KEY.format(bot, rate_class) for bot, rate_class in costs]
+        args: List[float] = [int(time.time() * 1000)]
+        for (_, rate_class), cost in costs.items():
+            rate, burst = self.rates[rate_class]
+            args += [rate, burst, cost]
+
+        try:
+            if self._script is None:
+                self._script = self.db.redis.register_script(TOKEN_BUCKET_SCRIPT)
+            wait_ms = int(await self._script(keys=keys, args=args))
+            self._failing = False
+        except Exception as e:
+            if not self._failing:
+                logger.warning(f"Admission control unavailable, admitting writes: {e}")
+                self._failing = True
+            for (_, rate_class), cost in costs.items():
+                events_admission.inc(cost, rate_class, "error")
+            return 0.0
+
+        if wait_ms < 0:
+            for (_, rate_class), cost in costs.items():
+                events_admission.inc(cost, rate_class, "paused")
+            raise WritesPaused()
+
+        outcome = "throttled" if wait_ms else "admitted"
+        for (_, rate_class), cost in costs.items():
+            events_admission.inc(cost, rate_class, outcome)
+        if wait_ms:
+            logger.debug(f"Throttled write from {sorted({bot for bot, _ in costs})}, retry in {wait_ms}ms")
+        return wait_ms / 1000
+
+def admission_from_env(db_connections) -> Optional[AdmissionController]:
+    """Controller from ADMISSION_* settings, or None when admission control is off"""
+    if os.getenv("ADMISSION_ENABLED", "true").lower() != "true":
+        return None
+    return AdmissionController(db_connections, parse_rates(os.getenv("ADMISSION_RATES", "")))
+
+def retry_after_header(wait: float) -> Dict[str, str]:
+    """Retry-After in whole seconds (at least 1, as the header has no fractions)"""
+    return {"Retry-After": str(max(1, math.ceil(wait)))}
@@ -0,0 +1,362 @@
+"""
+Payload Compression - Compress large event data in the hot tier with per-type trained dictionaries
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import base64
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.metrics import registry
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib with a preset dictionary is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_FIELD = "data_z"  # "<algorithm>:<dictionary or empty>:<base64>" in place of data (see split_compressed)
+DICTS_KEY = "events:dicts"   # "<algorithm>:<event type>" -> base64 dictionary
+
+payload_bytes = registry.counter(
+    "events_payload_bytes_total", "Event data bytes written, before and after compression", ("event_type", "stage")
+)
+compression_seconds = registry.counter(
+    "events_compression_seconds_total", "Time spent compressing and decompressing event data",
+    ("event_type", "operation")
+)
+
+# JSON strings, with the following colon when they are keys
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.){1,80}"(?:\s*:\s*)?')
+
+def train_zlib_dictionary(samples: List[bytes], size: int) -> bytes:
+    """
+    Preset dictionary for zlib from sample payloads
+
+    Keys and string values found in at least two samples are ranked by
+    (samples containing them x length) and packed up to size bytes, the
+    most valuable last, where deflate references them most cheaply.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        counts.update(set(_TOKEN.findall(sample.decode("utf-8", "replace"))))
+    ranked = sorted(
+        (token for token, seen in counts.items() if seen > 1),
+        key=lambda token: counts[token] * len(token), reverse=True
+    )
+    picked, used = [], 0
+    for token in ranked:
+        encoded = token.encode()
+        if used + len(encoded) > size:
+            continue
+        picked.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(picked))
+
+def split_compressed(encoded: str) -> Tuple[str, str, str]:
+    """
+    (algorithm, dictionary, base64 body) of a data_z value
+
+    The dictionary is named after an event type, which may itself contain
+    ':', so it is whatever lies between the algorithm and the body; neither
+    the algorithm nor base64 ever contains ':'.
+    """
+    algorithm, rest = encoded.split(":", 1)
+    dictionary, body = rest.rsplit(":", 1)
+    return algorithm, dictionary, body
+
+class PayloadCodec:
+    """
+    Compresses event data above a size threshold
+
+    Large data is serialized, compressed and stored base64 in the event's
+    data_z field, so the rest of the event stays plain JSON: filters read
+    it without decompressing, and data is only inflated for events a
+    caller actually gets back with their data. Once train_samples large
+    payloads of an event type have been written, a dictionary is trained
+    for that type (zstd when zstandard is installed, a zlib preset
+    dictionary otherwise) and kept in Redis, where other workers and
+    snapshot restores find it. A type whose samples yield no dictionary
+    is not sampled again. Payloads that would not shrink are stored as
+    they are.
+    """
+
+    def __init__(self, db_connections, min_bytes: int = 1024, algorithm: Optional[str] = None,
+                 level: int = 6, dict_bytes: int = 16384, train_samples: int = 64):
+        self.db = db_connections
+        self.min_bytes = min_bytes
+        self.algorithm = algorithm or ("zstd" if zstandard is not None else "zlib")
+        if self.algorithm == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, compressing event data with zlib")
+            self.algorithm = "zlib"
+        self.level = level
+        self.dict_bytes = dict_bytes
+        self.train_samples = train_samples
+        self._dicts: Dict[str, bytes] = {}  # "<algorithm>:<event type>" -> dictionary
+        self._zstd: Dict[str, Any] = {}     # cached zstd (de)compressors per dictionary
+        self._samples: Dict[str, List[bytes]] = {}
+        self._training: Set[str] = set()
+        self._untrainable: Set[str] = set()  # "<algorithm>:<event type>" whose samples gave no dictionary
+        self._task: Optional[asyncio.Task] = None
+        # event type -> [events, compressed, raw bytes, stored bytes, compress s, decompressed, decompress s]
+        self._stats: Dict[str, List[float]] = {}
+
+    def encode(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The event as it is stored: data moved into data_z when large
+
+        Events that are already compressed (re-stored on update or restore)
+        are returned unchanged.
+        """
+        if 'data' not in event:
+            return event
+        event_type = event.get('type') or ""
+        raw = json.dumps(event['data']).encode()
+        stats = self._typeStats(event_type)
+        stats[0] += 1
+        stats[2] += len(raw)
+        payload_bytes.inc(len(raw), event_type, "raw")
+        stored = {key: value for key, value in event.items() if key != COMPRESSED_FIELD}
+        if self.min_bytes <= 0 or len(raw) < self.min_bytes:
+            stats[3] += len(raw)
+            payload_bytes.inc(len(raw), event_type, "stored")
+            return stored
+
+        started = time.perf_counter()
+        name = f"{self.algorithm}:{event_type}"
+        dictionary = self._dicts.get(name)
+        encoded = f"{self.algorithm}:{event_type if dictionary else ''}:" \
+                  f"{base64.b64encode(self._compress(raw, name, dictionary)).decode()}"
+        elapsed = time.perf_counter() - started
+        stats[4] += elapsed
+        compression_seconds.inc(elapsed, event_type, "compress")
+        if dictionary is None and name not in self._training and name not in self._untrainable:
+            samples = self._samples.setdefault(event_type, [])
+            if len(samples) < self.train_samples:
+                samples.append(raw)
+
+        if len(encoded) >= len(raw):
+            stats[3] += len(raw)
+            payload_bytes.inc(len(raw), event_type, "stored")
+            return stored
+        del stored['data']
+        stored[COMPRESSED_FIELD] = encoded
+        stats[1] += 1
+        stats[3] += len(encoded)
+        payload_bytes.inc(len(encoded), event_type, "stored")
+        return stored
+
+    async def decode(self, events: List[Dict[str, Any]], include_data: bool = True) -> List[Dict[str, Any]]:
+        """
+        Inflate compressed data in place (or drop it when include_data is False)
+
+        Dictionaries trained by other workers are loaded from Redis first.
+        """
+        compressed = [event for event in events if COMPRESSED_FIELD in event]
+        if not include_data:
+            for event in events:
+                event.pop(COMPRESSED_FIELD, None)
+                event.pop('data', None)
+            return events
+        if not compressed:
+            return events
+
+        missing = set()
+        for event in compressed:
+            algorithm, dictionary, _ = split_compressed(event[COMPRESSED_FIELD])
+            if dictionary and f"{algorithm}:{dictionary}" not in self._dicts:
+                missing.add(f"{algorithm}:{dictionary}")
+        if missing:
+            await self.load()
+
+        for event in compressed:
+            event_type = event.get('type') or ""
+            started = time.perf_counter()
+            try:
+                event['data'] = self._inflate(event.pop(COMPRESSED_FIELD))
+            except Exception as e:
+                logger.warning(f"Failed to decompress data of event {event.get('id')}: {e}")
+                event['data'] = {}
+            elapsed = time.perf_counter() - started
+            stats = self._typeStats(event_type)
+            stats[5] += 1
+            stats[6] += elapsed
+            compression_seconds.inc(elapsed, event_type, "decompress")
+        return events
+
+    def trainSoon(self) -> None:
+        """Train dictionaries for event types with enough samples, in the background"""
+        if self._task is not None and not self._task.done():
+            return
+        if any(len(samples) >= self.train_samples for samples in self._samples.values()):
+            self._task = asyncio.create_task(self.train())
+
+    async def train(self) -> int:
+        """
+        Train and store dictionaries for event types with enough samples
+
+        When several workers train the same type, the first one stored in
+        Redis wins and the others adopt it. A type whose samples give no
+        dictionary is remembered and left uncompressed by a dictionary, as
+        more samples of the same payloads would not do better.
+
+        Returns:
+            Number of dictionaries trained
+        """
+        ready = [
+            (event_type, self._samples.pop(event_type)) for event_type, samples in list(self._samples.items())
+            if len(samples) >= self.train_samples
+        ]
+        for event_type, _ in ready:
+            self._training.add(f"{self.algorithm}:{event_type}")
+        trained = 0
+        for event_type, samples in ready:
+            name = f"{self.algorithm}:{event_type}"
+            try:
+                try:
+                    dictionary = await asyncio.to_thread(self._train, samples)
+                except Exception as e:
+                    logger.info(f"No dictionary trained for '{event_type}' events: {e}")
+                    dictionary = b""
+                if not dictionary:
+                    self._untrainable.add(name)
+                    continue
+                if self.db.redis:
+                    await self.db.redis.hsetnx(DICTS_KEY, name, base64.b64encode(dictionary).decode())
+                    await self.load()
+                else:
+                    self._dicts[name] = dictionary
+                trained += 1
+                logger.info(f"Trained {self.algorithm} dictionary for '{event_type}' events "
+                            f"({len(dictionary)} bytes from {len(samples)} samples)")
+            except Exception as e:
+                logger.warning(f"Failed to train a dictionary for '{event_type}' events: {e}")
+            finally:
+                self._training.discard(name)
+        return trained
+
+    async def load(self) -> int:
+        """Load every stored dictionary from Redis"""
+        if not self.db.redis:
+            return 0
+        try:
+            self.importDictionaries(await self.db.redis.hgetall(DICTS_KEY))
+        except Exception as e:
+            logger.warning(f"Failed to load compression dictionaries: {e}")
+        return len(self._dicts)
+
+    async def exportDictionaries(self) -> Dict[str, str]:
+        """Stored dictionaries, base64, for a snapshot"""
+        if self.db.redis:
+            return await self.db.redis.hgetall(DICTS_KEY)
+        return {name: base64.b64encode(dictionary).decode() for name, dictionary in self._dicts.items()}
+
+    async def restoreDictionaries(self, dictionaries: Dict[str, str]) -> None:
+        """Put a snapshot's dictionaries back (existing ones are kept)"""
+        if dictionaries and self.db.redis:
+            async with self.db.redis.pipeline(transaction=False) as pipe:
+                for name, encoded in dictionaries.items():
+                    pipe.hsetnx(DICTS_KEY, name, encoded)
+                await pipe.execute()
+        self.importDictionaries(dictionaries)
+
+    def importDictionaries(self, dictionaries: Dict[str, str]) -> None:
+        for name, encoded in dictionaries.items():
+            if name not in self._dicts:
+                self._dicts[name] = base64.b64decode(encoded)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def getStats(self) -> Dict[str, Any]:
+        """Compression ratio and time per event type since startup"""
+        types = {}
+        for event_type, (events, compressed, raw, stored, compress_s, decompressed, decompress_s) \
+                in sorted(self._stats.items()):
+            types[event_type] = {
+                'events': int(events),
+                'compressed': int(compressed),
+                'raw_bytes': int(raw),
+                'stored_bytes': int(stored),
+                'ratio': round(raw / stored, 2) if stored else 1.0,
+                'compress_us': round(compress_s * 1e6 / compressed, 1) if compressed else 0.0,
+                'decompress_us': round(decompress_s * 1e6 / decompressed, 1) if decompressed else 0.0,
+                'dictionary': f"{self.algorithm}:{event_type}" in self._dicts
+            }
+        return {
+            'algorithm': self.algorithm,
+            'min_bytes': self.min_bytes,
+            'dictionaries': len(self._dicts),
+            'types': types
+        }
+
+    def _typeStats(self, event_type: str) -> List[float]:
+        stats = self._stats.get(event_type)
+        if stats is None:
+            stats = self._stats[event_type] = [0, 0, 0, 0, 0.0, 0, 0.0]
+        return stats
+
+    def _train(self, samples: List[bytes]) -> bytes:
+        if self.algorithm == "zstd":
+            return zstandard.train_dictionary(self.dict_bytes, samples).as_bytes()
+        return train_zlib_dictionary(samples, self.dict_bytes)
+
+    def _compress(self, raw: bytes, name: str, dictionary: Optional[bytes]) -> bytes:
+        if self.algorithm == "zstd":
+            key = f"c:{name}" if dictionary else "c:"
+            compressor = self._zstd.get(key)
+            if compressor is None:
+                dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+                compressor = self._zstd[key] = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data)
+            return compressor.compress(raw)
+        if dictionary:
+            compressor = zlib.compressobj(self.level, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return compressor.compress(raw) + compressor.flush()
+
+    def _inflate(self, encoded: str) -> Dict[str, Any]:
+        algorithm, event_type, body = split_compressed(encoded)
+        name = f"{algorithm}:{event_type}"
+        dictionary = self._dicts.get(name) if event_type else None
+        if event_type and dictionary is None:
+            raise ValueError(f"Unknown compression dictionary '{name}'")
+        blob = base64.b64decode(body)
+        if algorithm == "zstd":
+            if zstandard is None:
+                raise ValueError("Event data is zstd-compressed but zstandard is not installed")
+            key = f"d:{name}" if dictionary else "d:"
+            decompressor = self._zstd.get(key)
+            if decompressor is None:
+                dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+                decompressor = self._zstd[key] = zstandard.ZstdDecompressor(dict_data=dict_data)
+            return json.loads(decompressor.decompress(blob))
+        if dictionary:
+            decompressor = zlib.decompressobj(zdict=dictionary)
+        else:
+            decompressor = zlib.decompressobj()
+        return json.loads(decompressor.decompress(blob) + decompressor.flush())
+
+def codec_from_env(db_connections) -> PayloadCodec:
+    """Codec from EVENTS_COMPRESS_* settings (EVENTS_COMPRESS_MIN_BYTES=0 turns compression off)"""
+    return PayloadCodec(
+        db_connections,
+        min_bytes=int(os.getenv("EVENTS_COMPRESS_MIN_BYTES", "1024")),
+        algorithm=os.getenv("EVENTS_COMPRESS_ALGORITHM") or None,
+        level=int(os.getenv("EVENTS_COMPRESS_LEVEL", "6")),
+        dict_bytes=int(os.getenv("EVENTS_COMPRESS_DICT_BYTES", "16384")),
+        train_samples=int(os.getenv("EVENTS_COMPRESS_TRAIN_SAMPLES", "64"))
+    )
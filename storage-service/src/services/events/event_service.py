@@ -3,25 +3,85 @@ Event Service - Manages event storage across different storage layers
 """
 
 import json
+import time
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import uuid4
 
+from redis.exceptions import WatchError
+
+from src.metrics import registry
+from .retention import RetentionPolicy, RETRIEVAL_BAND, policy_from_env
+from .severity import SeverityScorer, SeverityRescorer, events_scored, rescorer_from_env
+from .triggers import TriggerService
+from .compression import PayloadCodec, codec_from_env
+
 logger = logging.getLogger(__name__)
 
+# Hot tier layout in Redis
+EVENTS_KEY = "events:data"            # event id -> event JSON (large data compressed, see PayloadCodec)
+META_KEY = "events:meta"              # event id -> "band:bytes"
+TIMELINE_KEY = "events:timeline"      # event ids scored by event timestamp
+BOT_TIMELINE_KEY = "events:timeline:bot:{}"  # one bot's event ids scored by event timestamp
+BOTS_KEY = "events:bots"              # bot ids that have a timeline
+RETENTION_KEY = "events:retention"    # event ids scored by retention value, lowest evicted first
+RETRIEVALS_KEY = "events:retrievals"  # fed archive event ids scored by retrieval time
+STATS_KEY = "events:stats"            # stored bytes plus per-band counters
+LEGACY_KEY = "events"                 # pre-retention list of event JSON
+
+# Events per pipelined write when restoring a snapshot
+RESTORE_CHUNK = 1000
+
+events_evicted = registry.counter(
+    "events_evicted_total", "Events removed from the hot tier", ("band", "reason")
+)
+events_hot_bytes = registry.gauge("events_hot_bytes", "Event payload bytes held in the hot tier")
+
 class EventService:
-    """Handles event storage and retrieval"""
+    """
+    Handles event storage and retrieval
+
+    The hot tier keeps each event's JSON in a hash, indexed by sorted sets:
+    one by timestamp for reads (plus one per bot, so a bot's poll does not
+    walk every other bot's events) and one by retention score (see
+    RetentionPolicy) for eviction. Writes evict the lowest-scored events
+    until payloads fit in the byte budget. Every step is O(log n) per event
+    touched. Large data payloads are stored compressed by PayloadCodec and
+    only inflated for events returned with their data.
+    """
     
     # Redis storage limits
-    MAX_EVENTS = 2500
     MAX_RETRIEVALS = 500
+    RETRIEVAL_TTL = timedelta(hours=12)
+    
+    # Seconds between sweeps for expired retrievals
+    CLEANUP_INTERVAL = 60.0
     
-    def __init__(self, db_connections):
+    def __init__(self, db_connections, policy: Optional[RetentionPolicy] = None,
+                 scorer: Optional[SeverityScorer] = None, rescorer: Optional[SeverityRescorer] = None,
+                 triggers: Optional[TriggerService] = None, codec: Optional[PayloadCodec] = None):
         self.db = db_connections
+        self.triggers = triggers
+        self.codec = codec or codec_from_env(db_connections)
+        self.policy = policy or policy_from_env()
+        self.scorer = scorer or SeverityScorer()
+        self.rescorer = rescorer if rescorer is not None else rescorer_from_env()
+        self._lastCleanup = 0.0
+        
+    async def start(self):
+        """Load compression dictionaries and start LLM severity re-scoring when enabled"""
+        await self.codec.load()
+        if self.rescorer:
+            await self.rescorer.start(self._applySeverities)
+            
+    async def stop(self):
+        await self.codec.stop()
+        if self.rescorer:
+            await self.rescorer.stop()
         
     async def createEvent(self, event_type: str, data: Dict[str, Any], 
-                         botId: Optional[str] = None, severity: int = 0) -> str:
+                         botId: Optional[str] = None, severity: Optional[int] = None) -> str:
         """
         Create a new event and store it in Redis
         
@@ -29,42 +89,67 @@ class EventService:
             event_type: Type of event (e.g., 'player_joined', 'goal_completed')
             data: Event data payload
             botId: Optional bot identifier
-            severity: Event severity/importance (default 0)
+            severity: Event severity/importance, scored locally when omitted
             
         Returns:
             event_id: Unique identifier for the created event
         """
-        event_id = str(uuid4())
+        event_ids = await self.createEvents([
+            {'type': event_type, 'data': data, 'botId': botId, 'severity': severity}
+        ])
+        return event_ids[0]
+        
+    async def createEvents(self, events: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create several events in one write
+        
+        Events without a severity are scored together by the local scorer.
+        
+        Args:
+            events: Dicts with 'type', 'data' and optional 'botId' and 'severity'
+            
+        Returns:
+            Event IDs, in order
+        """
         timestamp = int(datetime.utcnow().timestamp() * 1000)  # milliseconds
         
-        event = {
-            'id': event_id,
-            'botId': botId,
-            'type': event_type,
-            'data': data,
-            'severity': severity,
-            'timestamp': timestamp
-        }
+        new_events = [
+            {
+                'id': str(uuid4()),
+                'botId': event.get('botId'),
+                'type': event['type'],
+                'data': event.get('data') or {},
+                'severity': event.get('severity'),
+                'timestamp': timestamp
+            }
+            for event in events
+        ]
+        if not new_events:
+            return []
         
         try:
             if not self.db.redis:
                 logger.error("Redis not available")
                 raise Exception("Redis connection not available")
                 
-            # Store in Redis list (matches bot memory format)
-            await self.db.redis.lpush("events", json.dumps(event))
-            
-            # Trim to maintain max events limit
-            await self.db.redis.ltrim("events", 0, self.MAX_EVENTS - 1)
+            self._scoreMissing(new_events)
+                
+            # Store, then evict the least valuable events past the byte budget
+            total_bytes = await self._store(new_events)
+            await self._evictToBudget(total_bytes)
             
             # Remove old retrieval events (older than 12 hours)
             await self._cleanupOldRetrievals()
             
-            # TODO: Use AI to determine event severity automatically
+            # Queue trigger matches for delivery
+            if self.triggers:
+                await self.triggers.dispatch(new_events)
+            
             # TODO: Store in Firestore for long-term storage
             
-            logger.info(f"Event created: {event_type} ({event_id}) severity={severity}")
-            return event_id
+            for event in new_events:
+                logger.info(f"Event created: {event['type']} ({event['id']}) severity={event['severity']}")
+            return [event['id'] for event in new_events]
             
         except Exception as e:
             logger.error(f"Failed to create event: {e}")
@@ -72,8 +157,10 @@ class EventService:
             
     async def getEvents(self, count: int = 10, event_id: Optional[str] = None,
                        botId: Optional[str] = None, event_type: Optional[str] = None,
-                       min_severity: Optional[int] = None, order_by: str = "timestamp",
-                       order_desc: bool = True) -> List[Dict[str, Any]]:
+                       min_severity: Optional[int] = None, since: Optional[int] = None,
+                       order_by: str = "timestamp", order_desc: bool = True,
+                       include_data: bool = True, event_types: Optional[List[str]] = None,
+                       skip: int = 0) -> List[Dict[str, Any]]:
         """
         Get events with filtering and ordering
         
@@ -83,8 +170,13 @@ class EventService:
             botId: Filter by bot ID
             event_type: Filter by event type
             min_severity: Filter by minimum severity level
+            since: Only events with timestamp >= since (milliseconds)
             order_by: Field to order by ('timestamp', 'severity')
             order_desc: Order descending (newest first)
+            include_data: Return each event's data (False skips decompressing it)
+            event_types: Filter by any of these event types
+            skip: Matching events to skip before the first one returned (with
+                `since`, a cursor past events already read at that timestamp)
             
         Returns:
             List of event dictionaries
@@ -94,42 +186,57 @@ class EventService:
                 logger.error("Redis not available")
                 return []
                 
-            # Get all events from Redis (we'll filter in memory for now)
-            # TODO: Optimize with Redis queries for large datasets
-            events_data = await self.db.redis.lrange("events", 0, -1)
-            
+            def matches(event: Dict[str, Any]) -> bool:
+                if botId and event.get('botId') != botId:
+                    return False
+                if event_type and event.get('type') != event_type:
+                    return False
+                if event_types and event.get('type') not in event_types:
+                    return False
+                if min_severity is not None and event.get('severity', 0) < min_severity:
+                    return False
+                if since is not None and event.get('timestamp', 0) < since:
+                    return False
+                return True
+                
+            # Lookup by ID is a single hash read
+            if event_id:
+                event_data = await self.db.redis.hget(EVENTS_KEY, event_id)
+                event = self._parse(event_data) if event_data else None
+                events = [event] if event and matches(event) else []
+                return await self.codec.decode(events, include_data)
+                
+            # Walk the timeline (the bot's own when filtering by bot) in
+            # timestamp order from `since`; ordering by timestamp can stop
+            # once `count` events matched
+            timeline_key = BOT_TIMELINE_KEY.format(botId) if botId else TIMELINE_KEY
+            by_timestamp = order_by != "severity"
+            low = since if since is not None else "-inf"
+            page = max(count, 100)
+            offset = 0
             events = []
-            for event_data in events_data:
-                try:
-                    event = json.loads(event_data)
-                    
-                    # Apply filters
-                    if event_id and event.get('id') != event_id:
-                        continue
-                    if botId and event.get('botId') != botId:
-                        continue
-                    if event_type and event.get('type') != event_type:
-                        continue
-                    if min_severity is not None and event.get('severity', 0) < min_severity:
-                        continue
-                        
-                    events.append(event)
+            while True:
+                if order_desc:
+                    ids = await self.db.redis.zrevrangebyscore(timeline_key, "+inf", low, start=offset, num=page)
+                else:
+                    ids = await self.db.redis.zrangebyscore(timeline_key, low, "+inf", start=offset, num=page)
+                if not ids:
+                    break
+                offset += len(ids)
+                for event_data in await self.db.redis.hmget(EVENTS_KEY, ids):
+                    # None when the event was evicted after the timeline read
+                    event = self._parse(event_data) if event_data else None
+                    if event and matches(event):
+                        events.append(event)
+                if by_timestamp and len(events) >= skip + count:
+                    break
                     
-                    # If searching by ID, return immediately
-                    if event_id:
-                        return [event]
-                        
-                except json.JSONDecodeError:
-                    logger.warning(f"Failed to parse event data: {event_data}")
-                    
-            # Sort events
-            if order_by == "severity":
+            # Sort events (the timeline already is in timestamp order)
+            if not by_timestamp:
                 events.sort(key=lambda x: x.get('severity', 0), reverse=order_desc)
-            else:  # default to timestamp
-                events.sort(key=lambda x: x.get('timestamp', 0), reverse=order_desc)
                 
-            # Limit results
-            return events[:count]
+            # Limit results, then inflate only the data being returned
+            return await self.codec.decode(events[skip:skip + count], include_data)
             
         except Exception as e:
             logger.error(f"Failed to get events: {e}")
@@ -151,35 +258,35 @@ class EventService:
                 return 0
                 
             current_timestamp = int(datetime.utcnow().timestamp() * 1000)
-            added_count = 0
             
             # Add retrieval timestamp to each event
             retrieval_events = []
             for event in events:
                 retrieval_event = event.copy()
+                retrieval_event.setdefault('id', str(uuid4()))
                 retrieval_event['retrieval'] = current_timestamp
                 retrieval_events.append(retrieval_event)
+            if not retrieval_events:
+                return 0
+            self._scoreMissing(retrieval_events)
+                
+            # Events fed again replace their earlier copy
+            ids = [event['id'] for event in retrieval_events]
+            existing = await self.db.redis.hmget(META_KEY, ids)
+            await self._remove([i for i, meta in zip(ids, existing) if meta], "replaced")
                 
-            # Get current retrieval count
-            current_events = await self.db.redis.lrange("events", 0, -1)
-            current_retrievals = sum(1 for event_data in current_events 
-                                   if 'retrieval' in json.loads(event_data))
-            
             # If adding new retrievals would exceed limit, remove oldest retrievals
+            current_retrievals = await self.db.redis.zcard(RETRIEVALS_KEY)
             if current_retrievals + len(retrieval_events) > self.MAX_RETRIEVALS:
                 excess = (current_retrievals + len(retrieval_events)) - self.MAX_RETRIEVALS
                 await self._removeOldestRetrievals(excess)
                 
-            # Add new retrieval events
-            for event in retrieval_events:
-                await self.db.redis.lpush("events", json.dumps(event))
-                added_count += 1
-                
-            # Maintain overall event limit
-            await self.db.redis.ltrim("events", 0, self.MAX_EVENTS + self.MAX_RETRIEVALS - 1)
+            # Add new retrieval events, then hold the byte budget
+            total_bytes = await self._store(retrieval_events)
+            await self._evictToBudget(total_bytes)
             
-            logger.info(f"Fed {added_count} events into Redis table")
-            return added_count
+            logger.info(f"Fed {len(retrieval_events)} events into Redis table")
+            return len(retrieval_events)
             
         except Exception as e:
             logger.error(f"Failed to feed events: {e}")
@@ -199,18 +306,10 @@ class EventService:
             if not self.db.redis:
                 return False
                 
-            events_data = await self.db.redis.lrange("events", 0, -1)
-            
-            for i, event_data in enumerate(events_data):
-                try:
-                    event = json.loads(event_data)
-                    if event.get('id') == event_id:
-                        # Remove from list by value
-                        await self.db.redis.lrem("events", 1, event_data)
-                        logger.info(f"Event deleted: {event_id}")
-                        return True
-                except json.JSONDecodeError:
-                    continue
+            removed, _ = await self._remove([event_id], "deleted")
+            if removed:
+                logger.info(f"Event deleted: {event_id}")
+                return True
                     
             logger.warning(f"Event not found for deletion: {event_id}")
             return False
@@ -234,21 +333,18 @@ class EventService:
             if not self.db.redis:
                 return False
                 
-            events_data = await self.db.redis.lrange("events", 0, -1)
-            
-            for i, event_data in enumerate(events_data):
-                try:
-                    event = json.loads(event_data)
-                    if event.get('id') == event_id:
-                        # Update event
-                        event.update(updates)
-                        
-                        # Replace in Redis list
-                        await self.db.redis.lset("events", i, json.dumps(event))
-                        logger.info(f"Event updated: {event_id}")
-                        return True
-                except json.JSONDecodeError:
-                    continue
+            event_data = await self.db.redis.hget(EVENTS_KEY, event_id)
+            event = self._parse(event_data) if event_data else None
+            if event is not None:
+                # Update event; restoring it re-scores it and moves its bytes to the new band
+                event.update(updates)
+                event['id'] = event_id
+                removed, _ = await self._remove([event_id], "replaced")
+                if removed:
+                    total_bytes = await self._store([event])
+                    await self._evictToBudget(total_bytes)
+                    logger.info(f"Event updated: {event_id}")
+                    return True
                     
             logger.warning(f"Event not found for update: {event_id}")
             return False
@@ -257,47 +353,403 @@ class EventService:
             logger.error(f"Failed to update event: {e}")
             return False
             
-    async def _cleanupOldRetrievals(self):
-        """Remove retrieval events older than 12 hours"""
+    async def getRetentionStats(self) -> Dict[str, Any]:
+        """
+        Hot tier usage and eviction counters per severity band
+        
+        Returns:
+            Byte budget and usage, plus count, bytes, evicted, evicted_bytes
+            and expired for each band
+        """
+        stats = await self.db.redis.hgetall(STATS_KEY) if self.db.redis else {}
+        
+        def value(field: str) -> int:
+            return int(stats.get(field, 0))
+            
+        bands = {
+            band: {
+                'weight': self.policy.weights[band],
+                'count': value(f"{band}:count"),
+                'bytes': value(f"{band}:bytes"),
+                'evicted': value(f"{band}:evicted"),
+                'evicted_bytes': value(f"{band}:evicted_bytes"),
+                'expired': value(f"{band}:expired")
+            }
+            for band in self.policy.bands
+        }
+        return {
+            'max_bytes': self.policy.max_bytes,
+            'bytes': value("bytes"),
+            'count': sum(band['count'] for band in bands.values()),
+            'half_life_seconds': self.policy.half_life,
+            'bands': bands
+        }
+        
+    async def migrateLegacyEvents(self) -> int:
+        """
+        Move events from the old capped list into the retention layout (runs once at startup)
+        
+        Returns:
+            Number of events migrated
+        """
+        try:
+            if not self.db.redis or await self.db.redis.type(LEGACY_KEY) != "list":
+                return 0
+                
+            events = [self._parse(event_data) for event_data in await self.db.redis.lrange(LEGACY_KEY, 0, -1)]
+            events = [event for event in events if event and event.get('id')]
+            for start in range(0, len(events), 500):
+                total_bytes = await self._store(events[start:start + 500])
+            if events:
+                await self._evictToBudget(total_bytes)
+            await self.db.redis.delete(LEGACY_KEY)
+            
+            logger.info(f"Migrated {len(events)} events from the '{LEGACY_KEY}' list")
+            return len(events)
+            
+        except Exception as e:
+            logger.error(f"Failed to migrate legacy events: {e}")
+            return 0
+            
+    async def migrateBotTimelines(self) -> int:
+        """
+        Build the per-bot timelines for events stored before they existed (runs once at startup)
+        
+        Returns:
+            Number of events indexed
+        """
         try:
-            cutoff_time = int((datetime.utcnow() - timedelta(hours=12)).timestamp() * 1000)
-            events_data = await self.db.redis.lrange("events", 0, -1)
+            if not self.db.redis or await self.db.redis.exists(BOTS_KEY) or not await self.db.redis.zcard(TIMELINE_KEY):
+                return 0
+                
+            indexed = 0
+            timelines: Dict[str, Dict[str, int]] = {}
+            async for event_id, payload in self.db.redis.hscan_iter(EVENTS_KEY, count=1000):
+                event = self._parse(payload)
+                if event and event.get('botId'):
+                    timestamp = int(event.get('timestamp') or event.get('retrieval') or 0)
+                    timelines.setdefault(event['botId'], {})[event_id] = timestamp
+                    indexed += 1
+            async with self.db.redis.pipeline(transaction=False) as pipe:
+                for botId, timeline in timelines.items():
+                    pipe.zadd(BOT_TIMELINE_KEY.format(botId), timeline)
+                if timelines:
+                    pipe.sadd(BOTS_KEY, *timelines)
+                await pipe.execute()
+                
+            logger.info(f"Indexed {indexed} events into {len(timelines)} bot timelines")
+            return indexed
+            
+        except Exception as e:
+            logger.error(f"Failed to build bot timelines: {e}")
+            return 0
+            
+    async def hasEvents(self) -> bool:
+        return await self.db.redis.hlen(EVENTS_KEY) > 0
+        
+    async def exportHotTier(self) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Read the hot tier for a snapshot without blocking Redis on one large command
+        
+        Returns:
+            (event JSON payloads, cumulative eviction/expiry counters per band)
+        """
+        payloads = [payload async for _, payload in self.db.redis.hscan_iter(EVENTS_KEY, count=1000)]
+        stats = await self.db.redis.hgetall(STATS_KEY)
+        counters = {
+            field: int(value) for field, value in stats.items()
+            if field.rsplit(":", 1)[-1] in ("evicted", "evicted_bytes", "expired")
+        }
+        return payloads, counters
+        
+    async def restoreHotTier(self, payloads: List[str], counters: Optional[Dict[str, int]] = None,
+                             chunk_size: int = RESTORE_CHUNK, replace: bool = True) -> int:
+        """
+        Replace the hot tier with snapshot payloads
+        
+        The tier is cleared in one transaction with the emptiness check, so
+        without replace an event another worker writes before the clear
+        makes the restore skip rather than being wiped; events written after
+        it are kept alongside the restored ones. The indexes and band
+        counters are rebuilt from the payloads through the normal write
+        path, in pipelined chunks, then checked with verifyIndexes.
+        
+        Args:
+            payloads: Event JSON payloads from the snapshot
+            counters: Eviction/expiry counters per band to add back
+            chunk_size: Events per pipelined write
+            replace: Replace a non-empty hot tier rather than skipping the restore
             
-            for event_data in events_data:
+        Returns:
+            Number of events restored (before any eviction to the byte budget)
+        """
+        if not await self._clearForRestore(replace):
+            logger.info("Hot tier restore skipped: events were written before it started")
+            return 0
+        
+        restored = 0
+        total_bytes = 0
+        chunk: List[Dict[str, Any]] = []
+        for payload in payloads:
+            event = self._parse(payload)
+            if not event or not event.get('id'):
+                continue
+            chunk.append(event)
+            if len(chunk) >= chunk_size:
+                total_bytes = await self._store(chunk)
+                restored += len(chunk)
+                chunk = []
+        if chunk:
+            total_bytes = await self._store(chunk)
+            restored += len(chunk)
+            
+        if counters:
+            async with self.db.redis.pipeline(transaction=False) as pipe:
+                for field, value in counters.items():
+                    pipe.hincrby(STATS_KEY, field, value)
+                await pipe.execute()
+        await self._evictToBudget(total_bytes)
+        
+        check = await self.verifyIndexes()
+        if not check['consistent']:
+            raise Exception(f"Hot tier indexes inconsistent after restore: {check}")
+        return restored
+        
+    async def _clearForRestore(self, replace: bool) -> bool:
+        """Delete the hot tier unless it holds events and replace is off; True when cleared"""
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            while True:
                 try:
-                    event = json.loads(event_data)
-                    if (event.get('retrieval') and 
-                        event.get('retrieval') < cutoff_time):
-                        await self.db.redis.lrem("events", 1, event_data)
-                except json.JSONDecodeError:
+                    # A write landing between the reads and EXEC aborts it, so the check is re-run
+                    await pipe.watch(EVENTS_KEY, BOTS_KEY)
+                    if not replace and await pipe.hlen(EVENTS_KEY) > 0:
+                        return False
+                    bots = await pipe.smembers(BOTS_KEY)
+                    pipe.multi()
+                    pipe.delete(EVENTS_KEY, META_KEY, TIMELINE_KEY, RETENTION_KEY, RETRIEVALS_KEY, STATS_KEY,
+                                BOTS_KEY, *[BOT_TIMELINE_KEY.format(botId) for botId in bots])
+                    await pipe.execute()
+                    return True
+                except WatchError:
                     continue
                     
+    async def verifyIndexes(self) -> Dict[str, Any]:
+        """
+        Check that the event hash, its indexes and the byte counter agree
+        
+        Returns:
+            Sizes of each structure and whether they are consistent
+        """
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.hlen(EVENTS_KEY)
+            pipe.hlen(META_KEY)
+            pipe.zcard(TIMELINE_KEY)
+            pipe.zcard(RETENTION_KEY)
+            pipe.hget(STATS_KEY, "bytes")
+            events, metas, timeline, retention, stored_bytes = await pipe.execute()
+            
+        meta_bytes = 0
+        async for _, meta in self.db.redis.hscan_iter(META_KEY, count=1000):
+            meta_bytes += int(meta.rsplit(":", 1)[1])
+        return {
+            'events': events,
+            'meta': metas,
+            'timeline': timeline,
+            'retention': retention,
+            'bytes': int(stored_bytes or 0),
+            'meta_bytes': meta_bytes,
+            'consistent': events == metas == timeline == retention and int(stored_bytes or 0) == meta_bytes
+        }
+        
+    def _scoreMissing(self, events: List[Dict[str, Any]]):
+        """Fill in missing severities in one scorer batch and offer ambiguous ones for LLM re-scoring"""
+        unscored = [event for event in events if event.get('severity') is None]
+        given = len(events) - len(unscored)
+        if given:
+            events_scored.inc(given, "caller")
+        if not unscored:
+            return
+        for event, (severity, ambiguous) in zip(unscored, self.scorer.score_batch(unscored)):
+            event['severity'] = severity
+            if ambiguous and self.rescorer:
+                self.rescorer.offer(event)
+                
+    async def _applySeverities(self, severities: Dict[str, int]) -> int:
+        """Write back re-scored severities (events evicted meanwhile are skipped)"""
+        updated = 0
+        for event_id, severity in severities.items():
+            if await self.updateEvent(event_id, {'severity': severity}):
+                updated += 1
+        events_scored.inc(updated, "llm")
+        return updated
+        
+    def _band(self, event: Dict[str, Any]) -> str:
+        if event.get('retrieval'):
+            return RETRIEVAL_BAND
+        return self.policy.band(int(event.get('severity', 0) or 0))
+        
+    @staticmethod
+    def _parse(event_data: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(event_data)
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to parse event data: {event_data}")
+            return None
+            
+    async def _store(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Write events with their indexes and band counters in one transaction
+        
+        Each structure gets a single multi-member command, so a bulk load
+        costs a handful of commands per chunk rather than several per event.
+        
+        Returns:
+            Total payload bytes in the hot tier afterwards
+        """
+        payloads: Dict[str, str] = {}
+        metas: Dict[str, str] = {}
+        timeline: Dict[str, int] = {}
+        bot_timelines: Dict[str, Dict[str, int]] = {}
+        retention: Dict[str, float] = {}
+        retrievals: Dict[str, int] = {}
+        band_totals: Dict[str, List[int]] = {}
+        total = 0
+        for event in events:
+            band = self._band(event)
+            payload = json.dumps(self.codec.encode(event))
+            size = len(payload)  # json.dumps output is ASCII, so characters are bytes
+            timestamp = int(event.get('timestamp') or event.get('retrieval') or 0)
+            payloads[event['id']] = payload
+            metas[event['id']] = f"{band}:{size}"
+            timeline[event['id']] = timestamp
+            if event.get('botId'):
+                bot_timelines.setdefault(event['botId'], {})[event['id']] = timestamp
+            if band == RETRIEVAL_BAND:
+                retrievals[event['id']] = event['retrieval']
+                retention[event['id']] = self.policy.score(band, event['retrieval'])
+            else:
+                retention[event['id']] = self.policy.score(band, timestamp)
+            counts = band_totals.setdefault(band, [0, 0])
+            counts[0] += 1
+            counts[1] += size
+            total += size
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(EVENTS_KEY, mapping=payloads)
+            pipe.hset(META_KEY, mapping=metas)
+            pipe.zadd(TIMELINE_KEY, timeline)
+            for botId, entries in bot_timelines.items():
+                pipe.zadd(BOT_TIMELINE_KEY.format(botId), entries)
+            if bot_timelines:
+                pipe.sadd(BOTS_KEY, *bot_timelines)
+            pipe.zadd(RETENTION_KEY, retention)
+            if retrievals:
+                pipe.zadd(RETRIEVALS_KEY, retrievals)
+            for band, (count, size) in band_totals.items():
+                pipe.hincrby(STATS_KEY, f"{band}:count", count)
+                pipe.hincrby(STATS_KEY, f"{band}:bytes", size)
+            pipe.hincrby(STATS_KEY, "bytes", total)
+            results = await pipe.execute()
+        events_hot_bytes.set(results[-1])
+        self.codec.trainSoon()
+        return results[-1]
+        
+    async def _remove(self, event_ids: List[str], reason: str) -> Tuple[int, Optional[int]]:
+        """
+        Remove events and settle their band counters
+        
+        Deleting an event's meta entry claims it, so when a delete and an
+        eviction race for the same event only one of them updates the
+        counters.
+        
+        Args:
+            event_ids: Events to remove
+            reason: 'evicted' or 'expired' (counted per band), 'deleted' or 'replaced'
+            
+        Returns:
+            (events removed, total payload bytes afterwards or None if nothing was removed)
+        """
+        if not event_ids:
+            return 0, None
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.hmget(META_KEY, event_ids)
+            pipe.hmget(EVENTS_KEY, event_ids)
+            for event_id in event_ids:
+                pipe.hdel(META_KEY, event_id)
+            results = await pipe.execute()
+        claimed = [
+            (event_id, meta) for event_id, meta, deleted in zip(event_ids, results[0], results[2:])
+            if deleted and meta
+        ]
+        if not claimed:
+            return 0, None
+            
+        band_totals: Dict[str, List[int]] = {}
+        for _, meta in claimed:
+            band, size = meta.rsplit(":", 1)
+            counts = band_totals.setdefault(band, [0, 0])
+            counts[0] += 1
+            counts[1] += int(size)
+        ids = [event_id for event_id, _ in claimed]
+        # Each event's bot, to take it off that bot's timeline
+        payloads = dict(zip(event_ids, results[1]))
+        bot_ids: Dict[str, List[str]] = {}
+        for event_id in ids:
+            event = self._parse(payloads[event_id]) if payloads[event_id] else None
+            if event and event.get('botId'):
+                bot_ids.setdefault(event['botId'], []).append(event_id)
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(EVENTS_KEY, *ids)
+            pipe.zrem(TIMELINE_KEY, *ids)
+            for botId, removed in bot_ids.items():
+                pipe.zrem(BOT_TIMELINE_KEY.format(botId), *removed)
+            pipe.zrem(RETENTION_KEY, *ids)
+            pipe.zrem(RETRIEVALS_KEY, *ids)
+            for band, (count, size) in band_totals.items():
+                pipe.hincrby(STATS_KEY, f"{band}:count", -count)
+                pipe.hincrby(STATS_KEY, f"{band}:bytes", -size)
+                if reason == "evicted":
+                    pipe.hincrby(STATS_KEY, f"{band}:evicted", count)
+                    pipe.hincrby(STATS_KEY, f"{band}:evicted_bytes", size)
+                elif reason == "expired":
+                    pipe.hincrby(STATS_KEY, f"{band}:expired", count)
+            pipe.hincrby(STATS_KEY, "bytes", -sum(size for _, size in band_totals.values()))
+            results = await pipe.execute()
+            
+        if reason in ("evicted", "expired"):
+            for band, (count, _) in band_totals.items():
+                events_evicted.inc(count, band, reason)
+        events_hot_bytes.set(results[-1])
+        return len(claimed), results[-1]
+        
+    async def _evictToBudget(self, total_bytes: int):
+        """Pop the lowest-scored events until the hot tier fits in the byte budget"""
+        while total_bytes > self.policy.max_bytes:
+            popped = await self.db.redis.zpopmin(RETENTION_KEY)
+            if not popped:
+                break
+            _, remaining = await self._remove([popped[0][0]], "evicted")
+            if remaining is not None:
+                total_bytes = remaining
+            
+    async def _cleanupOldRetrievals(self):
+        """Remove retrieval events older than 12 hours (at most once per CLEANUP_INTERVAL)"""
+        now = time.monotonic()
+        if now - self._lastCleanup < self.CLEANUP_INTERVAL:
+            return
+        self._lastCleanup = now
+        try:
+            cutoff_time = int((datetime.utcnow() - self.RETRIEVAL_TTL).timestamp() * 1000)
+            expired = await self.db.redis.zrangebyscore(RETRIEVALS_KEY, "-inf", cutoff_time)
+            await self._remove(expired, "expired")
+                    
         except Exception as e:
             logger.warning(f"Failed to cleanup old retrievals: {e}")
             
     async def _removeOldestRetrievals(self, count: int):
         """Remove oldest retrieval events"""
         try:
-            events_data = await self.db.redis.lrange("events", 0, -1)
-            retrieval_events = []
-            
-            for event_data in events_data:
-                try:
-                    event = json.loads(event_data)
-                    if event.get('retrieval'):
-                        retrieval_events.append((event_data, event.get('retrieval')))
-                except json.JSONDecodeError:
-                    continue
-                    
-            # Sort by retrieval timestamp (oldest first)
-            retrieval_events.sort(key=lambda x: x[1])
-            
-            # Remove oldest
-            for i in range(min(count, len(retrieval_events))):
-                await self.db.redis.lrem("events", 1, retrieval_events[i][0])
+            oldest = await self.db.redis.zrange(RETRIEVALS_KEY, 0, count - 1)
+            await self._remove(oldest, "evicted")
                 
         except Exception as e:
             logger.warning(f"Failed to remove oldest retrievals: {e}")
-
-
-
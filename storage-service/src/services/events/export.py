@@ -0,0 +1,510 @@
+"""
+Event Export - Stream the hot tier into day/bot partitioned Parquet or Arrow IPC files for offline analysis
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from src.metrics import registry
+from src.services.events.event_service import EVENTS_KEY, TIMELINE_KEY
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: exports are refused without it
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+EXTRA_COLUMN = "_extra"  # JSON of data fields that did not fit the columns of their event type
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Python types a column of each kind takes without per-value conversion
+NATIVE_TYPES = {
+    "bool": {bool, type(None)},
+    "int": {int, type(None)},
+    "float": {int, float, type(None)},
+    "string": {str, type(None)},
+}
+
+events_exported = registry.counter("events_exported_total", "Events written to export files", ("format",))
+
+def flatten(data: Any, prefix: str = "data.", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Flatten nested data into dotted keys ({"a": {"b": 1}} -> {"data.a.b": 1})
+
+    Lists are kept whole as JSON strings, so one event is always one row.
+    """
+    out = {} if out is None else out
+    if not isinstance(data, dict):
+        out[prefix.rstrip(".")] = data
+        return out
+    for key, value in data.items():
+        if isinstance(value, dict) and value:
+            flatten(value, f"{prefix}{key}.", out)
+        else:
+            out[f"{prefix}{key}"] = value
+    return out
+
+def infer_kind(values: List[Any]) -> str:
+    """Column kind for a batch of values: bool, int, float or string (anything mixed)"""
+    kinds = set()
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            kinds.add("bool")
+        elif isinstance(value, int):
+            kinds.add("int")
+        elif isinstance(value, float):
+            kinds.add("float")
+        else:
+            kinds.add("string")
+    if kinds == {"bool"}:
+        return "bool"
+    if kinds == {"int"}:
+        return "int"
+    if kinds and kinds <= {"int", "float"}:
+        return "float"
+    return "string"
+
+def coerce(value: Any, kind: str) -> Tuple[Any, bool]:
+    """(value converted to the column kind, whether it fit); values that do not fit go to EXTRA_COLUMN"""
+    if value is None:
+        return None, True
+    if kind == "bool":
+        return (value, True) if isinstance(value, bool) else (None, False)
+    if kind == "int":
+        fits = isinstance(value, int) and not isinstance(value, bool) and -2**63 <= value < 2**63
+        return (value, True) if fits else (None, False)
+    if kind == "float":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value), True
+        return None, False
+    if isinstance(value, str):
+        return value, True
+    return json.dumps(value), True
+
+def column(values: List[Any], kind: str, arrow_type) -> Tuple[Any, List[int]]:
+    """
+    Arrow array of a column's values, plus the positions of values that did not fit (left null)
+
+    When every value already has a type the kind takes, pyarrow converts
+    the whole list at once; otherwise (or for ints out of range) each
+    value goes through coerce.
+    """
+    if set(map(type, values)) <= NATIVE_TYPES[kind]:
+        try:
+            return pyarrow.array(values, type=arrow_type), []
+        except (OverflowError, pyarrow.ArrowInvalid):
+            pass
+    converted = [coerce(value, kind) for value in values]
+    misfits = [index for index, (_, fits) in enumerate(converted) if not fits]
+    return pyarrow.array([value for value, _ in converted], type=arrow_type), misfits
+
+def _copy(table) -> Any:
+    """A slice with buffers of its own, so buffering it does not keep the whole table alive"""
+    return pyarrow.Table.from_arrays([pyarrow.concat_arrays(chunks.chunks) for chunks in table.columns],
+                                     schema=table.schema)
+
+def _partition_value(value: str) -> str:
+    """Make a bot id safe as a directory name"""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in value) or "_"
+
+class ExportJob:
+    """
+    One export run: pages through the timeline, converts each page to Arrow
+    and writes it out per partition in row groups
+
+    A partition is (day, bot, event type). Each event type gets one schema
+    for the whole job - the common event columns plus its flattened data
+    fields - fixed from the first page holding that type, so every file of
+    a type reads as one dataset. Fields first seen later, and values that
+    do not fit their column, are kept as JSON in EXTRA_COLUMN.
+
+    Memory stays bounded however many events are exported: Redis is read
+    one page at a time and the page is converted to Arrow right away, so
+    only compact columnar buffers are held between pages. A partition's
+    buffer is written once it reaches row_group_rows, the largest buffer
+    is written early when all of them together reach max_buffered_bytes,
+    and at most max_open_files writers stay open (closing one starts a
+    new part file if its partition comes back).
+    """
+
+    def __init__(self, job_id: str, directory: str, fmt: str = "parquet",
+                 since: Optional[int] = None, until: Optional[int] = None,
+                 botId: Optional[str] = None, event_types: Optional[List[str]] = None,
+                 page_size: int = 1000, row_group_rows: int = 10000,
+                 max_buffered_bytes: int = 64 * 1024 * 1024, max_open_files: int = 64):
+        self.id = job_id
+        self.directory = directory
+        self.format = fmt
+        self.since = since
+        self.until = until
+        self.botId = botId
+        self.event_types = set(event_types) if event_types else None
+        self.page_size = page_size
+        self.row_group_rows = row_group_rows
+        self.max_buffered_bytes = max_buffered_bytes
+        self.max_open_files = max_open_files
+
+        self.state = "queued"
+        self.error: Optional[str] = None
+        self.created = int(time.time() * 1000)
+        self.started: Optional[int] = None
+        self.finished: Optional[int] = None
+        self.total = 0       # events in the time range when the job started
+        self.scanned = 0     # events read so far
+        self.exported = 0    # rows written so far
+        self.bytes = 0       # bytes in closed files
+        self.files: List[str] = []
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_requested = False
+
+        self._schemas: Dict[str, Any] = {}        # event type -> pyarrow schema
+        self._kinds: Dict[str, Dict[str, str]] = {}
+        self._buffers: Dict[Tuple[str, str, str], List[Any]] = {}  # partition -> Arrow tables
+        self._buffered_rows: Dict[Tuple[str, str, str], int] = {}
+        self._buffered_bytes: Dict[Tuple[str, str, str], int] = {}
+        self._writers: "OrderedDict[Tuple[str, str, str], Tuple[Any, str]]" = OrderedDict()
+        self._parts: Dict[Tuple[str, str, str], int] = {}
+        self._columns: Dict[str, List[str]] = {}  # event type -> data columns, for the manifest
+
+    def progress(self) -> Dict[str, Any]:
+        """Job state and counters, as returned by the API"""
+        return {
+            "id": self.id,
+            "state": self.state,
+            "format": self.format,
+            "directory": self.directory,
+            "since": self.since,
+            "until": self.until,
+            "botId": self.botId,
+            "event_types": sorted(self.event_types) if self.event_types else None,
+            "total": self.total,
+            "scanned": self.scanned,
+            "exported": self.exported,
+            "percent": round(min(self.scanned, self.total) * 100 / self.total, 1) if self.total else
+                       (100.0 if self.state == "completed" else 0.0),
+            "files": len(self.files),
+            "bytes": self.bytes,
+            "open_files": len(self._writers),
+            "buffered_rows": sum(self._buffered_rows.values()),
+            "buffered_bytes": sum(self._buffered_bytes.values()),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error
+        }
+
+    async def run(self, db_connections, codec) -> None:
+        """Export every matching event in the hot tier, oldest first"""
+        self.state = "running"
+        self.started = int(time.time() * 1000)
+        low = self.since if self.since is not None else "-inf"
+        high = self.until if self.until is not None else "+inf"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.total = await db_connections.redis.zcount(TIMELINE_KEY, low, high)
+
+            # Page by score rather than offset, so each page is O(log n + page) however deep
+            # the export is. Events written together share a timestamp, hence the skip count.
+            cursor, skip = low, 0
+            while not self.cancel_requested:
+                page = await db_connections.redis.zrangebyscore(
+                    TIMELINE_KEY, cursor, high, start=skip, num=self.page_size, withscores=True)
+                if not page:
+                    break
+                ids = [event_id for event_id, _ in page]
+                events = [json.loads(raw) for raw in await db_connections.redis.hmget(EVENTS_KEY, ids) if raw]
+                events = [event for event in events if self._matches(event)]
+                await codec.decode(events)
+                await asyncio.to_thread(self._add, events)
+                self.scanned += len(page)
+
+                last = page[-1][1]
+                same = sum(1 for _, score in page if score == last)
+                skip = skip + same if last == cursor else same
+                cursor = last
+                if len(page) < self.page_size:
+                    break
+
+            if self.cancel_requested:
+                # Checked between pages, so no write is in flight on the worker thread
+                await asyncio.to_thread(self._closeAll)
+                self.state = "cancelled"
+                logger.info(f"Export {self.id} cancelled after {self.exported} events")
+                return
+            await asyncio.to_thread(self._finish)
+            self.state = "completed"
+            logger.info(f"Export {self.id} wrote {self.exported} events to {len(self.files)} files")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Export {self.id} failed: {e}")
+            await asyncio.to_thread(self._closeAll)
+        finally:
+            self.finished = int(time.time() * 1000)
+
+    def _matches(self, event: Dict[str, Any]) -> bool:
+        if self.botId is not None and event.get('botId') != self.botId:
+            return False
+        return self.event_types is None or event.get('type') in self.event_types
+
+    def _add(self, events: List[Dict[str, Any]]) -> None:
+        """Convert a page to Arrow per event type, split by partition, writing buffers that are full or too much to hold"""
+        days: Dict[int, str] = {}
+        bots: Dict[Any, str] = {}
+        by_type: Dict[str, List[Tuple[Tuple[str, str], Dict[str, Any]]]] = {}
+        for event in events:
+            timestamp = int(event.get('timestamp') or event.get('retrieval') or 0)
+            day = days.get(timestamp // DAY_MS)
+            if day is None:
+                day = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+                days[timestamp // DAY_MS] = day
+            botId = event.get('botId') or "unknown"
+            if botId not in bots:
+                bots[botId] = _partition_value(str(botId))
+            by_type.setdefault(str(event.get('type') or "unknown"), []).append(((day, bots[botId]), event))
+
+        for event_type, keyed in by_type.items():
+            # One table per type, sorted (stably) by partition so each partition is a slice of it
+            keyed.sort(key=lambda item: item[0])
+            batch = [event for _, event in keyed]
+            rows = [flatten(event.get('data') if event.get('data') is not None else {}) for event in batch]
+            if event_type not in self._schemas:
+                self._defineSchema(event_type, rows)
+            table = self._table(event_type, batch, rows)
+            offset = 0
+            for (day, bot), group in itertools.groupby(keyed, key=lambda item: item[0]):
+                length = sum(1 for _ in group)
+                self._buffer((day, bot, event_type), _copy(table.slice(offset, length)))
+                offset += length
+        while self._buffers and sum(self._buffered_bytes.values()) >= self.max_buffered_bytes:
+            self._flush(max(self._buffered_bytes, key=self._buffered_bytes.get))
+
+    def _buffer(self, key: Tuple[str, str, str], table) -> None:
+        self._buffers.setdefault(key, []).append(table)
+        self._buffered_rows[key] = self._buffered_rows.get(key, 0) + table.num_rows
+        self._buffered_bytes[key] = self._buffered_bytes.get(key, 0) + table.get_total_buffer_size()
+        if self._buffered_rows[key] >= self.row_group_rows:
+            self._flush(key)
+
+    def _table(self, event_type: str, events: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> Any:
+        """Arrow table of events of one type, in the type's schema"""
+        kinds = self._kinds[event_type]
+        schema = self._schemas[event_type]
+        columns: Dict[str, Any] = {
+            "id": [event.get('id') for event in events],
+            "botId": [event.get('botId') for event in events],
+            "type": [event.get('type') for event in events],
+            "severity": [int(event.get('severity') or 0) for event in events],
+            "timestamp": [int(event.get('timestamp') or 0) for event in events],
+            "retrieval": [event.get('retrieval') for event in events],
+        }
+        misfits: Dict[int, List[str]] = {}  # row -> columns whose value did not fit
+        for name, kind in kinds.items():
+            columns[name], positions = column([row.get(name) for row in rows], kind, schema.field(name).type)
+            for position in positions:
+                misfits.setdefault(position, []).append(name)
+        extras = []
+        for index, row in enumerate(rows):
+            if index not in misfits and row.keys() <= kinds.keys():
+                extras.append(None)
+                continue
+            # Left over: fields without a column and values that did not fit theirs
+            left = misfits.get(index, ())
+            extras.append(json.dumps({name: value for name, value in row.items() if name not in kinds or name in left}))
+        columns[EXTRA_COLUMN] = extras
+        return pyarrow.Table.from_pydict(columns, schema=schema)
+
+    def _flush(self, key: Tuple[str, str, str]) -> None:
+        tables = self._buffers.pop(key, [])
+        self._buffered_rows.pop(key, None)
+        self._buffered_bytes.pop(key, None)
+        if not tables:
+            return
+        table = pyarrow.concat_tables(tables)
+        self._writer(key, table.schema).write_table(table)
+        self.exported += table.num_rows
+        events_exported.inc(table.num_rows, self.format)
+
+    def _defineSchema(self, event_type: str, rows: List[Dict[str, Any]]) -> None:
+        values: Dict[str, List[Any]] = {}
+        for row in rows:
+            for name, value in row.items():
+                values.setdefault(name, []).append(value)
+        kinds = {name: infer_kind(values[name]) for name in sorted(values)}
+        types = {"bool": pyarrow.bool_(), "int": pyarrow.int64(), "float": pyarrow.float64(), "string": pyarrow.string()}
+        fields = [
+            pyarrow.field("id", pyarrow.string()),
+            pyarrow.field("botId", pyarrow.string()),
+            pyarrow.field("type", pyarrow.string()),
+            pyarrow.field("severity", pyarrow.int32()),
+            pyarrow.field("timestamp", pyarrow.timestamp("ms", tz="UTC")),
+            pyarrow.field("retrieval", pyarrow.int64()),
+        ]
+        fields += [pyarrow.field(name, types[kind]) for name, kind in kinds.items()]
+        fields.append(pyarrow.field(EXTRA_COLUMN, pyarrow.string()))
+        self._schemas[event_type] = pyarrow.schema(fields)
+        self._kinds[event_type] = kinds
+        self._columns[event_type] = list(kinds)
+
+    def _writer(self, key: Tuple[str, str, str], schema) -> Any:
+        if key in self._writers:
+            self._writers.move_to_end(key)
+            return self._writers[key][0]
+        while len(self._writers) >= self.max_open_files:
+            self._close(next(iter(self._writers)))
+        day, bot, event_type = key
+        part = self._parts.get(key, 0)
+        self._parts[key] = part + 1
+        directory = os.path.join(self.directory, f"day={day}", f"bot={bot}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{_partition_value(event_type)}-{part:04d}{FORMATS[self.format]}")
+        if self.format == "parquet":
+            writer = pyarrow.parquet.ParquetWriter(path, schema, compression="zstd")
+        else:
+            writer = pyarrow.ipc.new_file(path, schema)
+        self._writers[key] = (writer, path)
+        return writer
+
+    def _close(self, key: Tuple[str, str, str]) -> None:
+        writer, path = self._writers.pop(key)
+        writer.close()
+        self.files.append(os.path.relpath(path, self.directory))
+        self.bytes += os.path.getsize(path)
+
+    def _closeAll(self) -> None:
+        for key in list(self._writers):
+            try:
+                self._close(key)
+            except Exception as e:
+                logger.warning(f"Failed to close export file for {key}: {e}")
+
+    def _finish(self) -> None:
+        """Write what is still buffered, close the files and write the manifest"""
+        for key in list(self._buffers):
+            self._flush(key)
+        self._closeAll()
+        manifest = {
+            "id": self.id,
+            "format": self.format,
+            "created": self.created,
+            "since": self.since,
+            "until": self.until,
+            "events": self.exported,
+            "files": sorted(self.files),
+            "columns": self._columns,
+            "partitioning": ["day", "bot"]
+        }
+        with open(os.path.join(self.directory, "_manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+class ExportService:
+    """
+    Runs export jobs in the background, one at a time
+
+    Each job writes to its own directory under base_dir:
+        <job id>/day=YYYY-MM-DD/bot=<botId>/<event type>-NNNN.parquet (or .arrow)
+    plus a _manifest.json listing the files and the data columns of each
+    event type. The day/bot directories are hive-style, so the export
+    opens as one partitioned dataset (pyarrow.dataset, DuckDB, Spark,
+    pandas). Jobs are kept in memory for status queries; the files stay
+    on disk.
+    """
+
+    def __init__(self, db_connections, event_service, base_dir: str, max_jobs: int = 50, **job_options):
+        self.db = db_connections
+        self.event_service = event_service
+        self.base_dir = base_dir
+        self.max_jobs = max_jobs
+        self.job_options = job_options
+        self.jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> bool:
+        return pyarrow is not None
+
+    def createJob(self, fmt: str = "parquet", since: Optional[int] = None, until: Optional[int] = None,
+                  botId: Optional[str] = None, event_types: Optional[List[str]] = None) -> ExportJob:
+        """
+        Queue an export and start it in the background
+
+        Raises:
+            RuntimeError: If pyarrow is not installed
+            ValueError: If the format is unknown
+        """
+        if pyarrow is None:
+            raise RuntimeError("Event export needs pyarrow, which is not installed")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(FORMATS)}")
+        job_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid4().hex[:8]}"
+        job = ExportJob(job_id, os.path.join(self.base_dir, job_id), fmt, since=since, until=until,
+                        botId=botId, event_types=event_types, **self.job_options)
+        self.jobs[job_id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run(job))
+        logger.info(f"Export {job_id} queued ({fmt})")
+        return job
+
+    def getJob(self, job_id: str) -> Optional[ExportJob]:
+        return self.jobs.get(job_id)
+
+    def getJobs(self) -> List[ExportJob]:
+        return list(reversed(self.jobs.values()))
+
+    def cancelJob(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job
+
+        A running job stops at its next page and closes its files, which
+        are left in place (without a manifest).
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.state not in ("queued", "running"):
+            return False
+        job.cancel_requested = True
+        return True
+
+    async def stop(self) -> None:
+        tasks = [job.task for job in self.jobs.values() if job.task and not job.task.done()]
+        for job in self.jobs.values():
+            job.cancel_requested = True
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: ExportJob) -> None:
+        async with self._lock:
+            if job.cancel_requested:
+                job.state = "cancelled"
+                job.finished = int(time.time() * 1000)
+                return
+            await job.run(self.db, self.event_service.codec)
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond max_jobs"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.state not in ("queued", "running")]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job_id]
+
+def export_service_from_env(db_connections, event_service) -> ExportService:
+    """ExportService configured from EXPORT_DIR / EXPORT_ROW_GROUP_ROWS / EXPORT_MAX_BUFFERED_MB / EXPORT_MAX_OPEN_FILES"""
+    return ExportService(
+        db_connections, event_service,
+        base_dir=os.getenv("EXPORT_DIR", "data/exports"),
+        row_group_rows=int(os.getenv("EXPORT_ROW_GROUP_ROWS", "10000")),
+        max_buffered_bytes=int(float(os.getenv("EXPORT_MAX_BUFFERED_MB", "64")) * 1024 * 1024),
+        max_open_files=int(os.getenv("EXPORT_MAX_OPEN_FILES", "64"))
+    )
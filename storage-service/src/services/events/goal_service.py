@@ -0,0 +1,277 @@
+"""
+Goal Service - Persists bot goals and their milestones, indexed by status
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from uuid import uuid4
+
+from redis.exceptions import WatchError
+
+from src.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+GOALS_KEY = "goals:data"              # goal id -> goal JSON
+VERSION_KEY = "goals:version:{}"      # goal id -> time of its last write, set by every write of the goal
+STATUS_KEY = "goals:status:{}"        # status -> goal ids scored by priority, then age
+BOT_STATUS_KEY = "goals:bot:{}:{}"    # botId, status -> goal ids scored the same way
+
+STATUSES = ("active", "pending", "completed", "archived")
+# Attempts at a read-modify-write before a conflicting concurrent write is reported
+WRITE_ATTEMPTS = 8
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+goal_writes = registry.counter("goal_writes_total", "Goal records written", ("operation",))
+goal_write_conflicts = registry.counter(
+    "goal_write_conflicts_total", "Goal writes retried because another write changed the goals first"
+)
+
+Change = Tuple[Optional[Dict[str, Any]], Dict[str, Any]]
+
+def goal_score(goal: Dict[str, Any]) -> float:
+    """Index score: priority rank first, then creation time (millisecond timestamps stay below 1e13)"""
+    return PRIORITY_RANK.get(goal.get('priority'), PRIORITY_RANK['medium']) * 1e13 + int(goal.get('createdAt') or 0)
+
+def apply_progress(goal: Dict[str, Any], update: Dict[str, Any], timestamp: int) -> None:
+    """
+    Apply a progress update to a goal record in place
+
+    Milestone statuses are set by id; progress follows the share of
+    completed milestones unless the update gives it explicitly.
+    """
+    milestones = update.get('milestones') or {}
+    for milestone in goal.get('milestones', []):
+        status = milestones.get(milestone.get('id'))
+        if status and status != milestone.get('status'):
+            milestone['status'] = status
+            if status == "completed":
+                milestone['completedAt'] = timestamp
+    if update.get('progress') is not None:
+        goal['progress'] = max(0, min(100, update['progress']))
+    elif milestones and goal.get('milestones'):
+        done = sum(1 for milestone in goal['milestones'] if milestone.get('status') == "completed")
+        goal['progress'] = round(done * 100 / len(goal['milestones']))
+    if update.get('priority') in PRIORITY_RANK:
+        goal['priority'] = update['priority']
+    if update.get('status') in STATUSES and update['status'] != goal.get('status'):
+        goal['status'] = update['status']
+        if update['status'] == "completed":
+            goal['completedAt'] = timestamp
+            goal['progress'] = 100
+    goal['updatedAt'] = timestamp
+
+class GoalService:
+    """
+    Handles goal storage and queries
+
+    Goals are id-addressed JSON records in one hash. Every goal is also a
+    member of a sorted set for its status, globally and per bot, scored by
+    priority then age, so listing a bot's active goals in priority order
+    reads one index range instead of scanning all goals. Writes move index
+    entries when status or priority change, in the same transaction as
+    the record. Every write sets a version key per goal it touches and
+    reads the goals it replaces while WATCHing their version keys, so it
+    starts over only if another worker wrote one of the same goals in
+    between: concurrent updates neither lose each other nor leave stale
+    index entries, and writers of different goals never wait on each other.
+    """
+
+    def __init__(self, db_connections):
+        self.db = db_connections
+
+    async def saveGoals(self, goals: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create or replace goal records in one write
+
+        Args:
+            goals: Goal dicts with 'botId' and 'name'; missing ids, timestamps,
+                status and priority are filled in
+
+        Returns:
+            Goal IDs, in order
+        """
+        if not self.db.redis:
+            raise Exception("Redis connection not available")
+        timestamp = int(datetime.utcnow().timestamp() * 1000)
+        records = []
+        for goal in goals:
+            record = dict(goal)
+            record['id'] = record.get('id') or str(uuid4())
+            record.setdefault('createdAt', timestamp)
+            record.setdefault('status', "pending")
+            record.setdefault('priority', "medium")
+            record.setdefault('progress', 0)
+            record['milestones'] = [
+                {'status': "pending", 'createdAt': timestamp, **milestone,
+                 'id': milestone.get('id') or str(uuid4()), 'parentGoalId': record['id']}
+                for milestone in record.get('milestones') or []
+            ]
+            record['updatedAt'] = timestamp
+            records.append(record)
+        if not records:
+            return []
+
+        await self._transact([record['id'] for record in records], lambda previous: list(zip(previous, records)))
+        goal_writes.inc(len(records), "save")
+        logger.info(f"Saved {len(records)} goals")
+        return [record['id'] for record in records]
+
+    async def updateProgress(self, updates: List[Dict[str, Any]]) -> int:
+        """
+        Apply progress updates to several goals in one read and one write
+
+        Args:
+            updates: Dicts with 'id' and any of 'progress', 'status', 'priority'
+                and 'milestones' ({milestone id: status})
+
+        Returns:
+            Number of goals updated (unknown ids are skipped)
+        """
+        if not self.db.redis or not updates:
+            return 0
+        timestamp = int(datetime.utcnow().timestamp() * 1000)
+        # Later updates to the same goal apply on top of earlier ones
+        merged: Dict[str, List[Dict[str, Any]]] = {}
+        for update in updates:
+            if update.get('id'):
+                merged.setdefault(update['id'], []).append(update)
+        ids = list(merged)
+
+        def apply(current: List[Optional[Dict[str, Any]]]) -> List[Change]:
+            changes = []
+            for goal_id, previous in zip(ids, current):
+                if previous is None:
+                    continue
+                goal = json.loads(json.dumps(previous))
+                for update in merged[goal_id]:
+                    apply_progress(goal, update, timestamp)
+                changes.append((previous, goal))
+            return changes
+
+        changes = await self._transact(ids, apply)
+        goal_writes.inc(len(changes), "progress")
+        return len(changes)
+
+    async def getGoal(self, goal_id: str) -> Optional[Dict[str, Any]]:
+        if not self.db.redis:
+            return None
+        return (await self._read([goal_id]))[0]
+
+    async def getGoals(self, botId: Optional[str] = None, status: Optional[str] = None,
+                       count: int = 100) -> List[Dict[str, Any]]:
+        """
+        Goals by bot and/or status, highest priority (then oldest) first
+
+        Without a status, goals of every status are returned, grouped by
+        status in STATUSES order. Without a botId, the global status
+        indexes are read.
+        """
+        if not self.db.redis:
+            return []
+        statuses = [status] if status else list(STATUSES)
+        ids: List[str] = []
+        for name in statuses:
+            key = BOT_STATUS_KEY.format(botId, name) if botId else STATUS_KEY.format(name)
+            ids += await self.db.redis.zrange(key, 0, count - len(ids) - 1)
+            if len(ids) >= count:
+                break
+        return [goal for goal in await self._read(ids) if goal]
+
+    async def countGoals(self, botId: Optional[str] = None) -> Dict[str, int]:
+        """Number of goals per status"""
+        if not self.db.redis:
+            return {}
+        async with self.db.redis.pipeline(transaction=False) as pipe:
+            for name in STATUSES:
+                pipe.zcard(BOT_STATUS_KEY.format(botId, name) if botId else STATUS_KEY.format(name))
+            counts = await pipe.execute()
+        return dict(zip(STATUSES, counts))
+
+    async def deleteGoal(self, goal_id: str) -> bool:
+        if not self.db.redis:
+            return False
+        deleted = []
+
+        def delete(pipe, current: List[Optional[Dict[str, Any]]]) -> None:
+            deleted[:] = [goal for goal in current if goal]
+            if not deleted:
+                return
+            pipe.hdel(GOALS_KEY, goal_id)
+            pipe.delete(VERSION_KEY.format(goal_id))
+            for key in self._indexKeys(deleted[0]):
+                pipe.zrem(key, goal_id)
+
+        await self._transact([goal_id], queue=delete)
+        if not deleted:
+            return False
+        goal_writes.inc(1, "delete")
+        logger.info(f"Goal deleted: {goal_id}")
+        return True
+
+    async def _read(self, goal_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not goal_ids:
+            return []
+        return [json.loads(raw) if raw else None for raw in await self.db.redis.hmget(GOALS_KEY, goal_ids)]
+
+    async def _transact(self, goal_ids: List[str],
+                        build: Optional[Callable[[List[Optional[Dict[str, Any]]]], List[Change]]] = None,
+                        queue: Optional[Callable[[Any, List[Optional[Dict[str, Any]]]], None]] = None) -> List[Change]:
+        """
+        Read goals while WATCHing their version keys, then write what build (or queue) makes of them atomically
+
+        Args:
+            goal_ids: Goals to read (None for unknown ids)
+            build: Current goals -> (previous, new) versions to store with their index moves
+            queue: Alternatively, adds its own commands to the transaction
+
+        Returns:
+            The changes written
+
+        Raises:
+            WatchError: If other writes kept changing these goals for WRITE_ATTEMPTS tries
+        """
+        for attempt in range(WRITE_ATTEMPTS):
+            async with self.db.redis.pipeline(transaction=True) as pipe:
+                try:
+                    if goal_ids:
+                        await pipe.watch(*[VERSION_KEY.format(goal_id) for goal_id in goal_ids])
+                    raws = await pipe.hmget(GOALS_KEY, goal_ids) if goal_ids else []
+                    current = [json.loads(raw) if raw else None for raw in raws]
+                    changes = build(current) if build else []
+                    pipe.multi()
+                    if queue:
+                        queue(pipe, current)
+                    self._queueWrite(pipe, changes)
+                    await pipe.execute()
+                    return changes
+                except WatchError:
+                    goal_write_conflicts.inc()
+                    if attempt == WRITE_ATTEMPTS - 1:
+                        raise
+        return []
+
+    @staticmethod
+    def _queueWrite(pipe, changes: List[Change]) -> None:
+        """Queue new versions of goals and their index moves on a transaction"""
+        if not changes:
+            return
+        pipe.hset(GOALS_KEY, mapping={goal['id']: json.dumps(goal) for _, goal in changes})
+        # Any write of a version key aborts transactions WATCHing it, whatever the value
+        pipe.mset({VERSION_KEY.format(goal['id']): goal.get('updatedAt') or 0 for _, goal in changes})
+        for previous, goal in changes:
+            keys = GoalService._indexKeys(goal)
+            if previous is not None:
+                stale = [key for key in GoalService._indexKeys(previous) if key not in keys]
+                for key in stale:
+                    pipe.zrem(key, goal['id'])
+            score = goal_score(goal)
+            for key in keys:
+                pipe.zadd(key, {goal['id']: score})
+
+    @staticmethod
+    def _indexKeys(goal: Dict[str, Any]) -> List[str]:
+        status = goal.get('status') if goal.get('status') in STATUSES else "pending"
+        return [STATUS_KEY.format(status), BOT_STATUS_KEY.format(goal.get('botId'), status)]
@@ -0,0 +1,79 @@
+"""
+Retention Policy - Severity bands and decay-weighted eviction order for the hot event tier
+"""
+
+import os
+import math
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# (band, lowest severity in the band), in ascending order
+SEVERITY_BANDS = (("low", 0), ("medium", 3), ("high", 6), ("critical", 9))
+
+# Archive events fed back by feedTable, scored by when they were retrieved
+RETRIEVAL_BAND = "retrieval"
+
+DEFAULT_WEIGHTS = {"low": 1.0, "medium": 4.0, "high": 16.0, "critical": 64.0, RETRIEVAL_BAND: 1.0}
+
+class RetentionPolicy:
+    """
+    Decides which events leave the hot tier first
+
+    An event's value is weight(band) * 2^(-age / half_life). Which of two
+    events is worth more never changes as both age, so ordering by value is
+    the same as ordering by
+        timestamp + half_life * log2(weight)
+    That score is computed once on insert and kept in a sorted set, making
+    the least valuable event a ZPOPMIN away (O(log n)). With the default
+    weights a critical event outranks a low one written up to six half-lives
+    later, so a burst of ticks cannot flush it out.
+
+    Events are evicted until the stored payloads fit in max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, half_life: float = 3600.0,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_bytes = max_bytes
+        self.half_life = half_life
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self._boost = {band: half_life * math.log2(weight) for band, weight in self.weights.items()}
+
+    @property
+    def bands(self) -> List[str]:
+        return [band for band, _ in SEVERITY_BANDS] + [RETRIEVAL_BAND]
+
+    def band(self, severity: int) -> str:
+        """Severity band for a severity level"""
+        name = SEVERITY_BANDS[0][0]
+        for band, lowest in SEVERITY_BANDS:
+            if severity >= lowest:
+                name = band
+        return name
+
+    def score(self, band: str, timestamp_ms: int) -> float:
+        """Retention score in seconds; the lowest score is evicted first"""
+        return timestamp_ms / 1000 + self._boost.get(band, 0.0)
+
+def policy_from_env() -> RetentionPolicy:
+    """
+    Policy from EVENTS_MAX_BYTES, RETENTION_HALF_LIFE and RETENTION_BAND_WEIGHTS
+
+    RETENTION_BAND_WEIGHTS overrides band weights as 'band=weight' pairs,
+    e.g. 'high=32,critical=256'.
+    """
+    weights = {}
+    for pair in os.getenv("RETENTION_BAND_WEIGHTS", "").split(","):
+        if "=" not in pair:
+            continue
+        band, value = pair.split("=", 1)
+        try:
+            weights[band.strip()] = max(1.0, float(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid retention weight '{pair}'")
+    return RetentionPolicy(
+        max_bytes=int(os.getenv("EVENTS_MAX_BYTES", str(4 * 1024 * 1024))),
+        half_life=float(os.getenv("RETENTION_HALF_LIFE", "3600")),
+        weights=weights
+    )
@@ -0,0 +1,272 @@
+"""
+Severity Scoring - Local, CPU-only severity for events created without one
+"""
+
+import os
+import re
+import math
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+events_scored = registry.counter("events_scored_total", "Event severities by source", ("source",))
+events_rescored = registry.counter(
+    "events_rescored_total", "Ambiguous events sent for LLM re-scoring", ("outcome",)
+)
+
+# Starting severity per event type; unknown types start at UNKNOWN_TYPE_BASE and count as ambiguous
+TYPE_BASE = {
+    "bot_action": 0.0,
+    "world_update": 1.0,
+    "command_executed": 1.5,
+    "system_event": 2.0,
+    "chat_message": 3.0,
+    "player_interaction": 3.0,
+    "discovery_made": 4.0,
+    "goal_progress": 4.0,
+    "player_joined": 3.0,
+    "player_left": 3.0,
+    "goal_completed": 6.0,
+    "goal_failed": 8.0
+}
+UNKNOWN_TYPE_BASE = 2.0
+
+# Adjustments for the fields clients already send: (data field, value) -> weight
+FIELD_WEIGHTS = {
+    ("status", "failed"): 3.0,
+    ("status", "interrupted"): 2.0,
+    ("status", "invalid"): 1.0,
+    ("status", "completed"): 0.5,
+    ("status", "in_progress"): -0.5,
+    ("status", "info"): -0.5,
+    ("event", "death"): 6.0,
+    ("event", "player_joined"): 1.0,
+    ("event", "player_left"): 1.0,
+    ("event", "error"): 4.0,
+    ("isNearby", True): 0.5,
+    ("isLooking", True): 0.5,
+    ("milestone", None): 1.0  # Any milestone
+}
+
+# Words in string fields, matched by a single compiled pattern per event
+KEYWORD_WEIGHTS = {
+    "died": 4.0, "death": 4.0, "killed": 3.0, "slain": 3.0,
+    "lava": 2.0, "drown": 2.0, "creeper": 2.0, "explod": 2.0, "attack": 2.0, "hurt": 1.5,
+    "error": 2.0, "fail": 2.0, "stuck": 1.5, "lost": 1.0, "help": 1.5, "urgent": 2.0,
+    "diamond": 2.0, "netherite": 3.0, "ancient": 1.5, "spawner": 2.0, "village": 1.0,
+    "stronghold": 3.0, "portal": 1.5, "boss": 3.0, "dragon": 4.0, "wither": 4.0
+}
+KEYWORD_PATTERN = re.compile("|".join(sorted(KEYWORD_WEIGHTS, key=len, reverse=True)))
+
+# Bot history: a type this bot has sent more than HISTORY_FREE_RATE times per
+# minute lately scores lower, by up to HISTORY_MAX_PENALTY
+HISTORY_HALF_LIFE = 60.0
+HISTORY_FREE_RATE = 2.0
+HISTORY_MAX_PENALTY = 2.0
+
+# A raw score this close to a rounding boundary is ambiguous
+AMBIGUITY_MARGIN = 0.15
+
+class SeverityScorer:
+    """
+    Scores event severity (0-10) without leaving the process
+
+    The raw score is a linear model over a handful of features:
+        TYPE_BASE[type]
+        + FIELD_WEIGHTS for known data fields (command status, system event, chat proximity)
+        + KEYWORD_WEIGHTS for the distinct keywords in the other top-level string fields
+        - a repetition penalty from the bot's recent rate of the same type
+    and is rounded and clamped to a severity. Events of unknown type, or whose
+    raw score sits within AMBIGUITY_MARGIN of a rounding boundary, are
+    flagged ambiguous so they can be re-scored by the LLM.
+
+    score_batch does one dictionary pass and one regex scan per event, a few
+    microseconds each, and keeps per-bot history for at most max_bots bots.
+    """
+
+    def __init__(self, max_bots: int = 1024, half_life: float = HISTORY_HALF_LIFE):
+        self.max_bots = max_bots
+        self._decay = math.log(2) / half_life
+        # botId -> {type: (decayed count, last seen)}
+        self._history: "OrderedDict[str, Dict[str, Tuple[float, float]]]" = OrderedDict()
+
+    def score_batch(self, events: List[Dict[str, Any]],
+                    now: Optional[float] = None) -> List[Tuple[int, bool]]:
+        """
+        Score events and record them in their bots' history
+
+        Args:
+            events: Events with 'type', 'data' and optionally 'botId'
+            now: Current time in seconds (defaults to time.monotonic())
+
+        Returns:
+            (severity, ambiguous) for each event, in order
+        """
+        now = time.monotonic() if now is None else now
+        results = []
+        for event in events:
+            event_type = event.get('type') or ""
+            base = TYPE_BASE.get(event_type)
+            raw = UNKNOWN_TYPE_BASE if base is None else base
+
+            data = event.get('data')
+            if isinstance(data, dict):
+                raw += self._data_weight(data)
+
+            raw -= self._repetition_penalty(event.get('botId') or "unknown", event_type, now)
+
+            severity = min(10, max(0, int(raw + 0.5)))
+            margin = abs((raw % 1.0) - 0.5)
+            ambiguous = base is None or (0.0 < raw < 10.0 and margin < AMBIGUITY_MARGIN)
+            results.append((severity, ambiguous))
+        events_scored.inc(len(results), "rules")
+        return results
+
+    @staticmethod
+    def _data_weight(data: Dict[str, Any]) -> float:
+        weight = 0.0
+        text = []
+        for key, value in data.items():
+            if isinstance(value, str):
+                field_weight = FIELD_WEIGHTS.get((key, value))
+                if field_weight is None:
+                    text.append(value)
+                else:
+                    weight += field_weight
+            elif isinstance(value, bool):
+                weight += FIELD_WEIGHTS.get((key, value), 0.0)
+            elif value is not None:
+                weight += FIELD_WEIGHTS.get((key, None), 0.0)
+        if text:
+            for keyword in set(KEYWORD_PATTERN.findall(" ".join(text).lower())):
+                weight += KEYWORD_WEIGHTS[keyword]
+        return weight
+
+    def _repetition_penalty(self, bot_id: str, event_type: str, now: float) -> float:
+        history = self._history.get(bot_id)
+        if history is None:
+            if len(self._history) >= self.max_bots:
+                self._history.popitem(last=False)
+            history = self._history[bot_id] = {}
+        else:
+            self._history.move_to_end(bot_id)
+
+        count, last_seen = history.get(event_type, (0.0, now))
+        count = count * math.exp(-self._decay * (now - last_seen)) + 1.0
+        history[event_type] = (count, now)
+
+        # A decayed count of c with this half-life is a rate of about c * decay per second
+        per_minute = count * self._decay * 60.0
+        if per_minute <= HISTORY_FREE_RATE:
+            return 0.0
+        return min(HISTORY_MAX_PENALTY, math.log2(per_minute / HISTORY_FREE_RATE))
+
+SeverityUpdate = Callable[[Dict[str, int]], Awaitable[int]]
+
+class SeverityRescorer:
+    """
+    Optional LLM second opinion for ambiguous events
+
+    A sample of the events the scorer flags ambiguous is queued (bounded,
+    oldest dropped) and sent to the governor's /severity endpoint in batches
+    from a background task, so the ingest path never waits on the LLM. The
+    returned severities are written back through the update callback. A
+    batch that fails goes back to the front of the queue for the next round,
+    up to max_attempts sends per event. The HTTP timeout should outlast the
+    governor's LLM_SEVERITY_DEADLINE, or batches the governor would still
+    answer are abandoned.
+    """
+
+    def __init__(self, governor_url: str, sample_rate: float = 0.1, batch_size: int = 16,
+                 interval: float = 5.0, max_queue: int = 256, timeout: float = 65.0,
+                 max_attempts: int = 3):
+        self.governor_url = governor_url.rstrip("/")
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        # (event, sends so far)
+        self._queue: Deque[Tuple[Dict[str, Any], int]] = deque(maxlen=max_queue)
+        self._task: Optional[asyncio.Task] = None
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """Queue an ambiguous event with probability sample_rate"""
+        if random.random() >= self.sample_rate:
+            return False
+        if len(self._queue) == self._queue.maxlen:
+            events_rescored.inc(1, "dropped")
+        self._queue.append(({
+            'id': event['id'], 'type': event.get('type'), 'data': event.get('data'),
+            'severity': event.get('severity')
+        }, 0))
+        return True
+
+    def _requeue(self, batch: List[Tuple[Dict[str, Any], int]]) -> None:
+        """Put a failed batch back in front, in order; events out of attempts or room are dropped"""
+        retry = [(event, attempts + 1) for event, attempts in batch if attempts + 1 < self.max_attempts]
+        retry = retry[:self._queue.maxlen - len(self._queue)]
+        events_rescored.inc(len(batch) - len(retry), "dropped")
+        self._queue.extendleft(reversed(retry))
+
+    async def start(self, update: SeverityUpdate) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(update))
+            logger.info(f"Severity re-scoring via {self.governor_url} (sample rate {self.sample_rate})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self, update: SeverityUpdate) -> None:
+        # httpx is only needed when re-scoring is enabled
+        import httpx
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            while True:
+                await asyncio.sleep(self.interval)
+                while self._queue:
+                    batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                    try:
+                        response = await client.post(f"{self.governor_url}/api/v1/severity",
+                                                     json={"events": [event for event, _ in batch]})
+                        response.raise_for_status()
+                        severities = response.json().get("severities", [])
+                    except Exception as e:
+                        # Try again next interval rather than losing the batch
+                        events_rescored.inc(len(batch), "error")
+                        logger.debug(f"Severity re-scoring failed: {e}")
+                        self._requeue(batch)
+                        break
+                    changed = {
+                        event['id']: int(severity) for (event, _), severity in zip(batch, severities)
+                        if severity is not None and int(severity) != event['severity']
+                    }
+                    events_rescored.inc(len(batch), "ok")
+                    if changed:
+                        await update(changed)
+
+def rescorer_from_env() -> Optional[SeverityRescorer]:
+    """Rescorer from SEVERITY_LLM_* settings, or None when LLM re-scoring is off"""
+    if os.getenv("SEVERITY_LLM_ENABLED", "false").lower() != "true":
+        return None
+    return SeverityRescorer(
+        governor_url=os.getenv("FASTAPI_BRIDGE_URL", "http://localhost:5000"),
+        sample_rate=float(os.getenv("SEVERITY_LLM_SAMPLE_RATE", "0.1")),
+        batch_size=int(os.getenv("SEVERITY_LLM_BATCH_SIZE", "16")),
+        interval=float(os.getenv("SEVERITY_LLM_INTERVAL", "5")),
+        # Outlast the governor's deadline for the batch, so its answer is not abandoned
+        timeout=float(os.getenv("SEVERITY_LLM_TIMEOUT", float(os.getenv("LLM_SEVERITY_DEADLINE", "60")) + 5))
+    )
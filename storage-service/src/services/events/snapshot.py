@@ -0,0 +1,275 @@
+"""
+Hot Tier Snapshots - Save the Redis hot tier to a local file and restore it on startup
+"""
+
+import os
+import json
+import time
+import zlib
+import asyncio
+import hashlib
+import logging
+from uuid import uuid4
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"OMNIA-HOT-TIER\n"
+SNAPSHOT_VERSION = 1
+
+AGENTS_KEY = "agents"
+LOCK_KEY = "snapshot:lock"  # held by the worker saving or restoring
+RESTORING_KEY = "snapshot:restoring"  # set while events are restored; admission refuses event writes
+
+# Deletes the lock only if this worker still holds it (it may have expired and been taken)
+# KEYS: lock. ARGV: token.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+snapshot_duration = registry.histogram(
+    "hot_tier_snapshot_duration_seconds", "Time to save or restore a hot tier snapshot", ("operation",)
+)
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or fails its checksum"""
+
+def encode_snapshot(events: List[str], agents: List[str], counters: Dict[str, int],
+                    dictionaries: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Serialize a snapshot
+
+    Layout: magic line, header JSON line, zlib-compressed body. The body is
+    the event payloads then the agent payloads, one JSON document per line
+    (json.dumps never emits a raw newline). The header carries the counts,
+    the eviction counters, the payload compression dictionaries the events
+    refer to and a SHA-256 of the compressed body.
+    """
+    body = zlib.compress("\n".join(events + agents).encode(), 6)
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "created": int(time.time() * 1000),
+        "events": len(events),
+        "agents": len(agents),
+        "counters": counters,
+        "dictionaries": dictionaries or {},
+        "sha256": hashlib.sha256(body).hexdigest()
+    }
+    return SNAPSHOT_MAGIC + json.dumps(header).encode() + b"\n" + body
+
+def decode_snapshot(blob: bytes) -> Tuple[Dict[str, Any], List[str], List[str]]:
+    """
+    Parse and verify a snapshot
+
+    Returns:
+        (header, event payloads, agent payloads)
+
+    Raises:
+        SnapshotError: If the file is not a valid snapshot
+    """
+    if not blob.startswith(SNAPSHOT_MAGIC):
+        raise SnapshotError("Not a hot tier snapshot")
+    header_end = blob.find(b"\n", len(SNAPSHOT_MAGIC))
+    if header_end < 0:
+        raise SnapshotError("Snapshot header is truncated")
+    try:
+        header = json.loads(blob[len(SNAPSHOT_MAGIC):header_end])
+    except json.JSONDecodeError as e:
+        raise SnapshotError(f"Snapshot header is corrupt: {e}")
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {header.get('version')}")
+
+    body = blob[header_end + 1:]
+    if hashlib.sha256(body).hexdigest() != header.get("sha256"):
+        raise SnapshotError("Snapshot checksum mismatch")
+    lines = zlib.decompress(body).decode().split("\n") if header["events"] + header["agents"] else []
+    if len(lines) != header["events"] + header["agents"]:
+        raise SnapshotError(f"Snapshot holds {len(lines)} records, header says "
+                            f"{header['events'] + header['agents']}")
+    return header, lines[:header["events"]], lines[header["events"]:]
+
+def write_snapshot_file(path: str, blob: bytes) -> None:
+    """Write atomically, so a crash mid-write leaves the previous snapshot intact"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Unique per writer, so two processes never write the same temp file
+    temp_path = f"{path}.{os.getpid()}.{uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def read_snapshot_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+class HotTierSnapshotter:
+    """
+    Periodic and shutdown snapshots of the hot tier (events and agents)
+
+    Saving reads Redis incrementally (HSCAN) and does the compression and
+    file write off the event loop. Restoring only runs into an empty hot
+    tier, so a Redis that kept its data is never overwritten; events go
+    through EventService.restoreHotTier, which rebuilds and verifies the
+    indexes, and agents are pushed back in their original order. While
+    events are restored, write admission refuses event writes from every
+    worker, so none land in (or make skip) a restore into an empty tier.
+
+    With several storage-service workers, saves and restores take a Redis
+    lock (SET NX PX lock_ttl) first; a worker that finds it held skips the
+    operation, since another worker is already doing it.
+    """
+
+    def __init__(self, db_connections, event_service, path: str, interval: float = 300.0,
+                 lock_ttl: float = 120.0):
+        self.db = db_connections
+        self.event_service = event_service
+        self.path = path
+        self.interval = interval
+        self.lock_ttl = lock_ttl
+        self.last_save: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._release = None
+
+    async def _lock(self) -> Optional[str]:
+        """Take the snapshot lock; returns its token, or None when another worker holds it"""
+        token = uuid4().hex
+        if await self.db.redis.set(LOCK_KEY, token, nx=True, px=int(self.lock_ttl * 1000)):
+            return token
+        return None
+
+    async def _unlock(self, token: str) -> None:
+        if self._release is None:
+            self._release = self.db.redis.register_script(RELEASE_SCRIPT)
+        await self._release(keys=[LOCK_KEY], args=[token])
+
+    async def save(self) -> Dict[str, Any]:
+        """Snapshot the hot tier to self.path (skipped while another worker holds the lock)"""
+        token = await self._lock()
+        if token is None:
+            logger.info("Hot tier snapshot skipped: another worker holds the snapshot lock")
+            return {"skipped": "locked"}
+        try:
+            return await self._save()
+        finally:
+            await self._unlock(token)
+
+    async def _save(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        events, counters = await self.event_service.exportHotTier()
+        agents = await self.db.redis.lrange(AGENTS_KEY, 0, -1)
+        dictionaries = await self.event_service.codec.exportDictionaries()
+
+        def encode_and_write() -> int:
+            blob = encode_snapshot(events, agents, counters, dictionaries)
+            write_snapshot_file(self.path, blob)
+            return len(blob)
+
+        size = await asyncio.to_thread(encode_and_write)
+        elapsed = time.perf_counter() - started
+        snapshot_duration.observe(elapsed, "save")
+        self.last_save = {"events": len(events), "agents": len(agents), "bytes": size,
+                          "ms": round(elapsed * 1000, 1)}
+        logger.info(f"Hot tier snapshot saved to {self.path}: {self.last_save}")
+        return self.last_save
+
+    async def restore(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Load the snapshot into Redis
+
+        Args:
+            force: Replace a non-empty hot tier
+
+        Returns:
+            Counts restored per kind (zero when skipped, including while
+            another worker holds the snapshot lock)
+        """
+        result = {"events": 0, "agents": 0}
+        if not os.path.exists(self.path):
+            return result
+        token = await self._lock()
+        if token is None:
+            logger.info("Hot tier restore skipped: another worker holds the snapshot lock")
+            return result
+        try:
+            return await self._restore(result, force)
+        finally:
+            await self._unlock(token)
+
+    async def _restore(self, result: Dict[str, int], force: bool) -> Dict[str, Any]:
+        started = time.perf_counter()
+        # Event writes are held off before the tier is looked at, so none slip in before the restore
+        await self.db.redis.set(RESTORING_KEY, "1", px=int(self.lock_ttl * 1000))
+        try:
+            restore_events = force or not await self.event_service.hasEvents()
+            if not restore_events:
+                await self.db.redis.delete(RESTORING_KEY)
+            header, events, agents = await asyncio.to_thread(
+                lambda: decode_snapshot(read_snapshot_file(self.path))
+            )
+            if events and restore_events:
+                # Compressed events need their dictionaries back first
+                await self.event_service.codec.restoreDictionaries(header.get("dictionaries") or {})
+                result["events"] = await self.event_service.restoreHotTier(events, header.get("counters"),
+                                                                           replace=force)
+        finally:
+            await self.db.redis.delete(RESTORING_KEY)
+
+        if agents and (force or not await self.db.redis.exists(AGENTS_KEY)):
+            async with self.db.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(AGENTS_KEY)
+                for start in range(0, len(agents), 1000):
+                    pipe.rpush(AGENTS_KEY, *agents[start:start + 1000])
+                await pipe.execute()
+            result["agents"] = len(agents)
+
+        elapsed = time.perf_counter() - started
+        snapshot_duration.observe(elapsed, "restore")
+        logger.info(f"Hot tier restored from {self.path} in {elapsed * 1000:.0f}ms: {result}")
+        return result
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic snapshots and take a final one"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.db.redis:
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Failed to save hot tier snapshot: {e}")
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.warning(f"Periodic hot tier snapshot failed: {e}")
+
+def snapshotter_from_env(db_connections, event_service) -> Optional[HotTierSnapshotter]:
+    """Snapshotter from SNAPSHOT_PATH / SNAPSHOT_INTERVAL, or None when SNAPSHOT_PATH is empty"""
+    path = os.getenv("SNAPSHOT_PATH", "data/hot-tier.snapshot")
+    if not path:
+        return None
+    return HotTierSnapshotter(db_connections, event_service, path,
+                              interval=float(os.getenv("SNAPSHOT_INTERVAL", "300")))
@@ -0,0 +1,384 @@
+"""
+Trigger Engine - Declarative rules matched against new events, with delivery to webhooks or queues
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+import logging
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from src.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Rules shared by every worker, plus a version bumped on each change
+RULES_KEY = "triggers:rules"          # rule id -> rule JSON
+VERSION_KEY = "triggers:version"
+QUEUE_KEY = "triggers:queue:{}"       # matches for a named queue, newest first
+
+trigger_match_duration = registry.histogram(
+    "trigger_match_duration_seconds", "Time to match a batch of new events against the trigger rules"
+)
+trigger_matches = registry.counter("trigger_matches_total", "Events that matched a trigger", ("target",))
+trigger_deliveries = registry.counter(
+    "trigger_deliveries_total", "Trigger match deliveries", ("target", "outcome")
+)
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+def field_value(data: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted path inside event data ('metadata.username'), or None"""
+    value: Any = data
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def event_position(data: Dict[str, Any]) -> Optional[Tuple[float, float, float]]:
+    """Position from data.position or data.metadata.position"""
+    position = data.get("position") or field_value(data, "metadata.position")
+    if not isinstance(position, dict):
+        return None
+    try:
+        return float(position["x"]), float(position.get("y", 0)), float(position["z"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _compile_condition(condition: Dict[str, Any]) -> Predicate:
+    path, op, expected = condition["field"], condition.get("op", "eq"), condition.get("value")
+
+    if op == "exists":
+        return lambda data: (field_value(data, path) is not None) == bool(expected if expected is not None else True)
+    if op == "eq":
+        return lambda data: field_value(data, path) == expected
+    if op == "ne":
+        return lambda data: field_value(data, path) != expected
+    if op == "in":
+        allowed = list(expected or [])
+        return lambda data: field_value(data, path) in allowed
+    if op == "contains":
+        needle = str(expected).lower()
+        return lambda data: needle in str(field_value(data, path) or "").lower()
+    if op in ("gt", "gte", "lt", "lte"):
+        bound = float(expected)
+
+        def compare(data: Dict[str, Any]) -> bool:
+            value = field_value(data, path)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return False
+            if op == "gt":
+                return value > bound
+            if op == "gte":
+                return value >= bound
+            if op == "lt":
+                return value < bound
+            return value <= bound
+        return compare
+    raise ValueError(f"Unknown condition operator '{op}'")
+
+def _compile_near(near: Dict[str, Any]) -> Predicate:
+    x, z, radius = float(near["x"]), float(near["z"]), float(near["radius"])
+    y = near.get("y")
+    radius_sq = radius * radius
+
+    def within(data: Dict[str, Any]) -> bool:
+        position = event_position(data)
+        if position is None:
+            return False
+        dy = position[1] - float(y) if y is not None else 0.0
+        return (position[0] - x) ** 2 + dy * dy + (position[2] - z) ** 2 <= radius_sq
+    return within
+
+class CompiledRule:
+    """A rule's residual predicates, checked after the index narrowed the candidates"""
+
+    __slots__ = ("rule", "min_severity", "max_severity", "predicates")
+
+    def __init__(self, rule: Dict[str, Any], skip_condition: Optional[int] = None):
+        self.rule = rule
+        self.min_severity = rule.get("min_severity")
+        self.min_severity = -math.inf if self.min_severity is None else self.min_severity
+        self.max_severity = rule.get("max_severity")
+        self.max_severity = math.inf if self.max_severity is None else self.max_severity
+        self.predicates = [
+            _compile_condition(condition) for index, condition in enumerate(rule.get("conditions") or [])
+            if index != skip_condition
+        ]
+        if rule.get("near"):
+            self.predicates.append(_compile_near(rule["near"]))
+
+    def matches(self, severity: float, data: Dict[str, Any]) -> bool:
+        if severity > self.max_severity:
+            return False
+        for predicate in self.predicates:
+            if not predicate(data):
+                return False
+        return True
+
+class _SeverityList:
+    """Rules ordered by min_severity, so only those an event's severity reaches are checked"""
+
+    __slots__ = ("mins", "rules")
+
+    def __init__(self):
+        self.mins: List[float] = []
+        self.rules: List[CompiledRule] = []
+
+    def add(self, compiled: CompiledRule) -> None:
+        index = bisect_right(self.mins, compiled.min_severity)
+        self.mins.insert(index, compiled.min_severity)
+        self.rules.insert(index, compiled)
+
+    def candidates(self, severity: float) -> List[CompiledRule]:
+        return self.rules[:bisect_right(self.mins, severity)]
+
+class _Bucket:
+    """Rules for one (type, botId) key, split by their first hashable equality condition"""
+
+    __slots__ = ("by_field", "rest")
+
+    def __init__(self):
+        self.by_field: Dict[str, Dict[Any, _SeverityList]] = {}
+        self.rest = _SeverityList()
+
+class TriggerIndex:
+    """
+    Rules compiled for dispatch
+
+    Rules are bucketed by (type, botId), with None as the wildcard, so an
+    event looks at four buckets. Inside a bucket, a rule with an 'eq'
+    condition on a scalar is filed under that field and value, and every
+    list is ordered by min_severity. What is left to evaluate per event is
+    the residual predicates of rules that already agree on type, bot, the
+    indexed field and the severity floor, so matching costs roughly the
+    number of rules that could match rather than the number registered.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = ()):
+        self._buckets: Dict[Tuple[Optional[str], Optional[str]], _Bucket] = {}
+        self.size = 0
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: Dict[str, Any]) -> None:
+        key = (rule.get("event_type"), rule.get("botId"))
+        bucket = self._buckets.setdefault(key, _Bucket())
+        for index, condition in enumerate(rule.get("conditions") or []):
+            value = condition.get("value")
+            if condition.get("op", "eq") == "eq" and isinstance(value, (str, int, float, bool)):
+                values = bucket.by_field.setdefault(condition["field"], {})
+                values.setdefault(value, _SeverityList()).add(CompiledRule(rule, skip_condition=index))
+                break
+        else:
+            bucket.rest.add(CompiledRule(rule))
+        self.size += 1
+
+    def match(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Rules the event satisfies"""
+        event_type, bot_id = event.get("type"), event.get("botId")
+        severity = event.get("severity") or 0
+        data = event.get("data")
+        if not isinstance(data, dict):
+            data = {}
+        matched = []
+        keys = {(event_type, bot_id), (event_type, None), (None, bot_id), (None, None)}
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            lists = [bucket.rest]
+            for path, values in bucket.by_field.items():
+                value = field_value(data, path)
+                if isinstance(value, (str, int, float, bool)) and value in values:
+                    lists.append(values[value])
+            for severity_list in lists:
+                for compiled in severity_list.candidates(severity):
+                    if compiled.matches(severity, data):
+                        matched.append(compiled.rule)
+        return matched
+
+class TriggerService:
+    """
+    Trigger rules and match delivery
+
+    Rules live in Redis so every worker sees them; each worker keeps a
+    compiled TriggerIndex and reloads it when the shared version changes
+    (checked at most every sync_interval seconds). Matching runs inline
+    after an event is stored; delivery happens in a background task: queue
+    targets are Redis lists capped at queue_max entries, webhooks receive
+    the matches as one POST per batch.
+    """
+
+    def __init__(self, db_connections, sync_interval: float = 2.0, queue_max: int = 1000,
+                 max_pending: int = 10000, webhook_timeout: float = 5.0):
+        self.db = db_connections
+        self.sync_interval = sync_interval
+        self.queue_max = queue_max
+        self.webhook_timeout = webhook_timeout
+        self.index = TriggerIndex()
+        self._version: Optional[str] = None
+        self._lastSync = 0.0
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self._reload()
+        if self._task is None:
+            self._task = asyncio.create_task(self._deliver_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def createRule(self, rule: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Register a rule (validated by compiling it)
+
+        Raises:
+            ValueError: If the rule has no target or an invalid condition
+        """
+        if bool(rule.get("webhook")) == bool(rule.get("queue")):
+            raise ValueError("A trigger needs exactly one of 'webhook' or 'queue'")
+        rule = {**rule, "id": str(uuid4()), "created": int(datetime.utcnow().timestamp() * 1000)}
+        CompiledRule(rule)
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(RULES_KEY, rule["id"], json.dumps(rule))
+            pipe.incr(VERSION_KEY)
+            await pipe.execute()
+        await self._reload()
+        return rule
+
+    async def deleteRule(self, rule_id: str) -> bool:
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(RULES_KEY, rule_id)
+            pipe.incr(VERSION_KEY)
+            deleted, _ = await pipe.execute()
+        await self._reload()
+        return bool(deleted)
+
+    async def getRules(self) -> List[Dict[str, Any]]:
+        rules = [json.loads(rule) for rule in (await self.db.redis.hgetall(RULES_KEY)).values()]
+        return sorted(rules, key=lambda rule: rule.get("created", 0))
+
+    async def dispatch(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Match new events and queue the matches for delivery
+
+        Returns:
+            Number of (rule, event) matches
+        """
+        await self._syncIfStale()
+        if not self.index.size:
+            return 0
+        started = time.perf_counter()
+        matches = [(rule, event) for event in events for rule in self.index.match(event)]
+        trigger_match_duration.observe(time.perf_counter() - started)
+        for rule, event in matches:
+            target = "webhook" if rule.get("webhook") else "queue"
+            trigger_matches.inc(1, target)
+            try:
+                self._pending.put_nowait((rule, event))
+            except asyncio.QueueFull:
+                trigger_deliveries.inc(1, target, "dropped")
+        return len(matches)
+
+    async def popQueue(self, name: str, count: int = 50) -> List[Dict[str, Any]]:
+        """Take up to count matches from a named queue, oldest first"""
+        key = QUEUE_KEY.format(name)
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, -count, -1)
+            pipe.ltrim(key, 0, -count - 1)
+            items, _ = await pipe.execute()
+        return [json.loads(item) for item in reversed(items)]
+
+    async def _syncIfStale(self) -> None:
+        now = time.monotonic()
+        if now - self._lastSync < self.sync_interval:
+            return
+        self._lastSync = now
+        try:
+            if await self.db.redis.get(VERSION_KEY) != self._version:
+                await self._reload()
+        except Exception as e:
+            logger.warning(f"Failed to sync trigger rules: {e}")
+
+    async def _reload(self) -> None:
+        async with self.db.redis.pipeline(transaction=True) as pipe:
+            pipe.get(VERSION_KEY)
+            pipe.hgetall(RULES_KEY)
+            version, rules = await pipe.execute()
+        index = TriggerIndex()
+        for rule_data in rules.values():
+            try:
+                index.add(json.loads(rule_data))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping invalid trigger rule: {e}")
+        self.index, self._version = index, version
+        self._lastSync = time.monotonic()
+
+    async def _deliver_loop(self) -> None:
+        # httpx is only needed once a webhook rule matches
+        client = None
+        try:
+            while True:
+                batch = [await self._pending.get()]
+                while not self._pending.empty() and len(batch) < 500:
+                    batch.append(self._pending.get_nowait())
+
+                queues: Dict[str, List[str]] = {}
+                webhooks: Dict[str, List[Dict[str, Any]]] = {}
+                for rule, event in batch:
+                    match = {"trigger_id": rule["id"], "name": rule.get("name"), "event": event}
+                    if rule.get("queue"):
+                        queues.setdefault(rule["queue"], []).append(json.dumps(match))
+                    else:
+                        webhooks.setdefault(rule["webhook"], []).append(match)
+
+                if queues:
+                    try:
+                        async with self.db.redis.pipeline(transaction=False) as pipe:
+                            for name, items in queues.items():
+                                pipe.lpush(QUEUE_KEY.format(name), *items)
+                                pipe.ltrim(QUEUE_KEY.format(name), 0, self.queue_max - 1)
+                            await pipe.execute()
+                        trigger_deliveries.inc(sum(len(items) for items in queues.values()), "queue", "ok")
+                    except Exception as e:
+                        trigger_deliveries.inc(sum(len(items) for items in queues.values()), "queue", "error")
+                        logger.warning(f"Trigger queue delivery failed: {e}")
+
+                if webhooks:
+                    if client is None:
+                        import httpx
+                        client = httpx.AsyncClient(timeout=self.webhook_timeout)
+                    for url, matches in webhooks.items():
+                        try:
+                            response = await client.post(url, json={"matches": matches})
+                            response.raise_for_status()
+                            trigger_deliveries.inc(len(matches), "webhook", "ok")
+                        except Exception as e:
+                            trigger_deliveries.inc(len(matches), "webhook", "error")
+                            logger.warning(f"Trigger webhook {url} failed: {e}")
+        finally:
+            if client is not None:
+                await client.aclose()
+
+def trigger_service_from_env(db_connections) -> TriggerService:
+    """Trigger service from TRIGGER_* environment settings"""
+    return TriggerService(
+        db_connections,
+        sync_interval=float(os.getenv("TRIGGER_SYNC_INTERVAL", "2")),
+        queue_max=int(os.getenv("TRIGGER_QUEUE_MAX", "1000")),
+        webhook_timeout=float(os.getenv("TRIGGER_WEBHOOK_TIMEOUT", "5"))
+    )